@@ -13,16 +13,31 @@ import pyttsx3
 import time
 import threading
 import os
+import logging
+
+from config_module import Config
+from result_module import PostureResult
+from trace_module import tracer
+
+logger = logging.getLogger(__name__)
 
 
 class AudioPlayer:
     """音訊播放器類別"""
     
-    def __init__(self):
-        # 初始化 pygame 的混音器模組
-        pygame.mixer.init()
+    def __init__(self, enable_mixer=True):
+        """
+        Args:
+            enable_mixer: 是否初始化 pygame 混音器；False 用於無音效裝置的環境（例如壓力測試）
+        """
+        self.enable_mixer = enable_mixer
+        if enable_mixer:
+            # 初始化 pygame 的混音器模組
+            pygame.mixer.init()
         self.audio_file = "output.wav"
-        self.is_playing = False  # 用於判斷是否正在播放音訊
+        self.is_playing = False  # 用於判斷是否正在播放音訊（讀寫皆需持有 _lock）
+        # 偵測迴圈、多人模式與背景執行緒可能同時要求播放，檢查與設定旗標必須是同一個原子操作
+        self._lock = threading.Lock()
         
         # 音訊檔案對應（預留功能：可依不同異常類型選擇不同音訊）
         self.audio_files = {
@@ -42,7 +57,7 @@ class AudioPlayer:
     
     def _ensure_audio_file_exists(self):
         """確保預設音訊檔存在，若不存在則產生"""
-        if not os.path.exists(self.audio_file):
+        if self.enable_mixer and not os.path.exists(self.audio_file):
             # 產生預設提示音訊
             self.text_to_audio("請注意，您的坐姿不正確，請調整姿勢")
     
@@ -72,7 +87,7 @@ class AudioPlayer:
             engine.save_to_file(text, self.audio_file)
             engine.runAndWait()
         except Exception as e:
-            print(f"文字轉音訊失敗: {e}")
+            logger.error("文字轉音訊失敗: %s", e)
     
     def play_audio(self, audio_type='default'):
         """
@@ -80,82 +95,128 @@ class AudioPlayer:
         
         Args:
             audio_type: 音訊類型，用於選擇不同音訊檔（預留功能）
+
+        Returns:
+            bool: 是否開始播放（已在播放中或音訊檔不存在時為 False）
         """
-        if self.is_playing:
-            print("音訊已在播放中，略過此次播放請求")
-            return
+        # 在啟動執行緒前就占用旗標：原本由播放執行緒設定，兩個請求可能同時通過檢查而重疊播放
+        with self._lock:
+            if self.is_playing:
+                logger.debug("音訊已在播放中，略過此次播放請求", extra={'rate_limit': 5.0})
+                return False
+            self.is_playing = True
         
         # 依類型選擇音訊檔（預留功能）
         audio_file = self.audio_files.get(audio_type, self.audio_file)
         
         # 檢查音訊檔是否存在
         if not os.path.exists(audio_file):
-            print(f"音訊檔不存在: {audio_file}，改用預設檔案")
+            logger.warning("音訊檔不存在: %s，改用預設檔案", audio_file, extra={'rate_limit': 60.0})
             audio_file = self.audio_file
             if not os.path.exists(audio_file):
-                print(f"預設音訊檔也不存在: {audio_file}")
-                return
+                logger.error("預設音訊檔也不存在: %s", audio_file, extra={'rate_limit': 60.0})
+                self._release_playing()
+                return False
         
         # 於新執行緒中播放，避免阻塞主執行緒
-        thread = threading.Thread(target=self._play_audio_thread, args=(audio_file,))
-        thread.daemon = True
-        thread.start()
+        with tracer.span('audio.dispatch', 'audio', {'type': audio_type}):
+            thread = threading.Thread(target=self._play_audio_thread, args=(audio_file,),
+                                      name="audio-playback")
+            thread.daemon = True
+            thread.start()
+        return True
     
     def _play_audio_thread(self, audio_file):
-        """於背景執行緒中播放音訊"""
+        """於背景執行緒中播放音訊（旗標已由 play_audio 設定，結束時釋放）"""
         try:
-            self.is_playing = True
-            
-            # 載入音訊檔
-            pygame.mixer.music.load(audio_file)
-            
-            # 播放音訊
-            pygame.mixer.music.play()
-            
-            # 等待音訊播放結束
-            while pygame.mixer.music.get_busy():  # 音訊播放中
-                time.sleep(0.1)
-            
-            print("播放完成")
+            with tracer.span('audio.play', 'audio', {'file': os.path.basename(audio_file)}):
+                self._playback(audio_file)
+            logger.debug("播放完成: %s", audio_file)
         except Exception as e:
-            print(f"播放音訊錯誤: {e}")
+            logger.error("播放音訊錯誤: %s", e, extra={'rate_limit': 10.0})
         finally:
+            self._release_playing()
+    
+    def _playback(self, audio_file):
+        """載入並播放音訊檔，直到播放結束才返回"""
+        if not self.enable_mixer:
+            return
+        
+        # 載入音訊檔
+        pygame.mixer.music.load(audio_file)
+        
+        # 播放音訊
+        pygame.mixer.music.play()
+        
+        # 等待音訊播放結束
+        while pygame.mixer.music.get_busy():  # 音訊播放中
+            time.sleep(0.1)
+    
+    def _release_playing(self):
+        with self._lock:
             self.is_playing = False
     
     def stop_audio(self):
-        """停止播放音訊"""
+        """
+        停止播放音訊
+
+        旗標由播放執行緒在結束時釋放（播放停止後很快就會返回），
+        這裡不直接清除，避免新的播放開始後被舊執行緒清掉而再次重疊
+        """
+        if not self.enable_mixer:
+            return
         try:
             pygame.mixer.music.stop()
-            self.is_playing = False
         except Exception as e:
-            print(f"停止音訊錯誤: {e}")
+            logger.error("停止音訊錯誤: %s", e)
     
-    def play_posture_warning(self, posture_info):
+    def play_alert(self, alert):
+        """
+        播放提醒規則觸發的音訊
+
+        Args:
+            alert: rule_module.Alert（依 audio_type 選擇音訊檔）
+
+        Returns:
+            bool: 是否開始播放
+        """
+        return self.play_audio(alert.audio_type)
+
+    def play_posture_warning(self, posture_info, neck_threshold=None, torso_threshold=None):
         """
         依坐姿資訊播放對應的警示音訊
         
         Args:
-            posture_info: 姿勢資訊字典
+            posture_info: 姿勢資訊（PostureResult；舊版字典亦可）
+            neck_threshold: 脖子角度閾值（預設 Config.DEFAULT_SIDE_NECK_THRESHOLD）
+            torso_threshold: 身體角度閾值（預設 Config.DEFAULT_SIDE_TORSO_THRESHOLD）
         """
-        view_type = posture_info.get('view_type')
-        angles = posture_info.get('angles', {})
-        is_correct = posture_info.get('is_correct', True)
-        
+        if isinstance(posture_info, dict):
+            # 舊版字典缺少 is_correct 時視為正確
+            if posture_info.get('is_correct', True):
+                return
+            posture_info = PostureResult.from_dict(posture_info)
+
         # 若坐姿正確，不播放
-        if is_correct:
+        if posture_info.is_correct:
             return
         
         # 依不同異常狀況選擇音訊類型（僅側面視角進行偵測）
         audio_type = 'default'
         
-        if view_type == 'side':
+        if posture_info.view_type == 'side':
             # 側面視角的異常判斷
-            neck_angle = angles.get('neck', 0)
-            torso_angle = angles.get('torso', 0)
+            neck_angle = posture_info.neck_angle or 0
+            torso_angle = posture_info.torso_angle or 0
             
-            if neck_angle > 50:
+            if neck_threshold is None:
+                neck_threshold = Config.DEFAULT_SIDE_NECK_THRESHOLD
+            if torso_threshold is None:
+                torso_threshold = Config.DEFAULT_SIDE_TORSO_THRESHOLD
+
+            if neck_angle > neck_threshold:
                 audio_type = 'neck_forward'
-            elif torso_angle > 20:
+            elif torso_angle > torso_threshold:
                 audio_type = 'torso_tilt'
         
         # 播放音訊
@@ -165,6 +226,7 @@ class AudioPlayer:
         """釋放資源"""
         try:
             self.stop_audio()
-            pygame.mixer.quit()
+            if self.enable_mixer:
+                pygame.mixer.quit()
         except Exception as e:
-            print(f"釋放音訊資源錯誤: {e}")
+            logger.error("釋放音訊資源錯誤: %s", e)
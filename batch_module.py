@@ -0,0 +1,526 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/24 10:40
+# User : l'r's
+# Software: PyCharm
+# File : batch_module.py
+"""
+批次處理模組 - Batch Runner Module
+掃描資料夾中的錄影檔，依檔案大小排入工作佇列（大檔先做，整批較早結束），
+以行程池處理（行程數依核心數與可用記憶體決定）：
+
+- 每處理完一段（BATCH_SEGMENT_SECONDS 影片秒數）即寫入檢查點：
+  該段的逐幀結果、提醒與規則／在座計時狀態，中斷後再次執行會由最後一段接續
+- 輸出已是最新（來源檔與設定都沒變）的檔案直接略過
+- 完成後寫入 manifest.json：每個檔案的結果與處理速度，以及整批的吞吐量
+
+輸出（BATCH_OUTPUT_DIR）：
+  <名稱>.json          摘要（良好／不良秒數、提醒、來源檔與設定識別），存在即代表已完成
+  <名稱>.frames.jsonl  逐幀結果，每行 [時間戳, is_correct, 視角, 脖子角度, 身體角度, 有人]
+  <名稱>.partial.jsonl 處理中的檢查點（完成後刪除）
+
+範例：python batch_module.py /data/recordings --output batch_output
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from config_manager import ConfigManager, Settings, file_signature
+from config_module import Config, config_overrides
+from log_module import setup_logging
+
+logger = logging.getLogger(__name__)
+
+BATCH_VERSION = 2
+
+
+# ==================== 工作與設定識別 ====================
+
+def config_fingerprint(settings, sample_hz):
+    """
+    影響輸出結果的設定識別（任何一項改變，既有輸出即視為過期）
+
+    Args:
+        settings: config_manager.Settings
+        sample_hz: 分析頻率
+
+    Returns:
+        str
+    """
+    values = settings.to_dict()
+    values.pop('resolution')  # 只影響攝影機擷取
+    values.update({
+        'version': BATCH_VERSION,
+        'sample_hz': sample_hz,
+        'alert_rules': Config.ALERT_RULES,
+        'warning_interval': Config.DEFAULT_WARNING_INTERVAL,
+        'head_down_distance': Config.DEFAULT_HEAD_DOWN_DISTANCE,
+        'head_up_distance': Config.DEFAULT_HEAD_UP_DISTANCE,
+        'front_view_threshold': Config.FRONT_VIEW_THRESHOLD,
+        'absence_seconds': Config.PRESENCE_ABSENCE_SECONDS,
+        'mp': [Config.MP_MIN_DETECTION_CONFIDENCE, Config.MP_MIN_TRACKING_CONFIDENCE,
+               Config.MP_MODEL_COMPLEXITY, Config.MP_FACE_MODEL_SELECTION,
+               Config.MP_FACE_MIN_DETECTION_CONFIDENCE],
+    })
+    text = json.dumps(values, sort_keys=True, default=list)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def scan_directory(directory, extensions=None):
+    """
+    列出資料夾（含子資料夾）中的錄影檔，由大到小排序
+
+    Returns:
+        list: [(路徑, 相對路徑, 大小), ...]
+    """
+    extensions = tuple(ext.lower() for ext in (extensions or Config.BATCH_EXTENSIONS))
+    found = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.startswith('.') or not name.lower().endswith(extensions):
+                continue
+            path = os.path.join(root, name)
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            found.append((path, os.path.relpath(path, directory), size))
+    found.sort(key=lambda item: item[2], reverse=True)
+    return found
+
+
+def pool_size(jobs, max_workers=None):
+    """
+    工作行程數：不超過核心數、可用記憶體可容納的行程數與工作數
+
+    Args:
+        jobs: 待處理的工作數
+        max_workers: 上限（0 或 None 表示不限）
+    """
+    cores = os.cpu_count() or 1
+    limit = cores
+    try:
+        available = os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+        limit = min(limit, max(1, available // (Config.BATCH_WORKER_MEMORY_MB * 1024 * 1024)))
+    except (AttributeError, ValueError, OSError):
+        pass  # 非 POSIX 系統只依核心數
+    if max_workers:
+        limit = min(limit, max_workers)
+    return max(1, min(limit, jobs))
+
+
+def _output_paths(output_dir, relpath):
+    stem = os.path.splitext(relpath)[0].replace(os.sep, '__').replace('/', '__')
+    base = os.path.join(output_dir, stem)
+    return {
+        'result': base + '.json',
+        'frames': base + '.frames.jsonl',
+        'partial': base + '.partial.jsonl',
+    }
+
+
+def _write_json_atomic(path, data):
+    """寫入暫存檔後以 os.replace 取代，中斷時不會留下寫到一半的檔案"""
+    fd, tmp_path = tempfile.mkstemp(prefix=".batch-", suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def is_up_to_date(job):
+    """輸出摘要存在，且來源檔與設定識別都與目前相同"""
+    try:
+        with open(job['paths']['result'], 'r', encoding='utf-8') as f:
+            summary = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return summary.get('signature') == job['signature'] and summary.get('config') == job['fingerprint']
+
+
+# ==================== 檢查點 ====================
+
+def _load_segments(path, header):
+    """
+    讀取檢查點中已完成的分段
+
+    標頭（來源檔與設定識別）不符時捨棄整個檢查點；最後一行寫到一半（中斷）時截掉該行
+
+    Returns:
+        list: 分段記錄
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return []
+    segments = []
+    valid = 0
+    with f:
+        first = f.readline()
+        try:
+            if json.loads(first) != header:
+                raise ValueError("header mismatch")
+        except ValueError:
+            f.close()
+            os.remove(path)
+            logger.info("檢查點與目前的來源檔或設定不符，重新處理: %s", path)
+            return []
+        valid = len(first)
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                segments.append(json.loads(line))
+            except ValueError:
+                break
+            valid += len(line)
+    if valid < os.path.getsize(path):
+        os.truncate(path, valid)
+    return segments
+
+
+def _accumulate(rows, carry):
+    """
+    由逐幀結果累計良好／不良秒數：兩幀之間的時間歸給前一次的判斷結果
+    （與姿勢時間軸相同，未判斷的幀沿用前一次的狀態）
+
+    Args:
+        rows: 逐幀結果
+        carry: [上一幀時間戳, 上一次的 is_correct]（跨分段延續）
+
+    Returns:
+        tuple: (良好秒數, 不良秒數, 新的 carry)
+    """
+    good = bad = 0.0
+    last_ts, state = carry
+    for row in rows:
+        ts, is_correct = row[0], row[1]
+        if last_ts is not None and state is not None:
+            if state:
+                good += ts - last_ts
+            else:
+                bad += ts - last_ts
+        last_ts = ts
+        if is_correct is not None:
+            state = is_correct
+    return good, bad, [last_ts, state]
+
+
+# ==================== 工作行程 ====================
+
+def run_job(job):
+    """
+    處理單一錄影檔（於工作行程執行），由檢查點接續
+
+    Returns:
+        dict: manifest 中該檔案的記錄
+    """
+    from detector_module import PostureDetector
+    from Play_prompt import AudioPlayer
+    from video_reader_module import SampledVideoReader
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    paths = job['paths']
+    header = {'source': job['path'], 'signature': job['signature'], 'config': job['fingerprint']}
+    segments = _load_segments(paths['partial'], header)
+
+    settings = Settings(**job['settings'])
+    with config_overrides(HISTORY_ENABLED=False, LATENCY_CONTROL_ENABLED=False):
+        detector = PostureDetector(settings.side_neck_threshold, settings.side_torso_threshold,
+                                   settings.warning_time, pose_backend=settings.pose_backend,
+                                   audio_player=AudioPlayer(enable_mixer=False),
+                                   stages=[name for name in Config.FRAME_STAGES if name != 'overlay'])
+    detector.update_sitting_minutes(settings.sitting_minutes)
+    alerts = []
+    detector.add_alert_listener(lambda alert, info: alerts.append([alert.name, round(alert.timestamp, 4)]))
+
+    start = 0.0
+    carry = [None, None]
+    finished = bool(segments) and segments[-1]['final']
+    if segments:
+        last = segments[-1]
+        start, carry = last['end'], last['carry']
+        detector.alert_engine.restore(last['state']['rules'])
+        detector.presence.restore(last['state']['presence'])
+        if not finished:
+            logger.info("由檢查點接續 %s（%.0f 秒起，已完成 %d 段）", job['relpath'], start, len(segments))
+    resumed_from = start
+    frames = 0
+
+    if not finished:
+        reader = SampledVideoReader(job['path'], sample_hz=job['sample_hz'], start=start)
+        if not reader.isOpened():
+            reader.release()
+            detector.release()
+            raise OSError(f"無法開啟影片檔: {job['path']}")
+        # 取樣時每個取樣幀都偵測（分析頻率只由 sample_hz 決定）
+        skip_frames = reader.analysis_skip(settings.skip_frames)
+        if segments:
+            # 沒有上一次的偵測結果可沿用：接續的第一幀即為偵測幀，否則前 skip_frames-1 幀都會記為無人
+            detector.frame_counter = skip_frames - 1
+        new_file = not segments
+        partial = open(paths['partial'], 'a', encoding='utf-8')
+        try:
+            if new_file:
+                partial.write(json.dumps(header) + '\n')
+            index = len(segments)
+            rows = []
+            boundary = start + job['segment_seconds']
+            seg_start = start
+            while True:
+                ok, frame = reader.read()
+                ts = reader.timestamp if ok else None
+                if not ok or ts >= boundary:
+                    # 分段邊界：在處理這一幀之前寫入，接續時由這一幀開始
+                    end = ts if ok else (rows[-1][0] if rows else seg_start)
+                    good, bad, carry = _accumulate(rows, carry)
+                    record = {
+                        'index': index, 'start': seg_start, 'end': end, 'final': not ok,
+                        'rows': rows, 'alerts': alerts, 'good': good, 'bad': bad, 'carry': carry,
+                        'state': {'rules': detector.alert_engine.snapshot(),
+                                  'presence': detector.presence.snapshot()},
+                    }
+                    partial.write(json.dumps(record, separators=(',', ':')) + '\n')
+                    partial.flush()
+                    os.fsync(partial.fileno())
+                    if not ok:
+                        break
+                    index += 1
+                    rows = []
+                    alerts = []
+                    seg_start = end
+                    boundary = end + job['segment_seconds']
+
+                _, result = detector.process_frame(frame, skip_frames, ts)
+                rows.append([round(ts, 4), result.is_correct, result.view_type,
+                             None if result.neck_angle is None else round(result.neck_angle, 2),
+                             None if result.torso_angle is None else round(result.torso_angle, 2),
+                             result.person_detected])
+                frames += 1
+        finally:
+            partial.close()
+            reader.release()
+            detector.release()
+    else:
+        detector.release()
+
+    summary = _finalize(job, header)
+    return {
+        'path': job['relpath'],
+        'size': job['size'],
+        'status': 'done',
+        'frames': summary['frames'],
+        'duration': summary['duration'],
+        'processed_frames': frames,
+        'processed_seconds': max(0.0, summary['duration'] - resumed_from) if frames else 0.0,
+        'resumed_from': resumed_from,
+        'wall_seconds': time.perf_counter() - wall_start,
+        'cpu_seconds': time.process_time() - cpu_start,
+        'good': summary['good'],
+        'bad': summary['bad'],
+        'alerts': len(summary['alerts']),
+    }
+
+
+def _finalize(job, header):
+    """合併所有分段：寫出逐幀結果與摘要（摘要最後寫入，作為完成標記），刪除檢查點"""
+    paths = job['paths']
+    segments = _load_segments(paths['partial'], header)
+    first_ts = last_ts = None
+    alerts = []
+    good = bad = 0.0
+    count = 0
+    fd, tmp_path = tempfile.mkstemp(prefix=".batch-", suffix=".tmp",
+                                    dir=os.path.dirname(os.path.abspath(paths['frames'])))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for segment in segments:
+                for row in segment['rows']:
+                    f.write(json.dumps(row, separators=(',', ':')) + '\n')
+                    first_ts = row[0] if first_ts is None else first_ts
+                    last_ts = row[0]
+                    count += 1
+                alerts.extend(segment['alerts'])
+                good += segment['good']
+                bad += segment['bad']
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, paths['frames'])
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    summary = {
+        'version': BATCH_VERSION,
+        'source': job['path'],
+        'signature': job['signature'],
+        'config': job['fingerprint'],
+        'settings': job['settings'],
+        'sample_hz': job['sample_hz'],
+        'frames': count,
+        'duration': (last_ts - first_ts) if count else 0.0,
+        'good': good,
+        'bad': bad,
+        'alerts': alerts,
+        'segments': len(segments),
+        'frames_file': os.path.basename(paths['frames']),
+    }
+    _write_json_atomic(paths['result'], summary)
+    os.remove(paths['partial'])
+    return summary
+
+
+# ==================== 批次排程 ====================
+
+def run_batch(directory, output_dir=None, workers=None, settings_path=None, sample_hz=None,
+              segment_seconds=None, force=False):
+    """
+    處理資料夾中所有錄影檔
+
+    Args:
+        directory: 錄影資料夾
+        output_dir: 輸出資料夾
+        workers: 工作行程數上限（預設 Config.BATCH_MAX_WORKERS；0 表示依核心數與記憶體）
+        settings_path: 偵測設定檔（預設 config.txt；不存在時使用預設值）
+        sample_hz: 分析頻率
+        segment_seconds: 檢查點間隔（影片秒數）
+        force: 忽略既有輸出全部重新處理
+
+    Returns:
+        dict: manifest 內容
+    """
+    output_dir = output_dir or Config.BATCH_OUTPUT_DIR
+    sample_hz = Config.BATCH_SAMPLE_HZ if sample_hz is None else sample_hz
+    segment_seconds = segment_seconds or Config.BATCH_SEGMENT_SECONDS
+    workers = Config.BATCH_MAX_WORKERS if workers is None else workers
+    os.makedirs(output_dir, exist_ok=True)
+
+    settings = ConfigManager.load_settings(settings_path) or Settings()
+    fingerprint = config_fingerprint(settings, sample_hz)
+
+    pending = []
+    records = []
+    for path, relpath, size in scan_directory(directory):
+        job = {
+            'path': os.path.abspath(path),
+            'relpath': relpath,
+            'size': size,
+            'signature': list(file_signature(path) or ()),
+            'fingerprint': fingerprint,
+            'settings': settings.to_dict(),
+            'sample_hz': sample_hz,
+            'segment_seconds': segment_seconds,
+            'paths': _output_paths(output_dir, relpath),
+        }
+        if not force and is_up_to_date(job):
+            records.append({'path': relpath, 'size': size, 'status': 'skipped'})
+        else:
+            if force and os.path.exists(job['paths']['partial']):
+                os.remove(job['paths']['partial'])
+            pending.append(job)
+
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    manifest = {
+        'version': BATCH_VERSION,
+        'directory': os.path.abspath(directory),
+        'config': fingerprint,
+        'settings': settings.to_dict(),
+        'sample_hz': sample_hz,
+        'started': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'workers': 0,
+        'files': records,
+    }
+    total = len(pending) + len(records)
+    logger.info("批次處理: %d 個檔案，%d 個已是最新，%d 個待處理", total, len(records), len(pending))
+
+    wall_start = time.perf_counter()
+    if pending:
+        manifest['workers'] = pool_size(len(pending), workers)
+        logger.info("使用 %d 個工作行程（%d 核心）", manifest['workers'], os.cpu_count() or 1)
+        # spawn：子行程不繼承主行程的 MediaPipe／OpenCV 狀態（與多行程管線相同）
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=manifest['workers'], mp_context=context,
+                                 initializer=setup_logging) as pool:
+            futures = {pool.submit(run_job, job): job for job in pending}  # 依大小排序送出
+            for done, future in enumerate(as_completed(futures), 1):
+                job = futures[future]
+                try:
+                    record = future.result()
+                except Exception as e:
+                    logger.error("[%d/%d] %s 處理失敗（下次執行會由檢查點接續）: %s",
+                                 done, len(pending), job['relpath'], e)
+                    record = {'path': job['relpath'], 'size': job['size'], 'status': 'failed', 'error': str(e)}
+                else:
+                    speed = record['processed_seconds'] / record['wall_seconds'] if record['wall_seconds'] > 0 else 0.0
+                    logger.info("[%d/%d] %s 完成：%d 幀，%.0f 秒影片，%.1fx 即時",
+                                done, len(pending), job['relpath'], record['frames'], record['duration'], speed)
+                records.append(record)
+                # 每完成一個檔案就更新 manifest，長時間執行中也可查看進度
+                manifest['totals'] = _totals(records, time.perf_counter() - wall_start)
+                _write_json_atomic(manifest_path, manifest)
+
+    manifest['finished'] = time.strftime('%Y-%m-%d %H:%M:%S')
+    manifest['totals'] = _totals(records, time.perf_counter() - wall_start)
+    _write_json_atomic(manifest_path, manifest)
+    return manifest
+
+
+def _totals(records, wall_seconds):
+    done = [r for r in records if r['status'] == 'done']
+    frames = sum(r['processed_frames'] for r in done)
+    video = sum(r['processed_seconds'] for r in done)
+    size = sum(r['size'] for r in done)
+    cpu = sum(r['cpu_seconds'] for r in done)
+    return {
+        'done': len(done),
+        'skipped': sum(1 for r in records if r['status'] == 'skipped'),
+        'failed': sum(1 for r in records if r['status'] == 'failed'),
+        'wall_seconds': wall_seconds,
+        'video_seconds': video,
+        'frames': frames,
+        'frames_per_second': frames / wall_seconds if wall_seconds > 0 else 0.0,
+        'realtime_factor': video / wall_seconds if wall_seconds > 0 else 0.0,
+        'megabytes_per_second': size / 1e6 / wall_seconds if wall_seconds > 0 else 0.0,
+        'cpu_seconds': cpu,
+    }
+
+
+def print_summary(manifest):
+    totals = manifest['totals']
+    print(f"完成 {totals['done']}，略過 {totals['skipped']}，失敗 {totals['failed']}"
+          f"（{manifest['workers']} 個工作行程）")
+    print(f"影片 {totals['video_seconds']:.0f} 秒 / 耗時 {totals['wall_seconds']:.1f} 秒 = "
+          f"{totals['realtime_factor']:.1f}x 即時，{totals['frames_per_second']:.1f} 幀/秒，"
+          f"{totals['megabytes_per_second']:.1f} MB/秒")
+    for record in manifest['files']:
+        if record['status'] == 'failed':
+            print(f"  失敗: {record['path']}: {record['error']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批次處理資料夾中的錄影檔（可中斷後接續）")
+    parser.add_argument("directory", help="錄影資料夾")
+    parser.add_argument("--output", default=None, help=f"輸出資料夾（預設 {Config.BATCH_OUTPUT_DIR}）")
+    parser.add_argument("--workers", type=int, default=None, help="工作行程數上限；0 表示依核心數與記憶體")
+    parser.add_argument("--settings", default=None, help="偵測設定檔（預設 config.txt）")
+    parser.add_argument("--hz", type=float, default=None, help="分析頻率；0 表示每一幀")
+    parser.add_argument("--segment", type=float, default=None, help="檢查點間隔（影片秒數）")
+    parser.add_argument("--force", action="store_true", help="忽略既有輸出全部重新處理")
+    args = parser.parse_args()
+    setup_logging()
+    result = run_batch(args.directory, args.output, args.workers, args.settings, args.hz,
+                       args.segment, args.force)
+    print_summary(result)
@@ -5,12 +5,204 @@
 # File : config_manager.py
 """
 設定管理模組 - Configuration Manager Module
-處理設定參數的儲存與載入
+處理設定參數的儲存與載入：
+- Settings：有型別、經驗證的設定值（每個欄位宣告型別、範圍與套用方式）
+- 儲存時先寫入暫存檔再以 os.replace 取代，寫到一半中斷也不會留下損壞的設定檔
+- ConfigWatcher：輪詢設定檔的變更（熱重新載入），忽略自己剛儲存的版本
 """
 
+import collections
+import logging
 import os
+import tempfile
+
 from config_module import Config
 
+logger = logging.getLogger(__name__)
+
+# 套用方式
+APPLY_LIVE = 'live'        # 直接更新偵測器參數
+APPLY_CAPTURE = 'capture'  # 需要重新開啟影像來源（背景進行）
+APPLY_MODEL = 'model'      # 需要建立新的姿勢模型（背景進行）
+
+SettingField = collections.namedtuple('SettingField', 'name kind default minimum maximum choices apply')
+
+
+def _resolution_choices():
+    return tuple(tuple(map(int, text.split('x'))) for text in Config.RESOLUTION_OPTIONS)
+
+
+def _pose_backend_choices():
+    from pose_backend_module import BACKENDS
+    return tuple(BACKENDS)
+
+
+# 欄位順序即設定檔的輸出順序；範圍與介面元件一致
+SETTING_FIELDS = (
+    SettingField('side_neck_threshold', float, Config.DEFAULT_SIDE_NECK_THRESHOLD, 20.0, 80.0, None, APPLY_LIVE),
+    SettingField('side_torso_threshold', float, Config.DEFAULT_SIDE_TORSO_THRESHOLD, 5.0, 40.0, None, APPLY_LIVE),
+    SettingField('warning_time', float, Config.DEFAULT_WARNING_TIME, 0.5, 10.0, None, APPLY_LIVE),
+    SettingField('sitting_minutes', int, Config.DEFAULT_SITTING_MINUTES, 1, 600, None, APPLY_LIVE),
+    SettingField('skip_frames', int, Config.DEFAULT_SKIP_FRAMES, 1, 10, None, APPLY_LIVE),
+    SettingField('resolution', tuple, Config.DEFAULT_RESOLUTION, None, None, _resolution_choices, APPLY_CAPTURE),
+    # 預設值於建立時讀取，命令列 --pose-backend 修改 Config 後仍會生效（設定檔有指定時以設定檔為準）
+    SettingField('pose_backend', str, lambda: Config.POSE_BACKEND, None, None, _pose_backend_choices, APPLY_MODEL),
+)
+FIELDS_BY_NAME = {field.name: field for field in SETTING_FIELDS}
+
+
+class SettingsError(ValueError):
+    """設定值型別或範圍錯誤"""
+
+
+def parse_value(field, value):
+    """
+    依欄位宣告轉換並驗證設定值
+
+    Args:
+        field: SettingField
+        value: 設定檔中的文字或已轉換的值
+
+    Returns:
+        轉換後的值
+
+    Raises:
+        SettingsError: 型別錯誤、超出範圍或不在可選值內
+    """
+    try:
+        if field.kind is tuple:
+            if isinstance(value, str):
+                w, h = value.lower().split('x')
+                value = (int(w), int(h))
+            else:
+                value = tuple(int(v) for v in value)
+        elif field.kind is int:
+            if isinstance(value, float) and not value.is_integer():
+                raise ValueError(value)
+            value = int(value)
+        elif field.kind is float:
+            value = float(value)
+        else:
+            value = str(value).strip()
+    except (TypeError, ValueError):
+        raise SettingsError(f"{field.name}: 無法轉換為 {field.kind.__name__}（{value!r}）") from None
+
+    if field.minimum is not None and value < field.minimum:
+        raise SettingsError(f"{field.name}: {value} 小於下限 {field.minimum}")
+    if field.maximum is not None and value > field.maximum:
+        raise SettingsError(f"{field.name}: {value} 大於上限 {field.maximum}")
+    if field.choices is not None:
+        choices = field.choices()
+        if value not in choices:
+            raise SettingsError(f"{field.name}: {format_value(field, value)} 不在可選值內"
+                                f"（{', '.join(format_value(field, c) for c in choices)}）")
+    return value
+
+
+def format_value(field, value):
+    """設定值的檔案表示，例如 (640, 480) -> '640x480'"""
+    if field.kind is tuple:
+        return f"{value[0]}x{value[1]}"
+    return str(value)
+
+
+class Settings:
+    """有型別、經驗證的設定值（不可變；修改請用 replace）"""
+
+    __slots__ = tuple(FIELDS_BY_NAME)
+
+    def __init__(self, **values):
+        """
+        Args:
+            **values: 欄位值；未提供的欄位使用預設值
+
+        Raises:
+            SettingsError: 未知欄位或值不合法
+        """
+        unknown = set(values) - set(FIELDS_BY_NAME)
+        if unknown:
+            raise SettingsError(f"未知的設定: {', '.join(sorted(unknown))}")
+        for field in SETTING_FIELDS:
+            value = values.get(field.name, field.default)
+            if callable(value):
+                value = value()
+            object.__setattr__(self, field.name, parse_value(field, value))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings 不可修改，請使用 replace()")
+
+    def __eq__(self, other):
+        return isinstance(other, Settings) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return "Settings(" + ", ".join(f"{k}={v!r}" for k, v in self.to_dict().items()) + ")"
+
+    def to_dict(self):
+        return {field.name: getattr(self, field.name) for field in SETTING_FIELDS}
+
+    def replace(self, **changes):
+        """回傳套用變更後的新設定"""
+        values = self.to_dict()
+        values.update(changes)
+        return Settings(**values)
+
+    def diff(self, other):
+        """
+        與另一份設定比較
+
+        Returns:
+            dict: {套用方式: [變更的欄位名稱, ...]}，只包含有變更的套用方式
+        """
+        changed = {}
+        for field in SETTING_FIELDS:
+            if getattr(self, field.name) != getattr(other, field.name):
+                changed.setdefault(field.apply, []).append(field.name)
+        return changed
+
+    @classmethod
+    def parse(cls, text, source="<string>", base=None):
+        """
+        解析設定檔內容（key=value，每行一項，# 開頭為註解）
+
+        不合法的行只記錄警告並略過，避免一個錯字讓整份設定失效
+
+        Args:
+            base: 未指定或不合法的欄位沿用此設定（預設使用預設值）；
+                  熱重新載入時傳入目前設定，編輯到一半的檔案不會把其他值改回預設
+
+        Returns:
+            Settings
+        """
+        values = base.to_dict() if base is not None else {}
+        for lineno, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith('#'):  # 略過空行與註解
+                continue
+            key, sep, value = line.partition('=')
+            key = key.strip()
+            field = FIELDS_BY_NAME.get(key)
+            if not sep or field is None:
+                logger.warning("%s:%d: 略過無法識別的設定 %r", source, lineno, line)
+                continue
+            try:
+                values[key] = parse_value(field, value.strip())
+            except SettingsError as e:
+                logger.warning("%s:%d: %s，略過此行", source, lineno, e)
+        return cls(**values)
+
+    def dumps(self):
+        return "".join(f"{field.name}={format_value(field, getattr(self, field.name))}\n"
+                       for field in SETTING_FIELDS)
+
+
+def file_signature(path):
+    """檔案的變更識別（修改時間、大小、inode）；檔案不存在時為 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
 
 class ConfigManager:
     """設定管理器類別"""
@@ -18,90 +210,82 @@ class ConfigManager:
     CONFIG_FILE = "config.txt"  # 設定檔路徑
 
     @staticmethod
-    def save_config(config_dict):
+    def save_settings(settings, path=None):
         """
-        將設定儲存至檔案
+        原子性儲存設定：寫入同資料夾的暫存檔並 fsync 後以 os.replace 取代
 
-        Args:
-            config_dict: 設定字典，包含所有需要儲存的參數
+        Returns:
+            bool: 是否成功
         """
+        path = path or ConfigManager.CONFIG_FILE
+        directory = os.path.dirname(os.path.abspath(path))
         try:
-            with open(ConfigManager.CONFIG_FILE, 'w', encoding='utf-8') as f:
-                for key, value in config_dict.items():
-                    # 處理不同型別的值
-                    if isinstance(value, tuple):
-                        # 元組轉成字串，例如 (640, 480) -> "640x480"
-                        f.write(f"{key}={value[0]}x{value[1]}\n")
-                    elif isinstance(value, float):
-                        f.write(f"{key}={value}\n")
-                    elif isinstance(value, int):
-                        f.write(f"{key}={value}\n")
-                    else:
-                        f.write(f"{key}={value}\n")
-            print(f"設定已儲存至 {ConfigManager.CONFIG_FILE}")
+            fd, tmp_path = tempfile.mkstemp(prefix=".config-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(settings.dumps())
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            logger.info("設定已儲存至 %s", path)
             return True
-        except Exception as e:
-            print(f"儲存設定失敗: {e}")
+        except OSError as e:
+            logger.error("儲存設定失敗: %s", e)
             return False
 
     @staticmethod
-    def load_config():
+    def load_settings(path=None, base=None):
         """
         從檔案載入設定
 
+        Args:
+            path: 設定檔路徑（預設 CONFIG_FILE）
+            base: 未指定或不合法的欄位沿用此設定
+
         Returns:
-            dict: 設定字典；若檔案不存在或讀取失敗則回傳 None
+            Settings: 若檔案不存在或讀取失敗則回傳 None
         """
-        if not os.path.exists(ConfigManager.CONFIG_FILE):
-            print(f"設定檔 {ConfigManager.CONFIG_FILE} 不存在，使用預設設定")
+        path = path or ConfigManager.CONFIG_FILE
+        if not os.path.exists(path):
+            logger.info("設定檔 %s 不存在，使用預設設定", path)
             return None
-
         try:
-            config_dict = {}
-            with open(ConfigManager.CONFIG_FILE, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line or line.startswith('#'):  # 略過空行與註解
-                        continue
-
-                    if '=' in line:
-                        key, value = line.split('=', 1)
-                        key = key.strip()
-                        value = value.strip()
-
-                        # 嘗試轉成數字
-                        try:
-                            if '.' in value:
-                                config_dict[key] = float(value)
-                            else:
-                                config_dict[key] = int(value)
-                        except ValueError:
-                            # 若非數字，檢查是否為解析度格式
-                            if 'x' in value and value.replace('x', '').isdigit():
-                                w, h = map(int, value.split('x'))
-                                config_dict[key] = (w, h)
-                            else:
-                                config_dict[key] = value
-
-            print(f"設定已從 {ConfigManager.CONFIG_FILE} 載入")
-            return config_dict
-        except Exception as e:
-            print(f"載入設定失敗: {e}")
+            with open(path, 'r', encoding='utf-8') as f:
+                settings = Settings.parse(f.read(), source=path, base=base)
+        except (OSError, UnicodeDecodeError) as e:
+            logger.error("載入設定失敗: %s", e)
             return None
+        logger.info("設定已從 %s 載入", path)
+        return settings
 
-    @staticmethod
-    def get_default_config():
+
+class ConfigWatcher:
+    """設定檔變更偵測（由呼叫端定期呼叫 poll，例如 QTimer）"""
+
+    def __init__(self, path=None):
+        self.path = path or ConfigManager.CONFIG_FILE
+        self._signature = file_signature(self.path)
+
+    def sync(self):
+        """記錄目前的檔案版本（自己儲存或載入後呼叫），避免把同一版本當成外部變更"""
+        self._signature = file_signature(self.path)
+
+    def poll(self, base=None):
         """
-        取得預設設定字典
+        檢查設定檔是否變更
+
+        Args:
+            base: 未指定或不合法的欄位沿用此設定（通常為目前套用中的設定）
 
         Returns:
-            dict: 預設設定字典
+            Settings: 檔案變更且可讀取時回傳新設定，否則為 None
         """
-        return {
-            'side_neck_threshold': Config.DEFAULT_SIDE_NECK_THRESHOLD,
-            'side_torso_threshold': Config.DEFAULT_SIDE_TORSO_THRESHOLD,
-            'warning_time': Config.DEFAULT_WARNING_TIME,
-            'sitting_minutes': Config.DEFAULT_SITTING_MINUTES,
-            'resolution': Config.DEFAULT_RESOLUTION,
-            'skip_frames': Config.DEFAULT_SKIP_FRAMES,
-        }
+        signature = file_signature(self.path)
+        if signature is None or signature == self._signature:
+            return None
+        self._signature = signature
+        logger.info("偵測到設定檔變更: %s", self.path)
+        return ConfigManager.load_settings(self.path, base=base)
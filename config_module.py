@@ -8,6 +8,8 @@
 存储所有配置参数和常量
 """
 
+import contextlib
+
 
 class Config:
     """配置类"""
@@ -26,6 +28,32 @@ class Config:
     # 久坐提醒（分钟）
     DEFAULT_SITTING_MINUTES = 30  # 连续坐姿/有人出现累计达到该时长则提醒
 
+    # 语音提醒间隔（秒）：同一规则两次提醒的最短间隔
+    DEFAULT_WARNING_INTERVAL = 5.0
+
+    # 在座计时：连续多少秒未检测到人视为离座（按时间而非帧数判断）
+    PRESENCE_ABSENCE_SECONDS = 5.0
+
+    # 提醒规则（依优先顺序排列；字串值表示引用可在运行中调整的参数）
+    #   metric: 量测名称；threshold: 进入门槛；hysteresis: 离开时门槛回退量
+    #   dwell: 持续多久才触发；cooldown: 同一规则的提醒间隔；repeat: 持续中是否重复提醒
+    ALERT_RULES = [
+        {'name': 'neck_forward', 'metric': 'neck_angle', 'op': '>',
+         'threshold': 'side_neck_threshold', 'hysteresis': 3.0,
+         'dwell': 'warning_time', 'cooldown': 'warning_interval', 'audio': 'neck_forward'},
+        {'name': 'torso_tilt', 'metric': 'torso_angle', 'op': '>',
+         'threshold': 'side_torso_threshold', 'hysteresis': 2.0,
+         'dwell': 'warning_time', 'cooldown': 'warning_interval', 'audio': 'torso_tilt'},
+        {'name': 'head_down', 'metric': 'head_distance', 'op': '<',
+         'threshold': 'head_down_distance', 'hysteresis': 10.0,
+         'dwell': 'warning_time', 'cooldown': 'warning_interval', 'audio': 'head_down'},
+        {'name': 'head_up', 'metric': 'head_distance', 'op': '>',
+         'threshold': 'head_up_distance', 'hysteresis': 10.0,
+         'dwell': 'warning_time', 'cooldown': 'warning_interval', 'audio': 'head_up'},
+        {'name': 'sitting', 'metric': 'sitting_seconds', 'op': '>=',
+         'threshold': 'sitting_seconds', 'repeat': False, 'audio': 'sitting'},
+    ]
+
     # 默认检测参数
     DEFAULT_SKIP_FRAMES = 1
     DEFAULT_RESOLUTION = (640, 480)
@@ -46,6 +74,155 @@ class Config:
     MP_MIN_DETECTION_CONFIDENCE = 0.8
     MP_MIN_TRACKING_CONFIDENCE = 0.6
     MP_MODEL_COMPLEXITY = 1
+    MP_FACE_MODEL_SELECTION = 0
+    MP_FACE_MIN_DETECTION_CONFIDENCE = 0.8
+
+    # 姿势模型后端：'legacy'（mp.solutions.pose）/ 'tasks'（PoseLandmarker LIVE_STREAM）/ 'onnx'（ONNX Runtime CPU）
+    POSE_BACKEND = 'legacy'
+    POSE_TASK_MODEL_PATH = "pose_landmarker_lite.task"     # MediaPipe Tasks 模型档
+    POSE_ONNX_MODEL_PATH = "movenet_singlepose_lightning.onnx"  # MoveNet SinglePose（17 点）ONNX 模型档
+    POSE_ONNX_THREADS = 2              # ONNX Runtime 推论线程数
+    POSE_MIN_KEYPOINT_SCORE = 0.3      # 肩膀关键点分数低于此值视为未检测到人（ONNX）
+
+    # 延迟预算控制（依实测延迟自动调整模型复杂度、推论宽度与检测间隔）
+    LATENCY_CONTROL_ENABLED = False
+    LATENCY_TARGET_FPS = 15            # 目标帧率（每帧延迟预算 = 1000 / 此值 毫秒）
+    LATENCY_HYSTERESIS = 0.15          # 平均延迟超出预算 ±15% 才调整
+    LATENCY_WINDOW = 30                # 以最近 N 帧的平均延迟判断
+    LATENCY_MIN_DWELL = 3.0            # 每次调整后至少维持的秒数
+    LATENCY_RETRY_SECONDS = 60.0       # 较重等级曾超出预算时，隔多久才再尝试升级
+    LATENCY_PROBE_FRAMES = 6           # 启动校准时每个等级量测的帧数（第一帧为暖机）
+    # 由重到轻：(模型复杂度, 推论宽度, 每 N 帧检测一次)
+    LATENCY_LEVELS = [
+        (2, 640, 1),
+        (1, 640, 1),
+        (1, 480, 1),
+        (0, 480, 1),
+        (0, 320, 1),
+        (0, 320, 2),
+        (0, 320, 3),
+    ]
+
+    # 低功耗待机（仅摄像头来源）：无人一段时间后降低撷取频率，只做低分辨率脸部检测
+    POWER_SAVING_ENABLED = True
+    POWER_IDLE_AFTER_SECONDS = 120.0   # 连续多少秒无人即进入待机
+    POWER_WAKE_LATENCY = 1.0           # 待机时的最长唤醒延迟（秒），即待机检查间隔
+    POWER_IDLE_CHECK_WIDTH = 240       # 待机检查的推论宽度
+    POWER_IDLE_POSE_COMPLEXITY = 0     # 待机检查没有脸部时，确认姿势所用的模型复杂度（侧坐时通常侦测不到脸）
+
+    # 影片档取样解码（不分析的帧只 grab 不 retrieve；时间戳取自容器）
+    VIDEO_SAMPLE_HZ = 5.0              # 分析频率（每个取样帧都做姿势检测，不再依 skip_frames 跳帧）；0 表示每一帧都解码并依 skip_frames 跳帧
+    VIDEO_PLAYBACK_REALTIME = True     # 界面依容器时间戳播放（与实际时间同速）；False 表示尽快分析
+    VIDEO_SEEK_THRESHOLD = 2.0         # 与下一个取样点间隔超过此秒数时改用定位；0 表示不定位
+    RESULTS_INDEX_ENABLED = True       # 影片档分析时记录逐帧结果索引（分析完可在时间轴上定位回看）
+    RESULTS_INDEX_STORE = None         # 关键点档路径；None 表示使用暂存档
+    SCRUB_FORWARD_READ_SECONDS = 1.0   # 回看定位：目标在目前位置之后此秒数内时逐帧往后读，否则直接定位
+
+    # 输出录影（背景线程编码写档；待写入帧达上限即丢帧，不阻塞检测）
+    EXPORT_DIR = "exports"
+    EXPORT_SESSION_ENABLED = False     # 录制整段标注后影像
+    EXPORT_CLIPS_ENABLED = False       # 提醒触发时保存前后片段
+    EXPORT_CLIP_ALERTS = None          # 触发片段的提醒名称，例如 ('neck_forward', 'torso_tilt')；None 表示全部
+    EXPORT_PRE_ROLL_SECONDS = 5.0      # 片段包含触发前的秒数
+    EXPORT_POST_ROLL_SECONDS = 10.0    # 片段包含触发后的秒数（期间再次触发会延长）
+    EXPORT_FPS = 15.0                  # 输出帧率（依时间戳补帧/丢帧，影片长度与实际时间一致）
+    EXPORT_CODEC = 'mp4v'              # FourCC 编码，例如 'mp4v'、'XVID'、'avc1'
+    EXPORT_EXTENSION = '.mp4'          # 副档名（需与编码相容）
+    EXPORT_SCALE = 1.0                 # 输出缩放比例
+    EXPORT_QUEUE_SIZE = 64             # 待写入帧数上限，超过即丢帧
+    EXPORT_MAX_GAP_SECONDS = 1.0       # 两帧间隔超过此秒数时不再补帧（例如待机期间）
+    EXPORT_REPORT_INTERVAL = 30.0      # 丢帧警告的最短间隔（秒）
+
+    # 推论服务器（区域网络上的瘦客户端送影像，服务器集中推论并保留各 stream 的状态）
+    INFERENCE_SERVER_HOST = '127.0.0.1'  # 开放区域网络请设为 '0.0.0.0'
+    INFERENCE_SERVER_PORT = 8765
+    INFERENCE_BATCH_WINDOW_MS = 8      # 收到第一个请求后最多等待多久凑成微批次
+    INFERENCE_BATCH_MAX = 8            # 每批次最多处理的 stream 数
+    INFERENCE_SERVER_WORKERS = 2       # 推论线程数（每线程一个脸部检测器）
+    INFERENCE_MAX_STREAMS = 16         # 同时服务的 stream 上限（每个 stream 一个 Pose 计算图）
+    INFERENCE_STREAM_TIMEOUT = 60.0    # stream 连续多少秒无请求即释放其状态
+    INFERENCE_LATENCY_WINDOW = 300     # 每个 stream 保留的延迟样本数
+    INFERENCE_STATS_INTERVAL = 30.0    # 输出各 stream 延迟统计的间隔（秒）；0 表示不输出
+    INFERENCE_CLIENT_WIDTH = 480       # 客户端送出前缩小到此宽度；0 表示不缩小
+    INFERENCE_JPEG_QUALITY = 80        # 客户端 JPEG 品质
+
+    # 准确度回归（golden output）：效能设定与基准输出比较的通过门槛
+    GOLDEN_DIR = "golden"
+    GOLDEN_ANGLE_TOLERANCE = 3.0       # 角度误差在此度数内视为一致
+    GOLDEN_MIN_AGREEMENT = 0.95        # is_correct 一致率下限
+    GOLDEN_MAX_ANGLE_P95 = 5.0         # 角度误差 p95 上限（度）
+    GOLDEN_MAX_TIME_DRIFT = 0.05       # 良好/不良总时间偏差上限（占影片长度比例）
+    GOLDEN_ALERT_WINDOW = 5.0          # 提醒时间配对范围（秒）；超出即视为漏报/多报
+
+    # 压力测试（合成关键点/影像的负载产生器）
+    LOADGEN_STREAMS = 8                # 并行的 stream 数
+    LOADGEN_WORKERS = 4                # 处理 stream 的线程数
+    LOADGEN_DURATION = 600.0           # 每个 stream 模拟的秒数（关键点模式不依实际时间，尽可能快）
+    LOADGEN_EVENT_RATE = 30.0          # 模拟的每秒观测次数（决定时间戳间隔）
+    LOADGEN_FRAME_SIZE = (640, 480)    # 影像模式送出的影像解析度
+    LOADGEN_FOOTAGE = "demo.MOV"       # 影像模式的实拍素材（依情境要求的角度挑选实际角度最接近的帧）
+    LOADGEN_FOOTAGE_HZ = 5.0           # 素材取样频率
+    LOADGEN_FOOTAGE_MAX_FRAMES = 400   # 素材帧数上限（内存中以 JPEG 保存）
+    LOADGEN_FRAME_FPS = 15.0           # 影像模式每个 stream 的送帧频率；0 表示不限速（量测上限）
+    LOADGEN_FRAME_DURATION = 30.0      # 影像模式每个 stream 的模拟秒数
+    LOADGEN_SITTING_MINUTES = 2.0      # 压力测试用的久坐提醒分钟数（让模拟时间内会触发）
+    LOADGEN_AUDIO_SECONDS = 0.002      # 模拟播放一次语音的实际秒数（检查播放是否重叠）
+    LOADGEN_SEED = 0
+
+    # 批次处理（整个资料夹的录影；每段写入检查点，中断后可接续）
+    BATCH_OUTPUT_DIR = "batch_output"
+    BATCH_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.m4v')
+    BATCH_SEGMENT_SECONDS = 60.0       # 检查点间隔（影片秒数）
+    BATCH_SAMPLE_HZ = 5.0              # 分析频率；0 表示每一帧都分析
+    BATCH_WORKER_MEMORY_MB = 700       # 每个工作进程估计占用的内存（决定进程数上限）
+    BATCH_MAX_WORKERS = 0              # 工作进程数上限；0 表示依核心数与可用内存决定
+
+    # 结果串流（无界面执行，以 SSE / WebSocket 推送姿势事件给本机订阅者）
+    STREAM_HOST = '127.0.0.1'
+    STREAM_PORT = 8766
+    STREAM_BATCH_WINDOW_MS = 50        # 合并事件的时间窗（毫秒）
+    STREAM_QUEUE_SIZE = 64             # 每个订阅者待送批次上限
+    STREAM_DROP_POLICY = 'drop_oldest' # 队列已满时：'drop_oldest' / 'drop_newest' / 'disconnect'
+    STREAM_WRITE_BUFFER_BYTES = 65536  # 每个连线的写入缓冲区上限（超过即等待，由队列吸收）
+    STREAM_MAX_SUBSCRIBERS = 256
+    STREAM_STATS_INTERVAL = 5.0        # stats 事件间隔（秒）；0 表示不送出
+    STREAM_STATS_WINDOW = 900          # stats 中近期统计的时间窗（秒）
+    STREAM_HEARTBEAT_SECONDS = 15.0    # 空闲连线的心跳间隔（秒）
+    STREAM_CLOSE_TIMEOUT = 2.0         # 关闭时等待订阅者收完剩余事件的秒数
+    STREAM_AUDIO_ENABLED = False       # 无界面执行时是否播放语音提醒
+
+    # 原始影像录制与重播（侦测前的摄影机画面与逐帧撷取时间；main.py --record 亦可开启）
+    RECORD_ENABLED = False
+    RECORD_DIR = "recordings"
+    RECORD_ENCODING = 'jpg'            # 'jpg'、'png'（无损）或 'raw'（不压缩）
+    RECORD_JPEG_QUALITY = 95
+    RECORD_QUEUE_SIZE = 32             # 待写入帧数上限，超过即丢帧
+    REPLAY_REALTIME = True             # 依原始撷取时间重播；False 表示尽快重播
+    REPLAY_DROP_LATE = False           # 处理跟不上原始节奏时略过过期的帧（同摄影机只取最新帧）
+
+    # 效能追踪（Chrome trace / Perfetto 格式；main.py --trace 亦可开启）
+    TRACE_ENABLED = False
+    TRACE_BUFFER_EVENTS = 200000       # 环形缓冲区事件数（约数分钟）
+    TRACE_DUMP_SECONDS = 10.0          # 汇出最近几秒
+    TRACE_DIR = "traces"
+    TRACE_SIGNAL = 'SIGUSR1'           # 收到此信号即汇出（SIGUSR2 已用于切换日志等级）
+
+    # 单帧处理阶段图（依序执行；无画面执行可省略 'overlay'，自定义阶段以 stage_module.register_stage 登录）
+    FRAME_STAGES = ('source', 'preprocess', 'presence', 'pose', 'classify',
+                    'temporal', 'alert', 'overlay', 'sink')
+
+    # 多进程管线配置（共享内存环形缓冲区）
+    PIPELINE_MODE = 'single'      # 'single' 单进程 / 'multiprocess' 撷取与推论分进程
+    MP_INFERENCE_WORKERS = 2      # 推论进程数
+    SHM_RING_EXTRA_SLOTS = 3      # 环形缓冲区除每个推论进程占用外的额外槽位
+    SHM_TASK_QUEUE_SIZE = 4       # 每个推论进程的待处理帧上限
+
+    # 多人模式（以脸部框裁切每个人的区域分别做姿势检测）
+    MULTI_PERSON_ENABLED = False
+    MULTI_PERSON_MAX = 4               # 同时追踪的人数上限（每人一个 Pose 计算图）
+    MULTI_PERSON_MATCH_DISTANCE = 1.5  # 脸部中心位移小于「脸宽 × 此值」视为同一人
+    MULTI_PERSON_TRACK_TIMEOUT = 5.0   # 追踪目标连续多少秒未出现即移除
+    MULTI_PERSON_COST_REPORT_INTERVAL = 300  # 每 N 帧输出一次「耗时 vs 人数」；0 表示不输出
 
     # 视角判断阈值
     FRONT_VIEW_THRESHOLD = 100  # 肩膀距离大于此值为正面
@@ -53,4 +230,43 @@ class Config:
     # UI配置
     WINDOW_WIDTH = 1400
     WINDOW_HEIGHT = 900
-    TIMER_INTERVAL = 30  # 毫秒
\ No newline at end of file
+    TIMER_INTERVAL = 30  # 毫秒
+    UI_REFRESH_HZ = 5  # 状态/统计文字刷新频率（与推论频率无关）；0 表示每帧刷新
+    UI_DIFF_UPDATES = True  # 仅在显示内容变更时才更新元件
+    UI_TIMING_REPORT_INTERVAL = 300  # 每 N 帧输出一次 GUI 线程耗时；0 表示不输出
+
+    CONFIG_WATCH_INTERVAL = 1000  # 设定档变更检查间隔（毫秒，热重新载入）；0 表示不检查
+
+    # 姿势时间轴
+    TIMELINE_MAX_RUNS = 10000      # 保留的已结束区段上限（超过后舍弃最旧区段，总计不受影响）
+    ROLLING_WINDOW_MINUTES = 15    # 介面显示的滚动统计时间窗（分钟）
+
+    # 历史记录（SQLite，按分钟/小时/天汇总）
+    HISTORY_ENABLED = True
+    HISTORY_DB_PATH = "posture_history.db"
+    HISTORY_USER_ID = None        # 使用者/座位识别码；None 表示使用主机名称
+    HISTORY_BATCH_SIZE = 200      # 单次交易最多写入笔数
+    HISTORY_FLUSH_INTERVAL = 1.0  # 未满一批时最长等待秒数
+
+    # 日志配置
+    LOG_LEVEL = 'INFO'            # 默认等级（运行中可用 log_module.set_level 或 SIGUSR2 切换）
+    LOG_FILE = None               # 额外写入的日志文件；None 表示只输出到 stderr
+    LOG_DEFAULT_RATE_LIMIT = 0.0  # 未指定 rate_limit 的 INFO 以下讯息限流间隔（秒）；0 表示不限流
+    LOG_PER_FRAME_SAMPLE = 30     # 每帧讯息的取样间隔（每 N 笔输出 1 笔）
+
+    # 内存配置量测（tracemalloc，会拖慢速度，仅用于确认稳定状态无大型配置）
+    ALLOC_PROBE_ENABLED = False
+    ALLOC_REPORT_INTERVAL = 300  # 每 N 帧输出一次配置统计
+
+
+@contextlib.contextmanager
+def config_overrides(**values):
+    """暂时修改 Config（离开时还原）"""
+    saved = {key: getattr(Config, key) for key in values}
+    for key, value in values.items():
+        setattr(Config, key, value)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            setattr(Config, key, value)
@@ -12,9 +12,22 @@ import cv2
 import numpy as np
 import mediapipe as mp
 import time
+import logging
 import math as m
 from config_module import Config
 from Play_prompt import AudioPlayer
+from frame_buffer_module import FrameBufferPool
+from result_module import Keypoints, PostureResult
+from history_module import HistoryStore
+from timeline_module import PostureTimeline, STATE_GOOD, STATE_BAD
+from rule_module import AlertRuleEngine
+from presence_module import PresenceTracker
+from pose_backend_module import create_pose_backend
+from latency_module import LatencyController
+from stage_module import FrameContext, Stage, build_graph, register_stage
+from trace_module import tracer
+
+logger = logging.getLogger(__name__)
 
 
 def findDistance(x1, y1, x2, y2):
@@ -41,37 +54,144 @@ def findAngle_ver(x1, y1, x2, y2):
     return degree
 
 
+def side_view_angles(kp):
+    """
+    側面視角的脖子與身體傾斜角度
+
+    Returns:
+        tuple: (脖子角度, 身體角度)
+    """
+    neck_inclination = findAngle_ver(kp.l_shldr_x, kp.l_shldr_y, kp.l_ear_x, kp.l_ear_y)
+    torso_inclination = findAngle_ver(kp.l_hip_x, kp.l_hip_y, kp.l_shldr_x, kp.l_shldr_y)
+    return neck_inclination, torso_inclination
+
+
+def extract_keypoints(lm, lmPose, w, h):
+    """取出關鍵點座標（像素座標）"""
+    return Keypoints.from_landmarks(lm, lmPose, w, h)
+
+
+def detect_faces(face_detection, image_rgb):
+    """
+    執行臉部偵測
+
+    Args:
+        face_detection: MediaPipe FaceDetection 物件
+        image_rgb: RGB 影像
+
+    Returns:
+        list: 像素座標的臉部框 [(x, y, w, h), ...]
+    """
+    h, w = image_rgb.shape[:2]
+    face_boxes = []
+    face_results = face_detection.process(image_rgb)
+    if face_results.detections:
+        for detection in face_results.detections:
+            box = detection.location_data.relative_bounding_box
+            face_boxes.append((int(box.xmin * w), int(box.ymin * h),
+                               int(box.width * w), int(box.height * h)))
+    return face_boxes
+
+
+def detect_pose(backend, image_rgb, timestamp_ms=None):
+    """
+    執行姿勢偵測
+
+    Args:
+        backend: 姿勢模型後端（pose_backend_module.PoseBackend）
+        image_rgb: RGB 影像
+        timestamp_ms: 影像時間戳（毫秒），非同步後端用來對應結果
+
+    Returns:
+        Keypoints: 關鍵點座標；未偵測到人則回傳 None
+    """
+    return backend.process(image_rgb, timestamp_ms)
+
+
+def draw_side_keypoints(image, kp, color, neck_angle, torso_angle):
+    """繪製側面視角的關鍵點、連線與角度（偵測中與結果索引回放共用）"""
+    # 繪製關鍵點
+    cv2.circle(image, (kp.l_shldr_x, kp.l_shldr_y), 7, Config.COLOR_YELLOW, -1)
+    cv2.circle(image, (kp.l_ear_x, kp.l_ear_y), 7, Config.COLOR_YELLOW, -1)
+    cv2.circle(image, (kp.l_hip_x, kp.l_hip_y), 7, Config.COLOR_YELLOW, -1)
+    cv2.circle(image, (kp.l_shldr_x, kp.l_shldr_y - 100), 7, Config.COLOR_YELLOW, -1)
+    cv2.circle(image, (kp.l_hip_x, kp.l_hip_y - 100), 7, Config.COLOR_YELLOW, -1)
+
+    # 繪製連線
+    cv2.line(image, (kp.l_shldr_x, kp.l_shldr_y), (kp.l_ear_x, kp.l_ear_y), color, 4)
+    cv2.line(image, (kp.l_shldr_x, kp.l_shldr_y), (kp.l_shldr_x, kp.l_shldr_y - 100), color, 4)
+    cv2.line(image, (kp.l_hip_x, kp.l_hip_y), (kp.l_shldr_x, kp.l_shldr_y), color, 4)
+    cv2.line(image, (kp.l_hip_x, kp.l_hip_y), (kp.l_hip_x, kp.l_hip_y - 100), color, 4)
+
+    # 顯示角度文字（關鍵！）
+    angle_text = f'Neck: {int(neck_angle)}  Torso: {int(torso_angle)}'
+    cv2.putText(image, angle_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
+
+    # 在關鍵點旁顯示角度數值
+    cv2.putText(image, str(int(neck_angle)), (kp.l_shldr_x + 10, kp.l_shldr_y),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
+    cv2.putText(image, str(int(torso_angle)), (kp.l_hip_x + 10, kp.l_hip_y),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
+
+
+def default_alert_params(**overrides):
+    """
+    提醒規則的預設參數（Config.ALERT_RULES 以名稱引用）
+
+    Args:
+        **overrides: 覆寫的參數值
+
+    Returns:
+        dict: {參數名稱: 數值}
+    """
+    params = {
+        'side_neck_threshold': Config.DEFAULT_SIDE_NECK_THRESHOLD,
+        'side_torso_threshold': Config.DEFAULT_SIDE_TORSO_THRESHOLD,
+        'head_down_distance': Config.DEFAULT_HEAD_DOWN_DISTANCE,
+        'head_up_distance': Config.DEFAULT_HEAD_UP_DISTANCE,
+        'warning_time': Config.DEFAULT_WARNING_TIME,
+        'warning_interval': Config.DEFAULT_WARNING_INTERVAL,
+        'sitting_seconds': Config.DEFAULT_SITTING_MINUTES * 60.0,
+    }
+    params.update(overrides)
+    return params
+
+
 class PostureDetector:
     """姿勢偵測器"""
 
     def __init__(self, side_neck_threshold=None, side_torso_threshold=None,
-                 warning_time=None):
+                 warning_time=None, pose_backend=None, audio_player=None, stages=None):
         # 初始化 MediaPipe
-        self.mp_pose = mp.solutions.pose
         self.mp_face_detection = mp.solutions.face_detection
 
-        # 初始化 Pose 偵測器
-        self.pose = self.mp_pose.Pose(
-            min_detection_confidence=Config.MP_MIN_DETECTION_CONFIDENCE,
-            min_tracking_confidence=Config.MP_MIN_TRACKING_CONFIDENCE,
-            model_complexity=Config.MP_MODEL_COMPLEXITY
+        # 姿勢模型後端（預設 Config.POSE_BACKEND）
+        self.pose_backend = create_pose_backend(pose_backend)
+        self.idle_pose = None  # 低功耗待機的在座檢查用（第一次需要時建立）
+
+        # 初始化臉部偵測器（只建立一次，避免每幀重建計算圖）
+        self.face_detection = self.mp_face_detection.FaceDetection(
+            model_selection=Config.MP_FACE_MODEL_SELECTION,
+            min_detection_confidence=Config.MP_FACE_MIN_DETECTION_CONFIDENCE
         )
 
+        # 預先配置的影像緩衝區（解析度改變時才重新配置）
+        self.buffers = FrameBufferPool()
+
+        # 延遲預算控制（啟用時由控制器決定模型複雜度、推論寬度與偵測間隔）
+        self.inference_width = None  # None 表示以原始解析度推論
+        self.auto_skip = None
+        self.latency = (LatencyController(on_change=self._apply_tuning)
+                        if Config.LATENCY_CONTROL_ENABLED else None)
+
         # 姿勢統計
         self.good_frames = 0
         self.bad_frames = 0
         self.total_frames = 0
         self.frame_counter = 0
 
-        # 累計時間統計（秒）
-        self.total_good_time = 0.0  # 累計正確坐姿時間
-        self.total_bad_time = 0.0   # 累計不正確坐姿時間
-        self.total_sitting_time = 0.0  # 累計總坐姿時間（偵測到人的總時間）
-
-        # 基於時間戳的姿勢狀態計時
-        self.bad_posture_start_time = None   # 開始不正確姿勢的時間戳
-        self.good_posture_start_time = None  # 開始正確姿勢的時間戳
-        self.last_posture_change_time = None  # 上次姿勢變更的時間戳
+        # 姿勢時間軸：以（狀態, 開始, 結束）區段記錄，累計與任意時間窗統計皆由此查詢
+        self.timeline = PostureTimeline(on_run_closed=self._on_run_closed)
 
         # 可調整的閾值參數
         self.side_neck_threshold = side_neck_threshold or Config.DEFAULT_SIDE_NECK_THRESHOLD
@@ -79,302 +199,274 @@ class PostureDetector:
 
         # 儲存上一次的臉部資訊（用於跳幀）
         self.last_face_center = None  # (x, y)
+        self.last_face_boxes = []     # 最近一幀的臉部框（結果索引記錄用）
 
         # FPS 計算
         self.start_time = time.time()
+        # 最近一幀的時間戳；影片檔可改用容器時間戳（process_frame 的 timestamp），
+        # 此時統計查詢也以影片時間為準，離線處理的速度不影響時間長度
+        self.last_frame_time = None
+        self._explicit_time = False
         self.fps = 0
 
         # 儲存上一次的偵測結果（用於跳幀）
         self.last_posture_info = None
-        self.last_keypoints = None  # 儲存關鍵點座標字典
+        self.last_keypoints = None  # 儲存關鍵點座標（Keypoints）
 
-        # 初始化語音播報
-        self.audio_player = AudioPlayer()
+        # 初始化語音播報（可傳入共用或無音效裝置的播放器）
+        self.audio_player = audio_player or AudioPlayer()
 
         # 警示時間閾值（可設定）
         self.warning_time = warning_time or Config.DEFAULT_WARNING_TIME
 
-        # 用於控制語音播報頻率
-        self.last_warning_time = 0
-        self.warning_interval = 5.0  # 警告播報間隔（秒）
+        # 提醒規則（遲滯、最短持續時間與各規則獨立冷卻）
+        self.warning_interval = Config.DEFAULT_WARNING_INTERVAL  # 同一規則的提醒間隔（秒）
+        self.alert_engine = AlertRuleEngine(params=default_alert_params(
+            side_neck_threshold=self.side_neck_threshold,
+            side_torso_threshold=self.side_torso_threshold,
+            warning_time=self.warning_time,
+            warning_interval=self.warning_interval,
+        ))
+        self._metrics = {'neck_angle': None, 'torso_angle': None, 'head_distance': None}
+        self.alert_listeners = []  # 提醒觸發時的回呼 fn(alert, posture_info)
+
+        # 在座計時（依時間判斷離座；久坐提醒由規則 'sitting' 觸發）
+        self.presence = PresenceTracker()
+        self.presence.add_reset_listener(self._on_session_reset)
+        self._presence_metrics = {'sitting_seconds': None}
+
+        # 歷史紀錄（狀態轉換與區間寫入 SQLite，重置統計或關閉程式都不會遺失）
+        self.history = HistoryStore() if Config.HISTORY_ENABLED else None
+
+        # 單幀處理的階段圖（預設 Config.FRAME_STAGES；無畫面執行可省略 'overlay'）
+        self.graph = build_graph(self, stages or Config.FRAME_STAGES)
 
     def update_thresholds(self, side_neck, side_torso):
         """更新閾值參數"""
         self.side_neck_threshold = side_neck
         self.side_torso_threshold = side_torso
+        self.alert_engine.set_param('side_neck_threshold', side_neck)
+        self.alert_engine.set_param('side_torso_threshold', side_torso)
 
     def update_warning_time(self, warning_time):
-        """更新警示時間閾值"""
+        """更新警示時間閾值（各姿勢規則的最短持續時間）"""
         self.warning_time = warning_time
+        self.alert_engine.set_param('warning_time', warning_time)
 
-    def process_frame(self, frame, skip_frames=1):
-        """處理單幀影像"""
-        h, w, _ = frame.shape
-        # OpenCV 攝影機影像幀是 BGR；MediaPipe 需要 RGB
-        # 這裡統一：偵測用 RGB，所有繪製都在 BGR 上進行（Config 內顏色也以 BGR 定義）
-        image_bgr = frame
-        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-        # 計算 FPS
-        now = time.time()
-        fps_time = now - self.start_time
-        self.start_time = now
-        self.fps = 1 / fps_time if fps_time > 0 else 0
-
-        posture_info = {
-            'is_correct': None,
-            'view_type': None,
-            'angles': {},
-            'good_time': 0,
-            'bad_time': 0,
-            # 當前幀是否偵測到人（供上層做久坐計時／重置使用）
-            'person_detected': False,
-        }
+    def update_sitting_minutes(self, minutes):
+        """更新久坐提醒分鐘數"""
+        self.alert_engine.set_param('sitting_seconds', float(minutes) * 60.0)
 
-        # 跳幀邏輯
-        self.frame_counter += 1
-        should_detect = (self.frame_counter % skip_frames == 0)
-
-        # 臉部偵測（每幀都執行）
-        face_center = None  # 初始化臉部中心點
-        with self.mp_face_detection.FaceDetection(model_selection=0, min_detection_confidence=0.8) as face_detection:
-            face_results = face_detection.process(image_rgb)
-            if face_results.detections:
-                posture_info['person_detected'] = True
-                for detection in face_results.detections:
-                    box = detection.location_data.relative_bounding_box
-                    cx = int(box.xmin * w)
-                    cy = int(box.ymin * h)
-                    cw = int(box.width * w)
-                    ch = int(box.height * h)
-                    cv2.rectangle(image_bgr, (cx, cy), (cx + cw, cy + ch), Config.COLOR_BLUE, 2)
-
-                    # 計算臉部中心點
-                    face_center_x = cx + cw // 2
-                    face_center_y = cy + ch // 2
-                    face_center = (face_center_x, face_center_y)
-
-                    # 繪製臉部中心點
-                    cv2.circle(image_bgr, face_center, 5, Config.COLOR_BLUE, -1)
+    def set_pose_backend(self, backend):
+        """
+        替換姿勢模型後端（新後端應已在背景建立完成）；統計、時間軸與在座計時不受影響
 
-        # 若未偵測到臉部，使用上一次的結果
-        if face_center is None:
-            face_center = self.last_face_center
-        else:
-            self.last_face_center = face_center
-
-        # 姿勢偵測
-        if should_detect:
-            keypoints = self.pose.process(image_rgb)
-            lm = keypoints.pose_landmarks
-            lmPose = self.mp_pose.PoseLandmark
-
-            if lm and hasattr(lm, 'landmark'):
-                posture_info['person_detected'] = True
-                self.total_frames += 1
-
-                # 取出關鍵點座標
-                keypoints_dict = self._extract_keypoints(lm, lmPose, w, h)
-
-                # 計算肩膀距離判斷視角
-                offset = findDistance(
-                    keypoints_dict['l_shldr_x'], keypoints_dict['l_shldr_y'],
-                    keypoints_dict['r_shldr_x'], keypoints_dict['r_shldr_y']
-                )
-
-                if offset > Config.FRONT_VIEW_THRESHOLD:  # 正面視角
-                    # 正面視角僅判斷視角類型，不進行偵測
-                    posture_info['view_type'] = 'front'
-                    posture_info['is_correct'] = None  # 正面不參與偵測
-                    posture_info['angles'] = {}
-                    w = image_bgr.shape[1]
-                    cv2.putText(image_bgr, f"{int(offset)} front (no detection)", (w - 200, 30),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.9, Config.COLOR_BLUE, 2)
-                else:  # 側面視角
-                    posture_info['view_type'] = 'side'
-                    self._process_side_view(image_bgr, keypoints_dict, offset, posture_info)
-
-                # 使用 time.time() 計算目前連續姿勢時間（更準確，不依賴 FPS）
-                current_time = time.time()
-
-                if posture_info['is_correct']:
-                    # 計算目前連續正確姿勢時間
-                    if self.good_posture_start_time is not None:
-                        posture_info['good_time'] = current_time - self.good_posture_start_time
-                    else:
-                        posture_info['good_time'] = 0
-                    posture_info['bad_time'] = 0
-                else:
-                    # 計算目前連續不正確姿勢時間
-                    if self.bad_posture_start_time is not None:
-                        posture_info['bad_time'] = current_time - self.bad_posture_start_time
-                    else:
-                        posture_info['bad_time'] = 0
-                    posture_info['good_time'] = 0
-
-                # 首次偵測到側面視角時，初始化時間戳
-                if posture_info['view_type'] == 'side':
-                    # 若為首次偵測，初始化相對應時間戳
-                    if posture_info['is_correct']:
-                        if self.good_posture_start_time is None:
-                            self.good_posture_start_time = current_time
-                    else:
-                        if self.bad_posture_start_time is None:
-                            self.bad_posture_start_time = current_time
-
-                # 當坐姿異常且持續時間超過閾值時，觸發語音播報
-                if (posture_info['view_type'] == 'side' and
-                    posture_info['is_correct'] == False and
-                    posture_info['bad_time'] > self.warning_time):  # 異常持續超過閾值
-                    if (current_time - self.last_warning_time) > self.warning_interval:
-                        print(f"觸發語音播報: bad_time={posture_info['bad_time']:.2f}s, warning_time={self.warning_time}s")
-                        self.audio_player.play_posture_warning(posture_info)
-                        self.last_warning_time = current_time
-
-                # 儲存本次偵測結果
-                self.last_posture_info = posture_info.copy()
-                self.last_keypoints = keypoints_dict
-        else:
-            # 跳幀時使用上一次的偵測結果，但更新時間戳（基於實際時間）
-            if self.last_posture_info is not None and self.last_keypoints is not None:
-                posture_info = self.last_posture_info.copy()
-                # 使用 time.time() 更新時間（基於實際經過時間）
-                current_time = time.time()
-
-                if posture_info.get('is_correct'):
-                    if self.good_posture_start_time is not None:
-                        posture_info['good_time'] = current_time - self.good_posture_start_time
-                    else:
-                        posture_info['good_time'] = 0
-                    posture_info['bad_time'] = 0
-                elif posture_info.get('is_correct') == False:
-                    if self.bad_posture_start_time is not None:
-                        posture_info['bad_time'] = current_time - self.bad_posture_start_time
-                    else:
-                        posture_info['bad_time'] = 0
-                    posture_info['good_time'] = 0
+        Args:
+            backend: PoseBackend
+        """
+        old, self.pose_backend = self.pose_backend, backend
+        if self.latency and self.latency.calibrated:
+            # 沿用目前等級，舊後端的延遲量測不再適用，由控制器依新量測重新調整
+            backend.set_complexity(self.latency.level.complexity)
+            self.latency.reset_measurements()
+        self.last_keypoints = None
+        old.close()
+        logger.info("姿勢模型後端已切換: %s -> %s", old.name, backend.name)
+
+    def add_alert_listener(self, callback):
+        """
+        註冊提醒回呼
 
-                # 繪製快取的偵測資訊（正面不繪製）
-                if posture_info['view_type'] == 'side':
-                    self._draw_side_cached(image_bgr, self.last_keypoints, posture_info, w, h)
-                elif posture_info['view_type'] == 'front':
-                    # 正面僅顯示視角標示
-                    cv2.putText(image_bgr, f"front (no detection)", (w - 200, 30),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.9, Config.COLOR_BLUE, 2)
+        Args:
+            callback: fn(alert, posture_info)；posture_info 於非姿勢提醒（例如久坐）時為 None
+        """
+        self.alert_listeners.append(callback)
 
-        # 顯示 FPS
-        cv2.putText(image_bgr, f'FPS: {int(self.fps)}', (w - 150, 60),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, Config.COLOR_BLUE, 2)
+    def evaluate_alerts(self, metrics, now=None, posture_info=None):
+        """
+        以量測值更新提醒規則，觸發時播放語音並通知回呼
 
-        return image_bgr, posture_info
+        Args:
+            metrics: {量測名稱: 數值}，例如 {'sitting_seconds': 1800}
+            now: 目前時間戳（預設 time.time()）
+            posture_info: 對應的姿勢結果（可為 None）
 
-    def _extract_keypoints(self, lm, lmPose, w, h):
-        """取出關鍵點座標"""
-        return {
-            'l_shldr_x': int(lm.landmark[lmPose.LEFT_SHOULDER].x * w),
-            'l_shldr_y': int(lm.landmark[lmPose.LEFT_SHOULDER].y * h),
-            'r_shldr_x': int(lm.landmark[lmPose.RIGHT_SHOULDER].x * w),
-            'r_shldr_y': int(lm.landmark[lmPose.RIGHT_SHOULDER].y * h),
-            'l_ear_x': int(lm.landmark[lmPose.LEFT_EAR].x * w),
-            'l_ear_y': int(lm.landmark[lmPose.LEFT_EAR].y * h),
-            'r_ear_x': int(lm.landmark[lmPose.RIGHT_EAR].x * w),
-            'r_ear_y': int(lm.landmark[lmPose.RIGHT_EAR].y * h),
-            'l_eye_x': int(lm.landmark[lmPose.LEFT_EYE].x * w),
-            'l_eye_y': int(lm.landmark[lmPose.LEFT_EYE].y * h),
-            'r_eye_x': int(lm.landmark[lmPose.RIGHT_EYE].x * w),
-            'r_eye_y': int(lm.landmark[lmPose.RIGHT_EYE].y * h),
-            'l_hip_x': int(lm.landmark[lmPose.LEFT_HIP].x * w),
-            'l_hip_y': int(lm.landmark[lmPose.LEFT_HIP].y * h),
-            'r_hip_x': int(lm.landmark[lmPose.RIGHT_HIP].x * w),
-            'r_hip_y': int(lm.landmark[lmPose.RIGHT_HIP].y * h),
-        }
-
-    def _process_side_view(self, image, kp, offset, posture_info):
-        """處理側面視角 - 只繪製必要的關鍵點與連線"""
-        w = image.shape[1]
-
-        cv2.putText(image, f"{int(offset)} side", (w - 150, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, Config.COLOR_DARK_BLUE, 2)
-
-        # 計算角度
-        neck_inclination = findAngle_ver(kp['l_shldr_x'], kp['l_shldr_y'], kp['l_ear_x'], kp['l_ear_y'])
-        torso_inclination = findAngle_ver(kp['l_hip_x'], kp['l_hip_y'], kp['l_shldr_x'], kp['l_shldr_y'])
-
-        posture_info['angles'] = {'neck': neck_inclination, 'torso': torso_inclination}
-
-        # 判斷姿勢
-        is_correct = (neck_inclination < self.side_neck_threshold and
-                      torso_inclination < self.side_torso_threshold)
-
-        current_time = time.time()
-
-        if is_correct:
-            # 若先前是不正確姿勢，現在轉為正確，累計不正確時間並重置
-            if self.bad_posture_start_time is not None:
-                elapsed_bad_time = current_time - self.bad_posture_start_time
-                self.total_bad_time += elapsed_bad_time
-                self.bad_posture_start_time = None
-
-            # 記錄正確姿勢開始時間（若尚未記錄）
-            if self.good_posture_start_time is None:
-                self.good_posture_start_time = current_time
-
-            self.bad_frames = 0
-            self.good_frames += 1
-            posture_info['is_correct'] = True
-            color = Config.COLOR_LIGHT_GREEN
-        else:
-            # 若先前是正確姿勢，現在轉為不正確，累計正確時間並重置
-            if self.good_posture_start_time is not None:
-                elapsed_good_time = current_time - self.good_posture_start_time
-                self.total_good_time += elapsed_good_time
-                self.good_posture_start_time = None
+        Returns:
+            list: 本次觸發的 Alert
+        """
+        now = time.time() if now is None else now
+        alerts = self.alert_engine.evaluate(metrics, now)
+        if alerts:
+            self._dispatch_alerts(alerts, posture_info)
+        return alerts
+
+    def _dispatch_alerts(self, alerts, posture_info):
+        """播放最高優先順序的提醒語音，並通知所有回呼"""
+        alert = alerts[0]
+        tracer.instant('alert', 'alert', {'name': alert.name, 'value': round(alert.value, 1)})
+        logger.info("觸發語音播報: %s（%s=%.1f，門檻 %.1f）",
+                    alert.name, alert.metric, alert.value, alert.threshold)
+        self.audio_player.play_alert(alert)
+        for callback in self.alert_listeners:
+            for item in alerts:
+                callback(item, posture_info)
+
+    def process_frame(self, frame, skip_frames=1, timestamp=None):
+        """
+        處理單幀影像（執行整個階段圖）
 
-            # 記錄不正確姿勢開始時間（若尚未記錄）
-            if self.bad_posture_start_time is None:
-                self.bad_posture_start_time = current_time
+        Args:
+            frame: BGR 影像
+            skip_frames: 每隔幾幀做一次姿勢偵測
+            timestamp: 影像時間戳（秒）；None 表示使用目前時間
 
-            self.good_frames = 0
-            self.bad_frames += 1
-            posture_info['is_correct'] = False
-            color = Config.COLOR_RED
+        Returns:
+            tuple: (繪製後的影像, 姿勢資訊 PostureResult)
+        """
+        start = time.perf_counter()
+        ctx = self.graph.run(FrameContext(frame, timestamp, skip_frames))
+        if self.latency is not None:
+            self.latency.observe((time.perf_counter() - start) * 1000.0)
+        return ctx.output
+
+    def _infer(self, frame, should_detect):
+        """
+        臉部偵測（每幀）與姿勢偵測（偵測幀），座標一律換回原始影像
+        （執行階段圖的 preprocess 到 pose）
+
+        Returns:
+            tuple: (臉部框列表, Keypoints 或 None)
+        """
+        ctx = self.graph.run(FrameContext(frame, should_detect=should_detect), 'preprocess', 'pose')
+        return ctx.face_boxes, ctx.keypoints
+
+    def check_presence(self, frame, width=None):
+        """
+        低功耗待機用的在座檢查：在縮小的影像上先做臉部偵測，沒有臉時再以最低複雜度的姿勢模型確認
+        （與全速時相同，臉部或姿勢任一偵測到即視為有人；側坐時通常偵測不到臉）
+
+        Args:
+            frame: BGR 影像
+            width: 檢查用的影像寬度（預設 Config.POWER_IDLE_CHECK_WIDTH）
+
+        Returns:
+            str: 偵測到人的方式 'face'／'pose'；None 表示沒有人
+        """
+        h, w = frame.shape[:2]
+        cw = min(w, width or Config.POWER_IDLE_CHECK_WIDTH)
+        ch = max(1, int(h * cw / w))
+        small = self.buffers.get('presence_bgr', (ch, cw, 3))
+        cv2.resize(frame, (cw, ch), dst=small, interpolation=cv2.INTER_AREA)
+        small_rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=self.buffers.get('presence_rgb', (ch, cw, 3)))
+        if detect_faces(self.face_detection, small_rgb):
+            return 'face'
+        if self.idle_pose is None:
+            # 待機專用的同步後端（只在第一次需要時建立，不影響全速時的後端與其追蹤狀態）
+            self.idle_pose = create_pose_backend('legacy', complexity=Config.POWER_IDLE_POSE_COMPLEXITY)
+        if detect_pose(self.idle_pose, small_rgb) is not None:
+            return 'pose'
+        return None
+
+    def _apply_tuning(self, level):
+        """套用延遲預算控制器選擇的等級"""
+        self.pose_backend.set_complexity(level.complexity)
+        self.inference_width = level.width
+        self.auto_skip = max(1, level.skip)
+
+    def _probe_level(self, frame, level):
+        """以目前影像量測某等級的平均每幀推論延遲（不更新統計，第一幀為暖機）"""
+        self._apply_tuning(level)
+        frames = max(2, Config.LATENCY_PROBE_FRAMES)
+        elapsed = 0.0
+        for i in range(frames):
+            start = time.perf_counter()
+            self._infer(frame, i % self.auto_skip == 0)
+            if i > 0:
+                elapsed += time.perf_counter() - start
+        return elapsed * 1000.0 / (frames - 1)
+
+    def apply_inference(self, frame, face_boxes, keypoints_dict, should_detect=True, timestamp=None):
+        """
+        套用推論結果：視角判斷、計時、語音提醒與繪製（執行階段圖的 classify 之後）
 
-        # 繪製關鍵點與連線
-        self._draw_side_keypoints(image, kp, color, neck_inclination, torso_inclination)
+        推論（臉部／姿勢偵測）與此步驟分離，讓推論可在其他行程執行，
+        主行程只需拿回精簡的臉部框與關鍵點即可
+
+        Args:
+            frame: BGR 影像（會直接在上面繪製）
+            face_boxes: 臉部框列表 [(x, y, w, h), ...]
+            keypoints_dict: 關鍵點座標（Keypoints）；未偵測到人為 None
+            should_detect: 本幀是否為偵測幀（False 時沿用上一次的結果）
+            timestamp: 影像時間戳（秒）；None 表示使用目前時間
+
+        Returns:
+            tuple: (繪製後的影像, 姿勢資訊 PostureResult)
+        """
+        ctx = FrameContext(frame, timestamp, should_detect=should_detect,
+                           face_boxes=face_boxes, keypoints=keypoints_dict)
+        return self.graph.run(ctx, 'classify').output
+
+    def _update_presence(self, person_detected, now):
+        """更新在座計時並評估久坐規則；觸發後重新計時"""
+        sitting_seconds = self.presence.update(person_detected, now)
+        self._presence_metrics['sitting_seconds'] = sitting_seconds if self.presence.present else None
+        alerts = self.evaluate_alerts(self._presence_metrics, now)
+        if any(alert.name == 'sitting' for alert in alerts):
+            self.alert_engine.clear('sitting')
+            self.presence.notify_reminder(now)
+
+    def _on_session_reset(self, start, end, sitting_seconds):
+        """在座工作階段結束：寫入歷史紀錄"""
+        if self.history and end is not None:
+            self.history.record_interval('sitting', start, end)
+
+    def _extract_keypoints(self, lm, lmPose, w, h):
+        """取出關鍵點座標"""
+        return extract_keypoints(lm, lmPose, w, h)
 
     def _draw_side_keypoints(self, image, kp, color, neck_angle, torso_angle):
         """繪製側面視角的關鍵點"""
-        # 繪製關鍵點
-        cv2.circle(image, (kp['l_shldr_x'], kp['l_shldr_y']), 7, Config.COLOR_YELLOW, -1)
-        cv2.circle(image, (kp['l_ear_x'], kp['l_ear_y']), 7, Config.COLOR_YELLOW, -1)
-        cv2.circle(image, (kp['l_hip_x'], kp['l_hip_y']), 7, Config.COLOR_YELLOW, -1)
-        cv2.circle(image, (kp['l_shldr_x'], kp['l_shldr_y'] - 100), 7, Config.COLOR_YELLOW, -1)
-        cv2.circle(image, (kp['l_hip_x'], kp['l_hip_y'] - 100), 7, Config.COLOR_YELLOW, -1)
-
-        # 繪製連線
-        cv2.line(image, (kp['l_shldr_x'], kp['l_shldr_y']), (kp['l_ear_x'], kp['l_ear_y']), color, 4)
-        cv2.line(image, (kp['l_shldr_x'], kp['l_shldr_y']), (kp['l_shldr_x'], kp['l_shldr_y'] - 100), color, 4)
-        cv2.line(image, (kp['l_hip_x'], kp['l_hip_y']), (kp['l_shldr_x'], kp['l_shldr_y']), color, 4)
-        cv2.line(image, (kp['l_hip_x'], kp['l_hip_y']), (kp['l_hip_x'], kp['l_hip_y'] - 100), color, 4)
-
-        # 顯示角度文字（關鍵！）
-        angle_text = f'Neck: {int(neck_angle)}  Torso: {int(torso_angle)}'
-        cv2.putText(image, angle_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
-
-        # 在關鍵點旁顯示角度數值
-        cv2.putText(image, str(int(neck_angle)), (kp['l_shldr_x'] + 10, kp['l_shldr_y']),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
-        cv2.putText(image, str(int(torso_angle)), (kp['l_hip_x'] + 10, kp['l_hip_y']),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
+        draw_side_keypoints(image, kp, color, neck_angle, torso_angle)
 
     def _draw_side_cached(self, image, kp, posture_info, w, h):
         """繪製快取的側面視角資訊"""
-        color = Config.COLOR_LIGHT_GREEN if posture_info['is_correct'] else Config.COLOR_RED
+        color = Config.COLOR_LIGHT_GREEN if posture_info.is_correct else Config.COLOR_RED
         self._draw_side_keypoints(image, kp, color,
-                                  posture_info['angles'].get('neck', 0),
-                                  posture_info['angles'].get('torso', 0))
+                                  posture_info.neck_angle or 0,
+                                  posture_info.torso_angle or 0)
         cv2.putText(image, "(cached)", (w - 150, 55), cv2.FONT_HERSHEY_SIMPLEX, 0.6, Config.COLOR_DARK_BLUE, 2)
 
+    @property
+    def good_posture_start_time(self):
+        """目前連續正確姿勢的開始時間戳（非正確姿勢時為 None）"""
+        return self.timeline.open_start if self.timeline.open_state == STATE_GOOD else None
+
+    @property
+    def bad_posture_start_time(self):
+        """目前連續不正確姿勢的開始時間戳（非不正確姿勢時為 None）"""
+        return self.timeline.open_start if self.timeline.open_state == STATE_BAD else None
+
+    @property
+    def total_good_time(self):
+        """已結束區段的累計正確坐姿時間（秒）"""
+        return self.timeline.total(STATE_GOOD)
+
+    @property
+    def total_bad_time(self):
+        """已結束區段的累計不正確坐姿時間（秒）"""
+        return self.timeline.total(STATE_BAD)
+
+    def _on_run_closed(self, state, start, end):
+        """時間軸區段結束時寫入歷史紀錄"""
+        if self.history:
+            self.history.record_interval(state, start, end)
+
+    def _clock(self):
+        """統計查詢用的目前時間：使用容器時間戳時為最近一幀的時間，否則為目前時間"""
+        if self._explicit_time and self.last_frame_time is not None:
+            return self.last_frame_time
+        return time.time()
+
     def get_statistics(self):
         """
         取得統計資訊（累計時間）
@@ -382,41 +474,351 @@ class PostureDetector:
         Returns:
             tuple: (累計正確坐姿時間(秒), 累計不正確坐姿時間(秒), 累計總坐姿時間(秒))
         """
-        # 計算目前未結束的時間區段並加總至統計中
-        current_time = time.time()
-
-        # 若目前是不正確姿勢，將目前時間段加到 total_bad_time
-        current_total_bad_time = self.total_bad_time
-        if self.bad_posture_start_time is not None:
-            current_total_bad_time += (current_time - self.bad_posture_start_time)
-
-        # 若目前是正確姿勢，將目前時間段加到 total_good_time
-        current_total_good_time = self.total_good_time
-        if self.good_posture_start_time is not None:
-            current_total_good_time += (current_time - self.good_posture_start_time)
+        # 累計值含目前未結束的區段
+        current_time = self._clock()
+        current_total_good_time = self.timeline.total(STATE_GOOD, current_time)
+        current_total_bad_time = self.timeline.total(STATE_BAD, current_time)
 
         # 總坐姿時間 = 正確時間 + 不正確時間
         current_total_sitting_time = current_total_good_time + current_total_bad_time
 
         return current_total_good_time, current_total_bad_time, current_total_sitting_time
 
+    def get_window_statistics(self, seconds):
+        """
+        取得最近一段時間的統計（例如最近 15 分鐘），O(log n)
+
+        Args:
+            seconds: 時間窗長度（秒）
+
+        Returns:
+            tuple: (時間窗內正確坐姿時間(秒), 時間窗內不正確坐姿時間(秒))
+        """
+        totals = self.timeline.rolling(seconds, self._clock())
+        return totals[STATE_GOOD], totals[STATE_BAD]
+
     def reset_statistics(self):
         """重置統計資訊"""
+        # 進行中的區段先結束（寫入歷史紀錄）再清除
+        self.timeline.close(self._clock())
+        self.timeline.clear()
+        self.alert_engine.reset()
+        self.presence.reset()
         self.good_frames = 0
         self.bad_frames = 0
         self.total_frames = 0
         self.frame_counter = 0
-        # 重置累計時間統計
-        self.total_good_time = 0.0
-        self.total_bad_time = 0.0
-        self.total_sitting_time = 0.0
-        # 重置時間戳
-        self.bad_posture_start_time = None
-        self.good_posture_start_time = None
-        self.last_posture_change_time = None
 
     def release(self):
         """釋放資源"""
-        self.pose.close()
+        self.pose_backend.close()
+        if self.idle_pose is not None:
+            self.idle_pose.close()
+            self.idle_pose = None
+        self.face_detection.close()
         if hasattr(self, 'audio_player'):
             self.audio_player.release()
+        if self.history:
+            self.timeline.close(self._clock())
+            self.presence.reset()
+            self.history.close()
+            self.history = None
+
+
+# ==================== 單幀處理階段（PostureDetector 的預設階段圖） ====================
+
+class DetectorStage(Stage):
+    """存取 PostureDetector 狀態的階段"""
+
+    def __init__(self, detector, executor=None):
+        super().__init__(executor=executor)
+        self.detector = detector
+
+
+class SourceStage(DetectorStage):
+    """延遲預算校準與跳幀判斷"""
+
+    name = 'source'
+    inputs = ('frame', 'skip_frames')
+    outputs = ('should_detect',)
+
+    def run(self, ctx):
+        det = self.detector
+        if det.latency is not None:
+            if not det.latency.calibrated:
+                det.latency.calibrate(lambda level: det._probe_level(ctx.frame, level))
+            ctx.skip_frames = det.auto_skip
+
+        # 跳幀邏輯
+        det.frame_counter += 1
+        ctx.should_detect = (det.frame_counter % ctx.skip_frames == 0)
+
+
+class PreprocessStage(DetectorStage):
+    """BGR 轉 RGB，需要時縮小為推論寬度"""
+
+    name = 'preprocess'
+    inputs = ('frame',)
+    outputs = ('image_rgb', 'scale')
+
+    def run(self, ctx):
+        det = self.detector
+        frame = ctx.frame
+        # OpenCV 攝影機影像幀是 BGR；MediaPipe 需要 RGB
+        # 這裡統一：偵測用 RGB，所有繪製都在 BGR 上進行（Config 內顏色也以 BGR 定義）
+        # 轉換結果直接寫入預先配置的緩衝區
+        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=det.buffers.get('rgb', frame.shape))
+
+        h, w = frame.shape[:2]
+        scale = 1.0
+        if det.inference_width and det.inference_width < w:
+            # 縮小後再推論（延遲預算控制），結果座標乘上 scale 換回原始影像
+            iw = det.inference_width
+            ih = max(1, int(h * iw / w))
+            small = det.buffers.get('rgb_small', (ih, iw, 3))
+            cv2.resize(image_rgb, (iw, ih), dst=small, interpolation=cv2.INTER_AREA)
+            image_rgb = small
+            scale = w / iw
+        ctx.image_rgb = image_rgb
+        ctx.scale = scale
+
+
+class PresenceStage(DetectorStage):
+    """臉部偵測（每幀）"""
+
+    name = 'presence'
+    inputs = ('image_rgb', 'scale')
+    outputs = ('face_boxes',)
+
+    def run(self, ctx):
+        face_boxes = detect_faces(self.detector.face_detection, ctx.image_rgb)
+        scale = ctx.scale
+        if scale != 1.0:
+            face_boxes = [(int(x * scale), int(y * scale), int(bw * scale), int(bh * scale))
+                          for x, y, bw, bh in face_boxes]
+        ctx.face_boxes = face_boxes
+
+
+class PoseStage(DetectorStage):
+    """姿勢偵測（偵測幀）"""
+
+    name = 'pose'
+    inputs = ('image_rgb', 'scale', 'should_detect')
+    outputs = ('keypoints',)
+
+    def run(self, ctx):
+        keypoints = detect_pose(self.detector.pose_backend, ctx.image_rgb) if ctx.should_detect else None
+        if keypoints is not None and ctx.scale != 1.0:
+            keypoints = keypoints.scaled(ctx.scale)
+        ctx.keypoints = keypoints
+
+
+class ClassifyStage(DetectorStage):
+    """臉部中心、視角判斷、角度與坐姿判斷（不涉及時間）"""
+
+    name = 'classify'
+    inputs = ('face_boxes', 'keypoints', 'should_detect')
+    outputs = ('posture_info', 'face_center', 'offset')
+
+    def run(self, ctx):
+        det = self.detector
+        # 本幀結果（發布前才會修改欄位；person_detected 供上層做久坐計時／重置使用）
+        posture_info = PostureResult()
+
+        face_boxes = ctx.face_boxes
+        face_center = None
+        if face_boxes:
+            posture_info.person_detected = True
+            cx, cy, cw, ch = face_boxes[-1]
+            face_center = (cx + cw // 2, cy + ch // 2)
+        det.last_face_boxes = face_boxes
+
+        # 若未偵測到臉部，使用上一次的結果
+        if face_center is None:
+            face_center = det.last_face_center
+        else:
+            det.last_face_center = face_center
+
+        kp = ctx.keypoints
+        ctx.offset = None
+        if ctx.should_detect and kp is not None:
+            posture_info.person_detected = True
+
+            # 計算肩膀距離判斷視角
+            offset = findDistance(kp.l_shldr_x, kp.l_shldr_y, kp.r_shldr_x, kp.r_shldr_y)
+            ctx.offset = offset
+
+            if offset > Config.FRONT_VIEW_THRESHOLD:  # 正面視角
+                # 正面視角僅判斷視角類型，不進行偵測
+                posture_info.view_type = 'front'
+                posture_info.is_correct = None
+            else:  # 側面視角
+                posture_info.view_type = 'side'
+                neck_inclination, torso_inclination = side_view_angles(kp)
+                posture_info.neck_angle = neck_inclination
+                posture_info.torso_angle = torso_inclination
+                posture_info.is_correct = (neck_inclination < det.side_neck_threshold and
+                                           torso_inclination < det.side_torso_threshold)
+                if face_boxes:
+                    # 臉部中心到肩膀中心的距離（判斷低頭／仰頭）
+                    posture_info.head_distance = findDistance(
+                        face_center[0], face_center[1],
+                        (kp.l_shldr_x + kp.r_shldr_x) / 2,
+                        (kp.l_shldr_y + kp.r_shldr_y) / 2)
+
+        ctx.face_center = face_center
+        ctx.posture_info = posture_info
+
+
+class TemporalStage(DetectorStage):
+    """時鐘與 FPS、姿勢時間軸、連續姿勢時間；非偵測幀沿用上一次的結果"""
+
+    name = 'temporal'
+    inputs = ('timestamp', 'posture_info', 'keypoints', 'should_detect')
+    outputs = ('now', 'posture_info', 'cached')
+
+    def run(self, ctx):
+        det = self.detector
+
+        # 計算 FPS（處理速度，一律以實際時間計算）
+        wall = time.time()
+        fps_time = wall - det.start_time
+        det.start_time = wall
+
+        # 計時、提醒與在座判斷使用的時間
+        now = wall if ctx.timestamp is None else ctx.timestamp
+        det.last_frame_time = now
+        det._explicit_time = ctx.timestamp is not None
+        det.fps = 1 / fps_time if fps_time > 0 else 0
+        ctx.now = now
+        ctx.cached = False
+
+        posture_info = ctx.posture_info
+        if ctx.should_detect:
+            if ctx.keypoints is not None:
+                det.total_frames += 1
+                if posture_info.view_type == 'side':
+                    # 記錄到時間軸：狀態改變時結束前一區段並開始新區段，相同狀態則延續
+                    state = STATE_GOOD if posture_info.is_correct else STATE_BAD
+                    if det.timeline.mark(state, now) and det.history:
+                        det.history.record_transition(now, state)
+                    if posture_info.is_correct:
+                        det.bad_frames = 0
+                        det.good_frames += 1
+                    else:
+                        det.good_frames = 0
+                        det.bad_frames += 1
+
+                # 以時間戳計算目前連續姿勢時間（更準確，不依賴 FPS）
+                if posture_info.is_correct:
+                    if det.good_posture_start_time is not None:
+                        posture_info.good_time = now - det.good_posture_start_time
+                else:
+                    if det.bad_posture_start_time is not None:
+                        posture_info.bad_time = now - det.bad_posture_start_time
+
+                # 儲存本次偵測結果（結果發布後不再修改，直接保存參照）
+                det.last_posture_info = posture_info
+                det.last_keypoints = ctx.keypoints
+        elif det.last_posture_info is not None and det.last_keypoints is not None:
+            # 跳幀時使用上一次的偵測結果，但更新時間（基於實際經過時間）
+            cached = det.last_posture_info
+            if cached.is_correct:
+                good_time = 0
+                if det.good_posture_start_time is not None:
+                    good_time = now - det.good_posture_start_time
+                posture_info = cached.with_times(good_time, 0)
+            elif cached.is_correct == False:
+                bad_time = 0
+                if det.bad_posture_start_time is not None:
+                    bad_time = now - det.bad_posture_start_time
+                posture_info = cached.with_times(0, bad_time)
+            else:
+                posture_info = cached.with_times(cached.good_time, cached.bad_time)
+            ctx.cached = True
+        ctx.posture_info = posture_info
+
+
+class AlertStage(DetectorStage):
+    """姿勢提醒規則（偵測幀、側面視角）與在座計時／久坐提醒"""
+
+    name = 'alert'
+    inputs = ('posture_info', 'keypoints', 'should_detect', 'now')
+    outputs = ()
+
+    def run(self, ctx):
+        det = self.detector
+        posture_info = ctx.posture_info
+        # 提醒規則只在側面視角評估（各規則自行處理遲滯、持續時間與冷卻）
+        if ctx.should_detect and ctx.keypoints is not None and posture_info.view_type == 'side':
+            metrics = det._metrics
+            metrics['neck_angle'] = posture_info.neck_angle
+            metrics['torso_angle'] = posture_info.torso_angle
+            metrics['head_distance'] = posture_info.head_distance
+            alerts = det.alert_engine.evaluate(metrics, ctx.now)
+            if alerts:
+                det._dispatch_alerts(alerts, posture_info)
+
+        # 久坐計時（與坐姿是否正確無關，只要偵測到人就累計）
+        det._update_presence(posture_info.person_detected, ctx.now)
+
+
+class OverlayStage(DetectorStage):
+    """在 BGR 影像上繪製臉部框、視角、關鍵點與 FPS（無畫面執行時可移除）"""
+
+    name = 'overlay'
+    inputs = ('frame', 'face_boxes', 'keypoints', 'offset', 'posture_info', 'cached')
+    outputs = ()
+
+    def run(self, ctx):
+        det = self.detector
+        image = ctx.frame
+        h, w = image.shape[:2]
+        for cx, cy, cw, ch in ctx.face_boxes:
+            cv2.rectangle(image, (cx, cy), (cx + cw, cy + ch), Config.COLOR_BLUE, 2)
+            cv2.circle(image, (cx + cw // 2, cy + ch // 2), 5, Config.COLOR_BLUE, -1)
+
+        posture_info = ctx.posture_info
+        if ctx.offset is not None:
+            if posture_info.view_type == 'front':
+                cv2.putText(image, f"{int(ctx.offset)} front (no detection)", (w - 200, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.9, Config.COLOR_BLUE, 2)
+            else:
+                cv2.putText(image, f"{int(ctx.offset)} side", (w - 150, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.9, Config.COLOR_DARK_BLUE, 2)
+                color = Config.COLOR_LIGHT_GREEN if posture_info.is_correct else Config.COLOR_RED
+                det._draw_side_keypoints(image, ctx.keypoints, color,
+                                         posture_info.neck_angle, posture_info.torso_angle)
+        elif ctx.cached:
+            # 繪製快取的偵測資訊（正面僅顯示視角標示）
+            if posture_info.view_type == 'side':
+                det._draw_side_cached(image, det.last_keypoints, posture_info, w, h)
+            elif posture_info.view_type == 'front':
+                cv2.putText(image, "front (no detection)", (w - 200, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.9, Config.COLOR_BLUE, 2)
+
+        # 顯示 FPS
+        cv2.putText(image, f'FPS: {int(det.fps)}', (w - 150, 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, Config.COLOR_BLUE, 2)
+
+
+class SinkStage(DetectorStage):
+    """組成輸出 (影像, PostureResult)，並通知已登錄的接收端"""
+
+    name = 'sink'
+    inputs = ('frame', 'posture_info')
+    outputs = ('output',)
+
+    def __init__(self, detector, executor=None):
+        super().__init__(detector, executor)
+        self.consumers = []  # fn(image, posture_info)
+
+    def run(self, ctx):
+        ctx.output = (ctx.frame, ctx.posture_info)
+        for consumer in self.consumers:
+            consumer(ctx.frame, ctx.posture_info)
+
+
+for _stage in (SourceStage, PreprocessStage, PresenceStage, PoseStage, ClassifyStage,
+               TemporalStage, AlertStage, OverlayStage, SinkStage):
+    register_stage(_stage.name, _stage)
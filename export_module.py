@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/21 16:10
+# User : l'r's
+# Software: PyCharm
+# File : export_module.py
+"""
+輸出錄影模組 - Export Sink Module
+將標註後的影像寫成影片檔：整段錄影，以及提醒觸發時保存「前 N 秒 + 後 M 秒」的證據片段。
+編碼與寫檔都在背景執行緒進行；偵測端只複製影像後放入佇列，
+待寫入的幀達到上限時直接丟棄並計數，不會拖慢偵測
+"""
+
+import collections
+import logging
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+from config_module import Config
+
+logger = logging.getLogger(__name__)
+
+
+class _Stream:
+    """單一輸出檔：依時間戳補幀／丟幀，讓固定幀率的影片長度與實際時間一致"""
+
+    def __init__(self, path, fps, codec, size):
+        self.path = path
+        self.fps = fps
+        self.size = size
+        self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), fps, size)
+        self.start = None
+        self.written = 0
+
+    def add(self, frame, ts):
+        if self.start is None:
+            self.start = ts
+        if (frame.shape[1], frame.shape[0]) != self.size:
+            frame = cv2.resize(frame, self.size)
+        target = int((ts - self.start) * self.fps) + 1
+        # 長時間沒有畫面（例如待機）時不補滿整段空白，只補到上限
+        max_gap = max(1, int(Config.EXPORT_MAX_GAP_SECONDS * self.fps))
+        if target - self.written > max_gap:
+            self.start += (target - self.written - max_gap) / self.fps
+            target = self.written + max_gap
+        while self.written < target:
+            self.writer.write(frame)
+            self.written += 1
+
+    def close(self):
+        self.writer.release()
+
+
+class ExportSink:
+    """輸出錄影（背景執行緒寫檔，佇列滿時丟幀）"""
+
+    def __init__(self, output_dir=None, record_session=None, record_clips=None,
+                 pre_roll=None, post_roll=None, fps=None, codec=None, extension=None,
+                 scale=None, queue_size=None, clip_alerts=None):
+        """
+        Args:
+            output_dir: 輸出資料夾
+            record_session: 是否錄製整段標註影像
+            record_clips: 是否於提醒觸發時保存片段
+            pre_roll: 片段包含觸發前的秒數
+            post_roll: 片段包含觸發後的秒數（期間再次觸發會延長）
+            fps: 輸出幀率
+            codec: FourCC 編碼，例如 'mp4v'、'XVID'、'avc1'
+            extension: 副檔名，需與編碼相容（例如 '.mp4'、'.avi'）
+            scale: 輸出縮放比例（在偵測端複製時一併縮小，減少佇列記憶體）
+            queue_size: 待寫入幀數上限，超過即丟幀
+            clip_alerts: 觸發片段的提醒名稱；None 表示全部
+        """
+        self.output_dir = output_dir or Config.EXPORT_DIR
+        self.record_session = Config.EXPORT_SESSION_ENABLED if record_session is None else record_session
+        self.record_clips = Config.EXPORT_CLIPS_ENABLED if record_clips is None else record_clips
+        self.pre_roll = pre_roll if pre_roll is not None else Config.EXPORT_PRE_ROLL_SECONDS
+        self.post_roll = post_roll if post_roll is not None else Config.EXPORT_POST_ROLL_SECONDS
+        self.fps = fps or Config.EXPORT_FPS
+        self.codec = codec or Config.EXPORT_CODEC
+        self.extension = extension or Config.EXPORT_EXTENSION
+        self.scale = scale or Config.EXPORT_SCALE
+        self.queue_size = queue_size or Config.EXPORT_QUEUE_SIZE
+        self.clip_alerts = clip_alerts if clip_alerts is not None else Config.EXPORT_CLIP_ALERTS
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        # 偵測端狀態（只在呼叫 push／trigger 的執行緒存取）
+        self._ring = collections.deque()  # 片段前置緩衝 [(ts, frame), ...]
+        self._ring_next = None            # 下一個放入前置緩衝的時間（依輸出幀率取樣）
+        self._send_next = None            # 下一個送往寫檔執行緒的時間（整段錄影與片段，依輸出幀率取樣）
+        self._clip_id = 0
+        self._clip_end = None             # 進行中片段的結束時間；None 表示沒有
+        self._session_open = False
+
+        # 統計（dropped 只由偵測端累加）
+        self.pushed = 0
+        self.dropped = 0
+        self.written = 0
+        self.clips = 0
+        self._last_report = time.monotonic()
+        self._dropped_reported = 0
+
+        # 控制訊息（開檔／關檔）一律放入；只有幀訊息受上限限制，順序仍由同一佇列保證
+        self._queue = queue.SimpleQueue()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._closed = False
+        self._writer = threading.Thread(target=self._writer_loop, name="export-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    def enabled(self):
+        return self.record_session or self.record_clips
+
+    # ==================== 偵測端（熱路徑只做複製與 put） ====================
+
+    def push(self, frame, timestamp=None):
+        """
+        送出一幀標註後的影像
+
+        Args:
+            frame: BGR 影像（會複製，呼叫端可立即重用緩衝區）
+            timestamp: 時間戳（預設 time.time()；影片檔請傳容器時間）
+        """
+        if self._closed or not self.enabled:
+            return
+        ts = time.time() if timestamp is None else timestamp
+        self.pushed += 1
+
+        session = self.record_session
+        clip = self._clip_id if self._clip_end is not None else None
+        if clip is not None and ts > self._clip_end:
+            self._queue.put(('close', clip))
+            self._clip_end = None
+            clip = None
+        ring = self.record_clips and self._due(self._ring_next, ts)
+        # 寫檔端本來就依輸出幀率重新取樣，因此在偵測端先依幀率取樣，不複製也不排入多餘的幀
+        send = (session or clip is not None) and self._due(self._send_next, ts)
+        if send and not self._reserve():
+            self.dropped += 1
+            self._report_drops()
+            send = False
+        if not (send or ring):
+            return
+
+        if self.scale != 1.0:
+            h, w = frame.shape[:2]
+            copy = cv2.resize(frame, (max(2, int(w * self.scale) // 2 * 2), max(2, int(h * self.scale) // 2 * 2)),
+                              interpolation=cv2.INTER_AREA)
+        else:
+            copy = frame.copy()
+
+        if ring:
+            # 前置緩衝依輸出幀率取樣，記憶體上限約為 pre_roll × fps 幀
+            self._ring.append((ts, copy))
+            self._ring_next = self._advance(self._ring_next, ts)
+            while self._ring and self._ring[0][0] < ts - self.pre_roll:
+                self._ring.popleft()
+
+        if not send:
+            return
+        self._send_next = self._advance(self._send_next, ts)
+        if session and not self._session_open:
+            path = os.path.join(self.output_dir, f"session_{self._stamp(ts)}{self.extension}")
+            self._queue.put(('open', 'session', path))
+            self._session_open = True
+        self._queue.put(('frame', ts, copy, session, clip))
+
+    def trigger(self, name, timestamp=None):
+        """
+        提醒觸發：開始保存片段（含前置緩衝）；片段進行中再次觸發則延長結束時間
+
+        Args:
+            name: 提醒名稱（用於檔名）
+            timestamp: 觸發時間（與 push 使用相同時間基準）
+        """
+        if self._closed or not self.record_clips:
+            return
+        if self.clip_alerts is not None and name not in self.clip_alerts:
+            return
+        ts = time.time() if timestamp is None else timestamp
+        end = ts + self.post_roll
+        if self._clip_end is not None:
+            self._clip_end = max(self._clip_end, end)
+            return
+        self._clip_id += 1
+        self._clip_end = end
+        self.clips += 1
+        path = os.path.join(self.output_dir, f"clip_{self._stamp(ts)}_{name}{self.extension}")
+        # 前置緩衝的幀已經在記憶體中，直接交給寫檔執行緒，不占用幀數上限
+        pre = list(self._ring)
+        self._ring.clear()
+        self._ring_next = None
+        self._queue.put(('open', self._clip_id, path))
+        self._queue.put(('frames', self._clip_id, pre))
+        logger.info("開始保存提醒片段: %s（前 %.0f 秒 / 後 %.0f 秒）", path, self.pre_roll, self.post_roll)
+
+    def stop(self):
+        """結束目前的整段錄影與片段（之後再 push 會開新檔）"""
+        if self._clip_end is not None:
+            self._queue.put(('close', self._clip_id))
+            self._clip_end = None
+        if self._session_open:
+            self._queue.put(('close', 'session'))
+            self._session_open = False
+        self._ring.clear()
+        self._ring_next = None
+        self._send_next = None
+        if self.dropped:
+            logger.warning("輸出錄影丟棄 %d / %d 幀（寫檔速度跟不上，可降低 EXPORT_FPS 或 EXPORT_SCALE）",
+                           self.dropped, self.pushed)
+
+    def close(self, timeout=5.0):
+        """停止寫檔執行緒（先寫完佇列中的幀）"""
+        if self._closed:
+            return
+        self.stop()
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join(timeout)
+
+    def stats(self):
+        return {'pushed': self.pushed, 'written': self.written, 'dropped': self.dropped,
+                'pending': self._pending, 'clips': self.clips}
+
+    @staticmethod
+    def _due(next_due, ts):
+        # 容許 1 ms 誤差：輸入幀率是輸出幀率的整數倍時，時間戳與取樣點重合，浮點誤差不應造成漏取
+        return next_due is None or ts >= next_due - 1e-3
+
+    def _advance(self, next_due, ts):
+        """下一個取樣時間：固定在輸出幀率的時間格上（不因輸入時間戳的抖動累積延遲），中斷後重新對齊"""
+        interval = 1.0 / self.fps
+        if next_due is None or ts - next_due >= interval:
+            return ts + interval
+        return next_due + interval
+
+    def _reserve(self):
+        with self._pending_lock:
+            if self._pending >= self.queue_size:
+                return False
+            self._pending += 1
+            return True
+
+    def _report_drops(self):
+        now = time.monotonic()
+        if now - self._last_report >= Config.EXPORT_REPORT_INTERVAL:
+            logger.warning("輸出錄影寫檔跟不上，%.0f 秒內丟棄 %d 幀（累計 %d）",
+                           now - self._last_report, self.dropped - self._dropped_reported, self.dropped)
+            self._last_report = now
+            self._dropped_reported = self.dropped
+
+    @staticmethod
+    def _stamp(ts):
+        return time.strftime("%Y%m%d_%H%M%S", time.localtime(ts))
+
+    # ==================== 寫檔執行緒 ====================
+
+    def _writer_loop(self):
+        paths = {}    # 串流鍵 -> 路徑（第一幀到達時才依影像大小開檔）
+        streams = {}  # 串流鍵 -> _Stream
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            kind = item[0]
+            try:
+                if kind == 'frame':
+                    _, ts, frame, session, clip = item
+                    with self._pending_lock:
+                        self._pending -= 1
+                    for key in (('session' if session else None), clip):
+                        if key is not None and key in paths:
+                            self._write(paths, streams, key, frame, ts)
+                elif kind == 'frames':
+                    _, key, frames = item
+                    for ts, frame in frames:
+                        self._write(paths, streams, key, frame, ts)
+                elif kind == 'open':
+                    paths[item[1]] = item[2]
+                elif kind == 'close':
+                    paths.pop(item[1], None)
+                    stream = streams.pop(item[1], None)
+                    if stream is not None:
+                        stream.close()
+                        logger.info("輸出錄影完成: %s（%d 幀）", stream.path, stream.written)
+            except cv2.error as e:
+                logger.error("輸出錄影寫檔失敗: %s", e)
+        for stream in streams.values():
+            stream.close()
+
+    def _write(self, paths, streams, key, frame, ts):
+        stream = streams.get(key)
+        if stream is None:
+            h, w = frame.shape[:2]
+            stream = streams[key] = _Stream(paths[key], self.fps, self.codec, (w, h))
+            if not stream.writer.isOpened():
+                logger.error("無法建立輸出影片（編碼 %s）: %s", self.codec, stream.path)
+        before = stream.written
+        stream.add(frame, ts)
+        self.written += stream.written - before
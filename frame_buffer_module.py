@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/19 10:05
+# User : l'r's
+# Software: PyCharm
+# File : frame_buffer_module.py
+"""
+影像緩衝區模組 - Frame Buffer Module
+預先配置每幀要用的影像陣列，色彩轉換與縮放直接寫入既有緩衝區，
+只有解析度改變時才重新配置，並提供每幀配置次數／位元組數的量測
+"""
+
+import tracemalloc
+
+import numpy as np
+
+
+class FrameBufferPool:
+    """依名稱管理預先配置的影像緩衝區"""
+
+    def __init__(self):
+        self._buffers = {}
+
+        # 配置統計
+        self.allocations = 0        # 累計配置次數
+        self.allocated_bytes = 0    # 累計配置位元組
+        self.frames = 0             # 已結束的幀數
+        self.last_frame_allocations = 0
+        self.last_frame_bytes = 0
+        self.frames_since_allocation = 0  # 連續未配置的幀數（穩定狀態判斷）
+        self._frame_allocations = 0
+        self._frame_bytes = 0
+
+    def get(self, name, shape, dtype=np.uint8):
+        """
+        取得指定名稱的緩衝區；尺寸或型別不符時重新配置
+
+        Args:
+            name: 緩衝區名稱（例如 'rgb'、'display'）
+            shape: 陣列形狀
+            dtype: 資料型別
+
+        Returns:
+            numpy.ndarray: 可直接作為 dst 寫入的緩衝區
+        """
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buf
+            self.allocations += 1
+            self.allocated_bytes += buf.nbytes
+            self._frame_allocations += 1
+            self._frame_bytes += buf.nbytes
+        return buf
+
+    def clear(self):
+        """釋放所有緩衝區（例如解析度變更時），下次取用時重新配置"""
+        self._buffers.clear()
+
+    def end_frame(self):
+        """結束一幀的統計"""
+        self.frames += 1
+        self.last_frame_allocations = self._frame_allocations
+        self.last_frame_bytes = self._frame_bytes
+        if self._frame_allocations:
+            self.frames_since_allocation = 0
+        else:
+            self.frames_since_allocation += 1
+        self._frame_allocations = 0
+        self._frame_bytes = 0
+
+    def stats(self):
+        """
+        取得配置統計
+
+        Returns:
+            dict: 累計配置次數／位元組、最近一幀配置、每幀平均位元組、目前保留的緩衝區大小
+        """
+        return {
+            'frames': self.frames,
+            'allocations': self.allocations,
+            'allocated_bytes': self.allocated_bytes,
+            'last_frame_allocations': self.last_frame_allocations,
+            'last_frame_bytes': self.last_frame_bytes,
+            'bytes_per_frame': self.allocated_bytes / self.frames if self.frames else 0.0,
+            'frames_since_allocation': self.frames_since_allocation,
+            'resident_bytes': sum(buf.nbytes for buf in self._buffers.values()),
+        }
+
+
+class AllocationProbe:
+    """
+    以 tracemalloc 量測每幀的暫時配置量（numpy／OpenCV 產生的陣列都會被追蹤）
+
+    開啟時會拖慢執行速度，只用於確認穩定狀態沒有大型配置
+    """
+
+    def __init__(self, large_threshold=64 * 1024):
+        """
+        Args:
+            large_threshold: 單幀峰值超過此位元組數即視為「大型配置」
+        """
+        self.large_threshold = large_threshold
+        self.frames = 0
+        self.large_frames = 0
+        self.total_peak_bytes = 0
+        self.max_peak_bytes = 0
+        self._base = 0
+        self._started_here = False
+
+    def start(self):
+        """開始追蹤"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_here = True
+
+    def stop(self):
+        """停止追蹤（僅停止由本探針啟動的追蹤）"""
+        if self._started_here and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_here = False
+
+    def begin_frame(self):
+        """標記一幀的開始"""
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        self._base = tracemalloc.get_traced_memory()[0]
+
+    def end_frame(self):
+        """
+        標記一幀的結束
+
+        Returns:
+            int: 本幀相對於開始時的峰值配置位元組
+        """
+        _, peak = tracemalloc.get_traced_memory()
+        peak_bytes = max(0, peak - self._base)
+        self.frames += 1
+        self.total_peak_bytes += peak_bytes
+        self.max_peak_bytes = max(self.max_peak_bytes, peak_bytes)
+        if peak_bytes >= self.large_threshold:
+            self.large_frames += 1
+        return peak_bytes
+
+    def stats(self):
+        """
+        取得量測結果
+
+        Returns:
+            dict: 量測幀數、每幀平均／最大峰值、含大型配置的幀數
+        """
+        return {
+            'frames': self.frames,
+            'avg_peak_bytes': self.total_peak_bytes / self.frames if self.frames else 0.0,
+            'max_peak_bytes': self.max_peak_bytes,
+            'large_frames': self.large_frames,
+        }
@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/22 15:40
+# User : l'r's
+# Software: PyCharm
+# File : golden_module.py
+"""
+準確度回歸模組 - Golden Output Module
+以目前的完整管線（每幀解碼、每幀偵測、原始解析度、固定模型）記錄每幀輸出作為基準，
+之後任何效能設定（跳幀、縮小推論、取樣解碼、其他後端…）都與基準比較：
+分類一致率、角度誤差分布、提醒時間差、正確／不良總時間偏差，並與處理速度並列成一行報告
+
+時間一律使用影片容器時間戳，結果不受處理速度影響，可重現
+
+記錄基準：python golden_module.py record demo.MOV --variants all
+比較設定：python golden_module.py compare demo.MOV --configs skip2 width320 sample5hz skip2+width320
+"""
+
+import argparse
+import bisect
+import json
+import logging
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from config_module import Config, config_overrides
+from video_reader_module import SampledVideoReader
+
+logger = logging.getLogger(__name__)
+
+GOLDEN_VERSION = 1
+
+# 待比較的設定（可用 '+' 組合，例如 skip2+width320）
+CONFIGURATIONS = {
+    'reference': {},
+    'skip2': {'skip_frames': 2},
+    'skip3': {'skip_frames': 3},
+    'width480': {'inference_width': 480},
+    'width320': {'inference_width': 320},
+    'sample10hz': {'sample_hz': 10.0},
+    'sample5hz': {'sample_hz': 5.0},
+    'complexity0': {'complexity': 0},
+    'complexity2': {'complexity': 2},
+    'tasks': {'pose_backend': 'tasks'},
+    'onnx': {'pose_backend': 'onnx'},
+    'latency': {'latency': True},
+}
+
+# 由 demo 影片衍生的合成片段：檢查不同拍攝條件下的結果是否同樣穩定
+VARIANTS = {
+    'mirror': lambda frame: cv2.flip(frame, 1),
+    'dark': lambda frame: cv2.convertScaleAbs(frame, alpha=0.5, beta=0),
+    'bright': lambda frame: cv2.convertScaleAbs(frame, alpha=1.3, beta=30),
+    'small': lambda frame: cv2.resize(frame, (frame.shape[1] // 2, frame.shape[0] // 2),
+                                      interpolation=cv2.INTER_AREA),
+    'noise': lambda frame: cv2.add(frame, np.random.default_rng(frame.shape[0]).integers(
+        0, 24, frame.shape, dtype=np.uint8)),
+}
+
+
+def resolve_configuration(name):
+    """
+    'skip2+width320' -> {'skip_frames': 2, 'inference_width': 320}
+
+    Raises:
+        ValueError: 未知的設定名稱
+    """
+    options = {}
+    for part in name.split('+'):
+        if part not in CONFIGURATIONS:
+            raise ValueError(f"未知的設定: {part}（可用: {', '.join(CONFIGURATIONS)}）")
+        options.update(CONFIGURATIONS[part])
+    return options
+
+
+def golden_path(video_path, variant=None):
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    name = f"{stem}_{variant}.json" if variant else f"{stem}.json"
+    return os.path.join(Config.GOLDEN_DIR, name)
+
+
+def run_pipeline(video_path, options=None, variant=None, max_frames=None):
+    """
+    以指定設定處理影片並記錄每幀輸出
+
+    Args:
+        video_path: 影片路徑
+        options: resolve_configuration() 的結果
+        variant: 合成片段名稱（VARIANTS）；None 表示原始影片
+        max_frames: 處理幀數上限
+
+    Returns:
+        dict: {'frames': [[ts, is_correct, view_type, neck, torso, person], ...],
+               'alerts': [[name, ts], ...], 'good': 秒, 'bad': 秒, 'duration': 秒,
+               'decode_ms': 每個輸出幀平均的讀取／解碼毫秒（含取樣略過的幀）,
+               'process_ms': 每幀平均處理毫秒}
+    """
+    from detector_module import PostureDetector
+
+    options = options or {}
+    transform = VARIANTS[variant] if variant else None
+    with config_overrides(HISTORY_ENABLED=False,
+                           LATENCY_CONTROL_ENABLED=bool(options.get('latency'))):
+        detector = PostureDetector(pose_backend=options.get('pose_backend'))
+    # 比較時不播放語音（只透過回呼記錄提醒）
+    detector.audio_player.play_alert = lambda alert: None
+    if 'complexity' in options and not detector.pose_backend.set_complexity(options['complexity']):
+        logger.warning("後端 %s 不支援調整模型複雜度", detector.pose_backend.name)
+    if options.get('inference_width'):
+        detector.inference_width = options['inference_width']
+
+    alerts = []
+    detector.add_alert_listener(lambda alert, info: alerts.append([alert.name, alert.timestamp]))
+
+    reader = SampledVideoReader(video_path, sample_hz=options.get('sample_hz', 0))
+    skip_frames = options.get('skip_frames', 1)
+    frames = []
+    elapsed = 0.0
+    decode = 0.0
+    first_ts = last_ts = None
+    try:
+        while max_frames is None or len(frames) < max_frames:
+            # 取樣解碼省下的時間在讀取端，需與處理時間一起計入
+            start = time.perf_counter()
+            ok, frame = reader.read()
+            decode += time.perf_counter() - start
+            if not ok:
+                break
+            if transform is not None:
+                frame = transform(frame)
+            ts = reader.timestamp
+            start = time.perf_counter()
+            _, result = detector.process_frame(frame, skip_frames, ts)
+            elapsed += time.perf_counter() - start
+            frames.append([round(ts, 4), result.is_correct, result.view_type,
+                           None if result.neck_angle is None else round(result.neck_angle, 2),
+                           None if result.torso_angle is None else round(result.torso_angle, 2),
+                           result.person_detected])
+            first_ts = ts if first_ts is None else first_ts
+            last_ts = ts
+        good, bad, _ = detector.get_statistics()
+    finally:
+        reader.release()
+        detector.release()
+
+    return {
+        'frames': frames,
+        'alerts': alerts,
+        'good': good,
+        'bad': bad,
+        'duration': (last_ts - first_ts) if frames else 0.0,
+        'decode_ms': decode * 1000.0 / len(frames) if frames else 0.0,
+        'process_ms': elapsed * 1000.0 / len(frames) if frames else 0.0,
+    }
+
+
+def record(video_path, variant=None, max_frames=None):
+    """以基準設定記錄 golden 輸出"""
+    output = run_pipeline(video_path, resolve_configuration('reference'), variant, max_frames)
+    output.update(version=GOLDEN_VERSION, video=os.path.basename(video_path), variant=variant,
+                  pose_backend=Config.POSE_BACKEND, recorded=time.strftime("%Y-%m-%d %H:%M:%S"))
+    path = golden_path(video_path, variant)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, separators=(',', ':'))
+    logger.info("已記錄基準 %s：%d 幀, %d 次提醒", path, len(output['frames']), len(output['alerts']))
+    return path
+
+
+def load_golden(video_path, variant=None):
+    path = golden_path(video_path, variant)
+    with open(path, 'r', encoding='utf-8') as f:
+        golden = json.load(f)
+    if golden.get('version') != GOLDEN_VERSION:
+        raise ValueError(f"{path} 的格式版本不符，請重新記錄")
+    return golden
+
+
+def _percentile(ordered, q):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def match_alerts(reference, candidate, window):
+    """
+    依名稱與時間配對提醒（每個基準提醒配對時間最接近且未被使用的候選提醒）
+
+    Returns:
+        tuple: (時間差列表, 漏報數, 多報數)
+    """
+    used = set()
+    deltas = []
+    missed = 0
+    for name, ts in sorted(reference, key=lambda a: a[1]):
+        best = None
+        for i, (c_name, c_ts) in enumerate(candidate):
+            if i in used or c_name != name or abs(c_ts - ts) > window:
+                continue
+            if best is None or abs(c_ts - ts) < abs(candidate[best][1] - ts):
+                best = i
+        if best is None:
+            missed += 1
+        else:
+            used.add(best)
+            deltas.append(candidate[best][1] - ts)
+    return deltas, missed, len(candidate) - len(used)
+
+
+def compare(reference, candidate):
+    """
+    比較候選輸出與基準（以時間戳對齊到最接近的基準幀）
+
+    Returns:
+        dict: 各項指標與是否通過
+    """
+    ref_frames = reference['frames']
+    ref_ts = [row[0] for row in ref_frames]
+    tolerance = Config.GOLDEN_ANGLE_TOLERANCE
+
+    classified = agree = 0
+    views = view_agree = 0
+    errors = []
+    for row in candidate['frames']:
+        i = bisect.bisect_left(ref_ts, row[0])
+        if i == len(ref_ts) or (i > 0 and row[0] - ref_ts[i - 1] < ref_ts[i] - row[0]):
+            i -= 1
+        if i < 0:
+            continue
+        ref = ref_frames[i]
+        views += 1
+        view_agree += ref[2] == row[2]
+        if ref[1] is not None or row[1] is not None:
+            classified += 1
+            agree += ref[1] == row[1]
+        for k in (3, 4):
+            if ref[k] is not None and row[k] is not None:
+                errors.append(abs(ref[k] - row[k]))
+    errors.sort()
+
+    deltas, missed, extra = match_alerts(reference['alerts'], candidate['alerts'], Config.GOLDEN_ALERT_WINDOW)
+    duration = max(reference['duration'], 1e-6)
+    good_drift = (candidate['good'] - reference['good']) / duration
+    bad_drift = (candidate['bad'] - reference['bad']) / duration
+
+    frame_ms = candidate['decode_ms'] + candidate['process_ms']
+    metrics = {
+        'frames': len(candidate['frames']),
+        'decode_ms': candidate['decode_ms'],
+        'process_ms': candidate['process_ms'],
+        'frame_ms': frame_ms,
+        'realtime': (candidate['duration'] / (frame_ms * len(candidate['frames']) / 1000.0)
+                     if candidate['frames'] and frame_ms > 0 else 0.0),
+        'agreement': agree / classified if classified else 1.0,
+        'view_agreement': view_agree / views if views else 1.0,
+        'angle_within': (sum(1 for e in errors if e <= tolerance) / len(errors)) if errors else 1.0,
+        'angle_p50': _percentile(errors, 0.5),
+        'angle_p95': _percentile(errors, 0.95),
+        'angle_max': errors[-1] if errors else 0.0,
+        'alerts_matched': len(deltas),
+        'alerts_missed': missed,
+        'alerts_extra': extra,
+        'alert_dt': sum(abs(d) for d in deltas) / len(deltas) if deltas else 0.0,
+        'good_drift': good_drift,
+        'bad_drift': bad_drift,
+    }
+    metrics['passed'] = (metrics['agreement'] >= Config.GOLDEN_MIN_AGREEMENT and
+                         metrics['angle_p95'] <= Config.GOLDEN_MAX_ANGLE_P95 and
+                         abs(good_drift) <= Config.GOLDEN_MAX_TIME_DRIFT and
+                         abs(bad_drift) <= Config.GOLDEN_MAX_TIME_DRIFT and
+                         missed == 0 and extra == 0)
+    return metrics
+
+
+def print_report(rows):
+    """rows: [(片段, 設定名稱, 指標), ...]"""
+    print(f"{'片段':<16} {'設定':<22} {'解碼ms':>6} {'ms/幀':>6} {'倍速':>5} {'分類一致':>8} {'視角一致':>8} "
+          f"{'角度p50/p95/max（容差內）':>24} {'提醒 對/漏/多 Δt':>18} {'良好偏差':>8} {'不良偏差':>8}  結果")
+    for clip, name, m in rows:
+        angles = f"{m['angle_p50']:.1f}/{m['angle_p95']:.1f}/{m['angle_max']:.1f} ({m['angle_within']:.0%})"
+        alerts = f"{m['alerts_matched']}/{m['alerts_missed']}/{m['alerts_extra']} {m['alert_dt']:.1f}s"
+        print(f"{clip:<16} {name:<22} {m['decode_ms']:>6.1f} {m['frame_ms']:>6.1f} {m['realtime']:>4.1f}x "
+              f"{m['agreement']:>8.1%} {m['view_agreement']:>8.1%} {angles:>24} {alerts:>18} "
+              f"{m['good_drift']:>+8.1%} {m['bad_drift']:>+8.1%}  {'PASS' if m['passed'] else 'FAIL'}")
+
+
+def _variants(arg):
+    if not arg:
+        return [None]
+    if arg == ['all']:
+        return [None] + list(VARIANTS)
+    return [None if v == 'original' else v for v in arg]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="姿勢輸出準確度回歸（golden output）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="以基準設定記錄每幀輸出")
+    rec.add_argument("videos", nargs="*", default=["demo.MOV"])
+    rec.add_argument("--variants", nargs="*", default=None,
+                     help=f"合成片段：original、all 或 {' '.join(VARIANTS)}")
+    rec.add_argument("--frames", type=int, default=None, help="處理幀數上限")
+
+    cmp_parser = sub.add_parser("compare", help="比較各設定與基準")
+    cmp_parser.add_argument("videos", nargs="*", default=["demo.MOV"])
+    cmp_parser.add_argument("--configs", nargs="+", default=['reference', 'skip2', 'width320', 'sample5hz'],
+                            help=f"設定名稱（可用 + 組合）：{' '.join(CONFIGURATIONS)}")
+    cmp_parser.add_argument("--variants", nargs="*", default=None)
+    cmp_parser.add_argument("--frames", type=int, default=None, help="處理幀數上限（需與記錄時相同）")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        for video in args.videos:
+            for variant in _variants(args.variants):
+                print(record(video, variant, args.frames))
+        sys.exit(0)
+
+    report = []
+    for video in args.videos:
+        for variant in _variants(args.variants):
+            golden = load_golden(video, variant)
+            clip = os.path.splitext(os.path.basename(video))[0] + (f"/{variant}" if variant else "")
+            for name in args.configs:
+                output = run_pipeline(video, resolve_configuration(name), variant, args.frames)
+                report.append((clip, name, compare(golden, output)))
+    print_report(report)
+    sys.exit(0 if all(m['passed'] for _, _, m in report) else 1)
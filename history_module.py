@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/19 16:30
+# User : l'r's
+# Software: PyCharm
+# File : history_module.py
+"""
+歷史紀錄模組 - History Store Module
+以 SQLite 保存姿勢狀態轉換與坐姿區間，寫入由背景執行緒批次處理；
+同時維護分鐘／小時／天的彙總表（以主鍵索引），報表查詢不必掃描原始事件
+"""
+
+import argparse
+import logging
+import queue
+import socket
+import sqlite3
+import threading
+import time
+
+from config_module import Config
+
+logger = logging.getLogger(__name__)
+
+# 彙總粒度（秒）
+GRANULARITIES = {
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400,
+}
+
+# 區間種類 -> 彙總表欄位
+METRIC_COLUMNS = {
+    'good': 'good_s',
+    'bad': 'bad_s',
+    'sitting': 'sitting_s',
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    state TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_user_ts ON events (user_id, ts);
+
+CREATE TABLE IF NOT EXISTS intervals (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    start REAL NOT NULL,
+    end REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_intervals_user_start ON intervals (user_id, start);
+
+CREATE TABLE IF NOT EXISTS rollups (
+    user_id TEXT NOT NULL,
+    granularity INTEGER NOT NULL,
+    bucket_start INTEGER NOT NULL,
+    good_s REAL NOT NULL DEFAULT 0,
+    bad_s REAL NOT NULL DEFAULT 0,
+    sitting_s REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, granularity, bucket_start)
+) WITHOUT ROWID;
+"""
+
+
+def bucket_start(ts, size):
+    """
+    計算時間戳所在桶的起點（依本地時區對齊，讓「天」以本地午夜為界）
+
+    Args:
+        ts: Unix 時間戳
+        size: 桶大小（秒）
+
+    Returns:
+        int: 桶起點的 Unix 時間戳
+    """
+    offset = time.localtime(ts).tm_gmtoff
+    return int((ts + offset) // size * size - offset)
+
+
+def split_interval(start, end, size):
+    """
+    將區間切分到各個桶
+
+    Returns:
+        list: [(桶起點, 該桶內的秒數), ...]
+    """
+    parts = []
+    t = start
+    while t < end:
+        b = bucket_start(t, size)
+        b_end = min(end, b + size)
+        if b_end <= t:
+            # 日光節約時間切換造成的邊界異常：直接推進到區間終點
+            b_end = end
+        parts.append((b, b_end - t))
+        t = b_end
+    return parts
+
+
+class HistoryStore:
+    """姿勢歷史紀錄（SQLite，背景批次寫入）"""
+
+    def __init__(self, path=None, user_id=None, batch_size=None, flush_interval=None):
+        """
+        Args:
+            path: 資料庫檔案路徑
+            user_id: 使用者／座位識別碼（預設 Config.HISTORY_USER_ID 或主機名稱）
+            batch_size: 單次交易最多寫入的紀錄數
+            flush_interval: 未滿一批時最長等待秒數
+        """
+        self.path = path or Config.HISTORY_DB_PATH
+        self.user_id = user_id or Config.HISTORY_USER_ID or socket.gethostname()
+        self.batch_size = batch_size or Config.HISTORY_BATCH_SIZE
+        self.flush_interval = flush_interval or Config.HISTORY_FLUSH_INTERVAL
+
+        # 先在目前執行緒建立資料表，讀取連線也在此建立
+        self._read_conn = self._connect()
+        self._read_conn.executescript(_SCHEMA)
+        self._read_conn.commit()
+        self._read_lock = threading.Lock()
+
+        self._queue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._writer_loop, name="history-writer", daemon=True)
+        self._closed = False
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL 模式讓背景寫入與前景查詢可同時進行
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ==================== 寫入（熱路徑只做 queue.put） ====================
+
+    def record_transition(self, ts, state):
+        """記錄姿勢狀態轉換（例如 'good' -> 'bad' 時記錄 'bad'）"""
+        if not self._closed:
+            self._queue.put(('event', ts, state))
+
+    def record_interval(self, kind, start, end):
+        """
+        記錄已結束的區間
+
+        Args:
+            kind: 'good'／'bad'／'sitting'
+            start: 開始時間戳
+            end: 結束時間戳
+        """
+        if not self._closed and end > start and kind in METRIC_COLUMNS:
+            self._queue.put(('interval', kind, start, end))
+
+    def _writer_loop(self):
+        conn = self._connect()
+        running = True
+        while running:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if item is None:
+                running = False
+            if batch:
+                try:
+                    self._write_batch(conn, batch)
+                except sqlite3.Error as e:
+                    logger.error("寫入歷史紀錄失敗: %s", e)
+        conn.close()
+
+    def _write_batch(self, conn, batch):
+        """單一交易寫入一批事件與區間，並累加彙總表"""
+        events = []
+        intervals = []
+        rollup = {}
+        for item in batch:
+            if item[0] == 'event':
+                events.append((self.user_id, item[1], item[2]))
+                continue
+            _, kind, start, end = item
+            intervals.append((self.user_id, kind, start, end))
+            column = METRIC_COLUMNS[kind]
+            for size in GRANULARITIES.values():
+                for b, seconds in split_interval(start, end, size):
+                    key = (size, b)
+                    acc = rollup.get(key)
+                    if acc is None:
+                        acc = rollup[key] = {'good_s': 0.0, 'bad_s': 0.0, 'sitting_s': 0.0}
+                    acc[column] += seconds
+
+        with conn:
+            if events:
+                conn.executemany("INSERT INTO events (user_id, ts, state) VALUES (?, ?, ?)", events)
+            if intervals:
+                conn.executemany(
+                    "INSERT INTO intervals (user_id, kind, start, end) VALUES (?, ?, ?, ?)", intervals)
+            if rollup:
+                keys = [(self.user_id, size, b) for size, b in rollup]
+                conn.executemany(
+                    "INSERT OR IGNORE INTO rollups (user_id, granularity, bucket_start) VALUES (?, ?, ?)",
+                    keys)
+                conn.executemany(
+                    "UPDATE rollups SET good_s = good_s + ?, bad_s = bad_s + ?, sitting_s = sitting_s + ? "
+                    "WHERE user_id = ? AND granularity = ? AND bucket_start = ?",
+                    [(acc['good_s'], acc['bad_s'], acc['sitting_s'], self.user_id, size, b)
+                     for (size, b), acc in rollup.items()])
+
+    # ==================== 查詢（只讀彙總表） ====================
+
+    def query_rollup(self, metric, granularity, since, until=None, user_id=None):
+        """
+        查詢彙總值，例如「最近 30 天每小時的不良坐姿分鐘數」
+
+        Args:
+            metric: 'good'／'bad'／'sitting'
+            granularity: 'minute'／'hour'／'day'
+            since: 起始時間戳（含）
+            until: 結束時間戳（不含），預設為現在
+            user_id: 使用者識別碼，預設為本機
+
+        Returns:
+            list: [(桶起點時間戳, 秒數), ...]（依時間排序，只含有資料的桶）
+        """
+        column = METRIC_COLUMNS[metric]
+        size = GRANULARITIES[granularity]
+        until = until if until is not None else time.time()
+        with self._read_lock:
+            rows = self._read_conn.execute(
+                f"SELECT bucket_start, {column} FROM rollups "
+                "WHERE user_id = ? AND granularity = ? AND bucket_start >= ? AND bucket_start < ? "
+                "ORDER BY bucket_start",
+                (user_id or self.user_id, size, bucket_start(since, size), until)).fetchall()
+        return rows
+
+    def summary(self, since, until=None, user_id=None):
+        """
+        以天彙總計算一段期間（例如一週）的總計
+
+        Returns:
+            dict: {'good': 秒數, 'bad': 秒數, 'sitting': 秒數}
+        """
+        until = until if until is not None else time.time()
+        with self._read_lock:
+            row = self._read_conn.execute(
+                "SELECT COALESCE(SUM(good_s), 0), COALESCE(SUM(bad_s), 0), COALESCE(SUM(sitting_s), 0) "
+                "FROM rollups WHERE user_id = ? AND granularity = ? AND bucket_start >= ? AND bucket_start < ?",
+                (user_id or self.user_id, GRANULARITIES['day'],
+                 bucket_start(since, GRANULARITIES['day']), until)).fetchone()
+        return {'good': row[0], 'bad': row[1], 'sitting': row[2]}
+
+    def users(self):
+        """列出資料庫中所有使用者識別碼"""
+        with self._read_lock:
+            return [r[0] for r in self._read_conn.execute(
+                "SELECT DISTINCT user_id FROM rollups WHERE granularity = ?", (GRANULARITIES['day'],))]
+
+    def close(self):
+        """送出剩餘紀錄並關閉資料庫"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join(timeout=5.0)
+        with self._read_lock:
+            self._read_conn.close()
+
+
+def _print_report(args):
+    """命令列報表"""
+    store = HistoryStore(path=args.db, user_id=args.user)
+    try:
+        since = time.time() - args.days * 86400
+        for bucket, seconds in store.query_rollup(args.metric, args.granularity, since):
+            stamp = time.strftime('%Y-%m-%d %H:%M', time.localtime(bucket))
+            print(f"{stamp}  {seconds / 60.0:8.1f} 分鐘")
+        total = store.summary(since)
+        print(f"合計（{args.days} 天）: 正確 {total['good'] / 60:.1f} 分鐘 / "
+              f"不良 {total['bad'] / 60:.1f} 分鐘 / 坐姿 {total['sitting'] / 60:.1f} 分鐘")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="姿勢歷史紀錄報表")
+    parser.add_argument("--db", default=Config.HISTORY_DB_PATH, help="資料庫路徑")
+    parser.add_argument("--user", default=None, help="使用者識別碼（預設本機）")
+    parser.add_argument("--metric", default="bad", choices=sorted(METRIC_COLUMNS))
+    parser.add_argument("--granularity", default="hour", choices=list(GRANULARITIES))
+    parser.add_argument("--days", type=float, default=30, help="查詢最近幾天")
+    _print_report(parser.parse_args())
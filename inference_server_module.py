@@ -0,0 +1,675 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/22 10:30
+# User : l'r's
+# Software: PyCharm
+# File : inference_server_module.py
+"""
+推論伺服器模組 - Inference Server Module
+低階裝置只負責擷取影像，由區域網路上的一台主機集中推論：
+- 客戶端以 TCP 送出 JPEG 或已縮小的 RGB 影像（附 stream 編號），伺服器回傳關鍵點、角度與姿勢狀態
+- 伺服器收到第一個請求後在短時間窗內湊成微批次（同一 stream 只保留最新一幀），
+  再由推論執行緒池平行處理；每個 stream 有獨立的姿勢模型、時間軸、在座計時與提醒冷卻
+- 逐 stream 統計伺服器端延遲（收到請求到送出結果，含排隊時間）
+
+訊息格式：[標頭長度 uint32][資料長度 uint32][JSON 標頭][二進位資料]（網路位元組順序）
+
+啟動伺服器：python inference_server_module.py serve --host 0.0.0.0
+重播測試：  python inference_server_module.py replay demo.MOV --clients 4 --fps 10 --local-server
+"""
+
+import argparse
+import collections
+import json
+import logging
+import multiprocessing as mp_proc
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from config_module import Config
+from detector_module import default_alert_params, detect_faces, detect_pose
+from log_module import setup_logging
+from multi_person_module import PersonTrack, classify_track, evaluate_track
+from pose_backend_module import create_pose_backend
+from result_module import Keypoints, PostureResult
+from video_reader_module import SampledVideoReader
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = struct.Struct('!II')
+
+
+# ==================== 訊息收發 ====================
+
+def send_message(sock, header, payload=b''):
+    """送出一則訊息（JSON 標頭 + 二進位資料）"""
+    data = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    sock.sendall(_PREFIX.pack(len(data), len(payload)) + data)
+    if payload:
+        sock.sendall(payload)
+
+
+def _recv_exact(sock, size):
+    buf = bytearray(size)
+    view = memoryview(buf)
+    got = 0
+    while got < size:
+        n = sock.recv_into(view[got:], size - got)
+        if n == 0:
+            return None
+        got += n
+    return buf
+
+
+def recv_message(sock):
+    """
+    接收一則訊息
+
+    Returns:
+        tuple: (標頭 dict, 資料 bytearray)；連線關閉時回傳 None
+    """
+    prefix = _recv_exact(sock, _PREFIX.size)
+    if prefix is None:
+        return None
+    header_len, payload_len = _PREFIX.unpack(prefix)
+    header = _recv_exact(sock, header_len)
+    if header is None:
+        return None
+    payload = _recv_exact(sock, payload_len) if payload_len else bytearray()
+    if payload is None:
+        return None
+    return json.loads(header.decode('utf-8')), payload
+
+
+def decode_image(header, payload):
+    """
+    依標頭格式還原 RGB 影像
+
+    Raises:
+        ValueError: 格式不支援或資料長度不符
+    """
+    fmt = header.get('format', 'jpeg')
+    if fmt == 'jpeg':
+        bgr = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if bgr is None:
+            raise ValueError("無法解碼 JPEG")
+        return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+    if fmt == 'rgb':
+        h, w = header['shape'][:2]
+        if len(payload) != h * w * 3:
+            raise ValueError(f"RGB 資料長度 {len(payload)} 與尺寸 {w}x{h} 不符")
+        return np.frombuffer(payload, dtype=np.uint8).reshape(h, w, 3)
+    raise ValueError(f"不支援的影像格式: {fmt}")
+
+
+def latency_summary(samples):
+    """
+    Returns:
+        dict: {'count', 'mean_ms', 'p50_ms', 'p95_ms'}
+    """
+    if not samples:
+        return {'count': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0}
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'mean_ms': sum(ordered) / len(ordered),
+        'p50_ms': ordered[len(ordered) // 2],
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+    }
+
+
+# ==================== 伺服器 ====================
+
+class _Request:
+    """一則待處理的請求（由連線執行緒建立，批次執行緒處理）"""
+
+    __slots__ = ('kind', 'stream_id', 'seq', 'timestamp', 'image', 'params', 'received', 'reply')
+
+    def __init__(self, kind, stream_id, seq=None, timestamp=None, image=None, params=None, reply=None):
+        self.kind = kind
+        self.stream_id = stream_id
+        self.seq = seq
+        self.timestamp = timestamp
+        self.image = image
+        self.params = params
+        self.received = time.perf_counter()
+        self.reply = reply
+
+
+class StreamState:
+    """單一客戶端串流的獨立狀態"""
+
+    def __init__(self, stream_id, now, params):
+        self.stream_id = stream_id
+        self.track = PersonTrack(stream_id, (0, 0, 0, 0), now, params)
+        self.pose = None        # 專屬的姿勢模型後端（MediaPipe 會沿用上一幀的 ROI）
+        self.last_seen = time.monotonic()
+        self.frames = 0
+        self.coalesced = 0      # 同一批次中被較新影像取代的幀數
+        self.latency = collections.deque(maxlen=Config.INFERENCE_LATENCY_WINDOW)
+
+    def stats(self):
+        summary = latency_summary(list(self.latency))
+        summary.update(frames=self.frames, coalesced=self.coalesced)
+        return summary
+
+
+class InferenceServer:
+    """推論伺服器（微批次 + 逐 stream 狀態）"""
+
+    def __init__(self, host=None, port=None, batch_window_ms=None, batch_max=None,
+                 workers=None, max_streams=None, pose_backend=None):
+        """
+        Args:
+            host: 監聽位址（'0.0.0.0' 開放區域網路）
+            port: 監聽埠；0 表示由系統指定（見 self.port）
+            batch_window_ms: 收到第一個請求後最多等待多久湊成批次
+            batch_max: 每批次最多處理的 stream 數
+            workers: 推論執行緒數
+            max_streams: 同時服務的 stream 上限
+            pose_backend: 姿勢模型後端名稱（預設 Config.POSE_BACKEND）
+        """
+        self.host = host or Config.INFERENCE_SERVER_HOST
+        self.port = Config.INFERENCE_SERVER_PORT if port is None else port
+        self.batch_window = (batch_window_ms if batch_window_ms is not None
+                             else Config.INFERENCE_BATCH_WINDOW_MS) / 1000.0
+        self.batch_max = batch_max or Config.INFERENCE_BATCH_MAX
+        self.workers = workers or Config.INFERENCE_SERVER_WORKERS
+        self.max_streams = max_streams or Config.INFERENCE_MAX_STREAMS
+        self.pose_backend = pose_backend or Config.POSE_BACKEND
+
+        self._requests = queue.SimpleQueue()
+        self._streams = {}               # stream 編號 -> StreamState（只由批次執行緒增刪）
+        self._streams_lock = threading.Lock()
+        self._free_poses = []            # 逾時 stream 釋出的後端，供新 stream 重用
+        self._pose_lock = threading.Lock()
+        self._local = threading.local()  # 每個推論執行緒各自的臉部偵測器
+        self._face_detections = []
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="infer")
+
+        # 批次統計
+        self.batches = 0
+        self.batch_items = 0
+        self._last_report = time.monotonic()
+
+        self._tcp = None
+        self._threads = []
+
+    # ---------- 啟動與停止 ----------
+
+    def start(self):
+        """在背景執行緒啟動伺服器（回傳後即可連線）"""
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                server._handle_connection(self.request, self.client_address)
+
+        class TCPServer(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self._tcp = TCPServer((self.host, self.port), Handler)
+        self.port = self._tcp.server_address[1]
+
+        batcher = threading.Thread(target=self._batch_loop, name="infer-batcher", daemon=True)
+        acceptor = threading.Thread(target=self._tcp.serve_forever, name="infer-accept", daemon=True)
+        self._threads = [batcher, acceptor]
+        for thread in self._threads:
+            thread.start()
+        logger.info("推論伺服器啟動: %s:%d（後端 %s，%d 推論執行緒，批次時間窗 %.0f ms）",
+                    self.host, self.port, self.pose_backend, self.workers, self.batch_window * 1000)
+
+    def serve_forever(self):
+        """啟動並阻塞直到中斷"""
+        self.start()
+        try:
+            while True:
+                time.sleep(1.0)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        """停止接受連線並釋放所有模型"""
+        if self._tcp is not None:
+            self._tcp.shutdown()
+            self._tcp.server_close()
+            self._tcp = None
+        self._requests.put(None)
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+        self._pool.shutdown(wait=True)
+        for state in list(self._streams.values()):
+            self._drop_stream(state)
+        for pose in self._free_poses:
+            pose.close()
+        self._free_poses = []
+        for face_detection in self._face_detections:
+            face_detection.close()
+        self._face_detections = []
+
+    # ---------- 連線（每個連線一個執行緒：收訊與解碼） ----------
+
+    def _handle_connection(self, sock, address):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        send_lock = threading.Lock()  # 結果由不同推論執行緒送回，需序列化
+
+        def reply(header, payload=b''):
+            try:
+                with send_lock:
+                    send_message(sock, header, payload)
+            except OSError:
+                pass  # 客戶端已斷線
+
+        logger.info("客戶端連線: %s:%d", *address[:2])
+        while True:
+            try:
+                message = recv_message(sock)
+            except (OSError, ValueError) as e:
+                logger.warning("客戶端 %s 連線錯誤: %s", address[0], e)
+                break
+            if message is None:
+                break
+            header, payload = message
+            kind = header.get('type')
+            stream_id = str(header.get('stream', address[0]))
+            if kind == 'frame':
+                try:
+                    image = decode_image(header, payload)
+                except (ValueError, KeyError, cv2.error) as e:
+                    reply({'type': 'error', 'stream': stream_id, 'seq': header.get('seq'), 'error': str(e)})
+                    continue
+                timestamp = header.get('ts')
+                self._requests.put(_Request('frame', stream_id, header.get('seq'),
+                                            time.time() if timestamp is None else float(timestamp),
+                                            image, reply=reply))
+            elif kind == 'hello':
+                self._requests.put(_Request('hello', stream_id, params=header.get('params') or {}, reply=reply))
+            elif kind == 'stats':
+                reply({'type': 'stats', 'stream': stream_id, 'stats': self.stats()})
+            else:
+                reply({'type': 'error', 'stream': stream_id, 'error': f"未知的訊息類型: {kind}"})
+        logger.info("客戶端離線: %s:%d", *address[:2])
+
+    # ---------- 批次 ----------
+
+    def _batch_loop(self):
+        running = True
+        while running:
+            try:
+                first = self._requests.get(timeout=1.0)
+            except queue.Empty:
+                self._expire_streams()
+                continue
+            if first is None:
+                break
+
+            # 收集微批次：同一 stream 只保留最新一幀；所有活躍 stream 都到齊就不再等待
+            batch = {}
+            item = first
+            deadline = time.perf_counter() + self.batch_window
+            while True:
+                if item.kind == 'hello':
+                    self._apply_hello(item)
+                else:
+                    previous = batch.get(item.stream_id)
+                    if previous is not None:
+                        previous.reply({'type': 'skipped', 'stream': previous.stream_id, 'seq': previous.seq})
+                        state = self._streams.get(item.stream_id)
+                        if state is not None:
+                            state.coalesced += 1
+                    batch[item.stream_id] = item
+                if len(batch) >= min(self.batch_max, max(1, len(self._streams))):
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+
+            jobs = []
+            for request in batch.values():
+                state = self._stream_for(request)
+                if state is not None:
+                    jobs.append(self._pool.submit(self._process, state, request, len(batch)))
+            # 等待本批次完成：同一 stream 的狀態不會同時被兩個執行緒修改
+            for job in jobs:
+                job.result()
+            if jobs:
+                self.batches += 1
+                self.batch_items += len(jobs)
+            self._expire_streams()
+            self._report()
+
+    def _stream_for(self, request):
+        state = self._streams.get(request.stream_id)
+        if state is None:
+            if len(self._streams) >= self.max_streams:
+                request.reply({'type': 'error', 'stream': request.stream_id, 'seq': request.seq,
+                               'error': f"已達 stream 上限 {self.max_streams}"})
+                return None
+            now = time.time() if request.timestamp is None else request.timestamp
+            state = StreamState(request.stream_id, now, default_alert_params())
+            with self._streams_lock:
+                self._streams[request.stream_id] = state
+            logger.info("新的 stream: %s（共 %d 個）", request.stream_id, len(self._streams))
+        state.last_seen = time.monotonic()
+        return state
+
+    def _apply_hello(self, request):
+        """客戶端宣告該 stream 的提醒參數（例如個人化的角度閾值）"""
+        state = self._stream_for(request)
+        if state is None:
+            return
+        engine = state.track.alert_engine
+        accepted = {}
+        for name, value in request.params.items():
+            if name in engine.params:
+                engine.set_param(name, float(value))
+                accepted[name] = float(value)
+        request.reply({'type': 'hello', 'stream': request.stream_id, 'params': accepted})
+
+    def _expire_streams(self):
+        now = time.monotonic()
+        for state in list(self._streams.values()):
+            if now - state.last_seen > Config.INFERENCE_STREAM_TIMEOUT:
+                logger.info("stream %s 逾時移除: %s", state.stream_id, state.stats())
+                self._drop_stream(state)
+
+    def _drop_stream(self, state):
+        with self._streams_lock:
+            self._streams.pop(state.stream_id, None)
+        state.track.presence.reset()
+        if state.pose is not None:
+            with self._pose_lock:
+                self._free_poses.append(state.pose)
+            state.pose = None
+
+    # ---------- 推論（推論執行緒） ----------
+
+    def _face_detection(self):
+        face_detection = getattr(self._local, 'face_detection', None)
+        if face_detection is None:
+            import mediapipe as mp
+            face_detection = mp.solutions.face_detection.FaceDetection(
+                model_selection=Config.MP_FACE_MODEL_SELECTION,
+                min_detection_confidence=Config.MP_FACE_MIN_DETECTION_CONFIDENCE)
+            self._local.face_detection = face_detection
+            self._face_detections.append(face_detection)
+        return face_detection
+
+    def _process(self, state, request, batch_size):
+        try:
+            if state.pose is None:
+                with self._pose_lock:
+                    state.pose = self._free_poses.pop() if self._free_poses else None
+                if state.pose is None:
+                    state.pose = create_pose_backend(self.pose_backend)
+            now = request.timestamp
+            track = state.track
+            image = request.image
+            faces = detect_faces(self._face_detection(), image)
+            kp = detect_pose(state.pose, image, int(now * 1000))
+            if faces:
+                track.update_box(max(faces, key=lambda box: box[2] * box[3]), now)
+            if kp is not None:
+                params = track.alert_engine.params
+                result = classify_track(track, kp, now, params['side_neck_threshold'],
+                                        params['side_torso_threshold'])
+                if not faces:
+                    # 頭部距離以本幀的臉部框計算，沒有臉就不評估抬頭／低頭規則
+                    result.head_distance = track._metrics['head_distance'] = None
+            else:
+                track.keypoints = None
+                result = PostureResult(person_detected=bool(faces))
+                track.result = result
+            alerts = evaluate_track(track, result, now)
+        except Exception as e:
+            logger.error("stream %s 推論失敗: %s", state.stream_id, e)
+            request.reply({'type': 'error', 'stream': state.stream_id, 'seq': request.seq, 'error': str(e)})
+            return
+
+        server_ms = (time.perf_counter() - request.received) * 1000.0
+        state.frames += 1
+        state.latency.append(server_ms)
+        request.reply({
+            'type': 'result',
+            'stream': state.stream_id,
+            'seq': request.seq,
+            'ts': now,
+            'result': list(result.to_tuple()),
+            'keypoints': list(kp.to_tuple()) if kp is not None else None,
+            'face': list(track.box) if faces else None,
+            'sitting_seconds': track._metrics['sitting_seconds'],
+            'alerts': [{'name': a.name, 'audio': a.audio_type, 'metric': a.metric,
+                        'value': a.value, 'threshold': a.threshold} for a in alerts],
+            'server_ms': server_ms,
+            'batch': batch_size,
+        })
+
+    # ---------- 統計 ----------
+
+    def stats(self):
+        """
+        Returns:
+            dict: 批次統計與逐 stream 的伺服器端延遲
+        """
+        with self._streams_lock:
+            streams = {sid: state.stats() for sid, state in self._streams.items()}
+        return {
+            'batches': self.batches,
+            'avg_batch': self.batch_items / self.batches if self.batches else 0.0,
+            'streams': streams,
+        }
+
+    def _report(self):
+        now = time.monotonic()
+        if Config.INFERENCE_STATS_INTERVAL <= 0 or now - self._last_report < Config.INFERENCE_STATS_INTERVAL:
+            return
+        self._last_report = now
+        stats = self.stats()
+        logger.info("推論伺服器: %d 批次，平均每批 %.2f 個 stream", stats['batches'], stats['avg_batch'])
+        for sid, s in stats['streams'].items():
+            logger.info("  stream %s: %d 幀, 延遲 平均 %.1f / p50 %.1f / p95 %.1f ms, 合併 %d",
+                        sid, s['frames'], s['mean_ms'], s['p50_ms'], s['p95_ms'], s['coalesced'])
+
+
+# ==================== 客戶端 ====================
+
+class InferenceClient:
+    """推論伺服器的客戶端（同步：送出一幀後等待結果）"""
+
+    def __init__(self, stream_id, host=None, port=None, fmt='jpeg', width=None, quality=None, params=None):
+        """
+        Args:
+            stream_id: stream 編號（同一台裝置重新連線時沿用，伺服器會保留其統計）
+            host: 伺服器位址
+            port: 伺服器埠
+            fmt: 'jpeg' 或 'rgb'（已縮小的原始 RGB，省去伺服器端解碼）
+            width: 送出前縮小到此寬度；None 表示 Config.INFERENCE_CLIENT_WIDTH，0 表示不縮小
+            quality: JPEG 品質
+            params: 該 stream 的提醒參數，例如 {'side_neck_threshold': 40}
+        """
+        self.stream_id = str(stream_id)
+        self.fmt = fmt
+        self.width = Config.INFERENCE_CLIENT_WIDTH if width is None else width
+        self.quality = quality or Config.INFERENCE_JPEG_QUALITY
+        self.sock = socket.create_connection((host or Config.INFERENCE_SERVER_HOST,
+                                              port or Config.INFERENCE_SERVER_PORT))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._seq = 0
+        if params:
+            send_message(self.sock, {'type': 'hello', 'stream': self.stream_id, 'params': params})
+            recv_message(self.sock)
+
+    def infer(self, frame, timestamp=None):
+        """
+        送出一幀並等待結果
+
+        Args:
+            frame: BGR 影像
+            timestamp: 影像時間戳（秒）；None 表示由伺服器使用收到的時間
+
+        Returns:
+            dict: 回應標頭；結果另轉為 'posture'（PostureResult）與 'kp'（原始影像座標的 Keypoints）
+        """
+        h, w = frame.shape[:2]
+        scale = 1.0
+        if self.width and w > self.width:
+            scale = self.width / w
+            frame = cv2.resize(frame, (self.width, max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+        self._seq += 1
+        header = {'type': 'frame', 'stream': self.stream_id, 'seq': self._seq, 'ts': timestamp,
+                  'format': self.fmt}
+        if self.fmt == 'rgb':
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            header['shape'] = list(rgb.shape)
+            payload = rgb.tobytes()
+        else:
+            ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if not ok:
+                raise ValueError("JPEG 編碼失敗")
+            payload = encoded.tobytes()
+        send_message(self.sock, header, payload)
+
+        while True:
+            message = recv_message(self.sock)
+            if message is None:
+                raise ConnectionError("伺服器已關閉連線")
+            response, _ = message
+            if response.get('seq') == self._seq or response.get('type') == 'error':
+                break
+        if response.get('type') == 'result':
+            response['posture'] = PostureResult.from_tuple(response['result'])
+            kp = response['keypoints']
+            response['kp'] = Keypoints.from_tuple(kp).scaled(1.0 / scale) if kp else None
+        return response
+
+    def server_stats(self):
+        send_message(self.sock, {'type': 'stats', 'stream': self.stream_id})
+        message = recv_message(self.sock)
+        return message[0]['stats'] if message else None
+
+    def close(self):
+        self.sock.close()
+
+
+# ==================== 重播測試 ====================
+
+def _replay_client(index, video_path, host, port, fps, max_frames, fmt, width, results):
+    """客戶端行程：依影片時間以固定頻率重播，記錄來回延遲"""
+    client = InferenceClient(f"replay-{index}", host, port, fmt=fmt, width=width)
+    reader = SampledVideoReader(video_path, sample_hz=fps)
+    rtt = []
+    alerts = 0
+    errors = 0
+    start = time.perf_counter()
+    base = time.time()
+    try:
+        while len(rtt) + errors < max_frames:
+            ok, frame = reader.read()
+            if not ok:
+                break
+            # 依影片時間排程，模擬即時攝影機（處理慢時不補送，直接送下一個取樣點）
+            delay = reader.timestamp - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+            t0 = time.perf_counter()
+            response = client.infer(frame, base + reader.timestamp)
+            if response.get('type') != 'result':
+                errors += 1
+                continue
+            rtt.append((time.perf_counter() - t0) * 1000.0)
+            alerts += len(response['alerts'])
+    finally:
+        reader.release()
+        client.close()
+    results.put((index, latency_summary(rtt), alerts, errors))
+
+
+def run_replay(video_path, clients=4, fps=10.0, frames=200, fmt='jpeg', width=None,
+               host=None, port=None, local_server=False):
+    """
+    以多個客戶端行程重播影片，量測來回延遲與伺服器批次情形
+
+    Args:
+        local_server: 在本行程啟動伺服器（埠由系統指定）
+    """
+    server = None
+    if local_server:
+        server = InferenceServer(host='127.0.0.1', port=0)
+        server.start()
+        host, port = '127.0.0.1', server.port
+    host = host or Config.INFERENCE_SERVER_HOST
+    port = port or Config.INFERENCE_SERVER_PORT
+
+    results = mp_proc.Queue()
+    procs = [mp_proc.Process(target=_replay_client,
+                             args=(i, video_path, host, port, fps, frames, fmt, width, results))
+             for i in range(clients)]
+    start = time.perf_counter()
+    for proc in procs:
+        proc.start()
+    rows = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"{clients} 個客戶端，每個 {fps:g} FPS，格式 {fmt}，耗時 {elapsed:.1f} 秒")
+    print(f"{'客戶端':<8} {'幀數':>5} {'平均(ms)':>9} {'p50(ms)':>8} {'p95(ms)':>8} {'提醒':>5} {'錯誤':>5}")
+    for index, summary, alerts, errors in sorted(rows):
+        print(f"{index:<8} {summary['count']:>5} {summary['mean_ms']:>9.1f} {summary['p50_ms']:>8.1f} "
+              f"{summary['p95_ms']:>8.1f} {alerts:>5} {errors:>5}")
+    if server is not None:
+        stats = server.stats()
+        print(f"伺服器：{stats['batches']} 批次，平均每批 {stats['avg_batch']:.2f} 個 stream")
+        for sid, s in sorted(stats['streams'].items()):
+            print(f"  {sid}: 伺服器端延遲 平均 {s['mean_ms']:.1f} / p95 {s['p95_ms']:.1f} ms，合併 {s['coalesced']}")
+        server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="姿勢推論伺服器")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="啟動伺服器")
+    serve.add_argument("--host", default=Config.INFERENCE_SERVER_HOST)
+    serve.add_argument("--port", type=int, default=Config.INFERENCE_SERVER_PORT)
+    serve.add_argument("--workers", type=int, default=Config.INFERENCE_SERVER_WORKERS)
+    serve.add_argument("--window-ms", type=float, default=Config.INFERENCE_BATCH_WINDOW_MS)
+    serve.add_argument("--pose-backend", default=None)
+
+    replay = sub.add_parser("replay", help="以多個客戶端行程重播影片")
+    replay.add_argument("video", nargs="?", default="demo.MOV")
+    replay.add_argument("--clients", type=int, default=4)
+    replay.add_argument("--fps", type=float, default=10.0)
+    replay.add_argument("--frames", type=int, default=200, help="每個客戶端送出的幀數上限")
+    replay.add_argument("--format", choices=("jpeg", "rgb"), default="jpeg")
+    replay.add_argument("--width", type=int, default=None, help="客戶端縮小寬度（0 表示不縮小）")
+    replay.add_argument("--host", default=None)
+    replay.add_argument("--port", type=int, default=None)
+    replay.add_argument("--local-server", action="store_true", help="在本行程啟動伺服器")
+
+    args = parser.parse_args()
+    setup_logging()
+    if args.command == "serve":
+        InferenceServer(args.host, args.port, args.window_ms, workers=args.workers,
+                        pose_backend=args.pose_backend).serve_forever()
+    else:
+        run_replay(args.video, args.clients, args.fps, args.frames, args.format, args.width,
+                   args.host, args.port, args.local_server)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/21 9:15
+# User : l'r's
+# Software: PyCharm
+# File : latency_module.py
+"""
+延遲預算控制模組 - Latency Budget Module
+依目標幀率在「模型複雜度／推論寬度／偵測間隔」組成的等級表中選擇等級：
+啟動時以實際影像快速校準，執行期間依實測延遲升降一級；
+超出預算帶（遲滯）且維持足夠時間才調整，曾經超出預算的較重等級需等待一段時間才再嘗試
+"""
+
+import collections
+import logging
+import time
+
+from config_module import Config
+
+logger = logging.getLogger(__name__)
+
+TuningLevel = collections.namedtuple('TuningLevel', 'complexity width skip')
+
+
+class LatencyController:
+    """延遲預算控制器"""
+
+    def __init__(self, target_fps=None, levels=None, hysteresis=None, window=None,
+                 min_dwell=None, retry_seconds=None, clock=None, on_change=None):
+        """
+        Args:
+            target_fps: 目標幀率（預算 = 1000 / target_fps 毫秒）
+            levels: 由重到輕的等級表 [(複雜度, 推論寬度, 偵測間隔), ...]
+            hysteresis: 預算帶寬度（比例）
+            window: 判斷用的樣本數
+            min_dwell: 每次調整後至少維持的秒數
+            retry_seconds: 較重等級超出預算後，隔多久才再嘗試
+            clock: 時間來源（預設 time.monotonic）
+            on_change: 等級改變時的回呼 fn(level)
+        """
+        self.target_ms = 1000.0 / (target_fps or Config.LATENCY_TARGET_FPS)
+        self.levels = [TuningLevel(*level) for level in (levels or Config.LATENCY_LEVELS)]
+        self.hysteresis = hysteresis if hysteresis is not None else Config.LATENCY_HYSTERESIS
+        self.min_dwell = min_dwell if min_dwell is not None else Config.LATENCY_MIN_DWELL
+        self.retry_seconds = retry_seconds if retry_seconds is not None else Config.LATENCY_RETRY_SECONDS
+        self.clock = clock or time.monotonic
+        self.on_change = on_change
+
+        self.index = 0
+        self.calibrated = False
+        self.last_avg_ms = 0.0
+        self._samples = collections.deque(maxlen=window or Config.LATENCY_WINDOW)
+        self._level_cost = {}  # 等級索引 -> (實測平均延遲, 量測時間)
+        self._changed_at = self.clock()
+
+    @property
+    def level(self):
+        return self.levels[self.index]
+
+    def calibrate(self, probe):
+        """
+        啟動校準：由最重的等級開始量測，選擇第一個符合預算的等級
+
+        Args:
+            probe: fn(level) -> 該等級的平均每幀延遲（毫秒）
+        """
+        chosen = len(self.levels) - 1
+        for i, level in enumerate(self.levels):
+            cost = probe(level)
+            self._level_cost[i] = (cost, self.clock())
+            logger.info("延遲校準: %s -> %.1f ms（預算 %.1f ms）", self.describe(level), cost, self.target_ms)
+            if cost <= self.target_ms:
+                chosen = i
+                break
+        self.calibrated = True
+        self._set(chosen, "校準")
+
+    def observe(self, latency_ms):
+        """
+        記錄一幀的延遲，必要時調整等級
+
+        Returns:
+            TuningLevel: 等級改變時回傳新等級，否則為 None
+        """
+        samples = self._samples
+        samples.append(latency_ms)
+        now = self.clock()
+        if len(samples) < samples.maxlen or now - self._changed_at < self.min_dwell:
+            return None
+
+        avg = sum(samples) / len(samples)
+        self.last_avg_ms = avg
+        self._level_cost[self.index] = (avg, now)
+        upper = self.target_ms * (1.0 + self.hysteresis)
+        lower = self.target_ms * (1.0 - self.hysteresis)
+
+        if avg > upper and self.index < len(self.levels) - 1:
+            return self._set(self.index + 1, f"平均 {avg:.1f} ms 超出預算")
+        if avg < lower and self.index > 0:
+            # 較重的等級最近量過且超出預算時先不升級，避免在兩級之間來回切換
+            known = self._level_cost.get(self.index - 1)
+            if known is None or known[0] <= self.target_ms or now - known[1] > self.retry_seconds:
+                return self._set(self.index - 1, f"平均 {avg:.1f} ms 低於預算")
+        return None
+
+    def reset_measurements(self):
+        """捨棄既有的延遲量測（例如替換模型後端後），維持目前等級"""
+        self._samples.clear()
+        self._level_cost.clear()
+        self._changed_at = self.clock()
+
+    def _set(self, index, reason):
+        self.index = index
+        self._samples.clear()
+        self._changed_at = self.clock()
+        level = self.level
+        logger.info("延遲預算調整（%s）: %s", reason, self.describe(level))
+        if self.on_change is not None:
+            self.on_change(level)
+        return level
+
+    def describe(self, level=None):
+        """等級的顯示文字"""
+        level = level or self.level
+        return f"複雜度 {level.complexity}／推論寬度 {level.width}／每 {level.skip} 幀偵測"
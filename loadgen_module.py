@@ -0,0 +1,754 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/23 10:30
+# User : l'r's
+# Software: PyCharm
+# File : loadgen_module.py
+"""
+壓力測試模組 - Load Generator Module
+以合成資料對偵測管線施加負載，量測吞吐量上限並檢查並行時的狀態一致性：
+
+- 關鍵點模式（landmarks）：不經過模型，直接把合成關鍵點送進分類與提醒層
+  （側面角度判斷、姿勢時間軸、在座計時、提醒規則與語音播放），每秒可達數千筆以上
+- 影像模式（frames）：以實拍影片（預設 demo.MOV）的取樣幀為素材，依情境要求的角度挑選
+  實際量得角度最接近的幀，以指定解析度與頻率送進完整管線（本行程的 PostureDetector，
+  或透過推論伺服器）；素材中沒有可偵測的坐姿時直接失敗，不量測空轉的管線
+
+情境：姿勢慢慢偏移（drift）、角度在門檻附近擺盪（flap）、間歇離座（absence）、
+正確坐姿（steady），以及多個 stream 混合（mixed）。
+所有 stream 共用一個不實際發聲的語音播放器，記錄同時播放數；大於 1 表示播放旗標有競態
+
+範例：python loadgen_module.py landmarks --streams 32 --workers 8
+      python loadgen_module.py frames --streams 4 --fps 0 --size 1280x720
+"""
+
+import argparse
+import logging
+import math as m
+import random
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from config_module import Config, config_overrides
+from detector_module import default_alert_params
+from inference_server_module import latency_summary
+from log_module import setup_logging
+from multi_person_module import PersonTrack, classify_track, evaluate_track
+from Play_prompt import AudioPlayer
+from result_module import Keypoints, PostureResult
+from timeline_module import STATE_GOOD, STATE_BAD
+from video_reader_module import SampledVideoReader
+
+logger = logging.getLogger(__name__)
+
+# findAngle_ver 以 int(180 / π) = 57 換算角度，合成時用同一個係數才能得到指定角度
+_ANGLE_SCALE = int(180 / m.pi)
+
+# 合成關鍵點的參考座標（640x480；其他解析度依高度縮放）
+_REF_HEIGHT = 480
+_HIP = (300, 400)
+_TORSO_LENGTH = 150
+_NECK_LENGTH = 110   # 臉部中心到肩膀中心約 115 px，介於低頭與仰頭門檻之間
+
+_BACKGROUND = (200, 200, 200)
+
+
+# ==================== 合成資料 ====================
+
+def synthetic_keypoints(neck_angle, torso_angle, scale=1.0):
+    """
+    依脖子與身體傾斜角度產生側面視角的關鍵點（側面判斷會得到相同角度，誤差在取整範圍內）
+
+    Args:
+        neck_angle: 脖子角度（度）
+        torso_angle: 身體角度（度）
+        scale: 座標縮放比例（影像高度 / 480）
+
+    Returns:
+        Keypoints
+    """
+    hip_x, hip_y = _HIP
+    torso = torso_angle / _ANGLE_SCALE
+    neck = neck_angle / _ANGLE_SCALE
+    sx = int(hip_x + _TORSO_LENGTH * m.sin(torso))
+    sy = int(hip_y - _TORSO_LENGTH * m.cos(torso))
+    ex = int(sx + _NECK_LENGTH * m.sin(neck))
+    ey = int(sy - _NECK_LENGTH * m.cos(neck))
+    # 側面：左右肩距離遠小於 FRONT_VIEW_THRESHOLD
+    kp = Keypoints(sx, sy, sx + 6, sy + 2,
+                   ex, ey, ex + 6, ey,
+                   ex + 18, ey - 8, ex + 22, ey - 8,
+                   hip_x, hip_y, hip_x + 6, hip_y)
+    return kp if scale == 1.0 else kp.scaled(scale)
+
+
+def synthetic_face_box(kp, scale=1.0):
+    """由耳朵位置推估的臉部框 (x, y, w, h)"""
+    size = int(60 * scale)
+    return (kp.l_ear_x - int(20 * scale), kp.l_ear_y - int(35 * scale), size, size)
+
+
+# ==================== 情境 ====================
+# 每個情境為 fn(t, phase, rng, params) -> (脖子角度, 身體角度)；None 表示離座
+
+_DRIFT_PERIOD = 120.0        # 姿勢偏移的週期（秒）
+_FLAP_HZ = 1.5               # 門檻附近擺盪的頻率
+_FLAP_AMPLITUDE = 2.5        # 擺盪幅度（度），小於 neck_forward 的遲滯
+_ABSENCE_PRESENT = 60.0      # 每段在座秒數
+_ABSENCE_GAPS = (2.0, 8.0, 30.0)  # 依序輪替的離座秒數（短於、略長於、遠長於離座判斷時間）
+
+
+def _steady(t, phase, rng, params):
+    return (params['side_neck_threshold'] - 15 + rng.gauss(0, 1.0),
+            params['side_torso_threshold'] - 8 + rng.gauss(0, 0.5))
+
+
+def _drift(t, phase, rng, params):
+    # 三角波：由良好姿勢慢慢超過門檻再回來
+    x = ((t + phase) % _DRIFT_PERIOD) / _DRIFT_PERIOD
+    level = 1.0 - abs(2.0 * x - 1.0)
+    return (params['side_neck_threshold'] - 15 + 25 * level + rng.gauss(0, 0.5),
+            params['side_torso_threshold'] - 8 + 14 * level + rng.gauss(0, 0.3))
+
+
+def _flap(t, phase, rng, params):
+    return (params['side_neck_threshold'] + _FLAP_AMPLITUDE * m.sin(2 * m.pi * _FLAP_HZ * (t + phase))
+            + rng.gauss(0, 0.5),
+            params['side_torso_threshold'] - 8 + rng.gauss(0, 0.5))
+
+
+def _absence(t, phase, rng, params):
+    cycle = sum(_ABSENCE_GAPS) + _ABSENCE_PRESENT * len(_ABSENCE_GAPS)
+    pos = (t + phase) % cycle
+    for gap in _ABSENCE_GAPS:
+        if pos < _ABSENCE_PRESENT:
+            return _drift(t, phase, rng, params)
+        pos -= _ABSENCE_PRESENT
+        if pos < gap:
+            return None
+        pos -= gap
+    return _steady(t, phase, rng, params)
+
+
+SCENARIOS = {
+    'steady': _steady,
+    'drift': _drift,
+    'flap': _flap,
+    'absence': _absence,
+}
+MIXED = ('drift', 'flap', 'absence', 'steady')
+
+
+def scenario_for(name, index):
+    """'mixed' 依 stream 編號輪流分配情境；其餘情境所有 stream 相同（相位錯開）"""
+    if name == 'mixed':
+        name = MIXED[index % len(MIXED)]
+    if name not in SCENARIOS:
+        raise ValueError(f"未知的情境: {name}（可用: mixed {' '.join(SCENARIOS)}）")
+    return name, SCENARIOS[name]
+
+
+# ==================== 語音播放探針 ====================
+
+class AudioProbe(AudioPlayer):
+    """不實際發聲的播放器：以短暫等待模擬播放，記錄請求數與同時播放數（正確時永遠不超過 1）"""
+
+    def __init__(self, seconds=None):
+        super().__init__(enable_mixer=False)
+        self.seconds = Config.LOADGEN_AUDIO_SECONDS if seconds is None else seconds
+        self.requests = 0
+        self.started = 0
+        self.active = 0
+        self.max_active = 0
+        self.overlaps = 0
+        self._stats_lock = threading.Lock()
+
+    def play_audio(self, audio_type='default'):
+        with self._stats_lock:
+            self.requests += 1
+        return super().play_audio(audio_type)
+
+    def _playback(self, audio_file):
+        with self._stats_lock:
+            self.started += 1
+            self.active += 1
+            if self.active > 1:
+                self.overlaps += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.seconds)
+        finally:
+            with self._stats_lock:
+                self.active -= 1
+
+    def wait_idle(self, timeout=2.0):
+        """等待最後一次模擬播放結束"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not self.is_playing:
+                    return True
+            time.sleep(0.001)
+        return False
+
+    def stats(self):
+        with self._stats_lock:
+            return {'requests': self.requests, 'started': self.started,
+                    'suppressed': self.requests - self.started,
+                    'max_active': self.max_active, 'overlaps': self.overlaps}
+
+
+# ==================== 不變量檢查 ====================
+
+def check_stream(alerts, timeline, first_ts, last_ts, params):
+    """
+    檢查單一 stream 的結果
+
+    - 同一規則兩次提醒的間隔不小於其冷卻時間；久坐提醒的間隔不小於久坐門檻
+    - 提醒時間戳單調遞增且落在模擬時間內（狀態被其他 stream 寫入時會出現錯亂）
+    - 時間軸的良好＋不良時間不超過模擬時間
+
+    Args:
+        alerts: [(名稱, 時間戳), ...]
+        timeline: PostureTimeline
+
+    Returns:
+        list: 違規描述
+    """
+    problems = []
+    spacing = {}
+    for spec in Config.ALERT_RULES:
+        if 'cooldown' in spec:
+            value = spec['cooldown']
+            spacing[spec['name']] = params[value] if isinstance(value, str) else value
+    spacing['sitting'] = params['sitting_seconds']
+
+    last = {}
+    previous_ts = None
+    for name, ts in alerts:
+        if previous_ts is not None and ts < previous_ts:
+            problems.append(f"提醒時間戳倒退: {name} {ts:.3f} < {previous_ts:.3f}")
+        if not first_ts <= ts <= last_ts:
+            problems.append(f"提醒時間戳超出模擬範圍: {name} {ts:.3f}")
+        if name in last and ts - last[name] < spacing.get(name, 0.0) - 1e-6:
+            problems.append(f"{name} 提醒間隔 {ts - last[name]:.2f}s 小於 {spacing[name]:.2f}s")
+        last[name] = ts
+        previous_ts = ts
+
+    span = last_ts - first_ts
+    tracked = timeline.total(STATE_GOOD, last_ts) + timeline.total(STATE_BAD, last_ts)
+    if tracked > span + 1e-6:
+        problems.append(f"時間軸累計 {tracked:.2f}s 超過模擬時間 {span:.2f}s")
+    return problems
+
+
+# ==================== 關鍵點模式 ====================
+
+class _LandmarkStream:
+    """單一 stream：依情境產生關鍵點並送進分類與提醒層（只由一個執行緒處理）"""
+
+    def __init__(self, index, scenario, params, audio, target, seed):
+        self.stream_id = f"loadgen-{index}"
+        self.scenario_name, self.scenario = scenario_for(scenario, index)
+        self.params = params
+        self.audio = audio
+        self.target = target
+        self.rng = random.Random(seed * 1000003 + index)
+        self.phase = self.rng.uniform(0, _DRIFT_PERIOD)
+        self.alerts = []
+        self.latency = []
+        self.events = 0
+        self.detector = None
+        self.track = None
+
+    def open(self, now):
+        if self.target == 'detector':
+            from detector_module import PostureDetector
+
+            with config_overrides(HISTORY_ENABLED=False, LATENCY_CONTROL_ENABLED=False):
+                self.detector = PostureDetector(audio_player=self.audio)
+            for name, value in self.params.items():
+                self.detector.alert_engine.set_param(name, value)
+            self.detector.add_alert_listener(lambda alert, info: self.alerts.append((alert.name, alert.timestamp)))
+            self.canvas = np.full((_REF_HEIGHT, 640, 3), _BACKGROUND, dtype=np.uint8)
+        else:
+            self.track = PersonTrack(self.stream_id, (0, 0, 0, 0), now, self.params)
+
+    @property
+    def timeline(self):
+        return self.detector.timeline if self.detector is not None else self.track.timeline
+
+    def step(self, t, now):
+        angles = self.scenario(t, self.phase, self.rng, self.params)
+        kp = synthetic_keypoints(*angles) if angles is not None else None
+        start = time.perf_counter()
+        if self.detector is not None:
+            faces = [synthetic_face_box(kp)] if kp is not None else []
+            self.detector.apply_inference(self.canvas, faces, kp, True, now)
+        else:
+            # 與推論伺服器相同的流程（classify_track → evaluate_track），語音由共用播放器播放
+            track = self.track
+            if kp is not None:
+                track.update_box(synthetic_face_box(kp), now)
+                result = classify_track(track, kp, now, self.params['side_neck_threshold'],
+                                        self.params['side_torso_threshold'])
+            else:
+                track.keypoints = None
+                result = track.result = PostureResult(person_detected=False)
+            alerts = evaluate_track(track, result, now)
+            if alerts:
+                self.audio.play_alert(alerts[0])
+                self.alerts.extend((alert.name, alert.timestamp) for alert in alerts)
+        self.latency.append((time.perf_counter() - start) * 1000.0)
+        self.events += 1
+
+    def close(self):
+        if self.detector is not None:
+            self.detector.release()
+
+
+def run_landmarks(scenario='mixed', streams=None, workers=None, duration=None, rate=None,
+                  target='track', seed=None):
+    """
+    關鍵點模式：不限速地送出合成關鍵點，量測分類與提醒層的吞吐量上限
+
+    每個 stream 固定由一個執行緒處理（與伺服器相同，stream 狀態不跨執行緒），
+    多個 stream 的提醒同時要求共用的語音播放器
+
+    Args:
+        scenario: 情境名稱（SCENARIOS 或 'mixed'）
+        streams: stream 數
+        workers: 執行緒數
+        duration: 每個 stream 模擬的秒數
+        rate: 模擬的每秒觀測次數（時間戳間隔為 1 / rate）
+        target: 'track'（classify_track／evaluate_track）或 'detector'（PostureDetector.apply_inference，含繪製）
+        seed: 亂數種子
+
+    Returns:
+        dict: 吞吐量、延遲、提醒數、語音播放統計與違規列表
+    """
+    streams = streams or Config.LOADGEN_STREAMS
+    workers = max(1, min(workers or Config.LOADGEN_WORKERS, streams))
+    duration = duration or Config.LOADGEN_DURATION
+    rate = rate or Config.LOADGEN_EVENT_RATE
+    seed = Config.LOADGEN_SEED if seed is None else seed
+    params = default_alert_params(sitting_seconds=Config.LOADGEN_SITTING_MINUTES * 60.0)
+
+    audio = AudioProbe()
+    base = time.time()
+    states = [_LandmarkStream(i, scenario, params, audio, target, seed) for i in range(streams)]
+    for state in states:
+        state.open(base)
+    steps = int(duration * rate)
+    groups = [states[i::workers] for i in range(workers)]
+    ready = threading.Barrier(workers + 1)
+    errors = []
+
+    def worker(group):
+        ready.wait()
+        try:
+            for step in range(steps):
+                t = step / rate
+                now = base + t
+                for state in group:
+                    state.step(t, now)
+        except Exception as e:
+            errors.append(f"{threading.current_thread().name}: {e!r}")
+            raise
+
+    threads = [threading.Thread(target=worker, args=(group,), name=f"loadgen-{i}", daemon=True)
+               for i, group in enumerate(groups)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    audio.wait_idle()
+
+    last_ts = base + (steps - 1) / rate
+    problems = list(errors)
+    alert_counts = {}
+    samples = []
+    for state in states:
+        for name, _ in state.alerts:
+            alert_counts[name] = alert_counts.get(name, 0) + 1
+        samples.extend(state.latency)
+        problems.extend(f"{state.stream_id}（{state.scenario_name}）: {p}"
+                        for p in check_stream(state.alerts, state.timeline, base, last_ts, params))
+        state.close()
+    audio_stats = audio.stats()
+    if audio_stats['max_active'] > 1:
+        problems.append(f"語音播放重疊 {audio_stats['overlaps']} 次（同時最多 {audio_stats['max_active']} 個）")
+
+    events = sum(state.events for state in states)
+    return {
+        'mode': 'landmarks',
+        'scenario': scenario,
+        'target': target,
+        'streams': streams,
+        'workers': workers,
+        'events': events,
+        'elapsed': elapsed,
+        'throughput': events / elapsed if elapsed > 0 else 0.0,
+        'latency': latency_summary(samples),
+        'alerts': alert_counts,
+        'audio': audio_stats,
+        'problems': problems,
+    }
+
+
+# ==================== 影像模式 ====================
+
+class FootagePool:
+    """
+    影像模式的實拍素材：影片的取樣幀（在記憶體中以 JPEG 保存），載入時先以完整管線量出每幀
+    實際的脖子／身體角度；情境要求的角度以量得角度最接近的幀代替，
+    離座時使用沒有人的幀（素材中沒有時為空白背景）
+    """
+
+    def __init__(self, path=None, size=None, sample_hz=None, max_frames=None, pose_backend=None):
+        """
+        Args:
+            path: 素材影片
+            size: 送出的影像大小 (寬, 高)
+            sample_hz: 取樣頻率
+            max_frames: 素材幀數上限
+            pose_backend: 量測角度用的姿勢模型後端
+
+        Raises:
+            ValueError: 無法開啟素材，或素材中沒有可量出側面角度的幀
+        """
+        from detector_module import PostureDetector
+
+        self.path = path or Config.LOADGEN_FOOTAGE
+        self.size = tuple(size or Config.LOADGEN_FRAME_SIZE)
+        sample_hz = Config.LOADGEN_FOOTAGE_HZ if sample_hz is None else sample_hz
+        max_frames = max_frames or Config.LOADGEN_FOOTAGE_MAX_FRAMES
+        self.present = []   # [(脖子角度, 身體角度, JPEG), ...]
+        self.absent = []    # [JPEG, ...]
+        self.other = 0      # 有人但量不出側面角度（正面）的幀，不使用
+        reader = SampledVideoReader(self.path, sample_hz=sample_hz)
+        if not reader.isOpened():
+            reader.release()
+            raise ValueError(f"無法開啟素材影片: {self.path}")
+        with config_overrides(HISTORY_ENABLED=False, LATENCY_CONTROL_ENABLED=False):
+            detector = PostureDetector(pose_backend=pose_backend, audio_player=AudioPlayer(enable_mixer=False),
+                                       stages=[name for name in Config.FRAME_STAGES if name != 'overlay'])
+        try:
+            while len(self.present) + len(self.absent) + self.other < max_frames:
+                ok, frame = reader.read()
+                if not ok:
+                    break
+                if (frame.shape[1], frame.shape[0]) != self.size:
+                    frame = cv2.resize(frame, self.size)
+                _, result = detector.process_frame(frame, 1, reader.timestamp)
+                data = self._encode(frame)
+                if not result.person_detected:
+                    self.absent.append(data)
+                elif result.neck_angle is not None and result.torso_angle is not None:
+                    self.present.append((result.neck_angle, result.torso_angle, data))
+                else:
+                    self.other += 1
+        finally:
+            reader.release()
+            detector.release()
+        total = len(self.present) + len(self.absent) + self.other
+        if not self.present:
+            raise ValueError(f"素材 {self.path} 的 {total} 幀都量不出側面坐姿角度，"
+                             f"影像模式無法驅動分類與提醒（請改用有側面坐姿的影片）")
+        if not self.absent:
+            self.absent.append(self._encode(np.full((self.size[1], self.size[0], 3), _BACKGROUND, dtype=np.uint8)))
+        necks = [p[0] for p in self.present]
+        torsos = [p[1] for p in self.present]
+        logger.info("影像模式素材 %s：%d 幀（側面 %d，無人 %d，其他 %d），脖子 %.0f–%.0f°，身體 %.0f–%.0f°",
+                    self.path, total, len(self.present), len(self.absent), self.other,
+                    min(necks), max(necks), min(torsos), max(torsos))
+
+    @staticmethod
+    def _encode(frame):
+        ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        if not ok:
+            raise ValueError("素材影像編碼失敗")
+        return buf.tobytes()
+
+    def select(self, angles, rng):
+        """
+        Args:
+            angles: 情境要求的 (脖子角度, 身體角度)；None 表示離座
+            rng: random.Random
+
+        Returns:
+            tuple: (JPEG, 與要求角度的差距（度）；離座時為 0)
+        """
+        if angles is None:
+            return rng.choice(self.absent), 0.0
+        neck, torso = angles
+        best = min(self.present, key=lambda p: (p[0] - neck) ** 2 + (p[1] - torso) ** 2)
+        return best[2], m.hypot(best[0] - neck, best[1] - torso)
+
+
+def _frame_stream(index, scenario, footage, fps, duration, params, audio, detector, server, skip, seed, slot):
+    """單一 stream 的送幀迴圈（每個 stream 一個執行緒）"""
+    from inference_server_module import InferenceClient
+
+    _, fn = scenario_for(scenario, index)
+    rng = random.Random(seed * 1000003 + index)
+    phase = rng.uniform(0, _DRIFT_PERIOD)
+    step_rate = fps or Config.LOADGEN_EVENT_RATE
+    frames = int(duration * step_rate)
+    interval = 1.0 / fps if fps > 0 else 0.0
+    client = None
+    if server is not None:
+        client = InferenceClient(f"loadgen-{index}", server[0], server[1], params={
+            'side_neck_threshold': params['side_neck_threshold'],
+            'side_torso_threshold': params['side_torso_threshold'],
+            'sitting_seconds': params['sitting_seconds'],
+        })
+
+    base = time.time()
+    latency = []
+    late = detected = expected = alerts = errors = 0
+    match_error = 0.0
+    start = time.perf_counter()
+    try:
+        for i in range(frames):
+            if interval:
+                # 依排程送幀；處理跟不上時不補送，記為延遲
+                delay = start + i * interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                elif -delay > interval:
+                    late += 1
+            t = i / step_rate
+            angles = fn(t, phase, rng, params)
+            data, error = footage.select(angles, rng)
+            canvas = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if angles is not None:
+                expected += 1
+                match_error += error
+            t0 = time.perf_counter()
+            if client is not None:
+                response = client.infer(canvas, base + t)
+                if response.get('type') != 'result':
+                    errors += 1
+                    continue
+                person = response['posture'].person_detected
+                for alert in response['alerts'][:1]:
+                    audio.play_audio(alert['audio'])
+                alerts += len(response['alerts'])
+            else:
+                before = len(slot['alerts'])
+                _, result = detector.process_frame(canvas, skip, base + t)
+                person = result.person_detected
+                alerts += len(slot['alerts']) - before
+            latency.append((time.perf_counter() - t0) * 1000.0)
+            detected += bool(person)
+    except Exception as e:
+        slot['error'] = repr(e)
+        raise
+    finally:
+        if client is not None:
+            client.close()
+        slot.update({
+            'frames': len(latency),
+            'elapsed': time.perf_counter() - start,
+            'latency': latency,
+            'late': late,
+            'detected': detected,
+            'expected': expected,
+            'match_error': match_error / expected if expected else 0.0,
+            'alert_count': alerts,
+            'errors': errors,
+        })
+
+
+def run_frames(scenario='mixed', streams=None, size=None, fps=None, duration=None,
+               server=None, skip_frames=1, pose_backend=None, seed=None, footage=None):
+    """
+    影像模式：每個 stream 依情境從實拍素材挑幀，以指定解析度與頻率送進完整管線
+
+    Args:
+        size: (寬, 高)
+        fps: 每個 stream 的送幀頻率；0 表示不限速（量測上限）
+        duration: 每個 stream 模擬的秒數
+        server: (host, port)：送往推論伺服器；None 表示每個 stream 在本行程建立 PostureDetector
+        skip_frames: 本行程模式的跳幀設定
+        pose_backend: 本行程模式的姿勢模型後端
+        footage: 素材影片（預設 Config.LOADGEN_FOOTAGE）
+
+    Returns:
+        dict: 整體與逐 stream 的幀率、延遲、延遲送出的幀數與偵測到人的比例
+
+    Raises:
+        ValueError: 素材中沒有可量出側面角度的幀
+    """
+    streams = streams or Config.LOADGEN_STREAMS
+    size = tuple(size or Config.LOADGEN_FRAME_SIZE)
+    fps = Config.LOADGEN_FRAME_FPS if fps is None else fps
+    duration = duration or Config.LOADGEN_FRAME_DURATION
+    seed = Config.LOADGEN_SEED if seed is None else seed
+    params = default_alert_params(sitting_seconds=Config.LOADGEN_SITTING_MINUTES * 60.0)
+    pool = FootagePool(footage, size, pose_backend=pose_backend)
+    audio = AudioProbe()
+
+    slots = [{'alerts': []} for _ in range(streams)]
+    detectors = [None] * streams
+    if server is None:
+        from detector_module import PostureDetector
+
+        # 在主執行緒建立（建立期間暫時修改 Config），每個 stream 一個偵測器
+        with config_overrides(HISTORY_ENABLED=False, LATENCY_CONTROL_ENABLED=False):
+            for i in range(streams):
+                detector = PostureDetector(pose_backend=pose_backend, audio_player=audio)
+                for name, value in params.items():
+                    detector.alert_engine.set_param(name, value)
+                detector.add_alert_listener(lambda alert, info, alerts=slots[i]['alerts']: alerts.append(alert.name))
+                detectors[i] = detector
+
+    threads = [threading.Thread(target=_frame_stream, name=f"loadgen-{i}", daemon=True,
+                                args=(i, scenario, pool, fps, duration, params, audio, detectors[i],
+                                      server, skip_frames, seed, slots[i]))
+               for i in range(streams)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    audio.wait_idle()
+    for detector in detectors:
+        if detector is not None:
+            detector.release()
+
+    problems = [f"loadgen-{i}: {slot['error']}" for i, slot in enumerate(slots) if 'error' in slot]
+    audio_stats = audio.stats()
+    if audio_stats['max_active'] > 1:
+        problems.append(f"語音播放重疊 {audio_stats['overlaps']} 次（同時最多 {audio_stats['max_active']} 個）")
+
+    per_stream = []
+    samples = []
+    for i, slot in enumerate(slots):
+        frames = slot.get('frames', 0)
+        samples.extend(slot.get('latency', ()))
+        if slot.get('expected') and not slot.get('detected'):
+            # 沒有偵測到人時分類與提醒層都沒有執行，量到的只是空轉的管線
+            problems.append(f"loadgen-{i}: {slot['expected']} 幀應有人，但完全沒有偵測到")
+        per_stream.append({
+            'stream': f"loadgen-{i}",
+            'scenario': scenario_for(scenario, i)[0],
+            'frames': frames,
+            'fps': frames / slot['elapsed'] if slot.get('elapsed') else 0.0,
+            'latency': latency_summary(slot.get('latency', ())),
+            'late': slot.get('late', 0),
+            'detected': slot.get('detected', 0) / frames if frames else 0.0,
+            'expected': slot.get('expected', 0) / frames if frames else 0.0,
+            'match_error': slot.get('match_error', 0.0),
+            'alerts': slot.get('alert_count', 0),
+            'errors': slot.get('errors', 0),
+        })
+    frames = sum(row['frames'] for row in per_stream)
+    return {
+        'mode': 'frames',
+        'scenario': scenario,
+        'target': 'server' if server else 'local',
+        'streams': streams,
+        'size': size,
+        'footage': pool.path,
+        'fps': fps,
+        'frames': frames,
+        'elapsed': elapsed,
+        'throughput': frames / elapsed if elapsed > 0 else 0.0,
+        'latency': latency_summary(samples),
+        'per_stream': per_stream,
+        'audio': audio_stats,
+        'problems': problems,
+    }
+
+
+# ==================== 報告 ====================
+
+def print_report(report):
+    lat = report['latency']
+    audio = report['audio']
+    if report['mode'] == 'landmarks':
+        print(f"關鍵點模式 情境={report['scenario']} 目標={report['target']} "
+              f"stream={report['streams']} 執行緒={report['workers']}")
+        print(f"  {report['events']} 筆 / {report['elapsed']:.2f}s = {report['throughput']:,.0f} 筆/秒"
+              f"（每筆 p50 {lat['p50_ms'] * 1000:.1f}us, p95 {lat['p95_ms'] * 1000:.1f}us）")
+        alerts = ", ".join(f"{name} {count}" for name, count in sorted(report['alerts'].items())) or "無"
+        print(f"  提醒: {alerts}")
+    else:
+        w, h = report['size']
+        pace = f"{report['fps']:g} fps" if report['fps'] else "不限速"
+        print(f"影像模式 情境={report['scenario']} 目標={report['target']} "
+              f"stream={report['streams']} {w}x{h} {pace} 素材={report['footage']}")
+        print(f"  {report['frames']} 幀 / {report['elapsed']:.2f}s = {report['throughput']:.1f} 幀/秒"
+              f"（每幀 p50 {lat['p50_ms']:.1f} ms, p95 {lat['p95_ms']:.1f} ms）")
+        print(f"  {'stream':<12} {'情境':<8} {'幀數':>6} {'fps':>7} {'p50ms':>7} {'p95ms':>7} "
+              f"{'延遲':>5} {'有人/應有':>11} {'角度差':>6} {'提醒':>5} {'錯誤':>5}")
+        for row in report['per_stream']:
+            print(f"  {row['stream']:<12} {row['scenario']:<8} {row['frames']:>6} {row['fps']:>7.1f} "
+                  f"{row['latency']['p50_ms']:>7.1f} {row['latency']['p95_ms']:>7.1f} {row['late']:>5} "
+                  f"{row['detected']:>5.0%}/{row['expected']:<5.0%} {row['match_error']:>5.1f}° "
+                  f"{row['alerts']:>5} {row['errors']:>5}")
+    print(f"  語音: 請求 {audio['requests']}, 播放 {audio['started']}, 略過 {audio['suppressed']}, "
+          f"同時最多 {audio['max_active']}")
+    if report['problems']:
+        print(f"  不一致 {len(report['problems'])} 項:")
+        for problem in report['problems'][:20]:
+            print(f"    {problem}")
+    else:
+        print("  不變量檢查通過")
+
+
+def _parse_size(text):
+    w, h = text.lower().split('x')
+    return int(w), int(h)
+
+
+def _parse_server(text):
+    host, _, port = text.rpartition(':')
+    return host or Config.INFERENCE_SERVER_HOST, int(port)
+
+
+if __name__ == "__main__":
+    choices = ('mixed',) + tuple(SCENARIOS)
+    parser = argparse.ArgumentParser(description="合成關鍵點／影像壓力測試")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    lm = sub.add_parser("landmarks", help="關鍵點直接送進分類與提醒層（量測吞吐量上限）")
+    lm.add_argument("--scenario", choices=choices, default="mixed")
+    lm.add_argument("--streams", type=int, default=None)
+    lm.add_argument("--workers", type=int, default=None)
+    lm.add_argument("--duration", type=float, default=None, help="每個 stream 模擬的秒數")
+    lm.add_argument("--rate", type=float, default=None, help="模擬的每秒觀測次數")
+    lm.add_argument("--target", choices=("track", "detector"), default="track")
+    lm.add_argument("--seed", type=int, default=None)
+
+    fr = sub.add_parser("frames", help="依情境挑選實拍素材的幀跑完整管線")
+    fr.add_argument("--scenario", choices=choices, default="mixed")
+    fr.add_argument("--streams", type=int, default=None)
+    fr.add_argument("--size", type=_parse_size, default=None, help="例如 1280x720")
+    fr.add_argument("--fps", type=float, default=None, help="每個 stream 的送幀頻率；0 表示不限速")
+    fr.add_argument("--duration", type=float, default=None)
+    fr.add_argument("--server", type=_parse_server, default=None, help="推論伺服器 host:port")
+    fr.add_argument("--skip-frames", type=int, default=1)
+    fr.add_argument("--pose-backend", default=None)
+    fr.add_argument("--seed", type=int, default=None)
+    fr.add_argument("--footage", default=None, help=f"素材影片（預設 {Config.LOADGEN_FOOTAGE}）")
+
+    args = parser.parse_args()
+    setup_logging()
+    if args.command == "landmarks":
+        result = run_landmarks(args.scenario, args.streams, args.workers, args.duration, args.rate,
+                               args.target, args.seed)
+    else:
+        result = run_frames(args.scenario, args.streams, args.size, args.fps, args.duration,
+                            args.server, args.skip_frames, args.pose_backend, args.seed, args.footage)
+    print_report(result)
+    sys.exit(1 if result['problems'] else 0)
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/19 15:10
+# User : l'r's
+# Software: PyCharm
+# File : log_module.py
+"""
+日誌模組 - Logging Module
+以佇列轉交給背景執行緒輸出，呼叫端不做阻塞 I/O；
+支援逐訊息限流（rate_limit）與取樣（sample），並可於執行期間調整等級
+
+用法：
+    logger = logging.getLogger(__name__)
+    logger.debug("每幀訊息 %s", value, extra={'sample': 30})       # 每 30 筆輸出 1 筆
+    logger.info("事件 %s", value, extra={'rate_limit': 5.0})      # 同一呼叫點 5 秒內最多 1 筆
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import signal
+import threading
+import time
+
+from config_module import Config
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_lock = threading.Lock()
+_listener = None
+_queue_handler = None
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    依呼叫點（檔案＋行號）限流與取樣
+
+    - record 帶有 rate_limit（秒）：同一呼叫點在間隔內只放行第一筆
+    - record 帶有 sample（N）：同一呼叫點每 N 筆放行 1 筆
+    被略過的筆數會附加在下一筆放行的訊息後面
+    """
+
+    def __init__(self, default_interval=0.0):
+        super().__init__()
+        self.default_interval = default_interval
+        self._state = {}  # 呼叫點 -> [上次放行時間, 計數, 已略過筆數]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        interval = getattr(record, 'rate_limit', None)
+        sample = getattr(record, 'sample', None)
+        if interval is None and sample is None:
+            if not self.default_interval or record.levelno >= logging.WARNING:
+                return True
+            interval = self.default_interval
+
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(key)
+            if state is None:
+                state = self._state[key] = [None, 0, 0]
+            state[1] += 1
+            allowed = True
+            if sample and (state[1] - 1) % int(sample) != 0:
+                allowed = False
+            if allowed and interval and state[0] is not None and now - state[0] < interval:
+                allowed = False
+            if not allowed:
+                state[2] += 1
+                return False
+            state[0] = now
+            suppressed, state[2] = state[2], 0
+
+        if suppressed:
+            record.msg = f"{record.msg} (已略過 {suppressed} 筆)"
+        return True
+
+
+def setup_logging(level=None, log_file=None):
+    """
+    設定根 logger：所有輸出經由佇列交給背景執行緒處理（可重複呼叫）
+
+    Args:
+        level: 日誌等級（名稱或數值），預設 Config.LOG_LEVEL
+        log_file: 額外寫入的檔案路徑，預設 Config.LOG_FILE（None 表示只輸出到 stderr）
+    """
+    global _listener, _queue_handler
+    level = level or Config.LOG_LEVEL
+    log_file = log_file if log_file is not None else Config.LOG_FILE
+
+    with _lock:
+        root = logging.getLogger()
+        root.setLevel(level)
+        if _listener is not None:
+            return
+
+        formatter = logging.Formatter(LOG_FORMAT)
+        handlers = [logging.StreamHandler()]
+        if log_file:
+            handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        _queue_handler = logging.handlers.QueueHandler(log_queue)
+        _queue_handler.addFilter(RateLimitFilter(Config.LOG_DEFAULT_RATE_LIMIT))
+        root.addHandler(_queue_handler)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """停止背景輸出執行緒並送出剩餘的日誌"""
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener = None
+        _queue_handler = None
+
+
+def set_level(level, name=None):
+    """
+    執行期間調整日誌等級
+
+    Args:
+        level: 等級名稱（'DEBUG'、'INFO'…）或數值
+        name: logger 名稱（例如 'detector_module'）；None 表示根 logger
+    """
+    if isinstance(level, str):
+        level = level.upper()
+    logging.getLogger(name).setLevel(level)
+
+
+def install_level_signal(signum=None):
+    """
+    安裝訊號處理：收到訊號時在 INFO 與 DEBUG 之間切換（預設 SIGUSR2，僅限 POSIX）
+
+    Returns:
+        bool: 是否安裝成功
+    """
+    signum = signum or getattr(signal, 'SIGUSR2', None)
+    if signum is None:
+        return False
+
+    def _toggle(_signum, _frame):
+        root = logging.getLogger()
+        root.setLevel(logging.INFO if root.level <= logging.DEBUG else logging.DEBUG)
+        logging.getLogger(__name__).warning("日誌等級切換為 %s", logging.getLevelName(root.level))
+
+    try:
+        signal.signal(signum, _toggle)
+    except ValueError:
+        # 非主執行緒無法安裝訊號處理
+        return False
+    return True
@@ -9,13 +9,44 @@
 """
 
 import sys
+import argparse
 from PyQt5.QtWidgets import QApplication
+from config_module import Config
 from ui_module import PostureDetectionApp
+from log_module import setup_logging, install_level_signal
+from pose_backend_module import BACKENDS
+from trace_module import tracer, install_dump_signal
+
+
+def parse_args(argv):
+    """解析命令列參數（其餘參數保留給 Qt）"""
+    parser = argparse.ArgumentParser(description="智慧坐姿偵測系統")
+    parser.add_argument("--pose-backend", choices=list(BACKENDS), default=None,
+                        help=f"姿勢模型後端（預設 {Config.POSE_BACKEND}）")
+    parser.add_argument("--trace", action="store_true",
+                        help=f"開啟效能追蹤（{Config.TRACE_SIGNAL} 或介面按鈕匯出至 {Config.TRACE_DIR}/）")
+    parser.add_argument("--record", action="store_true",
+                        help=f"錄製攝影機原始影像至 {Config.RECORD_DIR}/（可用「錄製重播」來源重播）")
+    return parser.parse_known_args(argv[1:])
 
 
 def main():
     """主函式"""
-    app = QApplication(sys.argv)
+    args, qt_args = parse_args(sys.argv)
+    if args.pose_backend:
+        Config.POSE_BACKEND = args.pose_backend
+    if args.record:
+        Config.RECORD_ENABLED = True
+
+    # 日誌經由佇列由背景執行緒輸出，避免在 GUI 執行緒做阻塞 I/O
+    setup_logging()
+    install_level_signal()
+    if args.trace:
+        tracer.enable()
+    if tracer.enabled:
+        install_dump_signal()
+
+    app = QApplication(sys.argv[:1] + qt_args)
 
     # 設定應用程式樣式
     app.setStyle('Fusion')
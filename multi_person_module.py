@@ -0,0 +1,498 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/20 14:10
+# User : l'r's
+# Software: PyCharm
+# File : multi_person_module.py
+"""
+多人偵測模組 - Multi-Person Module
+以臉部框裁切每個人的身體區域分別做姿勢偵測，並以臉部中心追蹤穩定的編號；
+每個追蹤目標有獨立的姿勢時間軸、在座計時與提醒冷卻，多人同框時統計互不干擾
+"""
+
+import argparse
+import logging
+import time
+
+import cv2
+import numpy as np
+from config_module import Config, config_overrides
+from detector_module import detect_faces, detect_pose, findDistance, side_view_angles
+from pose_backend_module import create_pose_backend
+from presence_module import PresenceTracker
+from result_module import PostureResult
+from rule_module import AlertRuleEngine
+from timeline_module import PostureTimeline, STATE_GOOD, STATE_BAD
+
+logger = logging.getLogger(__name__)
+
+
+def person_crop(box, frame_w, frame_h):
+    """
+    由臉部框推估身體區域（側面坐姿：左右各 3 個臉寬、往下 7 個臉高）
+
+    Returns:
+        tuple: (x0, y0, x1, y1)，已限制在影像範圍內
+    """
+    x, y, w, h = box
+    cx = x + w // 2
+    x0 = max(0, cx - 3 * w)
+    x1 = min(frame_w, cx + 3 * w)
+    y0 = max(0, y - h)
+    y1 = min(frame_h, y + 8 * h)
+    return x0, y0, x1, y1
+
+
+class PersonTrack:
+    """單一追蹤目標與其獨立狀態"""
+
+    def __init__(self, track_id, box, now, params):
+        self.track_id = track_id
+        self.box = box
+        self.center = (box[0] + box[2] // 2, box[1] + box[3] // 2)
+        self.first_seen = now
+        self.last_seen = now
+        self.matched = True        # 本幀是否有對應的臉部框
+        self.pose = None           # 專屬的姿勢模型後端（由池中取得）
+        self.result = None         # 最近一次的 PostureResult
+        self.keypoints = None      # 最近一次的關鍵點（整張影像座標）
+
+        self.timeline = PostureTimeline()
+        self.presence = PresenceTracker()
+        self.alert_engine = AlertRuleEngine(params=params)
+        self._metrics = {'neck_angle': None, 'torso_angle': None,
+                         'head_distance': None, 'sitting_seconds': None}
+
+    def update_box(self, box, now):
+        self.box = box
+        self.center = (box[0] + box[2] // 2, box[1] + box[3] // 2)
+        self.last_seen = now
+        self.matched = True
+
+
+def associate(tracks, boxes, max_distance):
+    """
+    以臉部中心距離做貪婪配對（距離以臉寬為單位）
+
+    Args:
+        tracks: 現有追蹤目標列表
+        boxes: 本幀臉部框列表
+        max_distance: 配對的最大距離（臉寬倍數）
+
+    Returns:
+        tuple: (配對列表 [(track, box)], 未配對的臉部框列表)
+    """
+    candidates = []
+    for ti, track in enumerate(tracks):
+        for bi, (x, y, w, h) in enumerate(boxes):
+            scale = max(w, track.box[2], 1)
+            dist = findDistance(track.center[0], track.center[1], x + w // 2, y + h // 2) / scale
+            if dist <= max_distance:
+                candidates.append((dist, ti, bi))
+    candidates.sort()
+
+    used_tracks = set()
+    used_boxes = set()
+    pairs = []
+    for _, ti, bi in candidates:
+        if ti in used_tracks or bi in used_boxes:
+            continue
+        used_tracks.add(ti)
+        used_boxes.add(bi)
+        pairs.append((tracks[ti], boxes[bi]))
+    unmatched = [box for bi, box in enumerate(boxes) if bi not in used_boxes]
+    return pairs, unmatched
+
+
+def classify_track(track, kp, now, neck_threshold, torso_threshold):
+    """
+    分類單一目標的姿勢並更新其時間軸；側面視角時記錄姿勢規則的量測值（由 evaluate_track 評估）
+
+    Args:
+        track: PersonTrack（box 為臉部框，用於計算頭部距離）
+        kp: 整張影像座標的關鍵點；未偵測到姿勢時為 None
+        now: 時間戳
+        neck_threshold: 脖子角度閾值
+        torso_threshold: 身體角度閾值
+
+    Returns:
+        PostureResult
+    """
+    result = PostureResult(person_detected=True)
+    track.keypoints = kp
+    if kp is not None:
+        offset = findDistance(kp.l_shldr_x, kp.l_shldr_y, kp.r_shldr_x, kp.r_shldr_y)
+        if offset > Config.FRONT_VIEW_THRESHOLD:
+            result.view_type = 'front'
+        else:
+            result.view_type = 'side'
+            neck, torso = side_view_angles(kp)
+            result.neck_angle, result.torso_angle = neck, torso
+            result.is_correct = neck < neck_threshold and torso < torso_threshold
+            track.timeline.mark(STATE_GOOD if result.is_correct else STATE_BAD, now)
+            x, y, fw, fh = track.box
+            result.head_distance = findDistance(
+                x + fw // 2, y + fh // 2,
+                (kp.l_shldr_x + kp.r_shldr_x) / 2, (kp.l_shldr_y + kp.r_shldr_y) / 2)
+
+    state, elapsed = track.timeline.current_run(now)
+    if result.is_correct:
+        result.good_time = elapsed if state == STATE_GOOD else 0
+    elif result.is_correct is False:
+        result.bad_time = elapsed if state == STATE_BAD else 0
+
+    if result.view_type == 'side':
+        # 姿勢規則只在側面視角的偵測幀更新（與 evaluate_track 一併評估）
+        metrics = track._metrics
+        metrics['neck_angle'] = result.neck_angle
+        metrics['torso_angle'] = result.torso_angle
+        metrics['head_distance'] = result.head_distance
+    track.result = result
+    return result
+
+
+def evaluate_track(track, result, now):
+    """
+    更新目標的在座計時並評估其所有提醒規則
+
+    Returns:
+        list: 觸發的 Alert（依優先順序）
+    """
+    metrics = track._metrics
+    metrics['sitting_seconds'] = track.presence.update(result.person_detected, now)
+    alerts = track.alert_engine.evaluate(metrics, now)
+    metrics['neck_angle'] = metrics['torso_angle'] = metrics['head_distance'] = None
+    if any(alert.name == 'sitting' for alert in alerts):
+        track.alert_engine.clear('sitting')
+        track.presence.notify_reminder(now)
+    return alerts
+
+
+class PeopleCostStats:
+    """依同框人數累計每幀耗時（毫秒），觀察成本隨人數的成長"""
+
+    def __init__(self, report_interval=300):
+        self.report_interval = report_interval
+        self.frames = 0
+        self._by_people = {}  # 人數 -> [幀數, 臉部偵測總耗時, 姿勢偵測總耗時]
+
+    def add(self, people, face_ms, pose_ms):
+        """
+        記錄一幀
+
+        Returns:
+            bool: 是否到達輸出報告的間隔
+        """
+        acc = self._by_people.get(people)
+        if acc is None:
+            acc = self._by_people[people] = [0, 0.0, 0.0]
+        acc[0] += 1
+        acc[1] += face_ms
+        acc[2] += pose_ms
+        self.frames += 1
+        return self.report_interval > 0 and self.frames % self.report_interval == 0
+
+    def summary(self):
+        """
+        Returns:
+            list: [(人數, 幀數, 每幀平均總耗時, 每人平均姿勢耗時), ...]（依人數排序）
+        """
+        rows = []
+        for people in sorted(self._by_people):
+            frames, face_ms, pose_ms = self._by_people[people]
+            per_person = pose_ms / (frames * people) if people else 0.0
+            rows.append((people, frames, (face_ms + pose_ms) / frames, per_person))
+        return rows
+
+    def report(self):
+        for people, frames, total_ms, per_person in self.summary():
+            logger.info("多人模式: %d 人 %d 幀, 每幀 %.1f ms, 每人姿勢 %.1f ms",
+                        people, frames, total_ms, per_person)
+
+    def reset(self):
+        self.frames = 0
+        self._by_people.clear()
+
+
+class MultiPersonDetector:
+    """
+    多人姿勢偵測
+
+    與 PostureDetector 共用臉部偵測器、閾值、影像緩衝區與語音播放器；
+    每個追蹤目標使用專屬的姿勢模型後端（MediaPipe 會沿用上一幀的 ROI 追蹤，
+    不同人的裁切區域共用同一個計算圖會互相干擾），後端於目標移除後回收重用
+    """
+
+    def __init__(self, detector, max_people=None, match_distance=None, track_timeout=None):
+        """
+        Args:
+            detector: PostureDetector
+            max_people: 同時追蹤的人數上限
+            match_distance: 配對距離（臉寬倍數）
+            track_timeout: 目標連續多少秒未出現即移除
+        """
+        self.detector = detector
+        self.max_people = max_people or Config.MULTI_PERSON_MAX
+        self.match_distance = match_distance or Config.MULTI_PERSON_MATCH_DISTANCE
+        self.track_timeout = track_timeout or Config.MULTI_PERSON_TRACK_TIMEOUT
+
+        self.tracks = []
+        self._next_id = 1
+        self._free_poses = []
+        self._params = dict(detector.alert_engine.params)
+        self.alert_listeners = []  # fn(track_id, alert, posture_info)
+        self.frame_counter = 0
+        self._explicit_now = None  # 呼叫端指定的時間戳（影片容器時間），統計查詢以此為準
+        self.cost = PeopleCostStats(Config.MULTI_PERSON_COST_REPORT_INTERVAL)
+
+    def add_alert_listener(self, callback):
+        """
+        註冊提醒回呼
+
+        Args:
+            callback: fn(track_id, alert, posture_info)
+        """
+        self.alert_listeners.append(callback)
+
+    def _acquire_pose(self):
+        # 主偵測器切換後端後，舊類型的閒置後端直接釋放；進行中的目標沿用到結束
+        name = self.detector.pose_backend.name
+        while self._free_poses:
+            pose = self._free_poses.pop()
+            if pose.name == name:
+                return pose
+            pose.close()
+        return create_pose_backend(name)
+
+    def _sync_params(self):
+        """介面調整閾值後同步到各目標的提醒規則（只在參數有變時處理）"""
+        params = self.detector.alert_engine.params
+        if params == self._params:
+            return
+        for name, value in params.items():
+            if self._params.get(name) != value:
+                for track in self.tracks:
+                    track.alert_engine.set_param(name, value)
+        self._params = dict(params)
+
+    def _update_tracks(self, face_boxes, now):
+        """配對臉部框與追蹤目標，建立新目標並移除逾時的目標"""
+        for track in self.tracks:
+            track.matched = False
+        pairs, unmatched = associate(self.tracks, face_boxes, self.match_distance)
+        for track, box in pairs:
+            track.update_box(box, now)
+
+        # 新目標：臉越大（越靠近鏡頭）越優先，超過上限的人不追蹤
+        unmatched.sort(key=lambda b: b[2] * b[3], reverse=True)
+        for box in unmatched:
+            if len(self.tracks) >= self.max_people:
+                break
+            track = PersonTrack(self._next_id, box, now, self._params)
+            track.pose = self._acquire_pose()
+            self._next_id += 1
+            self.tracks.append(track)
+
+        for track in [t for t in self.tracks if now - t.last_seen > self.track_timeout]:
+            self._drop(track, now)
+
+    def _drop(self, track, now):
+        track.timeline.close(now)
+        track.presence.reset()
+        self._free_poses.append(track.pose)
+        track.pose = None
+        self.tracks.remove(track)
+
+    def process_frame(self, frame, skip_frames=1, now=None):
+        """
+        處理一幀
+
+        Args:
+            frame: BGR 影像（會直接在上面繪製）
+            skip_frames: 每隔幾幀做一次姿勢偵測（臉部偵測與追蹤每幀都做）
+            now: 時間戳（預設 time.time()）
+
+        Returns:
+            tuple: (繪製後的影像, {追蹤編號: PostureResult})
+        """
+        self._explicit_now = now
+        now = time.time() if now is None else now
+        h, w = frame.shape[:2]
+        self.frame_counter += 1
+        should_detect = self.frame_counter % max(1, skip_frames) == 0
+        self._sync_params()
+
+        image_rgb = self.detector.buffers.get('rgb', frame.shape)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=image_rgb)
+
+        t0 = time.perf_counter()
+        face_boxes = detect_faces(self.detector.face_detection, image_rgb)
+        self._update_tracks(face_boxes, now)
+        t1 = time.perf_counter()
+
+        results = {}
+        detected = 0
+        for track in self.tracks:
+            if not track.matched:
+                track.presence.update(False, now)
+                continue
+            if should_detect or track.result is None:
+                x0, y0, x1, y1 = person_crop(track.box, w, h)
+                if x1 - x0 < 2 or y1 - y0 < 2:
+                    continue
+                crop = np.ascontiguousarray(image_rgb[y0:y1, x0:x1])
+                kp = detect_pose(track.pose, crop)
+                detected += 1
+                result = self._classify(track, kp.translated(x0, y0) if kp else None, now)
+            else:
+                result = self._cached(track, now)
+            results[track.track_id] = result
+            self._update_presence(track, result, now)
+            self._draw(frame, track, result)
+        t2 = time.perf_counter()
+
+        if self.cost.add(detected, (t1 - t0) * 1000.0, (t2 - t1) * 1000.0):
+            self.cost.report()
+        return frame, results
+
+    def _classify(self, track, kp, now):
+        """分類單一目標的姿勢並更新其時間軸與提醒規則"""
+        return classify_track(track, kp, now, self.detector.side_neck_threshold,
+                              self.detector.side_torso_threshold)
+
+    def _cached(self, track, now):
+        """跳幀時沿用上一次的結果，只更新連續時間"""
+        cached = track.result
+        state, elapsed = track.timeline.current_run(now)
+        if cached.is_correct:
+            return cached.with_times(elapsed if state == STATE_GOOD else 0, 0)
+        if cached.is_correct is False:
+            return cached.with_times(0, elapsed if state == STATE_BAD else 0)
+        return cached
+
+    def _update_presence(self, track, result, now):
+        """更新在座計時並評估該目標的所有提醒規則"""
+        self._dispatch(track, evaluate_track(track, result, now), result)
+
+    def _dispatch(self, track, alerts, result):
+        if not alerts:
+            return
+        alert = alerts[0]
+        logger.info("觸發語音播報（#%d）: %s（%s=%.1f，門檻 %.1f）", track.track_id,
+                    alert.name, alert.metric, alert.value, alert.threshold)
+        self.detector.audio_player.play_alert(alert)
+        for callback in self.alert_listeners:
+            for item in alerts:
+                callback(track.track_id, item, result)
+
+    def _draw(self, image, track, result):
+        x, y, fw, fh = track.box
+        if result.is_correct is None:
+            color = Config.COLOR_BLUE
+        else:
+            color = Config.COLOR_LIGHT_GREEN if result.is_correct else Config.COLOR_RED
+        cv2.rectangle(image, (x, y), (x + fw, y + fh), color, 2)
+        label = f"#{track.track_id}"
+        if result.neck_angle is not None:
+            label += f" N{int(result.neck_angle)} T{int(result.torso_angle)}"
+        elif result.view_type == 'front':
+            label += " front"
+        cv2.putText(image, label, (x, max(15, y - 8)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+
+        kp = track.keypoints
+        if kp is not None and result.view_type == 'side':
+            cv2.line(image, (kp.l_shldr_x, kp.l_shldr_y), (kp.l_ear_x, kp.l_ear_y), color, 3)
+            cv2.line(image, (kp.l_hip_x, kp.l_hip_y), (kp.l_shldr_x, kp.l_shldr_y), color, 3)
+
+    def primary_track(self):
+        """本幀可見的目標中最早出現者（介面以此人為主要顯示對象）"""
+        visible = [t for t in self.tracks if t.matched and t.result is not None]
+        return min(visible, key=lambda t: t.track_id) if visible else None
+
+    def primary_result(self):
+        track = self.primary_track()
+        return track.result if track else None
+
+    def get_statistics(self, track_id=None):
+        """
+        取得某目標的累計時間（預設主要目標）
+
+        Returns:
+            tuple: (正確秒數, 不良秒數, 總秒數)
+        """
+        track = self._find(track_id)
+        if track is None:
+            return 0.0, 0.0, 0.0
+        now = self._explicit_now or time.time()
+        good = track.timeline.total(STATE_GOOD, now)
+        bad = track.timeline.total(STATE_BAD, now)
+        return good, bad, good + bad
+
+    def get_window_statistics(self, seconds, track_id=None):
+        """取得某目標最近一段時間的統計（預設主要目標）"""
+        track = self._find(track_id)
+        if track is None:
+            return 0.0, 0.0
+        totals = track.timeline.rolling(seconds, self._explicit_now or time.time())
+        return totals[STATE_GOOD], totals[STATE_BAD]
+
+    def _find(self, track_id):
+        if track_id is None:
+            return self.primary_track()
+        for track in self.tracks:
+            if track.track_id == track_id:
+                return track
+        return None
+
+    def reset_statistics(self):
+        """清除所有目標（編號重新開始）"""
+        now = time.time()
+        for track in list(self.tracks):
+            self._drop(track, now)
+        self._next_id = 1
+        self.cost.reset()
+
+    def release(self):
+        """釋放所有姿勢模型後端（臉部偵測器由 PostureDetector 釋放）"""
+        self.reset_statistics()
+        for pose in self._free_poses:
+            pose.close()
+        self._free_poses = []
+
+
+def run_benchmark(video_path, frames=300, max_people=None):
+    """輸出每幀耗時與同框人數的關係"""
+    from detector_module import PostureDetector
+
+    # 測試影片不寫入歷史紀錄
+    with config_overrides(HISTORY_ENABLED=False):
+        detector = PostureDetector()
+    multi = MultiPersonDetector(detector, max_people=max_people)
+    multi.cost.report_interval = 0
+    cap = cv2.VideoCapture(video_path)
+    count = 0
+    try:
+        while count < frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            multi.process_frame(frame)
+            count += 1
+        # release() 會清除耗時統計，先取出
+        summary = multi.cost.summary()
+    finally:
+        cap.release()
+        multi.release()
+        detector.release()
+
+    print(f"{'人數':>4} {'幀數':>6} {'每幀(ms)':>10} {'每人姿勢(ms)':>14}")
+    for people, n, total_ms, per_person in summary:
+        print(f"{people:>4} {n:>6} {total_ms:>10.1f} {per_person:>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="多人模式耗時與人數關係測試")
+    parser.add_argument("video", nargs="?", default="demo.MOV", help="測試影片路徑")
+    parser.add_argument("--frames", type=int, default=300, help="處理幀數上限")
+    parser.add_argument("--max-people", type=int, default=Config.MULTI_PERSON_MAX, help="追蹤人數上限")
+    args = parser.parse_args()
+    run_benchmark(args.video, args.frames, args.max_people)
@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/20 16:30
+# User : l'r's
+# Software: PyCharm
+# File : pose_backend_module.py
+"""
+姿勢模型後端模組 - Pose Backend Module
+偵測器只透過 PoseBackend.process() 取得關鍵點，實作可替換：
+- legacy：mp.solutions.pose（同步）
+- tasks：MediaPipe Tasks PoseLandmarker（LIVE_STREAM 非同步，結果由回呼送回）
+- onnx：ONNX Runtime CPU 執行 MoveNet SinglePose
+所有後端都回傳相同的 Keypoints（像素座標），上層邏輯不必區分
+
+效能測試：python pose_backend_module.py demo.MOV --backends legacy tasks onnx
+"""
+
+import argparse
+import collections
+import logging
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from config_module import Config
+from result_module import Keypoints
+
+logger = logging.getLogger(__name__)
+
+# Keypoints.from_points 的索引：左肩、右肩、左耳、右耳、左眼、右眼、左髖、右髖
+BLAZEPOSE_INDEX = (11, 12, 7, 8, 2, 5, 23, 24)  # MediaPipe 33 點
+MOVENET_INDEX = (5, 6, 3, 4, 1, 2, 11, 12)      # COCO 17 點
+
+_Point = collections.namedtuple('_Point', 'x y')
+
+
+class PoseBackend:
+    """姿勢模型後端介面"""
+
+    name = None
+
+    def __init__(self):
+        self.latency_ms = collections.deque(maxlen=1000)  # 最近的單幀延遲（毫秒）
+        self.completed = 0                                 # 已完成的推論次數
+
+    def process(self, image_rgb, timestamp_ms=None):
+        """
+        偵測單張 RGB 影像
+
+        Args:
+            image_rgb: RGB 影像（呼叫端可能重複使用此緩衝區）
+            timestamp_ms: 影像時間戳（毫秒，需遞增）；非同步後端用來對應結果
+
+        Returns:
+            Keypoints: 關鍵點像素座標；未偵測到人為 None
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """釋放模型資源"""
+
+    def set_complexity(self, complexity):
+        """
+        調整模型複雜度（0／1／2）
+
+        Returns:
+            bool: 後端是否支援（不支援時不做任何事）
+        """
+        return False
+
+    def _record(self, elapsed_ms):
+        self.latency_ms.append(elapsed_ms)
+        self.completed += 1
+
+    def stats(self):
+        """
+        Returns:
+            dict: {'completed': 完成次數, 'mean_ms': 平均延遲, 'p95_ms': 95 百分位延遲}
+        """
+        if not self.latency_ms:
+            return {'completed': self.completed, 'mean_ms': 0.0, 'p95_ms': 0.0}
+        values = np.fromiter(self.latency_ms, dtype=np.float64)
+        return {'completed': self.completed,
+                'mean_ms': float(values.mean()),
+                'p95_ms': float(np.percentile(values, 95))}
+
+
+class LegacyPoseBackend(PoseBackend):
+    """mp.solutions.pose（同步 API）"""
+
+    name = 'legacy'
+
+    def __init__(self, complexity=None):
+        super().__init__()
+        import mediapipe as mp
+        self._mp_pose = mp.solutions.pose
+        self._landmark_enum = mp.solutions.pose.PoseLandmark
+        self.complexity = Config.MP_MODEL_COMPLEXITY if complexity is None else complexity
+        self._pose = self._create(self.complexity)
+
+    def _create(self, complexity):
+        return self._mp_pose.Pose(
+            min_detection_confidence=Config.MP_MIN_DETECTION_CONFIDENCE,
+            min_tracking_confidence=Config.MP_MIN_TRACKING_CONFIDENCE,
+            model_complexity=complexity
+        )
+
+    def set_complexity(self, complexity):
+        if complexity != self.complexity:
+            # 複雜度只能在建立時指定，因此重建計算圖
+            self._pose.close()
+            self._pose = self._create(complexity)
+            self.complexity = complexity
+        return True
+
+    def process(self, image_rgb, timestamp_ms=None):
+        start = time.perf_counter()
+        h, w = image_rgb.shape[:2]
+        lm = self._pose.process(image_rgb).pose_landmarks
+        self._record((time.perf_counter() - start) * 1000.0)
+        if lm and hasattr(lm, 'landmark'):
+            return Keypoints.from_landmarks(lm, self._landmark_enum, w, h)
+        return None
+
+    def close(self):
+        self._pose.close()
+
+
+class TasksPoseBackend(PoseBackend):
+    """
+    MediaPipe Tasks PoseLandmarker（LIVE_STREAM）
+
+    detect_async() 立即返回，結果於背景執行緒的回呼送回；
+    process() 回傳目前最新的已完成結果（通常落後一到兩幀），不會等待推論
+    """
+
+    name = 'tasks'
+
+    def __init__(self, model_path=None):
+        super().__init__()
+        import mediapipe as mp
+        from mediapipe.tasks import python as mp_tasks
+        from mediapipe.tasks.python import vision
+
+        model_path = model_path or Config.POSE_TASK_MODEL_PATH
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"找不到 PoseLandmarker 模型檔: {model_path}")
+
+        self._mp = mp
+        self._lock = threading.Lock()
+        self._latest = None          # 最新結果的 Keypoints（或 None）
+        self._submitted = {}         # 時間戳 -> 送出時間（計算延遲用）
+        self._last_ts = -1
+        self.pending = 0             # 已送出但尚未收到結果的幀數
+
+        options = vision.PoseLandmarkerOptions(
+            base_options=mp_tasks.BaseOptions(model_asset_path=model_path),
+            running_mode=vision.RunningMode.LIVE_STREAM,
+            num_poses=1,
+            min_pose_detection_confidence=Config.MP_MIN_DETECTION_CONFIDENCE,
+            min_tracking_confidence=Config.MP_MIN_TRACKING_CONFIDENCE,
+            result_callback=self._on_result,
+        )
+        self._landmarker = vision.PoseLandmarker.create_from_options(options)
+
+    def _on_result(self, result, output_image, timestamp_ms):
+        keypoints = None
+        if result.pose_landmarks:
+            keypoints = Keypoints.from_points(result.pose_landmarks[0], BLAZEPOSE_INDEX,
+                                              output_image.width, output_image.height)
+        with self._lock:
+            self._latest = keypoints
+            sent = self._submitted.pop(timestamp_ms, None)
+            # 推論忙碌時 LIVE_STREAM 會丟棄較舊的幀，這些幀不會有回呼
+            for ts in [ts for ts in self._submitted if ts < timestamp_ms]:
+                del self._submitted[ts]
+            self.pending = len(self._submitted)
+        if sent is not None:
+            self._record((time.perf_counter() - sent) * 1000.0)
+
+    def process(self, image_rgb, timestamp_ms=None):
+        if timestamp_ms is None:
+            timestamp_ms = int(time.monotonic() * 1000)
+        # LIVE_STREAM 要求時間戳嚴格遞增
+        timestamp_ms = max(int(timestamp_ms), self._last_ts + 1)
+        self._last_ts = timestamp_ms
+
+        image = self._mp.Image(image_format=self._mp.ImageFormat.SRGB, data=image_rgb)
+        with self._lock:
+            self._submitted[timestamp_ms] = time.perf_counter()
+            self.pending = len(self._submitted)
+        self._landmarker.detect_async(image, timestamp_ms)
+        with self._lock:
+            return self._latest
+
+    def close(self):
+        self._landmarker.close()
+
+
+class OnnxPoseBackend(PoseBackend):
+    """ONNX Runtime CPU 執行 MoveNet SinglePose（輸入 NHWC、輸出 [1, 1, 17, 3] 的 y, x, 分數）"""
+
+    name = 'onnx'
+
+    def __init__(self, model_path=None, threads=None):
+        super().__init__()
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("ONNX 後端需要 onnxruntime：pip install onnxruntime") from e
+
+        model_path = model_path or Config.POSE_ONNX_MODEL_PATH
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"找不到 ONNX 姿勢模型檔: {model_path}")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads or Config.POSE_ONNX_THREADS
+        options.inter_op_num_threads = 1
+        self._session = ort.InferenceSession(model_path, sess_options=options,
+                                             providers=['CPUExecutionProvider'])
+        model_input = self._session.get_inputs()[0]
+        self._input_name = model_input.name
+        size = model_input.shape[1]
+        self.input_size = size if isinstance(size, int) else 192
+        if 'int32' in model_input.type:
+            dtype = np.int32
+        elif 'uint8' in model_input.type:
+            dtype = np.uint8
+        else:
+            dtype = np.float32
+        # 輸入緩衝區只配置一次
+        self._resized = np.empty((self.input_size, self.input_size, 3), dtype=np.uint8)
+        self._input = np.empty((1, self.input_size, self.input_size, 3), dtype=dtype)
+
+    def process(self, image_rgb, timestamp_ms=None):
+        start = time.perf_counter()
+        h, w = image_rgb.shape[:2]
+        cv2.resize(image_rgb, (self.input_size, self.input_size), dst=self._resized,
+                   interpolation=cv2.INTER_LINEAR)
+        self._input[0] = self._resized
+        output = self._session.run(None, {self._input_name: self._input})[0].reshape(-1, 3)
+        self._record((time.perf_counter() - start) * 1000.0)
+
+        # 直接縮放（非等比例）不影響正規化座標
+        if min(output[5, 2], output[6, 2]) < Config.POSE_MIN_KEYPOINT_SCORE:
+            return None
+        points = [_Point(float(x), float(y)) for y, x, _ in output[:17]]
+        return Keypoints.from_points(points, MOVENET_INDEX, w, h)
+
+
+BACKENDS = {
+    LegacyPoseBackend.name: LegacyPoseBackend,
+    TasksPoseBackend.name: TasksPoseBackend,
+    OnnxPoseBackend.name: OnnxPoseBackend,
+}
+
+
+def create_pose_backend(name=None, **kwargs):
+    """
+    建立姿勢模型後端
+
+    Args:
+        name: 'legacy'／'tasks'／'onnx'（預設 Config.POSE_BACKEND）
+
+    Returns:
+        PoseBackend
+    """
+    name = name or Config.POSE_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"不支援的姿勢後端: {name}（可用: {', '.join(BACKENDS)}）")
+    logger.info("姿勢模型後端: %s", name)
+    return BACKENDS[name](**kwargs)
+
+
+def run_benchmark(video_path, backends, frames=200, resolution="640x480"):
+    """
+    在本機量測各後端的延遲與吞吐量（影格先讀入記憶體，排除解碼時間）
+
+    Args:
+        video_path: 測試影片路徑
+        backends: 後端名稱列表
+        frames: 測試幀數
+        resolution: 測試解析度
+    """
+    w, h = (int(v) for v in resolution.split('x'))
+    cap = cv2.VideoCapture(video_path)
+    images = []
+    while len(images) < frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        images.append(cv2.cvtColor(cv2.resize(frame, (w, h)), cv2.COLOR_BGR2RGB))
+    cap.release()
+    if not images:
+        print(f"無法讀取影片: {video_path}")
+        return
+
+    print(f"{'後端':<8} {'幀數':>6} {'偵測率':>8} {'平均(ms)':>10} {'P95(ms)':>10} {'吞吐(FPS)':>10}")
+    for name in backends:
+        try:
+            backend = create_pose_backend(name)
+        except (ImportError, FileNotFoundError, ValueError) as e:
+            print(f"{name:<8} 無法建立: {e}")
+            continue
+        try:
+            # 暖機：排除模型載入與第一次配置
+            for image in images[:5]:
+                backend.process(image)
+            if isinstance(backend, TasksPoseBackend):
+                _wait_pending(backend)
+            backend.latency_ms.clear()
+            backend.completed = 0
+
+            found = 0
+            start = time.perf_counter()
+            for i, image in enumerate(images):
+                if backend.process(image, int(start * 1000) + i * 33) is not None:
+                    found += 1
+            if isinstance(backend, TasksPoseBackend):
+                _wait_pending(backend)
+            elapsed = time.perf_counter() - start
+        finally:
+            backend.close()
+
+        stats = backend.stats()
+        fps = stats['completed'] / elapsed if elapsed > 0 else 0.0
+        print(f"{name:<8} {len(images):>6} {found / len(images):>8.0%} "
+              f"{stats['mean_ms']:>10.1f} {stats['p95_ms']:>10.1f} {fps:>10.1f}")
+
+
+def _wait_pending(backend, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while backend.pending and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="姿勢模型後端效能測試")
+    parser.add_argument("video", nargs="?", default="demo.MOV", help="測試影片路徑")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--frames", type=int, default=200, help="測試幀數")
+    parser.add_argument("--resolution", default="640x480", choices=Config.RESOLUTION_OPTIONS)
+    args = parser.parse_args()
+    run_benchmark(args.video, args.backends, args.frames, args.resolution)
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/21 11:00
+# User : l'r's
+# Software: PyCharm
+# File : power_module.py
+"""
+電源狀態模組 - Power State Module
+依是否有人切換「全速」與「低功耗待機」：
+連續一段時間沒有人時降低擷取頻率，只以低解析度確認是否有人（臉部，沒有臉時再以最低複雜度的
+姿勢模型確認，與全速時的判斷相同）；偵測到人後立即回到全速，喚醒延遲不超過設定值。
+並統計各狀態的平均 CPU 使用率，以及待機檢查各路徑（臉部／姿勢／無人）的次數與耗時
+"""
+
+import logging
+import time
+
+from config_module import Config
+
+logger = logging.getLogger(__name__)
+
+POWER_ACTIVE = 'active'
+POWER_IDLE = 'idle'
+
+
+class PowerManager:
+    """電源狀態管理"""
+
+    def __init__(self, idle_after=None, wake_latency=None, active_interval_ms=None, clock=None):
+        """
+        Args:
+            idle_after: 連續多少秒沒有人即進入待機
+            wake_latency: 待機時的最長喚醒延遲（秒），即待機檢查間隔
+            active_interval_ms: 全速時的擷取間隔（毫秒）
+            clock: 時間來源（預設 time.monotonic）
+        """
+        self.idle_after = idle_after if idle_after is not None else Config.POWER_IDLE_AFTER_SECONDS
+        self.wake_latency = wake_latency if wake_latency is not None else Config.POWER_WAKE_LATENCY
+        self.active_interval_ms = active_interval_ms or Config.TIMER_INTERVAL
+        self.clock = clock or time.monotonic
+
+        self.state = POWER_ACTIVE
+        self.last_person = self.clock()
+        self.transitions = 0
+
+        # 各狀態累計的行程 CPU 時間與經過時間（秒）
+        self._cpu = {POWER_ACTIVE: 0.0, POWER_IDLE: 0.0}
+        self._wall = {POWER_ACTIVE: 0.0, POWER_IDLE: 0.0}
+        self._mark_cpu = time.process_time()
+        self._mark_wall = self.clock()
+
+        # 待機檢查：路徑 -> [次數, 累計秒數]（'none' 為臉部與姿勢都沒有偵測到，兩者都執行過）
+        self.checks = {'face': [0, 0.0], 'pose': [0, 0.0], 'none': [0, 0.0]}
+
+    @property
+    def idle(self):
+        return self.state == POWER_IDLE
+
+    @property
+    def interval_ms(self):
+        """目前狀態的擷取間隔（毫秒）"""
+        if self.state == POWER_IDLE:
+            return max(self.active_interval_ms, int(self.wake_latency * 1000))
+        return self.active_interval_ms
+
+    def update(self, person_detected, now=None):
+        """
+        依本次觀測更新電源狀態
+
+        Args:
+            person_detected: 是否偵測到人
+            now: 時間戳（預設使用 clock）
+
+        Returns:
+            bool: 狀態是否改變（呼叫端需依 interval_ms 調整計時器）
+        """
+        now = self.clock() if now is None else now
+        if person_detected:
+            self.last_person = now
+            if self.state == POWER_IDLE:
+                self._switch(POWER_ACTIVE, now)
+                return True
+        elif self.state == POWER_ACTIVE and now - self.last_person >= self.idle_after:
+            self._switch(POWER_IDLE, now)
+            return True
+        return False
+
+    def record_check(self, method, seconds):
+        """
+        記錄一次待機檢查
+
+        Args:
+            method: check_presence 的結果（'face'／'pose'／None）
+            seconds: 檢查耗時
+        """
+        entry = self.checks[method or 'none']
+        entry[0] += 1
+        entry[1] += seconds
+
+    def check_summary(self):
+        """
+        Returns:
+            dict: {路徑: (次數, 平均毫秒)}
+        """
+        return {method: (count, total * 1000.0 / count if count else 0.0)
+                for method, (count, total) in self.checks.items()}
+
+    def wake(self, now=None):
+        """強制回到全速（例如使用者重新開始偵測）"""
+        now = self.clock() if now is None else now
+        self.last_person = now
+        if self.state != POWER_ACTIVE:
+            self._switch(POWER_ACTIVE, now)
+
+    def _accumulate(self, now):
+        cpu = time.process_time()
+        self._cpu[self.state] += cpu - self._mark_cpu
+        self._wall[self.state] += max(0.0, now - self._mark_wall)
+        self._mark_cpu = cpu
+        self._mark_wall = now
+
+    def _switch(self, state, now):
+        self._accumulate(now)
+        previous, self.state = self.state, state
+        self.transitions += 1
+        usage = self.cpu_usage(now)
+        logger.info("電源狀態: %s -> %s（平均 CPU：全速 %.1f%%／待機 %.1f%%）",
+                    previous, state, usage[POWER_ACTIVE], usage[POWER_IDLE])
+
+    def cpu_usage(self, now=None):
+        """
+        各狀態的平均 CPU 使用率（行程 CPU 時間 / 經過時間，以單核心 100% 計）
+
+        Returns:
+            dict: {'active': 百分比, 'idle': 百分比}
+        """
+        now = self.clock() if now is None else now
+        self._accumulate(now)
+        return {state: (self._cpu[state] / self._wall[state] * 100.0 if self._wall[state] > 0 else 0.0)
+                for state in (POWER_ACTIVE, POWER_IDLE)}
+
+    def summary(self):
+        """
+        Returns:
+            dict: {狀態: (累計秒數, 平均 CPU 百分比)}
+        """
+        usage = self.cpu_usage()
+        return {state: (self._wall[state], usage[state]) for state in usage}
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/20 10:40
+# User : l'r's
+# Software: PyCharm
+# File : presence_module.py
+"""
+在座偵測模組 - Presence Tracker Module
+依時間（而非幀數）累計在座秒數並判斷離座，5 fps 與 30 fps 的行為相同；
+時間來源可注入（重播／測試），久坐提醒與工作階段重置以回呼通知訂閱者
+"""
+
+import time
+
+from config_module import Config
+
+
+class PresenceTracker:
+    """在座計時器"""
+
+    def __init__(self, absence_timeout=None, clock=None):
+        """
+        Args:
+            absence_timeout: 連續多少秒未偵測到人視為離座（工作階段結束、計時歸零）
+            clock: 時間來源（預設 time.time）；update() 未指定 now 時使用
+        """
+        self.absence_timeout = (absence_timeout if absence_timeout is not None
+                                else Config.PRESENCE_ABSENCE_SECONDS)
+        self.clock = clock or time.time
+
+        self.sitting_seconds = 0.0   # 自上次提醒（或工作階段開始）以來的在座秒數
+        self.session_start = None    # 本次工作階段開始時間
+        self.last_seen = None        # 最後一次偵測到人的時間
+        self.present = False         # 最近一次觀測是否有人
+        self._last_ts = None         # 最近一次觀測時間
+
+        self._reminder_listeners = []
+        self._reset_listeners = []
+
+    def add_reminder_listener(self, callback):
+        """
+        訂閱久坐提醒事件
+
+        Args:
+            callback: fn(sitting_seconds, now)
+        """
+        self._reminder_listeners.append(callback)
+
+    def add_reset_listener(self, callback):
+        """
+        訂閱工作階段重置事件（離座超過 absence_timeout 或手動重置）
+
+        Args:
+            callback: fn(session_start, session_end, sitting_seconds)
+        """
+        self._reset_listeners.append(callback)
+
+    def update(self, person_detected, now=None):
+        """
+        記錄一次觀測
+
+        只累計前後兩次觀測皆有人的時間；兩次觀測間隔超過 absence_timeout
+        （例如暫停或卡頓）也視為離座
+
+        Args:
+            person_detected: 本次觀測是否偵測到人
+            now: 觀測時間戳（預設使用 clock）
+
+        Returns:
+            float: 目前的在座秒數
+        """
+        now = self.clock() if now is None else now
+        last = self._last_ts
+        self._last_ts = now
+        if last is not None and now - last > self.absence_timeout:
+            self._end_session(self.last_seen)
+            last = None
+
+        if person_detected:
+            if self.session_start is None:
+                self.session_start = now
+            elif self.present and last is not None:
+                self.sitting_seconds += max(0.0, now - last)
+            self.last_seen = now
+            self.present = True
+        else:
+            self.present = False
+            # 離座時間從最後一次偵測到人起算，與幀率無關
+            if self.session_start is not None and now - self.last_seen >= self.absence_timeout:
+                self._end_session(self.last_seen)
+        return self.sitting_seconds
+
+    def notify_reminder(self, now=None):
+        """久坐提醒已觸發：通知訂閱者並重新累計，讓提醒可週期性觸發"""
+        now = self.clock() if now is None else now
+        seconds = self.sitting_seconds
+        self.sitting_seconds = 0.0
+        for callback in self._reminder_listeners:
+            callback(seconds, now)
+
+    def snapshot(self):
+        """目前的計時狀態（可 JSON 序列化），例如批次處理在檢查點保存後接續"""
+        return {'sitting_seconds': self.sitting_seconds, 'session_start': self.session_start,
+                'last_seen': self.last_seen, 'present': self.present, 'last_ts': self._last_ts}
+
+    def restore(self, snapshot):
+        """還原 snapshot() 的結果（不通知訂閱者）"""
+        self.sitting_seconds = snapshot['sitting_seconds']
+        self.session_start = snapshot['session_start']
+        self.last_seen = snapshot['last_seen']
+        self.present = snapshot['present']
+        self._last_ts = snapshot['last_ts']
+
+    def reset(self):
+        """結束目前的工作階段（例如停止偵測或重置統計）"""
+        self._end_session(self.last_seen)
+        self._last_ts = None
+
+    def _end_session(self, end):
+        start, seconds = self.session_start, self.sitting_seconds
+        self.sitting_seconds = 0.0
+        self.session_start = None
+        self.last_seen = None
+        self.present = False
+        if start is None:
+            return
+        for callback in self._reset_listeners:
+            callback(start, end, seconds)
@@ -0,0 +1,569 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/27 14:30
+# User : l'r's
+# Software: PyCharm
+# File : recorder_module.py
+"""
+錄製重播模組 - Session Recorder Module
+錄下攝影機的原始影像（偵測與繪製之前），保留每一幀的擷取時間與讀取耗時，
+之後以 ReplayCapture 代替 cv2.VideoCapture(0) 重播，現場的使用情境即可重現為效能基準：
+
+- <名稱>.rec：逐幀編碼後的影像依序串接（預設 JPEG；'png' 無損、'raw' 不壓縮）
+- <名稱>.idx：固定長度的逐幀索引（位移、長度、相對時間、讀取耗時、寬、高、通道數），
+  每幀寫完影像後才寫索引，程式中斷時已寫入的部分仍可重播
+- <名稱>.json：擷取設定（解析度、幀率、FourCC、曝光、增益…與後端名稱）、應用程式設定與統計
+
+編碼與寫檔在背景執行緒進行；偵測端只複製影像後放入佇列，佇列滿時丟幀並計數
+（丟掉的幀不寫入索引，重播時的間隔仍與原始時間一致）
+
+範例：python recorder_module.py info recordings/session-20261027_143000.rec
+      python recorder_module.py bench recordings/session-20261027_143000.rec
+      python recorder_module.py bench session.rec --realtime   （依原始節奏重播）
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import struct
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from config_module import Config, config_overrides
+from log_module import setup_logging
+
+logger = logging.getLogger(__name__)
+
+INDEX_MAGIC = b'PSTREC01'
+# 位移、長度、相對時間（秒）、讀取耗時（毫秒）、寬、高、通道數
+INDEX_RECORD = struct.Struct('<QIddHHH')
+
+ENCODINGS = ('jpg', 'png', 'raw')
+
+# 錄製時記錄的擷取屬性（cv2.CAP_PROP_ 之後的名稱；平台不支援的屬性略過）
+CAPTURE_PROPS = ('FRAME_WIDTH', 'FRAME_HEIGHT', 'FPS', 'FOURCC', 'BUFFERSIZE', 'FORMAT',
+                 'AUTO_EXPOSURE', 'EXPOSURE', 'GAIN', 'BRIGHTNESS', 'CONTRAST', 'SATURATION',
+                 'HUE', 'SHARPNESS', 'GAMMA', 'AUTOFOCUS', 'FOCUS', 'AUTO_WB', 'WB_TEMPERATURE',
+                 'BACKLIGHT')
+
+
+def session_paths(path):
+    """
+    由任一錄製檔路徑（.rec／.idx／.json 或不含副檔名）取得三個檔案的路徑
+
+    Returns:
+        tuple: (影像檔, 索引檔, 說明檔)
+    """
+    base, ext = os.path.splitext(path)
+    if ext not in ('.rec', '.idx', '.json'):
+        base = path
+    return base + '.rec', base + '.idx', base + '.json'
+
+
+def capture_settings(cap):
+    """
+    讀取擷取裝置目前的設定
+
+    Returns:
+        dict: {'backend': 後端名稱, 'props': {屬性名稱: 值}, 'fourcc': 四字元編碼}
+    """
+    props = {}
+    for name in CAPTURE_PROPS:
+        prop = getattr(cv2, 'CAP_PROP_' + name, None)
+        if prop is None:
+            continue
+        value = cap.get(prop)
+        if value != -1:
+            props[name] = float(value)
+    try:
+        backend = cap.getBackendName()
+    except (AttributeError, cv2.error):
+        backend = None
+    fourcc = int(props.get('FOURCC', 0))
+    return {
+        'backend': backend,
+        'props': props,
+        'fourcc': ''.join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)).strip('\x00') or None,
+    }
+
+
+def _write_json(path, data):
+    """寫入暫存檔後以 os.replace 取代，讀取端不會看到寫一半的檔案"""
+    fd, tmp_path = tempfile.mkstemp(prefix=".rec-", suffix=".tmp",
+                                    dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class SessionRecorder:
+    """原始影像錄製（背景執行緒編碼寫檔，佇列滿時丟幀）"""
+
+    def __init__(self, output_dir=None, encoding=None, quality=None, queue_size=None):
+        """
+        Args:
+            output_dir: 輸出資料夾
+            encoding: 'jpg'、'png'（無損）或 'raw'（不壓縮）
+            quality: JPEG 品質（0–100）
+            queue_size: 待寫入幀數上限，超過即丟幀
+        """
+        self.output_dir = output_dir or Config.RECORD_DIR
+        self.encoding = encoding or Config.RECORD_ENCODING
+        if self.encoding not in ENCODINGS:
+            raise ValueError(f"未知的錄製編碼: {self.encoding}（可用: {', '.join(ENCODINGS)}）")
+        self.quality = quality if quality is not None else Config.RECORD_JPEG_QUALITY
+        self.queue_size = queue_size or Config.RECORD_QUEUE_SIZE
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        # 偵測端狀態（只在呼叫 start／push／stop 的執行緒存取）
+        self.path = None       # 進行中錄製的影像檔路徑；None 表示未錄製
+        self._start = None     # 錄製開始的 time.monotonic()
+        self.pushed = 0
+        self.dropped = 0
+        self.written = 0
+        self.bytes = 0
+        self._last_report = time.monotonic()
+        self._dropped_reported = 0
+
+        self._queue = queue.SimpleQueue()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._closed = False
+        self._writer = threading.Thread(target=self._writer_loop, name="record-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    def active(self):
+        return self.path is not None
+
+    # ==================== 偵測端（熱路徑只做複製與 put） ====================
+
+    def start(self, cap, name=None, settings=None):
+        """
+        開始錄製
+
+        Args:
+            cap: 擷取裝置（記錄其設定）
+            name: 檔名（不含副檔名；預設 session-日期_時間）
+            settings: 一併記錄的應用程式設定（dict）
+
+        Returns:
+            str: 影像檔路徑
+        """
+        if self._closed:
+            raise RuntimeError("錄製器已關閉")
+        if self.active:
+            self.stop()
+        name = name or time.strftime("session-%Y%m%d_%H%M%S")
+        paths = session_paths(os.path.join(self.output_dir, name))
+        self.pushed = self.dropped = self.written = self.bytes = 0
+        self._dropped_reported = 0
+        self._start = time.monotonic()
+        meta = {
+            'version': 1,
+            'encoding': self.encoding,
+            'quality': self.quality if self.encoding == 'jpg' else None,
+            'started_at': time.time(),
+            'capture': capture_settings(cap),
+            'settings': settings or {},
+            'complete': False,
+        }
+        # 先寫說明檔：錄製中斷時仍可得知擷取設定
+        _write_json(paths[2], meta)
+        self._queue.put(('open', paths, meta))
+        self.path = paths[0]
+        logger.info("開始錄製原始影像: %s（%s）", self.path, self.encoding)
+        return self.path
+
+    def push(self, frame, read_ms=0.0):
+        """
+        送出一幀原始影像
+
+        Args:
+            frame: BGR 影像（會複製，呼叫端可立即重用或在上面繪製）
+            read_ms: 本幀 read() 的耗時（毫秒；重播時可重現擷取延遲）
+        """
+        if not self.active:
+            return
+        t = time.monotonic() - self._start
+        self.pushed += 1
+        if not self._reserve():
+            self.dropped += 1
+            self._report_drops()
+            return
+        self._queue.put(('frame', t, read_ms, frame.copy()))
+
+    def stop(self):
+        """結束目前的錄製（佇列中的幀寫完後才更新說明檔）"""
+        if not self.active:
+            return
+        stats = {'pushed': self.pushed, 'dropped': self.dropped,
+                 'duration': time.monotonic() - self._start}
+        self._queue.put(('close', stats))
+        if self.dropped:
+            logger.warning("原始影像錄製丟棄 %d / %d 幀（可改用 'jpg' 或降低 RECORD_JPEG_QUALITY）",
+                           self.dropped, self.pushed)
+        self.path = None
+
+    def close(self, timeout=5.0):
+        """停止寫檔執行緒（先寫完佇列中的幀）"""
+        if self._closed:
+            return
+        self.stop()
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join(timeout)
+
+    def stats(self):
+        return {'pushed': self.pushed, 'written': self.written, 'dropped': self.dropped,
+                'pending': self._pending, 'bytes': self.bytes}
+
+    def _reserve(self):
+        with self._pending_lock:
+            if self._pending >= self.queue_size:
+                return False
+            self._pending += 1
+            return True
+
+    def _report_drops(self):
+        now = time.monotonic()
+        if now - self._last_report >= Config.EXPORT_REPORT_INTERVAL:
+            logger.warning("原始影像錄製跟不上，%.0f 秒內丟棄 %d 幀（累計 %d）",
+                           now - self._last_report, self.dropped - self._dropped_reported, self.dropped)
+            self._last_report = now
+            self._dropped_reported = self.dropped
+
+    # ==================== 寫檔執行緒 ====================
+
+    def _encode(self, frame):
+        if self.encoding == 'raw':
+            return np.ascontiguousarray(frame).reshape(-1).data
+        if self.encoding == 'png':
+            ok, buf = cv2.imencode('.png', frame, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        else:
+            ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)])
+        if not ok:
+            raise cv2.error("影像編碼失敗")
+        return buf.reshape(-1).data
+
+    def _writer_loop(self):
+        session = None  # (影像檔, 索引檔, 說明檔路徑, 說明)
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            kind = item[0]
+            try:
+                if kind == 'frame':
+                    _, t, read_ms, frame = item
+                    with self._pending_lock:
+                        self._pending -= 1
+                    if session is not None:
+                        self._write(session, t, read_ms, frame)
+                elif kind == 'open':
+                    _, paths, meta = item
+                    if session is not None:
+                        self._finish(session, None)
+                    rec = open(paths[0], 'wb')
+                    idx = open(paths[1], 'wb')
+                    idx.write(INDEX_MAGIC)
+                    session = (rec, idx, paths[2], meta)
+                elif kind == 'close':
+                    if session is not None:
+                        self._finish(session, item[1])
+                        session = None
+            except (cv2.error, OSError) as e:
+                logger.error("原始影像錄製寫檔失敗: %s", e)
+        if session is not None:
+            self._finish(session, None)
+
+    def _write(self, session, t, read_ms, frame):
+        rec, idx = session[0], session[1]
+        data = self._encode(frame)
+        offset = rec.tell()
+        rec.write(data)
+        # 影像先寫出才寫索引：索引指到的範圍一定已在影像檔中
+        rec.flush()
+        h, w = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        idx.write(INDEX_RECORD.pack(offset, data.nbytes, t, read_ms, w, h, channels))
+        idx.flush()
+        self.written += 1
+        self.bytes += data.nbytes
+
+    def _finish(self, session, stats):
+        rec, idx, meta_path, meta = session
+        frames = (idx.tell() - len(INDEX_MAGIC)) // INDEX_RECORD.size
+        for f in (rec, idx):
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+        meta = dict(meta, complete=stats is not None, frames=frames, bytes=os.path.getsize(rec.name))
+        if stats:
+            meta.update(stats)
+        _write_json(meta_path, meta)
+        logger.info("原始影像錄製完成: %s（%d 幀）", rec.name, frames)
+
+
+def read_index(path):
+    """
+    讀取逐幀索引（錄製中斷時略過不完整的最後一筆，以及影像檔中不存在的範圍）
+
+    Returns:
+        list: [(位移, 長度, 相對時間, 讀取耗時, 寬, 高, 通道數), ...]
+    """
+    rec_path, idx_path, _ = session_paths(path)
+    with open(idx_path, 'rb') as f:
+        data = f.read()
+    if data[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+        raise ValueError(f"不是錄製索引檔: {idx_path}")
+    body = data[len(INDEX_MAGIC):]
+    body = body[:len(body) - len(body) % INDEX_RECORD.size]
+    entries = list(INDEX_RECORD.iter_unpack(body))
+    rec_size = os.path.getsize(rec_path)
+    while entries and entries[-1][0] + entries[-1][1] > rec_size:
+        entries.pop()
+    return entries
+
+
+def read_meta(path):
+    """讀取說明檔（擷取設定、應用程式設定與統計）"""
+    with open(session_paths(path)[2], encoding='utf-8') as f:
+        return json.load(f)
+
+
+class ReplayCapture:
+    """
+    重播錄製的原始影像（介面與 cv2.VideoCapture／SampledVideoReader 的 read() 相容）
+
+    realtime 時每一幀都等到原始擷取時間（依 speed 縮放）才回傳，與攝影機 read() 一樣會阻塞；
+    否則盡快回傳。timestamp 為相對於錄製開始的原始擷取時間（秒）
+    """
+
+    def __init__(self, path, realtime=None, speed=1.0, drop_late=None):
+        """
+        Args:
+            path: 錄製檔路徑（.rec／.idx／.json 任一）
+            realtime: 是否依原始節奏重播（預設 Config.REPLAY_REALTIME）
+            speed: 重播速度倍率（僅 realtime）
+            drop_late: 處理跟不上原始節奏時略過已過期的幀（同攝影機只取最新幀；僅 realtime）
+        """
+        self.path = session_paths(path)[0]
+        self.realtime = Config.REPLAY_REALTIME if realtime is None else realtime
+        self.speed = speed if speed and speed > 0 else 1.0
+        self.drop_late = Config.REPLAY_DROP_LATE if drop_late is None else drop_late
+        self.meta = {}
+        self.entries = []
+        self._file = None
+        try:
+            self.meta = read_meta(path)
+            self.entries = read_index(path)
+            self._file = open(self.path, 'rb')
+        except (OSError, ValueError) as e:
+            logger.error("無法開啟錄製檔 %s: %s", path, e)
+        self._props = {}
+        for name, value in self.meta.get('capture', {}).get('props', {}).items():
+            prop = getattr(cv2, 'CAP_PROP_' + name, None)
+            if prop is not None:
+                self._props[prop] = value
+
+        self.timestamp = None   # 最近一次回傳幀的原始擷取時間（秒）
+        self.read_ms = 0.0      # 最近一次回傳幀錄製時的 read() 耗時
+        self._pos = 0
+        self._clock = None      # 第一幀回傳時的 perf_counter（realtime 節奏基準）
+
+        # 統計
+        self.delivered = 0
+        self.skipped = 0        # drop_late 略過的幀
+        self.late = 0           # 回傳時已晚於原始時間的幀
+        self.waited = 0.0       # realtime 等待的總秒數
+
+    @property
+    def duration(self):
+        return self.entries[-1][2] - self.entries[0][2] if self.entries else 0.0
+
+    def isOpened(self):
+        return self._file is not None
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self.entries))
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._pos)
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return (self.timestamp or 0.0) * 1000.0
+        return self._props.get(prop, 0.0)
+
+    def set(self, prop, value):
+        """擷取設定已固定在錄製檔中（介面調整解析度、幀率等不影響重播）"""
+        return False
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def read(self):
+        """
+        讀取下一幀
+
+        Returns:
+            tuple: (是否成功, BGR 影像)；時間戳見 self.timestamp
+        """
+        if self._file is None or self._pos >= len(self.entries):
+            return False, None
+        if self.realtime:
+            self._pace()
+            if self._pos >= len(self.entries):
+                return False, None
+        offset, size, t, read_ms, w, h, channels = self.entries[self._pos]
+        self._pos += 1
+        self._file.seek(offset)
+        data = self._file.read(size)
+        if len(data) != size:
+            return False, None
+        buf = np.frombuffer(data, dtype=np.uint8)
+        if self.meta.get('encoding') == 'raw':
+            frame = buf.reshape((h, w, channels) if channels > 1 else (h, w)).copy()
+        else:
+            frame = cv2.imdecode(buf, cv2.IMREAD_UNCHANGED)
+            if frame is None:
+                return False, None
+        self.timestamp = t
+        self.read_ms = read_ms
+        self.delivered += 1
+        return True, frame
+
+    def _pace(self):
+        """等到目前這一幀的原始擷取時間；drop_late 時先略過已被下一幀取代的幀"""
+        now = time.perf_counter()
+        if self._clock is None:
+            self._clock = now - self.entries[self._pos][2] / self.speed
+        if self.drop_late:
+            while (self._pos + 1 < len(self.entries)
+                   and self._clock + self.entries[self._pos + 1][2] / self.speed <= now):
+                self._pos += 1
+                self.skipped += 1
+        due = self._clock + self.entries[self._pos][2] / self.speed
+        if due > now:
+            time.sleep(due - now)
+            self.waited += due - now
+        elif now - due > 0.001:
+            self.late += 1
+
+    def stats(self):
+        return {'frames': len(self.entries), 'delivered': self.delivered, 'skipped': self.skipped,
+                'late': self.late, 'waited_s': round(self.waited, 3)}
+
+
+def describe(path):
+    """錄製檔摘要（說明檔內容與索引統計）"""
+    meta = read_meta(path)
+    entries = read_index(path)
+    summary = {
+        'frames': len(entries),
+        'complete': meta.get('complete', False),
+        'encoding': meta.get('encoding'),
+        'capture': meta.get('capture'),
+        'settings': meta.get('settings'),
+    }
+    if len(entries) > 1:
+        times = [e[2] for e in entries]
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        duration = times[-1] - times[0]
+        summary.update({
+            'duration_s': round(duration, 3),
+            'mean_fps': round((len(entries) - 1) / duration, 2) if duration > 0 else None,
+            'max_gap_ms': round(max(gaps) * 1000.0, 1),
+            'mean_read_ms': round(sum(e[3] for e in entries) / len(entries), 2),
+            'bytes_per_frame': int(sum(e[1] for e in entries) / len(entries)),
+        })
+    for key in ('pushed', 'dropped'):
+        if key in meta:
+            summary[key] = meta[key]
+    return summary
+
+
+def meta_skip_frames(path):
+    """錄製時的偵測間隔（說明檔沒有時使用 Config.DEFAULT_SKIP_FRAMES）"""
+    try:
+        return int(read_meta(path).get('settings', {}).get('skip_frames') or Config.DEFAULT_SKIP_FRAMES)
+    except (OSError, ValueError):
+        return Config.DEFAULT_SKIP_FRAMES
+
+
+def run_bench(path, realtime=False, speed=1.0, skip_frames=None, frames=None):
+    """
+    以重播影像執行無介面偵測並回報耗時（同一錄製檔重複執行即為可重現的效能基準）
+
+    Returns:
+        dict: 處理幀數、總耗時、幀率、各階段平均／最大耗時與重播統計
+    """
+    # detector_module 經由 stage_module 匯入 trace_module，於此才匯入以縮短 info 的啟動時間
+    from detector_module import PostureDetector
+    from Play_prompt import AudioPlayer
+
+    skip_frames = skip_frames or meta_skip_frames(path)
+    cap = ReplayCapture(path, realtime=realtime, speed=speed, drop_late=False)
+    if not cap.isOpened():
+        raise ValueError(f"無法開啟錄製檔: {path}")
+    # 重播不寫入歷史紀錄（同一錄製檔重複執行不可重複累計）
+    with config_overrides(HISTORY_ENABLED=False):
+        detector = PostureDetector(audio_player=AudioPlayer(enable_mixer=False))
+    # 時間戳沿用原始擷取時間，提醒與久坐判斷與現場一致
+    base = cap.meta.get('started_at', 0.0)
+    count = 0
+    began = time.perf_counter()
+    try:
+        while frames is None or count < frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            detector.process_frame(frame, skip_frames, base + cap.timestamp)
+            count += 1
+        elapsed = time.perf_counter() - began
+        return {
+            'frames': count,
+            'skip_frames': skip_frames,
+            'elapsed_s': round(elapsed, 3),
+            'fps': round(count / elapsed, 2) if elapsed > 0 else None,
+            'stages': detector.graph.timings(),
+            'replay': cap.stats(),
+        }
+    finally:
+        cap.release()
+        detector.release()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="原始影像錄製檔（查看與重播效能基準）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    info = sub.add_parser("info", help="顯示錄製檔的擷取設定與逐幀時間統計")
+    info.add_argument("path")
+
+    bench = sub.add_parser("bench", help="重播錄製檔執行無介面偵測並回報耗時")
+    bench.add_argument("path")
+    bench.add_argument("--realtime", action="store_true", help="依原始節奏重播（預設盡快重播）")
+    bench.add_argument("--speed", type=float, default=1.0, help="realtime 重播速度倍率")
+    bench.add_argument("--skip", type=int, default=None, help="每隔幾幀做一次姿勢偵測（預設與錄製時相同）")
+    bench.add_argument("--frames", type=int, default=None, help="最多處理幾幀")
+
+    args = parser.parse_args()
+    setup_logging()
+    if args.command == "info":
+        result = describe(args.path)
+    else:
+        result = run_bench(args.path, args.realtime, args.speed, args.skip, args.frames)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/19 11:20
+# User : l'r's
+# Software: PyCharm
+# File : result_module.py
+"""
+結果型別模組 - Result Types Module
+以 __slots__ 定義每幀的偵測結果，取代巢狀字典與逐幀複製；
+保留 get()／[] 字典介面以相容既有呼叫端，並可轉成 tuple 供記錄與 IPC 使用
+"""
+
+
+class Keypoints:
+    """關鍵點像素座標（只保留姿勢判斷用到的點）"""
+
+    FIELDS = (
+        'l_shldr_x', 'l_shldr_y', 'r_shldr_x', 'r_shldr_y',
+        'l_ear_x', 'l_ear_y', 'r_ear_x', 'r_ear_y',
+        'l_eye_x', 'l_eye_y', 'r_eye_x', 'r_eye_y',
+        'l_hip_x', 'l_hip_y', 'r_hip_x', 'r_hip_y',
+    )
+    __slots__ = FIELDS
+
+    def __init__(self, l_shldr_x, l_shldr_y, r_shldr_x, r_shldr_y,
+                 l_ear_x, l_ear_y, r_ear_x, r_ear_y,
+                 l_eye_x, l_eye_y, r_eye_x, r_eye_y,
+                 l_hip_x, l_hip_y, r_hip_x, r_hip_y):
+        self.l_shldr_x = l_shldr_x
+        self.l_shldr_y = l_shldr_y
+        self.r_shldr_x = r_shldr_x
+        self.r_shldr_y = r_shldr_y
+        self.l_ear_x = l_ear_x
+        self.l_ear_y = l_ear_y
+        self.r_ear_x = r_ear_x
+        self.r_ear_y = r_ear_y
+        self.l_eye_x = l_eye_x
+        self.l_eye_y = l_eye_y
+        self.r_eye_x = r_eye_x
+        self.r_eye_y = r_eye_y
+        self.l_hip_x = l_hip_x
+        self.l_hip_y = l_hip_y
+        self.r_hip_x = r_hip_x
+        self.r_hip_y = r_hip_y
+
+    @classmethod
+    def from_landmarks(cls, lm, lmPose, w, h):
+        """由 MediaPipe 正規化座標建立（乘上影像寬高轉為像素座標）"""
+        landmark = lm.landmark
+        l_shldr = landmark[lmPose.LEFT_SHOULDER]
+        r_shldr = landmark[lmPose.RIGHT_SHOULDER]
+        l_ear = landmark[lmPose.LEFT_EAR]
+        r_ear = landmark[lmPose.RIGHT_EAR]
+        l_eye = landmark[lmPose.LEFT_EYE]
+        r_eye = landmark[lmPose.RIGHT_EYE]
+        l_hip = landmark[lmPose.LEFT_HIP]
+        r_hip = landmark[lmPose.RIGHT_HIP]
+        return cls(
+            int(l_shldr.x * w), int(l_shldr.y * h), int(r_shldr.x * w), int(r_shldr.y * h),
+            int(l_ear.x * w), int(l_ear.y * h), int(r_ear.x * w), int(r_ear.y * h),
+            int(l_eye.x * w), int(l_eye.y * h), int(r_eye.x * w), int(r_eye.y * h),
+            int(l_hip.x * w), int(l_hip.y * h), int(r_hip.x * w), int(r_hip.y * h),
+        )
+
+    @classmethod
+    def from_points(cls, points, index, w, h):
+        """
+        由任意模型的正規化關鍵點建立
+
+        Args:
+            points: 可索引的關鍵點序列（元素具有 x、y 屬性，範圍 0～1）
+            index: 8 個索引，依序為左肩、右肩、左耳、右耳、左眼、右眼、左髖、右髖
+            w: 影像寬度
+            h: 影像高度
+        """
+        l_shldr, r_shldr, l_ear, r_ear, l_eye, r_eye, l_hip, r_hip = (points[i] for i in index)
+        return cls(
+            int(l_shldr.x * w), int(l_shldr.y * h), int(r_shldr.x * w), int(r_shldr.y * h),
+            int(l_ear.x * w), int(l_ear.y * h), int(r_ear.x * w), int(r_ear.y * h),
+            int(l_eye.x * w), int(l_eye.y * h), int(r_eye.x * w), int(r_eye.y * h),
+            int(l_hip.x * w), int(l_hip.y * h), int(r_hip.x * w), int(r_hip.y * h),
+        )
+
+    @classmethod
+    def from_tuple(cls, values):
+        """由 to_tuple() 的結果還原"""
+        return cls(*values)
+
+    @classmethod
+    def from_dict(cls, kp):
+        """由舊版關鍵點字典建立"""
+        return cls(*(kp[name] for name in cls.FIELDS))
+
+    def translated(self, dx, dy):
+        """回傳平移後的關鍵點（例如由裁切區域座標換回整張影像座標）"""
+        values = self.to_tuple()
+        return Keypoints(*(v + (dx if i % 2 == 0 else dy) for i, v in enumerate(values)))
+
+    def scaled(self, factor):
+        """回傳縮放後的關鍵點（例如由縮小的推論影像換回原始影像座標）"""
+        return Keypoints(*(int(v * factor) for v in self.to_tuple()))
+
+    def to_tuple(self):
+        """轉為 16 個整數的 tuple（依 FIELDS 順序）"""
+        return (self.l_shldr_x, self.l_shldr_y, self.r_shldr_x, self.r_shldr_y,
+                self.l_ear_x, self.l_ear_y, self.r_ear_x, self.r_ear_y,
+                self.l_eye_x, self.l_eye_y, self.r_eye_x, self.r_eye_y,
+                self.l_hip_x, self.l_hip_y, self.r_hip_x, self.r_hip_y)
+
+    def as_dict(self):
+        """字典檢視（相容舊版 keypoints_dict）"""
+        return dict(zip(self.FIELDS, self.to_tuple()))
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __reduce__(self):
+        # pickle 時只送出整數 tuple，跨行程傳遞更精簡
+        return (Keypoints, self.to_tuple())
+
+    def __eq__(self, other):
+        return isinstance(other, Keypoints) and self.to_tuple() == other.to_tuple()
+
+    def __repr__(self):
+        return f"Keypoints{self.to_tuple()}"
+
+
+class PostureResult:
+    """
+    單幀姿勢結果
+
+    偵測器每幀建立新物件，發布後視為唯讀（跳幀時以 with_times() 產生新物件），
+    因此呼叫端可直接保存參照而不必複製
+    """
+
+    __slots__ = ('is_correct', 'view_type', 'neck_angle', 'torso_angle',
+                 'good_time', 'bad_time', 'person_detected', 'head_distance')
+
+    def __init__(self, is_correct=None, view_type=None, neck_angle=None, torso_angle=None,
+                 good_time=0, bad_time=0, person_detected=False, head_distance=None):
+        self.is_correct = is_correct          # True／False；非側面視角為 None
+        self.view_type = view_type            # 'side'／'front'／None
+        self.neck_angle = neck_angle          # 脖子角度（僅側面視角）
+        self.torso_angle = torso_angle        # 身體角度（僅側面視角）
+        self.good_time = good_time            # 目前連續正確姿勢秒數
+        self.bad_time = bad_time              # 目前連續不良姿勢秒數
+        self.person_detected = person_detected  # 當前幀是否偵測到人
+        self.head_distance = head_distance    # 臉部中心到肩膀中心距離（僅側面且偵測到臉時）
+
+    @property
+    def angles(self):
+        """舊版 angles 字典（非側面視角為空字典）"""
+        if self.neck_angle is None:
+            return {}
+        return {'neck': self.neck_angle, 'torso': self.torso_angle}
+
+    def with_times(self, good_time, bad_time):
+        """回傳更新連續時間後的新結果（跳幀時使用）"""
+        return PostureResult(self.is_correct, self.view_type, self.neck_angle, self.torso_angle,
+                             good_time, bad_time, self.person_detected, self.head_distance)
+
+    @classmethod
+    def from_dict(cls, info):
+        """由舊版 posture_info 字典建立"""
+        angles = info.get('angles') or {}
+        return cls(info.get('is_correct'), info.get('view_type'),
+                   angles.get('neck'), angles.get('torso'),
+                   info.get('good_time', 0), info.get('bad_time', 0),
+                   info.get('person_detected', False), info.get('head_distance'))
+
+    @classmethod
+    def from_tuple(cls, values):
+        """由 to_tuple() 的結果還原"""
+        return cls(*values)
+
+    def to_tuple(self):
+        """轉為 tuple（依 __slots__ 順序），供記錄與 IPC 使用"""
+        return (self.is_correct, self.view_type, self.neck_angle, self.torso_angle,
+                self.good_time, self.bad_time, self.person_detected, self.head_distance)
+
+    def as_dict(self):
+        """字典檢視（與舊版 posture_info 結構相同）"""
+        return {
+            'is_correct': self.is_correct,
+            'view_type': self.view_type,
+            'angles': self.angles,
+            'good_time': self.good_time,
+            'bad_time': self.bad_time,
+            'person_detected': self.person_detected,
+            'head_distance': self.head_distance,
+        }
+
+    def __getitem__(self, key):
+        if key == 'angles':
+            return self.angles
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __reduce__(self):
+        return (PostureResult, self.to_tuple())
+
+    def __repr__(self):
+        return (f"PostureResult(is_correct={self.is_correct}, view_type={self.view_type!r}, "
+                f"neck={self.neck_angle}, torso={self.torso_angle}, "
+                f"good={self.good_time:.2f}, bad={self.bad_time:.2f}, person={self.person_detected})")
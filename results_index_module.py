@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/23 15:20
+# User : l'r's
+# Software: PyCharm
+# File : results_index_module.py
+"""
+結果索引模組 - Results Index Module
+影片檔分析時逐幀記錄結果，分析完後可在時間軸上任意定位回看：
+
+- 索引（記憶體中的定長陣列）：時間戳、姿勢狀態、角度、關鍵點在關鍵點檔中的位元組位置
+- 關鍵點檔（只附加的二進位檔）：關鍵點與臉部框，依位元組位置直接讀取單筆
+- 姿勢區段（同狀態連續幀合併）供時間軸著色；每幀記錄「之前已開始的不良區段數」，
+  跳到下一段不良姿勢是 O(1)
+
+回看時的標註直接由索引繪製，不重新推論
+"""
+
+import collections
+import logging
+import math
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left
+
+import cv2
+
+from config_module import Config
+from detector_module import draw_side_keypoints
+from result_module import Keypoints, PostureResult
+
+logger = logging.getLogger(__name__)
+
+# 索引中的姿勢狀態
+CODE_ABSENT = 0    # 未偵測到人
+CODE_GOOD = 1
+CODE_BAD = 2
+CODE_UNKNOWN = 3   # 偵測到人但未判斷（正面視角或沒有姿勢結果）
+
+# 關鍵點檔的單筆格式：16 個關鍵點座標、臉部框數量、臉部框 (x, y, w, h) × 數量
+_KEYPOINTS = struct.Struct('<16i')
+_FACE_COUNT = struct.Struct('<B')
+_FACE_BOX = struct.Struct('<4i')
+_MAX_FACES = 255
+
+IndexEntry = collections.namedtuple('IndexEntry', 'index timestamp state neck_angle torso_angle keypoints face_boxes')
+
+
+def state_code(result):
+    """PostureResult -> 索引中的姿勢狀態"""
+    if result is None or not result.person_detected:
+        return CODE_ABSENT
+    if result.is_correct is True:
+        return CODE_GOOD
+    if result.is_correct is False:
+        return CODE_BAD
+    return CODE_UNKNOWN
+
+
+class ResultsIndex:
+    """逐幀結果索引（只由 GUI 執行緒存取）"""
+
+    def __init__(self, store_path=None):
+        """
+        Args:
+            store_path: 關鍵點檔路徑；None 表示使用暫存檔（關閉後自動刪除）
+        """
+        self.timestamps = array('d')
+        self.states = array('b')
+        self.neck_angles = array('f')   # 非側面視角為 NaN
+        self.torso_angles = array('f')
+        self.offsets = array('q')       # 關鍵點檔中的位元組位置；-1 表示沒有關鍵點
+
+        # 同狀態連續幀合併的區段 [狀態, 起始幀, 結束幀（不含）]
+        self.runs = []
+        # 不良區段的起始幀，以及每幀（含）之前已開始的不良區段數
+        self._bad_starts = array('l')
+        self._bad_rank = array('l')
+
+        self._store = open(store_path, 'w+b') if store_path else tempfile.TemporaryFile()
+        self._store_size = 0
+        self._store_dirty = False
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def duration(self):
+        return self.timestamps[-1] - self.timestamps[0] if self.timestamps else 0.0
+
+    def append(self, timestamp, result, keypoints=None, face_boxes=None):
+        """
+        記錄一幀
+
+        Args:
+            timestamp: 容器時間戳（秒，遞增）
+            result: PostureResult
+            keypoints: 該幀顯示用的關鍵點（跳幀時為沿用的結果）；None 表示沒有
+            face_boxes: 臉部框列表
+
+        Returns:
+            int: 幀編號
+        """
+        i = len(self.timestamps)
+        code = state_code(result)
+        self.timestamps.append(timestamp)
+        self.states.append(code)
+        self.neck_angles.append(math.nan if result is None or result.neck_angle is None else result.neck_angle)
+        self.torso_angles.append(math.nan if result is None or result.torso_angle is None else result.torso_angle)
+        self.offsets.append(self._write_landmarks(keypoints, face_boxes))
+
+        runs = self.runs
+        if runs and runs[-1][0] == code:
+            runs[-1][2] = i + 1
+        else:
+            runs.append([code, i, i + 1])
+            if code == CODE_BAD:
+                self._bad_starts.append(i)
+        self._bad_rank.append(len(self._bad_starts))
+        return i
+
+    def _write_landmarks(self, keypoints, face_boxes):
+        if keypoints is None and not face_boxes:
+            return -1
+        faces = list(face_boxes or ())[:_MAX_FACES]
+        # 沒有關鍵點但有臉部框時，以全為 -1 的座標標示
+        kp = keypoints.to_tuple() if keypoints is not None else (-1,) * len(Keypoints.FIELDS)
+        record = b''.join([_KEYPOINTS.pack(*kp), _FACE_COUNT.pack(len(faces))] +
+                          [_FACE_BOX.pack(*box) for box in faces])
+        offset = self._store_size
+        self._store.seek(offset)
+        self._store.write(record)
+        self._store_size += len(record)
+        self._store_dirty = True
+        return offset
+
+    def _read_landmarks(self, offset):
+        if offset < 0:
+            return None, []
+        if self._store_dirty:
+            self._store.flush()
+            self._store_dirty = False
+        self._store.seek(offset)
+        head = self._store.read(_KEYPOINTS.size + _FACE_COUNT.size)
+        values = _KEYPOINTS.unpack_from(head)
+        (count,) = _FACE_COUNT.unpack_from(head, _KEYPOINTS.size)
+        boxes = self._store.read(_FACE_BOX.size * count)
+        faces = [_FACE_BOX.unpack_from(boxes, k * _FACE_BOX.size) for k in range(count)]
+        keypoints = None if values[0] == -1 and values[1] == -1 else Keypoints.from_tuple(values)
+        return keypoints, faces
+
+    def entry(self, i):
+        """
+        讀取第 i 幀的完整記錄
+
+        Returns:
+            IndexEntry
+        """
+        keypoints, faces = self._read_landmarks(self.offsets[i])
+        neck = self.neck_angles[i]
+        torso = self.torso_angles[i]
+        return IndexEntry(i, self.timestamps[i], self.states[i],
+                          None if math.isnan(neck) else neck,
+                          None if math.isnan(torso) else torso,
+                          keypoints, faces)
+
+    def find(self, timestamp):
+        """時間戳 -> 最接近（不晚於下一幀）的幀編號，O(log n)"""
+        if not self.timestamps:
+            return None
+        return min(bisect_left(self.timestamps, timestamp), len(self.timestamps) - 1)
+
+    def next_bad(self, i):
+        """
+        第 i 幀之後下一段不良姿勢的起始幀（O(1)）；i 在不良區段中時回傳下一段
+
+        Returns:
+            int: 幀編號；之後沒有不良姿勢時為 None
+        """
+        if not self.timestamps:
+            return None
+        if i < 0:
+            rank = 0
+        else:
+            rank = self._bad_rank[min(i, len(self._bad_rank) - 1)]
+        return self._bad_starts[rank] if rank < len(self._bad_starts) else None
+
+    def previous_bad(self, i):
+        """
+        第 i 幀之前上一段不良姿勢的起始幀（O(1)）；i 在不良區段中間時回傳該段開頭，正在開頭時回傳前一段
+
+        Returns:
+            int: 幀編號；之前沒有不良姿勢時為 None
+        """
+        if not self.timestamps or i <= 0:
+            return None
+        rank = self._bad_rank[min(i, len(self._bad_rank) - 1)]
+        # 本幀所在（或最近一段已開始的）不良區段為 rank - 1；正在其開頭時再往前一段
+        k = rank - 1
+        if k >= 0 and self._bad_starts[k] >= i:
+            k -= 1
+        return self._bad_starts[k] if k >= 0 else None
+
+    def bad_segments(self):
+        """不良區段數"""
+        return len(self._bad_starts)
+
+    def close(self):
+        self._store.close()
+
+
+def entry_result(entry):
+    """IndexEntry -> PostureResult（介面狀態顯示用；連續時間不保存於索引，一律為 0）"""
+    is_correct = {CODE_GOOD: True, CODE_BAD: False}.get(entry.state)
+    view_type = 'side' if entry.neck_angle is not None else ('front' if entry.keypoints is not None else None)
+    return PostureResult(is_correct, view_type, entry.neck_angle, entry.torso_angle,
+                         person_detected=entry.state != CODE_ABSENT)
+
+
+def draw_entry(image, entry):
+    """
+    依索引記錄在影像上繪製標註（與偵測時的畫面一致，不重新推論）
+
+    Returns:
+        image
+    """
+    for x, y, w, h in entry.face_boxes:
+        cv2.rectangle(image, (x, y), (x + w, y + h), Config.COLOR_BLUE, 2)
+        cv2.circle(image, (x + w // 2, y + h // 2), 5, Config.COLOR_BLUE, -1)
+    if entry.keypoints is not None and entry.neck_angle is not None:
+        color = Config.COLOR_LIGHT_GREEN if entry.state == CODE_GOOD else Config.COLOR_RED
+        draw_side_keypoints(image, entry.keypoints, color, entry.neck_angle, entry.torso_angle or 0)
+    elif entry.keypoints is not None:
+        cv2.putText(image, "front (no detection)", (image.shape[1] - 200, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, Config.COLOR_BLUE, 2)
+    minutes, seconds = divmod(entry.timestamp, 60)
+    cv2.putText(image, f"{int(minutes):02d}:{seconds:05.2f} (index)", (10, image.shape[0] - 15),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, Config.COLOR_DARK_BLUE, 2)
+    return image
+
+
+class VideoSeeker:
+    """回看用的影片讀取：依時間戳取得影像（距離目前位置很近時往後讀，否則直接定位）"""
+
+    def __init__(self, path, forward_seconds=None):
+        """
+        Args:
+            path: 影片檔路徑
+            forward_seconds: 目標在目前位置之後此秒數內時逐幀往後讀（比定位快）
+        """
+        self.path = path
+        self.forward_seconds = (forward_seconds if forward_seconds is not None
+                                else Config.SCRUB_FORWARD_READ_SECONDS)
+        self.cap = cv2.VideoCapture(path)
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0.0
+        self.frame_seconds = 1.0 / fps if fps and fps > 0 else 1.0 / 30.0
+        self._frame = None
+        self._ts = None   # 最近一次讀到的幀的容器時間戳
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def frame_at(self, timestamp):
+        """
+        取得時間戳所在的幀（回傳複本，呼叫端可直接在上面繪製）
+
+        Returns:
+            BGR 影像；讀取失敗時為 None
+        """
+        half = self.frame_seconds / 2
+        if self._ts is not None and abs(self._ts - timestamp) <= half:
+            return self._frame.copy()
+        if self._ts is None or not (self._ts < timestamp <= self._ts + self.forward_seconds):
+            self.cap.set(cv2.CAP_PROP_POS_MSEC, max(0.0, timestamp - half) * 1000.0)
+        while True:
+            if not self.cap.grab():
+                return None
+            ts = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            if ts + half >= timestamp:
+                break
+        ok, frame = self.cap.retrieve()
+        if not ok:
+            return None
+        self._frame, self._ts = frame, ts
+        return frame.copy()
+
+    def release(self):
+        self.cap.release()
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/20 9:20
+# User : l'r's
+# Software: PyCharm
+# File : rule_module.py
+"""
+提醒規則模組 - Alert Rule Module
+將宣告式的提醒規則（Config.ALERT_RULES）編譯成固定數量的判斷器，
+每幀工作量固定；每條規則具備進入／離開遲滯、最短持續時間與獨立冷卻時間，
+避免角度在門檻附近擺盪時反覆觸發語音
+"""
+
+import operator
+
+from config_module import Config
+
+# 規則狀態
+RULE_IDLE = 0      # 未觸發
+RULE_PENDING = 1   # 已達進入條件，等待持續時間
+RULE_ACTIVE = 2    # 已觸發（持續中）
+
+_OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+}
+
+
+class Alert:
+    """一次觸發的提醒"""
+
+    __slots__ = ('name', 'audio_type', 'metric', 'value', 'threshold', 'timestamp')
+
+    def __init__(self, name, audio_type, metric, value, threshold, timestamp):
+        self.name = name
+        self.audio_type = audio_type
+        self.metric = metric
+        self.value = value
+        self.threshold = threshold
+        self.timestamp = timestamp
+
+    def to_tuple(self):
+        return (self.name, self.audio_type, self.metric, self.value, self.threshold, self.timestamp)
+
+    def __reduce__(self):
+        return (Alert, self.to_tuple())
+
+    def __repr__(self):
+        return f"Alert({self.name}, {self.metric}={self.value} vs {self.threshold})"
+
+
+class _CompiledRule:
+    """編譯後的規則與其執行狀態"""
+
+    __slots__ = ('name', 'metric', 'audio_type', 'repeat', 'enter', 'leave',
+                 'spec', 'threshold', 'exit_threshold', 'dwell', 'cooldown',
+                 'state', 'pending_since', 'last_fired')
+
+    def __init__(self, spec):
+        op = spec.get('op', '>')
+        if op not in _OPERATORS:
+            raise ValueError(f"規則 {spec.get('name')} 的運算子不支援: {op}")
+        self.spec = spec
+        self.name = spec['name']
+        self.metric = spec['metric']
+        self.audio_type = spec.get('audio', 'default')
+        self.repeat = spec.get('repeat', True)
+        self.enter = _OPERATORS[op]
+        # 離開條件為進入條件的反向，且門檻往回退 hysteresis
+        self.leave = operator.lt if op in ('>', '>=') else operator.gt
+        self.threshold = 0.0
+        self.exit_threshold = 0.0
+        self.dwell = 0.0
+        self.cooldown = 0.0
+        self.reset()
+
+    def bind(self, params):
+        """依參數表解析門檻、遲滯、持續與冷卻時間（參數名稱或數值皆可）"""
+        spec = self.spec
+        self.threshold = float(_resolve(spec['threshold'], params))
+        hysteresis = float(_resolve(spec.get('hysteresis', 0.0), params))
+        if self.leave is operator.lt:
+            self.exit_threshold = self.threshold - hysteresis
+        else:
+            self.exit_threshold = self.threshold + hysteresis
+        self.dwell = float(_resolve(spec.get('dwell', 0.0), params))
+        self.cooldown = float(_resolve(spec.get('cooldown', 0.0), params))
+
+    def reset(self):
+        self.state = RULE_IDLE
+        self.pending_since = None
+        self.last_fired = None
+
+
+def _resolve(value, params):
+    """數值直接回傳；字串視為參數名稱"""
+    if isinstance(value, str):
+        return params[value]
+    return value
+
+
+class AlertRuleEngine:
+    """提醒規則判斷器"""
+
+    def __init__(self, rules=None, params=None):
+        """
+        Args:
+            rules: 規則宣告列表（預設 Config.ALERT_RULES），依優先順序排列
+            params: 規則引用的參數值，例如 {'side_neck_threshold': 50, 'warning_time': 2.0}
+        """
+        self.params = dict(params or {})
+        self._rules = [_CompiledRule(spec) for spec in (rules or Config.ALERT_RULES)]
+        self._bind_all()
+
+    def _bind_all(self):
+        for rule in self._rules:
+            rule.bind(self.params)
+
+    def set_param(self, name, value):
+        """更新參數（例如介面調整閾值），只重新解析引用到的規則"""
+        self.params[name] = value
+        for rule in self._rules:
+            spec = rule.spec
+            if name in (spec['threshold'], spec.get('hysteresis'), spec.get('dwell'), spec.get('cooldown')):
+                rule.bind(self.params)
+
+    def rule_names(self):
+        return [rule.name for rule in self._rules]
+
+    def evaluate(self, metrics, now):
+        """
+        依本幀的量測值更新規則狀態
+
+        Args:
+            metrics: {量測名稱: 數值}；缺少或為 None 的量測不更新該規則（狀態凍結）
+            now: 目前時間戳
+
+        Returns:
+            list: 本幀觸發的 Alert（依規則優先順序）
+        """
+        fired = []
+        get = metrics.get
+        for rule in self._rules:
+            value = get(rule.metric)
+            if value is None:
+                continue
+
+            if rule.state == RULE_IDLE:
+                if not rule.enter(value, rule.threshold):
+                    continue
+                rule.state = RULE_PENDING
+                rule.pending_since = now
+            elif rule.leave(value, rule.exit_threshold):
+                # 回到遲滯帶之外才解除，避免在門檻附近擺盪
+                rule.state = RULE_IDLE
+                rule.pending_since = None
+                continue
+
+            if rule.state == RULE_PENDING:
+                if now - rule.pending_since < rule.dwell:
+                    continue
+                rule.state = RULE_ACTIVE
+            elif not rule.repeat:
+                continue
+
+            if rule.last_fired is not None and now - rule.last_fired < rule.cooldown:
+                continue
+            rule.last_fired = now
+            fired.append(Alert(rule.name, rule.audio_type, rule.metric, value, rule.threshold, now))
+        return fired
+
+    def clear(self, name):
+        """
+        將指定規則回到未觸發狀態（例如久坐計時重新開始後）
+
+        Args:
+            name: 規則名稱
+        """
+        for rule in self._rules:
+            if rule.name == name:
+                rule.state = RULE_IDLE
+                rule.pending_since = None
+
+    def snapshot(self):
+        """
+        各規則的執行狀態（可 JSON 序列化），例如批次處理在檢查點保存後接續
+
+        Returns:
+            list: [[名稱, 狀態, 進入等待時間, 上次觸發時間], ...]
+        """
+        return [[rule.name, rule.state, rule.pending_since, rule.last_fired] for rule in self._rules]
+
+    def restore(self, snapshot):
+        """還原 snapshot() 的結果（名稱不存在的規則略過）"""
+        rules = {rule.name: rule for rule in self._rules}
+        for name, state, pending_since, last_fired in snapshot:
+            rule = rules.get(name)
+            if rule is not None:
+                rule.state, rule.pending_since, rule.last_fired = state, pending_since, last_fired
+
+    def active_rules(self):
+        """目前處於觸發狀態的規則名稱"""
+        return [rule.name for rule in self._rules if rule.state == RULE_ACTIVE]
+
+    def reset(self):
+        """清除所有規則狀態與冷卻時間"""
+        for rule in self._rules:
+            rule.reset()
@@ -0,0 +1,533 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/19 9:12
+# User : l'r's
+# Software: PyCharm
+# File : shm_pipeline_module.py
+"""
+多行程管線模組 - Multiprocess Pipeline Module
+擷取行程把影像寫入共享記憶體環形緩衝區，推論行程依槽位索引零複製讀取影像，
+只把精簡的臉部框與關鍵點結果送回主行程，避開與 Qt 繪製共用 GIL
+"""
+
+import argparse
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from config_module import Config, config_overrides
+
+# 槽位狀態
+SLOT_FREE = 0      # 空閒（可寫入）
+SLOT_WRITING = 1   # 擷取行程寫入中
+SLOT_READY = 2     # 已寫入完成，等待讀取
+
+# 控制區欄位索引（每個槽位一列 int64）
+_SEQ = 0     # 影像序號（0 表示尚未寫入過）
+_STATE = 1   # 槽位狀態
+_REFS = 2    # 持有者數量（推論行程／主行程）
+_TS_US = 3   # 擷取時間戳（微秒）
+_CTRL_FIELDS = 4
+
+
+def parse_resolution(text):
+    """
+    解析並驗證解析度字串
+
+    Args:
+        text: 解析度字串（例如 "640x480"）或 (w, h) 元組
+
+    Returns:
+        tuple: (寬, 高)
+    """
+    if isinstance(text, tuple):
+        text = f"{text[0]}x{text[1]}"
+    if text not in Config.RESOLUTION_OPTIONS:
+        raise ValueError(f"不支援的解析度: {text}，可用選項: {Config.RESOLUTION_OPTIONS}")
+    w, h = map(int, text.split('x'))
+    return w, h
+
+
+class SharedFrameRing:
+    """
+    共享記憶體影像環形緩衝區
+
+    - 影像區：slots 個 (h, w, 3) uint8 影像連續排列
+    - 控制區：每個槽位記錄序號、狀態、持有者數量與時間戳
+    - 寫入時挑選「無人持有且序號最舊」的槽位覆寫（overwrite-oldest）
+    - 讀取者以 (槽位, 序號) 取得持有權，序號不符代表已被覆寫
+    """
+
+    def __init__(self, width, height, slots, lock, frame_name=None, ctrl_name=None):
+        self.width = width
+        self.height = height
+        self.slots = slots
+        self.lock = lock
+        self.frame_bytes = width * height * 3
+
+        create = frame_name is None
+        self._owner = create
+        self._frame_shm = shared_memory.SharedMemory(
+            name=frame_name, create=create, size=self.frame_bytes * slots if create else 0)
+        self._ctrl_shm = shared_memory.SharedMemory(
+            name=ctrl_name, create=create, size=slots * _CTRL_FIELDS * 8 if create else 0)
+
+        self._frames = np.ndarray((slots, height, width, 3), dtype=np.uint8, buffer=self._frame_shm.buf)
+        self._ctrl = np.ndarray((slots, _CTRL_FIELDS), dtype=np.int64, buffer=self._ctrl_shm.buf)
+        if create:
+            self._ctrl[:] = 0
+
+    @property
+    def spec(self):
+        """供子行程附加用的描述（可 pickle）"""
+        return (self.width, self.height, self.slots, self._frame_shm.name, self._ctrl_shm.name)
+
+    @classmethod
+    def attach(cls, spec, lock):
+        """於子行程中附加到既有的環形緩衝區"""
+        width, height, slots, frame_name, ctrl_name = spec
+        return cls(width, height, slots, lock, frame_name=frame_name, ctrl_name=ctrl_name)
+
+    def view(self, slot):
+        """取得槽位影像的 numpy 視圖（零複製）"""
+        return self._frames[slot]
+
+    def begin_write(self):
+        """
+        取得可寫入的槽位
+
+        Returns:
+            int: 槽位索引；所有槽位都被持有時回傳 -1
+        """
+        with self.lock:
+            ctrl = self._ctrl
+            best = -1
+            best_seq = None
+            for slot in range(self.slots):
+                if ctrl[slot, _REFS] > 0 or ctrl[slot, _STATE] == SLOT_WRITING:
+                    continue
+                seq = ctrl[slot, _SEQ]
+                if best_seq is None or seq < best_seq:
+                    best, best_seq = slot, seq
+            if best >= 0:
+                ctrl[best, _STATE] = SLOT_WRITING
+            return best
+
+    def commit_write(self, slot, seq, timestamp):
+        """標記槽位寫入完成"""
+        with self.lock:
+            self._ctrl[slot, _SEQ] = seq
+            self._ctrl[slot, _TS_US] = int(timestamp * 1e6)
+            self._ctrl[slot, _STATE] = SLOT_READY
+
+    def abort_write(self, slot):
+        """放棄寫入（例如擷取失敗），槽位回到空閒"""
+        with self.lock:
+            self._ctrl[slot, _SEQ] = 0
+            self._ctrl[slot, _STATE] = SLOT_FREE
+
+    def acquire(self, slot, seq, refs=1):
+        """
+        取得槽位持有權
+
+        Args:
+            slot: 槽位索引
+            seq: 預期的影像序號
+            refs: 要增加的持有者數量
+
+        Returns:
+            bool: 序號相符且可讀取時為 True；已被覆寫則為 False
+        """
+        with self.lock:
+            if self._ctrl[slot, _STATE] != SLOT_READY or self._ctrl[slot, _SEQ] != seq:
+                return False
+            self._ctrl[slot, _REFS] += refs
+            return True
+
+    def release(self, slot):
+        """釋放一份槽位持有權"""
+        with self.lock:
+            if self._ctrl[slot, _REFS] > 0:
+                self._ctrl[slot, _REFS] -= 1
+
+    def held_slots(self):
+        """目前被持有的槽位數量（除錯／統計用）"""
+        with self.lock:
+            return int(np.count_nonzero(self._ctrl[:, _REFS]))
+
+    def close(self):
+        """關閉對共享記憶體的映射；建立者同時負責 unlink"""
+        self._frames = None
+        self._ctrl = None
+        for shm in (self._frame_shm, self._ctrl_shm):
+            try:
+                shm.close()
+                if self._owner:
+                    shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _capture_worker(spec, lock, source, resolution, task_queues, stop_event, eof_event,
+                    stats, realtime):
+    """擷取行程：讀取攝影機／影片並寫入環形緩衝區"""
+    ring = SharedFrameRing.attach(spec, lock)
+    cap = cv2.VideoCapture(source)
+    if isinstance(source, int):
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, resolution[0])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
+
+    # 影片檔依原始 FPS 節奏送出，避免一次把整支影片灌進緩衝區
+    frame_period = 0.0
+    if realtime and not isinstance(source, int):
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_period = 1.0 / fps if fps and fps > 0 else 0.0
+
+    seq = 0
+    next_worker = 0
+    next_due = time.perf_counter()
+    try:
+        while not stop_event.is_set():
+            if not cap.grab():
+                eof_event.set()
+                break
+            timestamp = time.time()
+
+            slot = ring.begin_write()
+            if slot < 0:
+                # 所有槽位都被持有：丟棄此幀
+                with stats.get_lock():
+                    stats[1] += 1
+                continue
+
+            view = ring.view(slot)
+            ret, image = cap.retrieve(view)
+            if not ret:
+                ring.abort_write(slot)
+                continue
+            if image is not view:
+                # 攝影機實際解析度與槽位不符時，縮放寫入槽位
+                cv2.resize(image, (ring.width, ring.height), dst=view)
+
+            seq += 1
+            ring.commit_write(slot, seq, timestamp)
+            with stats.get_lock():
+                stats[0] += 1
+
+            # 依序分派給推論行程；佇列已滿則不等待，該幀留在緩衝區由後續寫入覆蓋
+            try:
+                task_queues[next_worker].put_nowait((slot, seq, timestamp))
+            except queue.Full:
+                with stats.get_lock():
+                    stats[1] += 1
+            next_worker = (next_worker + 1) % len(task_queues)
+
+            if frame_period:
+                next_due += frame_period
+                delay = next_due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_due = time.perf_counter()
+    finally:
+        cap.release()
+        ring.close()
+
+
+def _inference_worker(spec, lock, task_queue, result_queue, stop_event, pose_backend):
+    """推論行程：依槽位讀取影像，回傳臉部框與關鍵點"""
+    import mediapipe as mp
+    from detector_module import detect_faces, detect_pose
+    from pose_backend_module import create_pose_backend
+
+    ring = SharedFrameRing.attach(spec, lock)
+    face_detection = mp.solutions.face_detection.FaceDetection(
+        model_selection=Config.MP_FACE_MODEL_SELECTION,
+        min_detection_confidence=Config.MP_FACE_MIN_DETECTION_CONFIDENCE)
+    pose = create_pose_backend(pose_backend)
+    # 每個推論行程只配置一次 RGB 緩衝區
+    image_rgb = np.empty((ring.height, ring.width, 3), dtype=np.uint8)
+
+    try:
+        while not stop_event.is_set():
+            try:
+                task = task_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if task is None:
+                break
+
+            slot, seq, timestamp = task
+            # 一份持有權給本行程，一份保留給主行程顯示用
+            if not ring.acquire(slot, seq, refs=2):
+                continue  # 已被覆寫，略過
+
+            start = time.perf_counter()
+            try:
+                cv2.cvtColor(ring.view(slot), cv2.COLOR_BGR2RGB, dst=image_rgb)
+                face_boxes = detect_faces(face_detection, image_rgb)
+                keypoints = detect_pose(pose, image_rgb, int(timestamp * 1000))
+            except Exception:
+                ring.release(slot)
+                ring.release(slot)
+                continue
+            ring.release(slot)
+
+            infer_ms = (time.perf_counter() - start) * 1000.0
+            result_queue.put((slot, seq, timestamp, face_boxes, keypoints, infer_ms))
+    finally:
+        face_detection.close()
+        pose.close()
+        ring.close()
+
+
+class PipelineResult:
+    """主行程取得的單幀結果（frame 為共享記憶體視圖，用畢需 release）"""
+
+    __slots__ = ('slot', 'seq', 'timestamp', 'face_boxes', 'keypoints', 'infer_ms', 'frame')
+
+    def __init__(self, slot, seq, timestamp, face_boxes, keypoints, infer_ms, frame):
+        self.slot = slot
+        self.seq = seq
+        self.timestamp = timestamp
+        self.face_boxes = face_boxes
+        self.keypoints = keypoints
+        self.infer_ms = infer_ms
+        self.frame = frame
+
+
+class MultiprocessPipeline:
+    """擷取行程 + 多個推論行程的管線，主行程只負責分類、繪製與顯示"""
+
+    def __init__(self, source, resolution, workers=None, slots=None, realtime=True, pose_backend=None):
+        """
+        Args:
+            source: 攝影機索引（int）或影片檔路徑
+            resolution: 解析度，必須是 Config.RESOLUTION_OPTIONS 其中之一
+            workers: 推論行程數
+            slots: 環形緩衝區槽位數（預設為推論行程數加額外槽位）
+            realtime: 影片檔是否依原始 FPS 節奏讀取
+            pose_backend: 推論行程使用的姿勢模型後端（預設 Config.POSE_BACKEND；
+                          spawn 出的子行程不會看到主行程執行期間對 Config 的修改，因此明確傳入）
+        """
+        self.source = source
+        self.resolution = parse_resolution(resolution)
+        self.workers = workers or Config.MP_INFERENCE_WORKERS
+        # 每個推論行程最多持有 1 槽，主行程持有 1 槽，擷取行程寫入 1 槽
+        self.slots = slots or (self.workers + Config.SHM_RING_EXTRA_SLOTS)
+        self.realtime = realtime
+        self.pose_backend = pose_backend or Config.POSE_BACKEND
+
+        self._ctx = multiprocessing.get_context('spawn')
+        self.ring = None
+        self._processes = []
+        self._task_queues = []
+        self._result_queue = None
+        self._stop_event = None
+        self._eof_event = None
+        self._stats = None
+        self._last_seq = 0
+        self.results_received = 0
+        self.results_stale = 0
+
+    def start(self):
+        """建立共享記憶體並啟動擷取／推論行程"""
+        ctx = self._ctx
+        lock = ctx.Lock()
+        self.ring = SharedFrameRing(self.resolution[0], self.resolution[1], self.slots, lock)
+        self._stop_event = ctx.Event()
+        self._eof_event = ctx.Event()
+        self._stats = ctx.Array('q', 2)  # [已擷取, 已丟棄]
+        self._result_queue = ctx.Queue()
+        self._task_queues = [ctx.Queue(maxsize=Config.SHM_TASK_QUEUE_SIZE) for _ in range(self.workers)]
+
+        for task_queue in self._task_queues:
+            proc = ctx.Process(
+                target=_inference_worker,
+                args=(self.ring.spec, lock, task_queue, self._result_queue, self._stop_event,
+                      self.pose_backend),
+                daemon=True)
+            proc.start()
+            self._processes.append(proc)
+
+        capture = ctx.Process(
+            target=_capture_worker,
+            args=(self.ring.spec, lock, self.source, self.resolution, self._task_queues,
+                  self._stop_event, self._eof_event, self._stats, self.realtime),
+            daemon=True)
+        capture.start()
+        self._processes.append(capture)
+
+    def poll(self):
+        """
+        取得最新一幀的推論結果（非阻塞）
+
+        Returns:
+            PipelineResult: 最新結果；沒有新結果時回傳 None
+        """
+        latest = None
+        while True:
+            try:
+                item = self._result_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.results_received += 1
+            slot, seq = item[0], item[1]
+            if seq <= self._last_seq or (latest is not None and seq <= latest[1]):
+                # 多個推論行程可能亂序完成，較舊的結果直接釋放
+                self.results_stale += 1
+                self.ring.release(slot)
+                continue
+            if latest is not None:
+                self.results_stale += 1
+                self.ring.release(latest[0])
+            latest = item
+
+        if latest is None:
+            return None
+        slot, seq, timestamp, face_boxes, keypoints, infer_ms = latest
+        self._last_seq = seq
+        return PipelineResult(slot, seq, timestamp, face_boxes, keypoints, infer_ms,
+                              self.ring.view(slot))
+
+    def release(self, result):
+        """主行程用畢後釋放槽位"""
+        if result is not None and self.ring is not None:
+            result.frame = None
+            self.ring.release(result.slot)
+
+    @property
+    def finished(self):
+        """影片來源是否已讀取完畢且結果已處理完"""
+        return (self._eof_event is not None and self._eof_event.is_set()
+                and self._result_queue.empty()
+                and all(q.empty() for q in self._task_queues))
+
+    def stats(self):
+        """
+        取得管線統計
+
+        Returns:
+            dict: 擷取數、丟棄數、收到／過期結果數、目前被持有槽位數
+        """
+        captured, dropped = (self._stats[0], self._stats[1]) if self._stats is not None else (0, 0)
+        return {
+            'captured': captured,
+            'dropped': dropped,
+            'results': self.results_received,
+            'stale': self.results_stale,
+            'held_slots': self.ring.held_slots() if self.ring is not None else 0,
+        }
+
+    def stop(self, timeout=2.0):
+        """停止所有子行程並釋放共享記憶體"""
+        if self._stop_event is None:
+            return
+        self._stop_event.set()
+        for task_queue in self._task_queues:
+            try:
+                task_queue.put_nowait(None)
+            except queue.Full:
+                pass
+
+        deadline = time.time() + timeout
+        for proc in self._processes:
+            proc.join(max(0.0, deadline - time.time()))
+            if proc.is_alive():
+                proc.terminate()
+                proc.join(0.5)
+
+        for q in self._task_queues + [self._result_queue]:
+            q.cancel_join_thread()
+            q.close()
+
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+        self._processes = []
+        self._task_queues = []
+        self._stop_event = None
+
+
+def run_benchmark(video_path, frames=300, workers=None, resolution="640x480"):
+    """
+    比較單行程與多行程管線的處理速度
+
+    Args:
+        video_path: 測試影片路徑
+        frames: 每種模式處理的幀數上限
+        workers: 推論行程數
+        resolution: 多行程模式的槽位解析度
+    """
+    from detector_module import PostureDetector
+    from Play_prompt import AudioPlayer
+
+    def create_detector():
+        # 每種模式各用一個全新的偵測器（不沿用上一輪的計時與提醒狀態），不寫入歷史也不播放語音
+        with config_overrides(HISTORY_ENABLED=False, LATENCY_CONTROL_ENABLED=False):
+            return PostureDetector(audio_player=AudioPlayer(enable_mixer=False))
+
+    w, h = parse_resolution(resolution)
+
+    # 單行程：擷取、推論、分類都在同一個行程
+    detector = create_detector()
+    cap = cv2.VideoCapture(video_path)
+    count = 0
+    start = time.perf_counter()
+    try:
+        while count < frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame = cv2.resize(frame, (w, h))
+            detector.process_frame(frame)
+            count += 1
+        single_elapsed = time.perf_counter() - start
+    finally:
+        cap.release()
+        detector.release()
+    single_fps = count / single_elapsed if single_elapsed > 0 else 0.0
+
+    # 多行程：主行程只做分類與繪製
+    detector = create_detector()
+    pipeline = MultiprocessPipeline(video_path, resolution, workers=workers, realtime=False)
+    pipeline.start()
+    handled = 0
+    infer_ms = []
+    start = time.perf_counter()
+    try:
+        while handled < count and not pipeline.finished:
+            result = pipeline.poll()
+            if result is None:
+                time.sleep(0.001)
+                continue
+            detector.apply_inference(result.frame, result.face_boxes, result.keypoints, timestamp=result.timestamp)
+            infer_ms.append(result.infer_ms)
+            pipeline.release(result)
+            handled += 1
+        multi_elapsed = time.perf_counter() - start
+        stats = pipeline.stats()
+    finally:
+        pipeline.stop()
+        detector.release()
+    multi_fps = handled / multi_elapsed if multi_elapsed > 0 else 0.0
+
+    print(f"單行程: {count} 幀, {single_fps:.1f} FPS")
+    print(f"多行程({pipeline.workers} 推論行程): {handled} 幀, {multi_fps:.1f} FPS, "
+          f"平均推論 {np.mean(infer_ms) if infer_ms else 0:.1f} ms, "
+          f"擷取 {stats['captured']} / 丟棄 {stats['dropped']} / 過期 {stats['stale']}")
+    if single_fps > 0:
+        print(f"加速比: {multi_fps / single_fps:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="共享記憶體多行程管線效能測試")
+    parser.add_argument("video", nargs="?", default="demo.MOV", help="測試影片路徑")
+    parser.add_argument("--frames", type=int, default=300, help="處理幀數上限")
+    parser.add_argument("--workers", type=int, default=Config.MP_INFERENCE_WORKERS, help="推論行程數")
+    parser.add_argument("--resolution", default="640x480", choices=Config.RESOLUTION_OPTIONS)
+    args = parser.parse_args()
+    run_benchmark(args.video, args.frames, args.workers, args.resolution)
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/25 09:50
+# User : l'r's
+# Software: PyCharm
+# File : stage_module.py
+"""
+階段圖模組 - Stage Graph Module
+單幀處理拆成依序執行的階段，每個階段宣告輸入與輸出欄位（FrameContext 的欄位），
+建立或修改圖時檢查每個輸入都已由前面的階段（或呼叫端）提供：
+
+- 階段可替換、插入或移除（例如無畫面執行時移除 overlay、在 pose 前插入動態偵測閘門）
+- 每個階段內建計時（次數、平均、最大耗時）
+- 階段可指定執行器（concurrent.futures.Executor），在其他執行緒或行程上執行；
+  同一幀的各階段仍依序完成
+
+預設圖與各階段的實作見 detector_module（PostureDetector.graph）
+"""
+
+import logging
+import time
+
+from trace_module import tracer
+
+logger = logging.getLogger(__name__)
+
+
+class FrameContext:
+    """一幀在各階段之間傳遞的資料；欄位即各階段宣告的輸入／輸出"""
+
+    FIELDS = {
+        'frame': "BGR 影像（overlay 直接在上面繪製）",
+        'timestamp': "影像時間戳（秒）；None 表示使用目前時間",
+        'skip_frames': "每隔幾幀做一次姿勢偵測",
+        'should_detect': "本幀是否為偵測幀",
+        'image_rgb': "推論用的 RGB 影像（可能已縮小）",
+        'scale': "推論影像座標換回原始影像的倍率",
+        'face_boxes': "原始影像座標的臉部框 [(x, y, w, h), ...]",
+        'keypoints': "原始影像座標的關鍵點（Keypoints）；未偵測或非偵測幀為 None",
+        'face_center': "臉部中心點（沒有臉部框時沿用上一次）",
+        'offset': "肩膀距離（視角判斷）；非偵測幀為 None",
+        'now': "計時、提醒與在座判斷使用的時間",
+        'posture_info': "本幀的 PostureResult",
+        'cached': "本幀是否沿用上一次的偵測結果",
+        'output': "(繪製後的影像, PostureResult)",
+    }
+
+    __slots__ = tuple(FIELDS)
+
+    def __init__(self, frame, timestamp=None, skip_frames=1, **fields):
+        self.frame = frame
+        self.timestamp = timestamp
+        self.skip_frames = skip_frames
+        for name in self.__slots__[3:]:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"未知的欄位: {', '.join(sorted(fields))}")
+
+
+# 呼叫端建立 FrameContext 時已提供的欄位
+SOURCE_FIELDS = ('frame', 'timestamp', 'skip_frames')
+
+
+class StageTiming:
+    """單一階段的累計耗時"""
+
+    __slots__ = ('count', 'total', 'max', 'last')
+
+    def __init__(self):
+        self.reset()
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': self.total * 1000.0 / self.count if self.count else 0.0,
+            'max_ms': self.max * 1000.0,
+            'total_ms': self.total * 1000.0,
+        }
+
+
+class Stage:
+    """
+    階段基底類別
+
+    子類別設定 inputs／outputs（FrameContext 欄位名稱）並實作 run(ctx)
+    """
+
+    name = None
+    inputs = ()
+    outputs = ()
+
+    def __init__(self, name=None, executor=None):
+        """
+        Args:
+            name: 階段名稱（預設為類別的 name）
+            executor: 執行此階段的 Executor；None 表示在呼叫端執行緒執行
+        """
+        self.name = name or self.name or type(self).__name__
+        self.executor = executor
+        self.timing = StageTiming()
+
+    def run(self, ctx):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name}>"
+
+
+# 階段類型登錄表（Config.FRAME_STAGES 以名稱引用）
+STAGE_TYPES = {}
+
+
+def register_stage(name, factory):
+    """
+    登錄階段類型
+
+    Args:
+        name: 名稱
+        factory: fn(detector) -> Stage（通常為 Stage 子類別）
+    """
+    STAGE_TYPES[name] = factory
+
+
+class FrameGraph:
+    """依序執行的階段圖"""
+
+    def __init__(self, stages=(), provided=SOURCE_FIELDS):
+        """
+        Args:
+            stages: Stage 列表
+            provided: 呼叫端建立 FrameContext 時已提供的欄位
+
+        Raises:
+            ValueError: 階段名稱重複或輸入欄位沒有來源
+        """
+        self.provided = tuple(provided)
+        self.stages = list(stages)
+        self._rebuild()
+
+    def _rebuild(self):
+        """重新檢查並建立名稱索引（修改圖之後呼叫）"""
+        available = set(self.provided)
+        index = {}
+        for i, stage in enumerate(self.stages):
+            if stage.name in index:
+                raise ValueError(f"階段名稱重複: {stage.name}")
+            for field in stage.inputs + stage.outputs:
+                if field not in FrameContext.FIELDS:
+                    raise ValueError(f"階段 {stage.name}: 未知的欄位 {field}")
+            missing = [field for field in stage.inputs if field not in available]
+            if missing:
+                raise ValueError(f"階段 {stage.name} 的輸入沒有來源: {', '.join(missing)}")
+            available.update(stage.outputs)
+            index[stage.name] = i
+        self._index = index
+
+    def names(self):
+        return [stage.name for stage in self.stages]
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __getitem__(self, name):
+        return self.stages[self._index[name]]
+
+    def _position(self, name):
+        try:
+            return self._index[name]
+        except KeyError:
+            raise KeyError(f"沒有此階段: {name}") from None
+
+    def _modify(self, stages):
+        old = self.stages
+        self.stages = stages
+        try:
+            self._rebuild()
+        except ValueError:
+            self.stages = old
+            self._rebuild()
+            raise
+
+    def replace(self, name, stage):
+        """以新階段取代同名階段（新階段可使用不同名稱）"""
+        stages = list(self.stages)
+        stages[self._position(name)] = stage
+        self._modify(stages)
+
+    def insert_before(self, name, stage):
+        stages = list(self.stages)
+        stages.insert(self._position(name), stage)
+        self._modify(stages)
+
+    def insert_after(self, name, stage):
+        stages = list(self.stages)
+        stages.insert(self._position(name) + 1, stage)
+        self._modify(stages)
+
+    def remove(self, name):
+        stages = list(self.stages)
+        del stages[self._position(name)]
+        self._modify(stages)
+
+    def run(self, ctx, first=None, last=None):
+        """
+        依序執行階段
+
+        Args:
+            ctx: FrameContext
+            first: 由此階段開始（含；預設第一個）
+            last: 執行到此階段為止（含；預設最後一個）
+
+        Returns:
+            FrameContext
+        """
+        start = 0 if first is None else self._position(first)
+        stop = len(self.stages) if last is None else self._position(last) + 1
+        for stage in self.stages[start:stop]:
+            began = time.perf_counter()
+            if stage.executor is None:
+                stage.run(ctx)
+            else:
+                stage.executor.submit(stage.run, ctx).result()
+            ended = time.perf_counter()
+            stage.timing.add(ended - began)
+            if tracer.enabled:
+                tracer.complete(stage.name, began, ended, 'stage')
+        return ctx
+
+    def timings(self):
+        """
+        Returns:
+            dict: {階段名稱: {'count', 'mean_ms', 'max_ms', 'total_ms'}}（依執行順序）
+        """
+        return {stage.name: stage.timing.summary() for stage in self.stages}
+
+    def reset_timings(self):
+        for stage in self.stages:
+            stage.timing.reset()
+
+    def format_timings(self):
+        """各階段平均／最大耗時的一行摘要"""
+        return "  ".join(f"{name} {t['mean_ms']:.2f}/{t['max_ms']:.1f}ms"
+                         for name, t in self.timings().items() if t['count'])
+
+
+def build_graph(detector, names, provided=SOURCE_FIELDS):
+    """
+    依名稱建立階段圖
+
+    Args:
+        detector: 傳給各階段建構函式的偵測器
+        names: 階段名稱列表（STAGE_TYPES 中的名稱）
+        provided: 呼叫端已提供的欄位
+
+    Returns:
+        FrameGraph
+
+    Raises:
+        ValueError: 未知的階段名稱或輸入欄位沒有來源
+    """
+    stages = []
+    for name in names:
+        factory = STAGE_TYPES.get(name)
+        if factory is None:
+            raise ValueError(f"未知的階段: {name}（可用: {', '.join(sorted(STAGE_TYPES))}）")
+        stage = factory(detector)
+        stage.name = name
+        stages.append(stage)
+    return FrameGraph(stages, provided)
@@ -0,0 +1,576 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/25 15:10
+# User : l'r's
+# Software: PyCharm
+# File : stream_module.py
+"""
+結果串流模組 - Result Streaming Module
+無介面執行偵測，並把精簡的姿勢事件推送給本機的 WebSocket 與 Server-Sent Events 訂閱者
+（看板、健康 App 的推播服務等）：
+
+- 事件：state（姿勢狀態改變）、alert（姿勢提醒）、sitting（久坐提醒）、stats（定期統計）、end（來源結束）
+- 推論執行緒只在 sink 階段與提醒回呼中建立事件並交給事件迴圈，不等待任何網路傳送
+- 事件在短時間窗內合併成一批（JSON 陣列）再分送；每批只編碼一次，所有訂閱者共用
+- 每個訂閱者有獨立的佇列與丟棄策略（drop_oldest／drop_newest／disconnect），
+  慢的訂閱者不影響其他訂閱者；每個事件帶遞增的 seq，訂閱者可由缺號得知丟棄
+- 新訂閱者會先收到最近一次的 state 與 stats
+
+端點（GET）：
+  /events  SSE           參數：types=alert,sitting  policy=drop_oldest  queue=64
+  /ws      WebSocket     參數同上
+  /stats   目前訂閱者與傳送統計（JSON）
+
+範例：python stream_module.py 0            （攝影機）
+      python stream_module.py demo.MOV     （影片檔，依時間戳即時播放）
+      curl -N http://127.0.0.1:8766/events?types=alert,sitting
+"""
+
+import argparse
+import asyncio
+import base64
+import collections
+import hashlib
+import json
+import logging
+import struct
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import cv2
+
+from config_manager import ConfigManager, Settings
+from config_module import Config
+from detector_module import PostureDetector
+from log_module import setup_logging
+from Play_prompt import AudioPlayer
+from results_index_module import CODE_ABSENT, CODE_BAD, CODE_GOOD, CODE_UNKNOWN, state_code
+from video_reader_module import SampledVideoReader
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ('state', 'alert', 'sitting', 'stats', 'end')
+DROP_POLICIES = ('drop_oldest', 'drop_newest', 'disconnect')
+STATE_NAMES = {CODE_ABSENT: 'absent', CODE_GOOD: 'good', CODE_BAD: 'bad', CODE_UNKNOWN: 'unknown'}
+
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_WS_TEXT, _WS_CLOSE, _WS_PING, _WS_PONG = 0x1, 0x8, 0x9, 0xA
+_WS_MAX_CLIENT_PAYLOAD = 64 * 1024   # 訂閱者只會送控制訊框，超過即關閉連線
+_HEADER_TIMEOUT = 10.0
+
+
+# ==================== 編碼 ====================
+
+def ws_frame(opcode, payload=b''):
+    """伺服器送出的 WebSocket 訊框（不遮罩）"""
+    n = len(payload)
+    if n < 126:
+        header = struct.pack('!BB', 0x80 | opcode, n)
+    elif n < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, n)
+    return header + payload
+
+
+def encode_batch(kind, events):
+    """
+    一批事件 -> 傳送用位元組
+
+    Args:
+        kind: 'sse' 或 'ws'
+        events: 事件列表（seq 遞增）
+    """
+    text = json.dumps(events, separators=(',', ':'), ensure_ascii=False)
+    if kind == 'ws':
+        return ws_frame(_WS_TEXT, text.encode('utf-8'))
+    return f"id: {events[-1]['seq']}\ndata: {text}\n\n".encode('utf-8')
+
+
+_HEARTBEAT = {'sse': b": ping\n\n", 'ws': ws_frame(_WS_PING)}
+
+
+# ==================== 事件產生（推論執行緒） ====================
+
+class EventPublisher:
+    """把偵測結果轉成事件（在推論執行緒上執行，只做比較並交給 emit）"""
+
+    def __init__(self, detector, emit, stats_interval=None, stats_window=None):
+        """
+        Args:
+            detector: PostureDetector（階段圖需含 'sink'）
+            emit: fn(event)，必須可從推論執行緒呼叫且不阻塞
+            stats_interval: stats 事件間隔（秒，依影像時間）
+            stats_window: stats 中近期統計的時間窗（秒）
+        """
+        self.detector = detector
+        self.emit = emit
+        self.stats_interval = stats_interval if stats_interval is not None else Config.STREAM_STATS_INTERVAL
+        self.stats_window = stats_window if stats_window is not None else Config.STREAM_STATS_WINDOW
+        self._state = None
+        self._next_stats = None
+        detector.graph['sink'].consumers.append(self.on_result)
+        detector.add_alert_listener(self.on_alert)
+
+    def on_result(self, image, posture_info):
+        now = self.detector.last_frame_time
+        state = STATE_NAMES[state_code(posture_info)]
+        if state != self._state:
+            self._state = state
+            event = {'type': 'state', 'ts': round(now, 3), 'state': state}
+            if posture_info.neck_angle is not None:
+                event['neck'] = round(posture_info.neck_angle, 1)
+                event['torso'] = round(posture_info.torso_angle, 1)
+            self.emit(event)
+        if self.stats_interval > 0 and (self._next_stats is None or now >= self._next_stats):
+            self._next_stats = now + self.stats_interval
+            self.emit(self.stats_event(now))
+
+    def on_alert(self, alert, posture_info):
+        if alert.name == 'sitting':
+            self.emit({'type': 'sitting', 'ts': round(alert.timestamp, 3), 'seconds': round(alert.value)})
+        else:
+            self.emit({'type': 'alert', 'ts': round(alert.timestamp, 3), 'name': alert.name,
+                       'metric': alert.metric, 'value': round(alert.value, 1),
+                       'threshold': round(alert.threshold, 1)})
+
+    def stats_event(self, now):
+        det = self.detector
+        good, bad, _ = det.get_statistics()
+        window_good, window_bad = det.get_window_statistics(self.stats_window)
+        return {'type': 'stats', 'ts': round(now, 3), 'good': round(good), 'bad': round(bad),
+                'window': self.stats_window, 'window_good': round(window_good),
+                'window_bad': round(window_bad), 'sitting': round(det.presence.sitting_seconds),
+                'fps': round(det.fps, 1)}
+
+
+# ==================== 分送（事件迴圈） ====================
+
+class Subscriber:
+    """一個訂閱連線：獨立的待送佇列與丟棄策略"""
+
+    def __init__(self, sid, kind, writer, types=None, max_queue=None, policy=None):
+        """
+        Args:
+            sid: 訂閱者編號
+            kind: 'sse' 或 'ws'
+            writer: asyncio.StreamWriter
+            types: 訂閱的事件類型（frozenset）；None 表示全部
+            max_queue: 待送批次上限
+            policy: 佇列已滿時的處理方式（DROP_POLICIES）
+
+        Raises:
+            ValueError: 丟棄策略或佇列上限不合法
+        """
+        self.policy = policy or Config.STREAM_DROP_POLICY
+        if self.policy not in DROP_POLICIES:
+            raise ValueError(f"未知的丟棄策略: {self.policy}（可用: {', '.join(DROP_POLICIES)}）")
+        self.max_queue = max_queue or Config.STREAM_QUEUE_SIZE
+        if self.max_queue < 1:
+            raise ValueError("佇列上限必須大於 0")
+        self.sid = sid
+        self.kind = kind
+        self.writer = writer
+        self.types = types
+        self.queue = collections.deque()   # (位元組, 事件數)
+        self._wakeup = asyncio.Event()
+        self.closed = False
+        self._draining = False
+        self.sent = 0       # 已送出的事件數
+        self.dropped = 0    # 丟棄的事件數
+        self.connected = time.time()
+
+    def offer(self, payload, count):
+        """加入待送佇列（不等待）；佇列已滿時依丟棄策略處理"""
+        if self.closed:
+            return
+        if len(self.queue) >= self.max_queue:
+            if self.policy == 'drop_newest':
+                self.dropped += count
+                return
+            if self.policy == 'disconnect':
+                self.dropped += count
+                logger.warning("訂閱者 %d 跟不上（待送 %d 批），中斷連線", self.sid, len(self.queue))
+                self.close()
+                self.writer.transport.abort()  # 送出中的 drain 會因此結束
+                return
+            _, old = self.queue.popleft()
+            self.dropped += old
+        self.queue.append((payload, count))
+        self._wakeup.set()
+
+    def heartbeat(self):
+        """佇列空閒時送出心跳（SSE 註解／WebSocket ping），維持連線並偵測斷線"""
+        if not self.queue:
+            self.offer(_HEARTBEAT[self.kind], 0)
+
+    async def pump(self):
+        """依序送出佇列中的資料；寫入緩衝區超過上限時 drain 會等待（背壓）"""
+        while True:
+            while self.queue and not self.closed:
+                payload, count = self.queue.popleft()
+                self.writer.write(payload)
+                await self.writer.drain()
+                self.sent += count
+            if self.closed or self._draining:
+                return
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+    def close(self, drain=False):
+        """
+        Args:
+            drain: True 表示送完已排入的資料再結束
+        """
+        if drain:
+            self._draining = True
+        else:
+            self.closed = True
+        self._wakeup.set()
+
+    def stats(self):
+        return {'id': self.sid, 'kind': self.kind, 'policy': self.policy,
+                'types': sorted(self.types) if self.types else None,
+                'queued': len(self.queue), 'sent': self.sent, 'dropped': self.dropped,
+                'seconds': round(time.time() - self.connected, 1)}
+
+
+class EventHub:
+    """事件分送：合併短時間窗內的事件，每批編碼一次後交給所有訂閱者"""
+
+    def __init__(self, loop, window_ms=None):
+        """
+        Args:
+            loop: 執行分送的事件迴圈
+            window_ms: 合併事件的時間窗（毫秒）
+        """
+        self.loop = loop
+        self.window = (window_ms if window_ms is not None else Config.STREAM_BATCH_WINDOW_MS) / 1000.0
+        self.subscribers = {}
+        self.latest = {}        # 最近一次的 state／stats（新訂閱者的初始資料）
+        self.seq = 0
+        self.batches = 0
+        self._pending = []
+        self._flush_handle = None
+        self._next_sid = 1
+
+    def publish(self, event):
+        """加入事件（只能在事件迴圈執行緒呼叫）"""
+        self.seq += 1
+        event['seq'] = self.seq
+        self._pending.append(event)
+        if event['type'] in ('state', 'stats'):
+            self.latest[event['type']] = event
+        if self._flush_handle is None:
+            self._flush_handle = self.loop.call_later(self.window, self.flush)
+
+    def publish_threadsafe(self, event):
+        """從其他執行緒（推論執行緒）加入事件，不等待"""
+        self.loop.call_soon_threadsafe(self.publish, event)
+
+    def flush(self):
+        """立即分送待送事件"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        events, self._pending = self._pending, []
+        if not events:
+            return
+        self.batches += 1
+        encoded = {}
+        for sub in list(self.subscribers.values()):
+            key = (sub.kind, sub.types)
+            if key not in encoded:
+                selected = events if sub.types is None else [e for e in events if e['type'] in sub.types]
+                encoded[key] = (encode_batch(sub.kind, selected), len(selected)) if selected else None
+            if encoded[key] is not None:
+                sub.offer(*encoded[key])
+
+    def subscribe(self, kind, writer, types=None, max_queue=None, policy=None):
+        """
+        建立訂閱者並放入最近一次的 state／stats
+
+        Raises:
+            ValueError: 參數不合法
+        """
+        sub = Subscriber(self._next_sid, kind, writer, types, max_queue, policy)
+        self._next_sid += 1
+        initial = [e for e in sorted(self.latest.values(), key=lambda e: e['seq'])
+                   if types is None or e['type'] in types]
+        if initial:
+            sub.offer(encode_batch(kind, initial), len(initial))
+        self.subscribers[sub.sid] = sub
+        return sub
+
+    def unsubscribe(self, sub):
+        sub.close()
+        self.subscribers.pop(sub.sid, None)
+
+    def heartbeat(self):
+        for sub in list(self.subscribers.values()):
+            sub.heartbeat()
+
+    def stats(self):
+        return {'published': self.seq, 'batches': self.batches,
+                'subscribers': [sub.stats() for sub in self.subscribers.values()]}
+
+
+# ==================== HTTP／SSE／WebSocket ====================
+
+class StreamServer:
+    """本機 HTTP 伺服器：/events（SSE）、/ws（WebSocket）、/stats"""
+
+    def __init__(self, hub, host=None, port=None, max_subscribers=None):
+        self.hub = hub
+        self.host = host or Config.STREAM_HOST
+        self.port = port if port is not None else Config.STREAM_PORT
+        self.max_subscribers = max_subscribers or Config.STREAM_MAX_SUBSCRIBERS
+        self.server = None
+        self._connections = {}   # 處理中的連線 task -> writer
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        logger.info("事件串流: http://%s:%d/events（SSE）、ws://%s:%d/ws", self.host, self.port,
+                    self.host, self.port)
+
+    async def close(self):
+        """送出剩餘事件後關閉所有連線"""
+        if self.server is not None:
+            self.server.close()
+        self.hub.flush()
+        for sub in list(self.hub.subscribers.values()):
+            sub.close(drain=True)
+        if self._connections:
+            await asyncio.wait(list(self._connections), timeout=Config.STREAM_CLOSE_TIMEOUT)
+        # 仍未送完（訂閱者不讀取）的連線直接中斷
+        for writer in list(self._connections.values()):
+            writer.transport.abort()
+        if self._connections:
+            await asyncio.wait(list(self._connections))
+        if self.server is not None:
+            await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            await self._dispatch(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                asyncio.TimeoutError):
+            pass
+        finally:
+            del self._connections[task]
+            writer.close()
+
+    async def _dispatch(self, reader, writer):
+        head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), _HEADER_TIMEOUT)
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = lines[0].split(' ', 2)
+        except ValueError:
+            return await self._respond(writer, 400, {'error': 'bad request'})
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                headers[key.strip().lower()] = value.strip()
+        url = urlsplit(target)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if method != 'GET':
+            return await self._respond(writer, 405, {'error': 'method not allowed'})
+        if url.path == '/stats':
+            return await self._respond(writer, 200, self.hub.stats())
+        if url.path not in ('/events', '/ws'):
+            return await self._respond(writer, 404, {'error': 'not found'})
+        if len(self.hub.subscribers) >= self.max_subscribers:
+            return await self._respond(writer, 503, {'error': 'too many subscribers'})
+        try:
+            options = self._subscriber_options(params)
+        except ValueError as e:
+            return await self._respond(writer, 400, {'error': str(e)})
+
+        if url.path == '/events':
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n"
+                         b"Access-Control-Allow-Origin: *\r\n\r\n")
+            await self._serve(reader, writer, 'sse', options, self._sse_reader)
+        else:
+            key = headers.get('sec-websocket-key')
+            if headers.get('upgrade', '').lower() != 'websocket' or not key:
+                return await self._respond(writer, 400, {'error': 'websocket upgrade required'})
+            accept = base64.b64encode(hashlib.sha1(key.encode('ascii') + _WS_GUID).digest())
+            writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                         b"Connection: Upgrade\r\nSec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+            await self._serve(reader, writer, 'ws', options, self._ws_reader)
+
+    @staticmethod
+    def _subscriber_options(params):
+        types = None
+        if params.get('types'):
+            types = frozenset(t.strip() for t in params['types'].split(',') if t.strip())
+            unknown = types - set(EVENT_TYPES)
+            if unknown:
+                raise ValueError(f"unknown event types: {', '.join(sorted(unknown))}")
+        try:
+            max_queue = int(params['queue']) if 'queue' in params else None
+        except ValueError:
+            raise ValueError("queue must be an integer") from None
+        if max_queue is not None and max_queue < 1:
+            raise ValueError("queue must be positive")
+        policy = params.get('policy')
+        if policy is not None and policy not in DROP_POLICIES:
+            raise ValueError(f"unknown policy: {policy} (use {', '.join(DROP_POLICIES)})")
+        return {'types': types, 'max_queue': max_queue, 'policy': policy}
+
+    async def _serve(self, reader, writer, kind, options, read_loop):
+        """送出事件直到任一方結束（訂閱者斷線、關閉訊框或被中斷連線）"""
+        transport = writer.transport
+        transport.set_write_buffer_limits(high=Config.STREAM_WRITE_BUFFER_BYTES)
+        sub = self.hub.subscribe(kind, writer, **options)
+        logger.info("訂閱者 %d 連線（%s，%s）", sub.sid, kind, sub.policy)
+        pump = asyncio.ensure_future(sub.pump())
+        watcher = asyncio.ensure_future(read_loop(reader, sub))
+        try:
+            await asyncio.wait((pump, watcher), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.hub.unsubscribe(sub)
+            for task in (pump, watcher):
+                task.cancel()
+            await asyncio.gather(pump, watcher, return_exceptions=True)
+            if kind == 'ws' and not transport.is_closing():
+                writer.write(ws_frame(_WS_CLOSE, struct.pack('!H', 1000)))
+            logger.info("訂閱者 %d 離線（送出 %d，丟棄 %d）", sub.sid, sub.sent, sub.dropped)
+
+    @staticmethod
+    async def _sse_reader(reader, sub):
+        """SSE 訂閱者不會再送資料；讀到 EOF 表示已斷線"""
+        while await reader.read(1024):
+            pass
+
+    @staticmethod
+    async def _ws_reader(reader, sub):
+        """處理訂閱者的控制訊框（ping 回 pong；close 結束）；一般訊息忽略"""
+        while True:
+            b0, b1 = await reader.readexactly(2)
+            opcode = b0 & 0x0F
+            n = b1 & 0x7F
+            if n == 126:
+                (n,) = struct.unpack('!H', await reader.readexactly(2))
+            elif n == 127:
+                (n,) = struct.unpack('!Q', await reader.readexactly(8))
+            if n > _WS_MAX_CLIENT_PAYLOAD:
+                return
+            mask = await reader.readexactly(4) if b1 & 0x80 else None
+            payload = await reader.readexactly(n)
+            if mask:
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+            if opcode == _WS_CLOSE:
+                return
+            if opcode == _WS_PING:
+                sub.offer(ws_frame(_WS_PONG, payload), 0)
+
+    @staticmethod
+    async def _respond(writer, status, body):
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                  503: 'Service Unavailable'}[status]
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode('ascii') + data)
+        await writer.drain()
+
+
+# ==================== 無介面執行 ====================
+
+def run_detection(source, emit, stop, settings=None, realtime=True, sample_hz=None):
+    """
+    推論執行緒：讀取來源並偵測，事件由 EventPublisher 交給 emit
+
+    Args:
+        source: 攝影機編號（數字字串）或影片檔路徑
+        emit: fn(event)
+        stop: threading.Event，設定後結束
+        settings: config_manager.Settings
+        realtime: 影片檔依時間戳即時播放（False 表示盡快處理）
+        sample_hz: 影片檔分析頻率（None 表示 Config.VIDEO_SAMPLE_HZ；0 表示每一幀都解碼並依 skip_frames 跳幀）
+    """
+    settings = settings or Settings()
+    detector = PostureDetector(settings.side_neck_threshold, settings.side_torso_threshold,
+                               settings.warning_time, pose_backend=settings.pose_backend,
+                               audio_player=AudioPlayer(enable_mixer=Config.STREAM_AUDIO_ENABLED),
+                               stages=[name for name in Config.FRAME_STAGES if name != 'overlay'])
+    detector.update_sitting_minutes(settings.sitting_minutes)
+    EventPublisher(detector, emit)
+
+    camera = source.isdigit()
+    if camera:
+        cap = cv2.VideoCapture(int(source))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, settings.resolution[0])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, settings.resolution[1])
+    else:
+        cap = SampledVideoReader(source, sample_hz=sample_hz)
+    # 影片檔取樣時每個取樣幀都分析，不再與 skip_frames 相乘
+    skip_frames = settings.skip_frames if camera else cap.analysis_skip(settings.skip_frames)
+    try:
+        if not cap.isOpened():
+            logger.error("無法開啟來源: %s", source)
+            return
+        started = time.perf_counter()
+        while not stop.is_set():
+            ok, frame = cap.read()
+            if not ok:
+                break
+            timestamp = None if camera else cap.timestamp
+            if timestamp is not None and realtime:
+                delay = timestamp - (time.perf_counter() - started)
+                if delay > 0 and stop.wait(delay):
+                    break
+            detector.process_frame(frame, skip_frames, timestamp)
+        emit({'type': 'end', 'ts': round(detector.last_frame_time or time.time(), 3)})
+    finally:
+        cap.release()
+        detector.release()
+
+
+async def serve(source, host=None, port=None, window_ms=None, settings=None, realtime=True,
+                sample_hz=None):
+    """
+    啟動串流服務並在背景執行緒偵測；來源結束（影片檔）或被中斷時關閉
+    """
+    loop = asyncio.get_running_loop()
+    hub = EventHub(loop, window_ms)
+    server = StreamServer(hub, host, port)
+    await server.start()
+
+    stop = threading.Event()
+    worker = loop.run_in_executor(None, run_detection, source, hub.publish_threadsafe, stop,
+                                  settings, realtime, sample_hz)
+    try:
+        while not (await asyncio.wait({worker}, timeout=Config.STREAM_HEARTBEAT_SECONDS))[0]:
+            hub.heartbeat()
+        worker.result()
+    finally:
+        stop.set()
+        # 推論執行緒排入的事件（含 end）在其結束通知之前已加入
+        await asyncio.wait({worker})
+        await server.close()
+        logger.info("串流結束：%d 個事件，%d 批", hub.seq, hub.batches)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="無介面偵測並以 SSE／WebSocket 推送姿勢事件")
+    parser.add_argument("source", nargs="?", default="0", help="攝影機編號或影片檔路徑")
+    parser.add_argument("--host", default=None, help=f"預設 {Config.STREAM_HOST}")
+    parser.add_argument("--port", type=int, default=None, help=f"預設 {Config.STREAM_PORT}")
+    parser.add_argument("--window-ms", type=float, default=None, help="合併事件的時間窗（毫秒）")
+    parser.add_argument("--settings", default=None, help="偵測設定檔（預設 config.txt）")
+    parser.add_argument("--hz", type=float, default=None, help="影片檔分析頻率")
+    parser.add_argument("--fast", action="store_true", help="影片檔盡快處理（不依時間戳即時播放）")
+    args = parser.parse_args()
+    setup_logging()
+    try:
+        asyncio.run(serve(args.source, args.host, args.port, args.window_ms,
+                          ConfigManager.load_settings(args.settings), not args.fast, args.hz))
+    except KeyboardInterrupt:
+        pass
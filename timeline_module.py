@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/19 18:05
+# User : l'r's
+# Software: PyCharm
+# File : timeline_module.py
+"""
+姿勢時間軸模組 - Posture Timeline Module
+以連續區段（狀態, 開始, 結束）記錄姿勢，相同狀態自動合併；
+每種狀態維護前綴和，任意時間窗的累計時間以二分搜尋在 O(log n) 內求得
+"""
+
+from bisect import bisect_left, bisect_right
+
+from config_module import Config
+
+STATE_GOOD = 'good'
+STATE_BAD = 'bad'
+STATES = (STATE_GOOD, STATE_BAD)
+
+
+class PostureTimeline:
+    """姿勢區段時間軸"""
+
+    def __init__(self, max_runs=None, on_run_closed=None):
+        """
+        Args:
+            max_runs: 保留的已結束區段上限（超過時捨棄最舊的區段，總計仍保留）
+            on_run_closed: 區段結束時的回呼 fn(state, start, end)
+        """
+        self.max_runs = max_runs or Config.TIMELINE_MAX_RUNS
+        self.on_run_closed = on_run_closed
+
+        # 已結束的區段（依時間排序、互不重疊）
+        self._states = []
+        self._starts = []
+        self._ends = []
+        # 前綴和：_cum[state][i] = 前 i 個區段中該狀態的累計秒數（含已捨棄區段的基準值）
+        self._cum = {state: [0.0] for state in STATES}
+
+        # 進行中的區段
+        self.open_state = None
+        self.open_start = None
+
+    def __len__(self):
+        return len(self._starts) + (1 if self.open_state is not None else 0)
+
+    @property
+    def horizon(self):
+        """仍保留明細的最早時間（更早的時間窗查詢會被截斷）"""
+        if self._starts:
+            return self._starts[0]
+        return self.open_start
+
+    def mark(self, state, ts):
+        """
+        記錄某一時刻的狀態
+
+        Args:
+            state: STATE_GOOD／STATE_BAD
+            ts: 時間戳
+
+        Returns:
+            bool: 是否開始了新的區段（狀態轉換）
+        """
+        if state == self.open_state:
+            return False
+        if self.open_state is not None:
+            self._close_open(ts)
+        self.open_state = state
+        self.open_start = ts
+        return True
+
+    def close(self, ts):
+        """結束進行中的區段（例如重置或關閉前）"""
+        if self.open_state is not None:
+            self._close_open(ts)
+            self.open_state = None
+            self.open_start = None
+
+    def clear(self):
+        """清除所有區段"""
+        self._states = []
+        self._starts = []
+        self._ends = []
+        self._cum = {state: [0.0] for state in STATES}
+        self.open_state = None
+        self.open_start = None
+
+    def _close_open(self, end):
+        state, start = self.open_state, self.open_start
+        end = max(end, start)
+        if self.on_run_closed is not None:
+            self.on_run_closed(state, start, end)
+
+        duration = end - start
+        if self._states and self._states[-1] == state and self._ends[-1] == start:
+            # 與前一個相同狀態且相鄰：直接延長，只需更新最後一個前綴和
+            self._ends[-1] = end
+            self._cum[state][-1] += duration
+            return
+
+        self._states.append(state)
+        self._starts.append(start)
+        self._ends.append(end)
+        for s, cum in self._cum.items():
+            cum.append(cum[-1] + (duration if s == state else 0.0))
+
+        if len(self._starts) > self.max_runs:
+            self._compact()
+
+    def _compact(self):
+        """捨棄最舊的區段（保留最新的 3/4），前綴和首項自然成為基準值"""
+        drop = len(self._starts) - self.max_runs * 3 // 4
+        self._states = self._states[drop:]
+        self._starts = self._starts[drop:]
+        self._ends = self._ends[drop:]
+        for state in STATES:
+            self._cum[state] = self._cum[state][drop:]
+
+    def total(self, state, now=None):
+        """
+        整個工作階段中某狀態的累計秒數（含已捨棄的區段）
+
+        Args:
+            state: STATE_GOOD／STATE_BAD
+            now: 目前時間；提供時會計入進行中區段
+        """
+        total = self._cum[state][-1]
+        if now is not None and self.open_state == state:
+            total += max(0.0, now - self.open_start)
+        return total
+
+    def window_total(self, state, since, until, now=None):
+        """
+        時間窗 [since, until) 內某狀態的累計秒數，O(log n)
+
+        Args:
+            state: STATE_GOOD／STATE_BAD
+            since: 時間窗起點
+            until: 時間窗終點
+            now: 目前時間；提供時會計入進行中區段
+        """
+        total = 0.0
+        lo = bisect_right(self._ends, since)   # 第一個結束於 since 之後的區段
+        hi = bisect_left(self._starts, until)  # 開始於 until 之前的區段數
+        if lo < hi:
+            cum = self._cum[state]
+            total = cum[hi] - cum[lo]
+            # 裁掉頭尾超出時間窗的部分
+            if self._states[lo] == state and self._starts[lo] < since:
+                total -= since - self._starts[lo]
+            if self._states[hi - 1] == state and self._ends[hi - 1] > until:
+                total -= self._ends[hi - 1] - until
+
+        if now is not None and self.open_state == state:
+            start = max(self.open_start, since)
+            end = min(now, until)
+            if end > start:
+                total += end - start
+        return total
+
+    def rolling(self, seconds, now):
+        """
+        最近 seconds 秒內各狀態的累計秒數
+
+        Returns:
+            dict: {'good': 秒數, 'bad': 秒數}
+        """
+        since = now - seconds
+        return {state: self.window_total(state, since, now, now) for state in STATES}
+
+    def current_run(self, now):
+        """
+        進行中的區段
+
+        Returns:
+            tuple: (狀態, 已持續秒數)；無進行中區段時為 (None, 0.0)
+        """
+        if self.open_state is None:
+            return None, 0.0
+        return self.open_state, max(0.0, now - self.open_start)
+
+    def runs(self, since=None):
+        """
+        取得已結束的區段（供報表／除錯使用）
+
+        Returns:
+            list: [(狀態, 開始, 結束), ...]
+        """
+        lo = bisect_right(self._ends, since) if since is not None else 0
+        return list(zip(self._states[lo:], self._starts[lo:], self._ends[lo:]))
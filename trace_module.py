@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/26 10:20
+# User : l'r's
+# Software: PyCharm
+# File : trace_module.py
+"""
+追蹤模組 - Trace Module
+逐幀記錄各步驟的時間區段（含執行緒），匯出為 Chrome trace JSON，以 Perfetto
+（ui.perfetto.dev）或 chrome://tracing 開啟，可看出某一幀慢在哪裡：
+
+- 區段：擷取、偵測器各階段（轉換、臉部、姿勢、判斷、繪製…）、顯示、介面更新、
+  樣式重新套用、語音播放的分派與播放執行緒
+- 預設關閉（Config.TRACE_ENABLED 或 main.py --trace 開啟）；關閉時每個區段只有一次屬性判斷
+- 區段存在環形緩衝區（最近 Config.TRACE_BUFFER_EVENTS 筆），需要時才匯出最近 N 秒：
+  介面按鈕、訊號（預設 SIGUSR1）或命令列
+
+範例：python main.py --trace
+      python trace_module.py dump <pid>            （通知執行中的程式匯出）
+      python trace_module.py run demo.MOV --seconds 20   （無介面偵測並匯出）
+"""
+
+import argparse
+import collections
+import json
+import logging
+import os
+import signal
+import tempfile
+import threading
+import time
+
+from config_module import Config, config_overrides
+from log_module import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+class _NullSpan:
+    """追蹤關閉時的區段（不做任何事）"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'start')
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.complete(self.name, self.start, time.perf_counter(), self.cat, self.args)
+        return False
+
+
+class Tracer:
+    """時間區段記錄器（各執行緒皆可記錄；deque.append 為原子操作，不需要鎖）"""
+
+    def __init__(self, capacity=None, enabled=None):
+        """
+        Args:
+            capacity: 環形緩衝區筆數（預設 Config.TRACE_BUFFER_EVENTS）
+            enabled: 是否啟用（預設 Config.TRACE_ENABLED）
+        """
+        self.enabled = Config.TRACE_ENABLED if enabled is None else enabled
+        self._events = collections.deque(maxlen=capacity or Config.TRACE_BUFFER_EVENTS)
+        self._threads = {}   # 原生執行緒編號 -> 名稱
+        self._dump_lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+        logger.info("效能追蹤%s（緩衝 %d 筆）", "開啟" if enabled else "關閉", self._events.maxlen)
+
+    def span(self, name, cat='frame', args=None):
+        """
+        記錄一個時間區段：with tracer.span('capture'): ...
+
+        Args:
+            name: 區段名稱
+            cat: 分類（Perfetto 可依分類篩選）
+            args: 附加資訊（dict，匯出時原樣寫入）
+        """
+        return _Span(self, name, cat, args) if self.enabled else _NULL_SPAN
+
+    def complete(self, name, start, end, cat='frame', args=None):
+        """
+        記錄已量測的區段（呼叫端自行計時時使用，例如階段圖）
+
+        Args:
+            start, end: time.perf_counter() 的值（秒）
+        """
+        tid = threading.get_native_id()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        self._events.append((name, cat, start, end - start, tid, args))
+
+    def instant(self, name, cat='frame', args=None):
+        """記錄一個時間點（例如觸發提醒）"""
+        if self.enabled:
+            now = time.perf_counter()
+            self.complete(name, now, now, cat, args)
+
+    def clear(self):
+        self._events.clear()
+
+    def __len__(self):
+        return len(self._events)
+
+    def to_chrome(self, seconds=None):
+        """
+        轉成 Chrome trace 格式
+
+        Args:
+            seconds: 只匯出最近幾秒；None 表示緩衝區全部
+
+        Returns:
+            dict: {'traceEvents': [...], 'displayTimeUnit': 'ms'}
+        """
+        events = list(self._events)  # 在 C 中一次複製完成，其他執行緒同時附加也不會出錯
+        if seconds is not None:
+            cutoff = time.perf_counter() - seconds
+            events = [e for e in events if e[2] >= cutoff]
+        pid = os.getpid()
+        trace = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                  'args': {'name': 'posture-detector'}}]
+        names = dict(self._threads)
+        for tid in sorted({e[4] for e in events}):
+            trace.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                          'args': {'name': names.get(tid, str(tid))}})
+        for name, cat, start, duration, tid, args in events:
+            event = {'name': name, 'cat': cat, 'pid': pid, 'tid': tid, 'ts': round(start * 1e6, 1)}
+            if duration > 0:
+                event['ph'] = 'X'
+                event['dur'] = round(duration * 1e6, 1)
+            else:
+                event['ph'] = 'i'
+                event['s'] = 't'
+            if args:
+                event['args'] = args
+            trace.append(event)
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+    def dump(self, path=None, seconds=None):
+        """
+        匯出最近 N 秒為 Chrome trace JSON（寫入暫存檔後以 os.replace 取代）
+
+        Args:
+            path: 輸出路徑（預設 Config.TRACE_DIR/trace-日期-時間.json）
+            seconds: 最近幾秒（預設 Config.TRACE_DUMP_SECONDS）
+
+        Returns:
+            str: 輸出路徑
+        """
+        seconds = Config.TRACE_DUMP_SECONDS if seconds is None else seconds
+        if path is None:
+            os.makedirs(Config.TRACE_DIR, exist_ok=True)
+            path = os.path.join(Config.TRACE_DIR, time.strftime("trace-%Y%m%d-%H%M%S.json"))
+        with self._dump_lock:
+            data = self.to_chrome(seconds)
+            fd, tmp_path = tempfile.mkstemp(prefix=".trace-", suffix=".tmp",
+                                            dir=os.path.dirname(os.path.abspath(path)))
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, separators=(',', ':'))
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        logger.info("追蹤已匯出: %s（最近 %.0f 秒，%d 個事件）", path, seconds, len(data['traceEvents']))
+        return path
+
+    def dump_async(self, path=None, seconds=None):
+        """在背景執行緒匯出（介面按鈕與訊號處理使用，不阻塞呼叫端）"""
+        def _run():
+            try:
+                self.dump(path, seconds)
+            except OSError as e:
+                logger.error("追蹤匯出失敗: %s", e)
+        thread = threading.Thread(target=_run, name="trace-dump", daemon=True)
+        thread.start()
+        return thread
+
+
+# 程式共用的追蹤器
+tracer = Tracer()
+
+
+def install_dump_signal(signum=None):
+    """
+    安裝訊號處理：收到訊號時匯出最近的追蹤（預設 Config.TRACE_SIGNAL，僅限 POSIX）
+
+    Qt 事件迴圈中，Python 的訊號處理在下一次執行 Python 程式碼時才會執行（偵測中每幀都會）
+
+    Returns:
+        bool: 是否安裝成功
+    """
+    signum = signum or getattr(signal, Config.TRACE_SIGNAL, None)
+    if signum is None:
+        return False
+    try:
+        signal.signal(signum, lambda _signum, _frame: tracer.dump_async())
+    except ValueError:
+        # 非主執行緒無法安裝訊號處理
+        return False
+    return True
+
+
+def run_traced(video_path, seconds=None, output=None, frames=None, skip_frames=1):
+    """無介面偵測影片並匯出追蹤（不含顯示與介面區段）"""
+    # detector_module 經由 stage_module 匯入本模組，於此才匯入以免循環
+    from detector_module import PostureDetector
+    from Play_prompt import AudioPlayer
+    from video_reader_module import SampledVideoReader
+
+    tracer.enable()
+    # 測試影片不寫入歷史紀錄
+    with config_overrides(HISTORY_ENABLED=False):
+        detector = PostureDetector(audio_player=AudioPlayer(enable_mixer=False))
+    reader = SampledVideoReader(video_path)
+    count = 0
+    try:
+        while frames is None or count < frames:
+            with tracer.span('capture'):
+                ok, frame = reader.read()
+            if not ok:
+                break
+            with tracer.span('frame', args={'index': count}):
+                detector.process_frame(frame, skip_frames, reader.timestamp)
+            count += 1
+    finally:
+        reader.release()
+        detector.release()
+    print(tracer.dump(output, seconds))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="效能追蹤（Chrome／Perfetto 格式）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    dump = sub.add_parser("dump", help="通知執行中的程式匯出追蹤")
+    dump.add_argument("pid", type=int)
+
+    run = sub.add_parser("run", help="無介面偵測影片並匯出追蹤")
+    run.add_argument("video", nargs="?", default="demo.MOV")
+    run.add_argument("--seconds", type=float, default=None, help="匯出最近幾秒")
+    run.add_argument("--frames", type=int, default=None, help="最多處理幾幀")
+    run.add_argument("--skip", type=int, default=1, help="每隔幾幀做一次姿勢偵測")
+    run.add_argument("--output", default=None)
+
+    args = parser.parse_args()
+    if args.command == "dump":
+        os.kill(args.pid, getattr(signal, Config.TRACE_SIGNAL))
+        print(f"已送出 {Config.TRACE_SIGNAL} 給 {args.pid}，追蹤匯出至 {Config.TRACE_DIR}/")
+    else:
+        # 以腳本執行時本檔是 __main__，其他模組匯入的是另一份 trace_module（各自的 tracer），
+        # 必須透過匯入的模組啟用，階段與語音播放的區段才會記錄
+        import trace_module
+
+        setup_logging()
+        trace_module.run_traced(args.video, args.seconds, args.output, args.frames, args.skip)
@@ -10,17 +10,119 @@
 
 import cv2
 import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QGroupBox, QComboBox,
     QLineEdit, QFileDialog, QSpinBox, QDoubleSpinBox, QMessageBox
 )
-from PyQt5.QtCore import QTimer, Qt
-from PyQt5.QtGui import QImage, QPixmap, QFont
+from PyQt5.QtCore import QTimer, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap, QFont, QPainter, QColor
 
 from config_module import Config
 from detector_module import PostureDetector
-from config_manager import ConfigManager
+from config_manager import ConfigManager, ConfigWatcher, Settings, APPLY_CAPTURE, APPLY_MODEL
+from shm_pipeline_module import MultiprocessPipeline
+from multi_person_module import MultiPersonDetector
+from power_module import PowerManager
+from video_reader_module import SampledVideoReader
+from export_module import ExportSink
+from recorder_module import SessionRecorder, ReplayCapture
+from results_index_module import (
+    ResultsIndex, VideoSeeker, draw_entry, entry_result,
+    CODE_ABSENT, CODE_GOOD, CODE_BAD, CODE_UNKNOWN
+)
+from pose_backend_module import create_pose_backend
+from frame_buffer_module import FrameBufferPool, AllocationProbe
+from trace_module import tracer
+from view_model_module import (
+    PostureViewModel, GuiTimingStats, STATUS_LABEL_STYLE, STATE_IDLE, STATE_FRONT
+)
+
+logger = logging.getLogger(__name__)
+
+
+def open_camera(resolution, warmup=False):
+    """
+    開啟攝影機並設定解析度
+
+    Args:
+        resolution: (寬, 高)
+        warmup: 是否先讀取一幀（背景替換時確認確實可以取得影像）
+
+    Returns:
+        cv2.VideoCapture: 無法開啟時回傳 None
+    """
+    cap = cv2.VideoCapture(0)
+    if not cap.isOpened():
+        cap.release()
+        return None
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, resolution[0])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
+    if warmup and not cap.read()[0]:
+        cap.release()
+        return None
+    return cap
+
+
+class TimelineScrubber(QWidget):
+    """影片分析結果的時間軸：依姿勢狀態著色，點擊或拖曳即定位（只讀取索引，不重新推論）"""
+
+    seek_requested = pyqtSignal(int)  # 幀編號
+
+    COLORS = {
+        CODE_ABSENT: QColor("#424242"),
+        CODE_GOOD: QColor("#4CAF50"),
+        CODE_BAD: QColor("#f44336"),
+        CODE_UNKNOWN: QColor("#9E9E9E"),
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.index = None
+        self.position = None  # 目前顯示的幀編號
+        self.setMinimumHeight(24)
+        self.setMaximumHeight(24)
+        self.setCursor(Qt.PointingHandCursor)
+
+    def set_index(self, index):
+        self.index = index
+        self.position = None
+        self.update()
+
+    def set_position(self, i):
+        self.position = i
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        w, h = self.width(), self.height()
+        painter.fillRect(0, 0, w, h, QColor("#2b2b2b"))
+        n = len(self.index) if self.index is not None else 0
+        if n:
+            # 區段依幀編號等比例排列（取樣解碼時幀間隔固定，即依時間排列）
+            for state, start, end in self.index.runs:
+                x0 = start * w // n
+                x1 = max(x0 + 1, end * w // n)
+                painter.fillRect(x0, 2, x1 - x0, h - 4, self.COLORS[state])
+            if self.position is not None:
+                x = min(w - 1, self.position * w // n)
+                painter.fillRect(x - 1, 0, 3, h, QColor("white"))
+        painter.end()
+
+    def mousePressEvent(self, event):
+        self._seek(event.x())
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton:
+            self._seek(event.x())
+
+    def _seek(self, x):
+        if not self.isEnabled() or self.index is None or not len(self.index):
+            return
+        n = len(self.index)
+        self.seek_requested.emit(max(0, min(n - 1, x * n // max(1, self.width()))))
 
 
 class PostureDetectionApp(QMainWindow):
@@ -33,24 +135,56 @@ class PostureDetectionApp(QMainWindow):
 
         # 初始化變數
         self.cap = None
+        self.mp_pipeline = None  # 多行程管線（Config.PIPELINE_MODE == 'multiprocess'）
         self.detector = None
+        self.multi_detector = None  # 多人模式（Config.MULTI_PERSON_ENABLED）
+        self.power = None  # 低功耗待機（僅攝影機來源）
+        self._media_base = None  # 影片檔：容器時間 0 對應的實際時間（歷史紀錄仍為合理的日期）
+        self._paced = False      # 影片檔依容器時間戳播放（Config.VIDEO_PLAYBACK_REALTIME）
+        self._held_frame = None  # 已讀取但尚未到播放時間的幀
+        self._camera_fps = None
+        # 影片檔的逐幀結果索引：分析完後在時間軸上定位回看（標註由索引繪製）
+        self.results_index = None
+        self.video_seeker = None
+        self._index_video_path = None
+        # 輸出錄影（整段／提醒片段），背景執行緒寫檔
+        self.exporter = ExportSink() if (Config.EXPORT_SESSION_ENABLED or Config.EXPORT_CLIPS_ENABLED) else None
+        # 原始影像錄製（攝影機來源，偵測之前的畫面與逐幀擷取時間；可用「錄製重播」來源重播）
+        self.recorder = SessionRecorder() if Config.RECORD_ENABLED else None
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_frame)
         self.is_running = False
 
+        # 檢視模型：每幀只記錄結果，文字元件依 UI_REFRESH_HZ 另行刷新
+        self.view_model = PostureViewModel(diff_updates=Config.UI_DIFF_UPDATES)
+        self.gui_timing = GuiTimingStats(Config.UI_TIMING_REPORT_INTERVAL)
+        self.ui_timer = QTimer()
+        self.ui_timer.timeout.connect(self.refresh_ui)
+
+        # 顯示用的預先配置緩衝區與 QImage（緩衝區重新配置時才重建）
+        self.frame_buffers = FrameBufferPool()
+        self._display_image = None
+        self._display_image_buffer = None
+        self.alloc_probe = AllocationProbe() if Config.ALLOC_PROBE_ENABLED else None
+
         # 偵測參數
         self.skip_frames = Config.DEFAULT_SKIP_FRAMES
         self.resolution = Config.DEFAULT_RESOLUTION
 
-        # 久坐提醒參數/狀態
+        # 久坐提醒參數（計時由偵測器的 PresenceTracker 處理）
         self.sitting_minutes = Config.DEFAULT_SITTING_MINUTES
-        self._sit_seconds = 0.0
-        self._sit_last_ts = None
-        self._no_person_streak = 0
-        self._sit_reminder_played = False
 
-        # 設定管理
+        # 設定管理（有型別的設定值；設定檔被外部修改時熱重新載入）
         self.config_manager = ConfigManager()
+        self.settings = Settings()
+        self.config_watcher = ConfigWatcher()
+        self.watch_timer = QTimer()
+        self.watch_timer.timeout.connect(self.poll_config)
+
+        # 背景替換：在背景建立新的姿勢模型／影像來源，完成後於 GUI 執行緒替換
+        # {種類: (future, 安裝函式, 捨棄函式)}
+        self._swap_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="swap")
+        self._pending_swaps = {}
 
         # 建立 UI（先建立元件，再載入設定，避免屬性不存在）
         self.init_ui()
@@ -60,6 +194,8 @@ class PostureDetectionApp(QMainWindow):
 
         # 初始化偵測器（使用載入的設定）
         self.init_detector()
+        if Config.CONFIG_WATCH_INTERVAL > 0:
+            self.watch_timer.start(Config.CONFIG_WATCH_INTERVAL)
 
     def init_ui(self):
         """初始化使用者介面"""
@@ -87,13 +223,30 @@ class PostureDetectionApp(QMainWindow):
         self.video_label.setText("攝影機尚未啟動\nCamera Not Started")
         left_layout.addWidget(self.video_label)
 
+        # 影片分析結果時間軸（分析中顯示進度，停止或播放完畢後可定位回看）
+        scrub_layout = QHBoxLayout()
+        self.prev_bad_button = QPushButton("◀ 上一段不良")
+        self.prev_bad_button.clicked.connect(lambda: self.jump_bad(forward=False))
+        self.scrubber = TimelineScrubber()
+        self.scrubber.seek_requested.connect(self.seek_to)
+        self.next_bad_button = QPushButton("下一段不良 ▶")
+        self.next_bad_button.clicked.connect(lambda: self.jump_bad(forward=True))
+        self.scrub_time_label = QLabel("--:--")
+        self.scrub_time_label.setStyleSheet("font-size: 12px;")
+        scrub_layout.addWidget(self.prev_bad_button)
+        scrub_layout.addWidget(self.scrubber, 1)
+        scrub_layout.addWidget(self.next_bad_button)
+        scrub_layout.addWidget(self.scrub_time_label)
+        left_layout.addLayout(scrub_layout)
+        self._set_scrub_enabled(False)
+
         # 輸入來源選擇
         source_layout = QHBoxLayout()
         source_label = QLabel("輸入來源：")
         source_label.setStyleSheet("font-size: 12px; font-weight: bold;")
 
         self.source_combo = QComboBox()
-        self.source_combo.addItems(["攝影機 Camera", "影片檔 Video File"])
+        self.source_combo.addItems(["攝影機 Camera", "影片檔 Video File", "錄製重播 Replay"])
         self.source_combo.setStyleSheet("""
             QComboBox {
                 padding: 5px;
@@ -305,8 +458,15 @@ class PostureDetectionApp(QMainWindow):
             }
         """)
 
+        # 效能追蹤開啟時才顯示：匯出最近 Config.TRACE_DUMP_SECONDS 秒的追蹤
+        self.trace_button = QPushButton("匯出追蹤")
+        self.trace_button.clicked.connect(self.dump_trace)
+        self.trace_button.setStyleSheet(self.load_config_button.styleSheet())
+        self.trace_button.setVisible(tracer.enabled)
+
         config_button_layout.addWidget(self.save_config_button)
         config_button_layout.addWidget(self.load_config_button)
+        config_button_layout.addWidget(self.trace_button)
         config_layout.addLayout(config_button_layout)
 
         config_group.setLayout(config_layout)
@@ -318,13 +478,12 @@ class PostureDetectionApp(QMainWindow):
         status_layout = QVBoxLayout()
 
         self.posture_status_label = QLabel("姿勢狀態：等待偵測…")
+        self.posture_status_label.setObjectName("postureStatus")
         self.posture_status_label.setFont(QFont("Arial", 14, QFont.Bold))
         self.posture_status_label.setAlignment(Qt.AlignCenter)
-        self.posture_status_label.setStyleSheet("""
-            padding: 15px;
-            border-radius: 5px;
-            background-color: #f0f0f0;
-        """)
+        # 樣式表只設定一次，狀態切換改用動態屬性，避免每幀重新解析 QSS
+        self.posture_status_label.setProperty("postureState", STATE_IDLE)
+        self.posture_status_label.setStyleSheet(STATUS_LABEL_STYLE)
 
         self.view_type_label = QLabel("視角：--")
         self.angle_info_label = QLabel("角度資訊：--")
@@ -348,14 +507,22 @@ class PostureDetectionApp(QMainWindow):
         self.correct_time_label = QLabel("正確坐姿時間：0.0 秒")
         self.incorrect_time_label = QLabel("不良坐姿時間：0.0 秒")
         self.total_sitting_time_label = QLabel("總坐姿時間：0.0 秒")
+        self.window_stats_label = QLabel(f"最近 {Config.ROLLING_WINDOW_MINUTES} 分鐘：--")
+        self.sitting_status_label = QLabel("久坐計時：--")
+        self.tuning_label = QLabel("")
+        self.tuning_label.setVisible(Config.LATENCY_CONTROL_ENABLED)
 
-        for label in [self.correct_time_label, self.incorrect_time_label, self.total_sitting_time_label]:
+        for label in [self.correct_time_label, self.incorrect_time_label, self.total_sitting_time_label,
+                      self.window_stats_label, self.sitting_status_label, self.tuning_label]:
             label.setFont(QFont("Arial", 10))
             label.setStyleSheet("padding: 3px;")
 
         results_layout.addWidget(self.correct_time_label)
         results_layout.addWidget(self.incorrect_time_label)
         results_layout.addWidget(self.total_sitting_time_label)
+        results_layout.addWidget(self.window_stats_label)
+        results_layout.addWidget(self.sitting_status_label)
+        results_layout.addWidget(self.tuning_label)
         results_group.setLayout(results_layout)
         right_layout.addWidget(results_group)
 
@@ -386,16 +553,25 @@ class PostureDetectionApp(QMainWindow):
         """解析度變更"""
         w, h = map(int, text.split('x'))
         self.resolution = (w, h)
-        if self.cap and self.cap.isOpened():
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, w)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, h)
+        self.settings = self.settings.replace(resolution=self.resolution)
+        self.frame_buffers.clear()
+        if self.cap is not None and self.source_combo.currentIndex() == 0:
+            # 在背景以新解析度開啟攝影機，完成後再替換，偵測與統計不中斷
+            resolution = self.resolution
+            self._start_swap('capture', lambda: open_camera(resolution, warmup=True),
+                             self._install_capture, lambda cap: cap.release())
+        elif self.mp_pipeline:
+            logger.info("多行程管線的解析度將於下次啟動偵測時套用")
 
     def on_skip_frames_changed(self, value):
         """偵測頻率變更"""
         self.skip_frames = int(value)
+        self.settings = self.settings.replace(skip_frames=self.skip_frames)
 
     def on_threshold_changed(self):
         """警戒角度變更"""
+        self.settings = self.settings.replace(side_neck_threshold=self.side_neck_spinbox.value(),
+                                              side_torso_threshold=self.side_torso_spinbox.value())
         # 啟動階段 load_config() 會觸發 valueChanged；此時 detector 可能尚未初始化
         if not self.detector:
             return
@@ -406,129 +582,156 @@ class PostureDetectionApp(QMainWindow):
 
     def on_source_changed(self, index):
         """輸入來源切換"""
-        is_video_file = (index == 1)
-        self.file_path_input.setEnabled(is_video_file)
-        self.browse_button.setEnabled(is_video_file)
+        is_file = (index != 0)
+        self.file_path_input.setEnabled(is_file)
+        self.browse_button.setEnabled(is_file)
+        self.file_path_input.setPlaceholderText("選擇錄製檔路徑…" if index == 2 else "選擇影片檔路徑…")
 
-        if not is_video_file:
-            self.file_path_input.clear()
+        self.file_path_input.clear()
 
     def browse_video_file(self):
-        """瀏覽並選擇影片檔"""
-        file_path, _ = QFileDialog.getOpenFileName(
-            self,
-            "選擇影片檔 Select Video File",
-            "",
-            "Video Files (*.mp4 *.avi *.mov *.mkv *.flv *.wmv *.m4v);;All Files (*.*)"
-        )
+        """瀏覽並選擇影片檔（錄製重播來源選擇錄製檔）"""
+        if self.source_combo.currentIndex() == 2:
+            file_path, _ = QFileDialog.getOpenFileName(
+                self,
+                "選擇錄製檔 Select Recording",
+                Config.RECORD_DIR,
+                "Recordings (*.rec);;All Files (*.*)"
+            )
+        else:
+            file_path, _ = QFileDialog.getOpenFileName(
+                self,
+                "選擇影片檔 Select Video File",
+                "",
+                "Video Files (*.mp4 *.avi *.mov *.mkv *.flv *.wmv *.m4v);;All Files (*.*)"
+            )
         if file_path:
             self.file_path_input.setText(file_path)
 
     def on_warning_time_changed(self, value):
         """提醒延遲時間變更"""
+        self.settings = self.settings.replace(warning_time=float(value))
         if self.detector:
             self.detector.update_warning_time(float(value))
 
     def save_config(self):
         """儲存目前設定到檔案"""
-        config_dict = {
-            'side_neck_threshold': self.side_neck_spinbox.value(),
-            'side_torso_threshold': self.side_torso_spinbox.value(),
-            'warning_time': self.warning_time_spinbox.value(),
-            'sitting_minutes': self.sitting_minutes_spinbox.value(),
-            'resolution': self.resolution,
-            'skip_frames': self.skip_frames,
-        }
-
-        if self.config_manager.save_config(config_dict):
+        if self.config_manager.save_settings(self.settings):
+            self.config_watcher.sync()
             QMessageBox.information(self, "儲存成功", "設定已儲存到 config.txt")
 
     def load_config(self):
         """從檔案載入設定"""
-        config_dict = self.config_manager.load_config()
-
-        if config_dict:
-            # 更新 UI 元件
-            if 'side_neck_threshold' in config_dict:
-                self.side_neck_spinbox.setValue(config_dict['side_neck_threshold'])
-            if 'side_torso_threshold' in config_dict:
-                self.side_torso_spinbox.setValue(config_dict['side_torso_threshold'])
-            if 'warning_time' in config_dict:
-                self.warning_time_spinbox.setValue(config_dict['warning_time'])
-            if 'sitting_minutes' in config_dict:
-                self.sitting_minutes_spinbox.setValue(int(config_dict['sitting_minutes']))
-            if 'resolution' in config_dict:
-                self.resolution = config_dict['resolution']
-                resolution_str = f"{self.resolution[0]}x{self.resolution[1]}"
-                idx = self.resolution_combo.findText(resolution_str)
-                if idx >= 0:
-                    self.resolution_combo.setCurrentIndex(idx)
-            if 'skip_frames' in config_dict:
-                self.skip_frames = int(config_dict['skip_frames'])
-                self.skip_spinbox.setValue(self.skip_frames)
-
-            # 更新偵測器
-            if self.detector:
-                self.detector.update_thresholds(
-                    self.side_neck_spinbox.value(),
-                    self.side_torso_spinbox.value()
-                )
-                self.detector.update_warning_time(self.warning_time_spinbox.value())
+        settings = self.config_manager.load_settings()
+        self.config_watcher.sync()
 
+        if settings is not None:
+            self.apply_settings(settings)
             QMessageBox.information(self, "載入成功", "設定已從 config.txt 載入")
         else:
             QMessageBox.information(self, "提示", "找不到設定檔或讀取失敗，已使用預設值")
 
-    def on_sitting_minutes_changed(self, value: int):
-        """久坐提醒分鐘數變更"""
-        self.sitting_minutes = int(value)
+    def poll_config(self):
+        """設定檔熱重新載入（外部修改 config.txt 時套用），並安裝背景替換完成的資源"""
+        self.poll_swaps()
+        settings = self.config_watcher.poll(base=self.settings)
+        if settings is not None and settings != self.settings:
+            self.apply_settings(settings)
 
-    def _reset_sit_timer(self):
-        """重置久坐計時（例如：連續多次偵測不到人）"""
-        self._sit_seconds = 0.0
-        self._sit_last_ts = None
-        self._sit_reminder_played = False
+    def apply_settings(self, settings):
+        """
+        套用設定：閾值、提醒時間、偵測頻率、久坐分鐘數直接更新偵測器；
+        解析度與姿勢模型在背景建立新的影像來源／模型後再替換，偵測與統計不中斷
 
-    def _update_sit_timer(self, posture_info):
+        Args:
+            settings: Settings
         """
-        更新久坐計時與提醒：
-        - 有人時累計坐姿時間（只累計「有人」的時間）
-        - 連續 10 次偵測不到人則清零重新計時
-        - 達到設定分鐘數播放 output2.wav（每次計時週期只播一次）
+        changes = self.settings.diff(settings)
+        pose_backend = settings.pose_backend
+        # 即時套用：更新元件，由元件的變更事件更新偵測器（值相同時不會觸發）
+        self.side_neck_spinbox.setValue(settings.side_neck_threshold)
+        self.side_torso_spinbox.setValue(settings.side_torso_threshold)
+        self.warning_time_spinbox.setValue(settings.warning_time)
+        self.sitting_minutes_spinbox.setValue(settings.sitting_minutes)
+        self.skip_spinbox.setValue(settings.skip_frames)
+        if APPLY_CAPTURE in changes:
+            resolution_str = f"{settings.resolution[0]}x{settings.resolution[1]}"
+            idx = self.resolution_combo.findText(resolution_str)
+            if idx >= 0:
+                self.resolution_combo.setCurrentIndex(idx)
+        self.settings = self.settings.replace(pose_backend=pose_backend)
+        if APPLY_MODEL in changes and self.detector:
+            self._start_swap('model', lambda: create_pose_backend(pose_backend),
+                             self._install_pose_backend, lambda backend: backend.close())
+        if changes:
+            logger.info("套用設定變更: %s", changes)
+
+    def _start_swap(self, kind, factory, install, discard):
         """
-        if not posture_info:
+        在背景建立資源，完成後由 poll_swaps 在 GUI 執行緒安裝；
+        同種類有尚未完成的替換時，舊的結果直接捨棄
+        """
+        previous = self._pending_swaps.pop(kind, None)
+        if previous is not None and not previous[0].cancel():
+            previous[0].add_done_callback(
+                lambda f, drop=previous[2]: f.exception() is None and f.result() is not None and drop(f.result()))
+        self._pending_swaps[kind] = (self._swap_executor.submit(factory), install, discard)
+
+    def poll_swaps(self):
+        """安裝已在背景建立完成的資源"""
+        for kind, (future, install, _) in list(self._pending_swaps.items()):
+            if not future.done():
+                continue
+            del self._pending_swaps[kind]
+            try:
+                resource = future.result()
+            except Exception as e:
+                logger.error("背景替換失敗（%s）: %s", kind, e)
+                continue
+            install(resource)
+
+    def _install_capture(self, cap):
+        """以背景開啟的攝影機取代目前的攝影機"""
+        if self.cap is None or self.source_combo.currentIndex() != 0:
+            # 替換完成前已停止偵測
+            if cap is not None:
+                cap.release()
+            return
+        if cap is None:
+            # 多數平台不允許同一攝影機同時開啟兩次：改為在目前的連線上直接調整解析度
+            logger.info("無法另外開啟攝影機，直接調整目前連線的解析度")
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
             return
+        old, self.cap = self.cap, cap
+        old.release()
+        if self.power:
+            self._camera_fps = cap.get(cv2.CAP_PROP_FPS)
+            if self.power.idle:
+                self._apply_power_state()
+        logger.info("攝影機已切換為 %dx%d", *self.resolution)
+
+    def _install_pose_backend(self, backend):
+        """以背景建立的姿勢模型取代目前的模型"""
+        if self.detector:
+            self.detector.set_pose_backend(backend)
+        else:
+            backend.close()
 
-        person_detected = bool(posture_info.get('person_detected', False))
+    def on_sitting_minutes_changed(self, value: int):
+        """久坐提醒分鐘數變更"""
+        self.sitting_minutes = int(value)
+        self.settings = self.settings.replace(sitting_minutes=self.sitting_minutes)
+        if self.detector:
+            self.detector.update_sitting_minutes(self.sitting_minutes)
 
-        if person_detected:
-            self._no_person_streak = 0
-            now = time.time()
-            if self._sit_last_ts is None:
-                self._sit_last_ts = now
-            else:
-                self._sit_seconds += max(0.0, now - self._sit_last_ts)
-                self._sit_last_ts = now
-        else:
-            self._no_person_streak += 1
-            self._sit_last_ts = None
-            if self._no_person_streak >= 10:
-                self._no_person_streak = 0
-                self._reset_sit_timer()
-                return
+    def on_sitting_reminder(self, sitting_seconds, now):
+        """久坐提醒事件（由偵測器的在座計時器發出）"""
+        self.view_model.set_sitting_event('reminded', now)
 
-        threshold_seconds = float(self.sitting_minutes) * 60.0
-        print(threshold_seconds)
-        print(self._sit_reminder_played)
-        print(self._sit_seconds)
-        if threshold_seconds > 0 and (not self._sit_reminder_played) and self._sit_seconds >= threshold_seconds:
-            
-            if self.detector and hasattr(self.detector, 'audio_player'):
-                self.detector.audio_player.play_audio('sitting')
-            self._sit_reminder_played = False
-            # 重置计时器，让提醒可以周期性触发
-            self._sit_seconds = 0.0
-            self._sit_last_ts = time.time()  # 重新开始计时
+    def on_sitting_session_reset(self, start, end, sitting_seconds):
+        """離座重新計時事件"""
+        self.view_model.set_sitting_event('reset', end if end is not None else time.time())
 
     # ==================== 偵測控制方法 ====================
 
@@ -541,15 +744,40 @@ class PostureDetectionApp(QMainWindow):
 
     def start_detection(self):
         """啟動偵測"""
+        # 上一支影片的結果索引不再回看（影片來源會建立新的索引）
+        self._close_results_index()
+        # 上一次開啟失敗的影片來源不可留下容器時間基準（攝影機沒有 timestamp）
+        self._media_base = None
+        self._paced = False
+        # 多行程模式：擷取與推論交給子行程，主行程只負責分類與顯示
+        if Config.PIPELINE_MODE == 'multiprocess':
+            if not self._start_multiprocess_pipeline():
+                return
         # 依輸入來源初始化影像擷取
-        if self.source_combo.currentIndex() == 0:
+        elif self.source_combo.currentIndex() == 0:
             # 攝影機
-            self.cap = cv2.VideoCapture(0)
-            if not self.cap.isOpened():
+            self.cap = open_camera(self.resolution)
+            if self.cap is None:
                 self.video_label.setText("無法開啟攝影機\nCannot open camera")
                 return
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
+            if Config.POWER_SAVING_ENABLED:
+                self.power = PowerManager()
+                self._camera_fps = self.cap.get(cv2.CAP_PROP_FPS)
+            if self.recorder:
+                self.recorder.start(self.cap, settings=self._recording_settings())
+        elif self.source_combo.currentIndex() == 2:
+            # 錄製重播：依原始擷取時間送出錄下的原始影像（取代攝影機）
+            record_path = self.file_path_input.text().strip()
+            if not record_path:
+                self.video_label.setText("請先選擇錄製檔\nPlease select a recording")
+                return
+            self.cap = ReplayCapture(record_path)
+            if not self.cap.isOpened():
+                self.cap.release()
+                self.cap = None
+                self.video_label.setText("無法開啟錄製檔\nCannot open recording")
+                return
+            self._media_base = time.time()
         else:
             # 影片檔
             video_path = self.file_path_input.text().strip()
@@ -557,10 +785,22 @@ class PostureDetectionApp(QMainWindow):
                 self.video_label.setText("請先選擇影片檔\nPlease select a video file")
                 return
 
-            self.cap = cv2.VideoCapture(video_path)
+            # 只解碼要分析的幀，時間戳取自容器
+            self.cap = SampledVideoReader(video_path)
             if not self.cap.isOpened():
+                self.cap.release()
+                self.cap = None
                 self.video_label.setText("無法開啟影片檔\nCannot open video file")
                 return
+            self._media_base = time.time()
+            self._paced = Config.VIDEO_PLAYBACK_REALTIME
+            if Config.RESULTS_INDEX_ENABLED:
+                self.results_index = ResultsIndex(Config.RESULTS_INDEX_STORE)
+                self._index_video_path = video_path
+                self.scrubber.set_index(self.results_index)
+
+        if self.alloc_probe:
+            self.alloc_probe.start()
 
         self.is_running = True
         self.start_button.setText("停止偵測 Stop")
@@ -575,27 +815,52 @@ class PostureDetectionApp(QMainWindow):
             }
         """)
 
-        # 偵測中禁用部分設定控件（避免變更造成不一致）
+        # 偵測中只禁用輸入來源（其餘設定可即時套用，解析度於背景替換攝影機）
         self.source_combo.setEnabled(False)
+        self._set_scrub_enabled(False)
         self.browse_button.setEnabled(False)
         self.file_path_input.setEnabled(False)
-        self.resolution_combo.setEnabled(False)
-        self.warning_time_spinbox.setEnabled(False)
 
         self.timer.start(Config.TIMER_INTERVAL)
+        self.gui_timing.reset()
+        if Config.UI_REFRESH_HZ > 0:
+            self.ui_timer.start(int(1000 / Config.UI_REFRESH_HZ))
 
     def stop_detection(self):
         """停止偵測"""
         self.is_running = False
         self.timer.stop()
-
+        self.ui_timer.stop()
+        if self.power:
+            for state, (seconds, cpu) in self.power.summary().items():
+                logger.info("電源狀態統計: %s %.0f 秒, 平均 CPU %.1f%%", state, seconds, cpu)
+            for method, (count, avg_ms) in self.power.check_summary().items():
+                if count:
+                    logger.info("待機檢查統計: %s %d 次, 平均 %.1f ms", method, count, avg_ms)
+            self.power = None
+        self.refresh_ui()
+        if self.gui_timing.frames:
+            self.report_gui_timing()
+
+        if isinstance(self.cap, ReplayCapture):
+            logger.info("重播統計: %s", self.cap.stats())
         if self.cap:
             self.cap.release()
             self.cap = None
+        self._media_base = None
+        self._held_frame = None
+        if self.exporter:
+            self.exporter.stop()
+        if self.recorder:
+            self.recorder.stop()
+        self._stop_multiprocess_pipeline()
+        if self.alloc_probe:
+            self.report_allocations()
+            self.alloc_probe.stop()
 
         # 停止後重置久坐計時
-        self._no_person_streak = 0
-        self._reset_sit_timer()
+        if self.detector:
+            self.detector.presence.reset()
 
         self.video_label.setText("偵測已停止\nDetection Stopped")
         self.start_button.setText("啟動偵測 Start")
@@ -612,118 +877,405 @@ class PostureDetectionApp(QMainWindow):
 
         # 重新啟用設定控件
         self.source_combo.setEnabled(True)
-        self.resolution_combo.setEnabled(True)
-        self.warning_time_spinbox.setEnabled(True)
-        if self.source_combo.currentIndex() == 1:
+        if self.source_combo.currentIndex() != 0:
             self.browse_button.setEnabled(True)
             self.file_path_input.setEnabled(True)
+        if self.results_index is not None and len(self.results_index):
+            self.scrubber.update()
+            self._set_scrub_enabled(True)
+            logger.info("結果索引: %d 幀, %d 段不良姿勢（可於時間軸定位回看）",
+                        len(self.results_index), self.results_index.bad_segments())
+
+    def _recording_settings(self):
+        """錄製檔一併記錄的應用程式設定（重播效能基準時以相同條件執行）"""
+        return dict(self.settings.to_dict(), timer_interval_ms=Config.TIMER_INTERVAL,
+                    frame_stages=list(Config.FRAME_STAGES),
+                    multi_person=Config.MULTI_PERSON_ENABLED)
+
+    def _start_multiprocess_pipeline(self):
+        """啟動共享記憶體多行程管線；失敗時回傳 False"""
+        if self.source_combo.currentIndex() == 0:
+            source = 0
+            if self.recorder:
+                logger.warning("多行程管線於子行程擷取影像，不錄製原始影像")
+        elif self.source_combo.currentIndex() == 2:
+            self.video_label.setText("多行程管線不支援錄製重播\nReplay requires single-process mode")
+            return False
+        else:
+            source = self.file_path_input.text().strip()
+            if not source:
+                self.video_label.setText("請先選擇影片檔\nPlease select a video file")
+                return False
+        try:
+            self.mp_pipeline = MultiprocessPipeline(source, self.resolution)
+            self.mp_pipeline.start()
+        except (ValueError, OSError) as e:
+            self.mp_pipeline = None
+            self.video_label.setText(f"無法啟動多行程管線\n{e}")
+            return False
+        return True
+
+    def _stop_multiprocess_pipeline(self):
+        """停止多行程管線並釋放共享記憶體"""
+        if self.mp_pipeline:
+            self.mp_pipeline.stop()
+            self.mp_pipeline = None
 
     def update_frame(self):
         """更新影像幀"""
-        ret, frame = self.cap.read()
-        if not ret:
-            if self.source_combo.currentIndex() == 1:
-                self.stop_detection()
-                self.video_label.setText("影片播放完畢\nVideo Finished")
-            return
+        if self.alloc_probe:
+            self.alloc_probe.begin_frame()
+        if self._pending_swaps:
+            self.poll_swaps()
+        with tracer.span('frame', 'ui'):
+            self._update_frame()
+        self.frame_buffers.end_frame()
+        if self.detector:
+            self.detector.buffers.end_frame()
+        if self.alloc_probe:
+            self.alloc_probe.end_frame()
+            if self.alloc_probe.frames % Config.ALLOC_REPORT_INTERVAL == 0:
+                self.report_allocations()
+
+    def report_allocations(self):
+        """輸出緩衝區配置統計（穩定狀態下每幀配置應為 0）"""
+        logger.info("偵測器緩衝區: %s", self.detector.buffers.stats())
+        logger.info("顯示緩衝區: %s", self.frame_buffers.stats())
+        if self.alloc_probe:
+            logger.info("每幀暫時配置: %s", self.alloc_probe.stats())
+
+    def _update_frame(self):
+        """讀取、處理並顯示一幀"""
+        if self.mp_pipeline:
+            with tracer.span('capture'):
+                result = self.mp_pipeline.poll()
+            if result is None:
+                if self.mp_pipeline.finished:
+                    self.stop_detection()
+                    self.video_label.setText("影片播放完畢\nVideo Finished")
+                return
+            self.gui_timing.start()
+            try:
+                processed_frame, posture_info = self.detector.apply_inference(
+                    result.frame, result.face_boxes, result.keypoints, timestamp=result.timestamp)
+                self.gui_timing.lap('inference')
+                self.display_frame(processed_frame)
+                if self.exporter:
+                    self.exporter.push(processed_frame, timestamp=result.timestamp)
+            finally:
+                self.mp_pipeline.release(result)
+        else:
+            with tracer.span('capture'):
+                began = time.perf_counter()
+                ret, frame = self._read_paced() if self._paced else self.cap.read()
+            if ret is None:
+                # 影片檔：下一個取樣幀尚未到播放時間
+                return
+            if not ret:
+                if self.source_combo.currentIndex() != 0:
+                    self.stop_detection()
+                    self.video_label.setText("影片播放完畢\nVideo Finished")
+                return
+            if self.recorder and self.recorder.active:
+                # 偵測會在影像上繪製，錄製端先複製原始畫面
+                self.recorder.push(frame, (time.perf_counter() - began) * 1000.0)
+            if self.power and self.power.idle:
+                self._idle_check(frame)
+                return
 
-        processed_frame, posture_info = self.detector.process_frame(frame, self.skip_frames)
+            timestamp = None
+            if self._media_base is not None:
+                timestamp = self._media_base + self.cap.timestamp
 
-        self.display_frame(processed_frame)
+            skip_frames = self.skip_frames
+            if isinstance(self.cap, SampledVideoReader):
+                skip_frames = self.cap.analysis_skip(skip_frames)
 
-        if posture_info and posture_info.get('is_correct') is not None:
-            self.update_posture_info(posture_info)
+            self.gui_timing.start()
+            if self.multi_detector:
+                # 多人模式：介面顯示最早出現的目標，其他人只在畫面上標示
+                processed_frame, _ = self.multi_detector.process_frame(frame, skip_frames, timestamp)
+                posture_info = self.multi_detector.primary_result()
+            else:
+                processed_frame, posture_info = self.detector.process_frame(
+                    frame, skip_frames, timestamp)
+            self.gui_timing.lap('inference')
+
+            self.display_frame(processed_frame)
+            if self.exporter:
+                with tracer.span('export'):
+                    self.exporter.push(processed_frame, timestamp)
+            if self.results_index is not None:
+                self._record_index(posture_info)
+        self.gui_timing.lap('display')
+
+        # 只記錄結果；元件文字由 refresh_ui 依設定頻率刷新
+        self.update_posture_info(posture_info)
+        if self.power and self.power.update(posture_info is not None and posture_info.person_detected):
+            self._apply_power_state()
+
+        if Config.UI_REFRESH_HZ <= 0:
+            self.refresh_ui()
+        self.gui_timing.lap('state')
+
+        if self.gui_timing.end_frame():
+            self.report_gui_timing()
+
+    def _read_paced(self):
+        """
+        依容器時間戳讀取影片檔（播放速度與實際時間一致）：取到的幀尚未到播放時間就先保留，
+        由下一次計時器觸發再處理，不阻塞 GUI 執行緒
 
-        # 久坐計時/提醒（與是否「坐姿正確」無關，只要偵測到人就累計）
-        self._update_sit_timer(posture_info)
+        Returns:
+            tuple: (是否成功, BGR 影像)；尚未到播放時間時為 (None, None)
+        """
+        if self._held_frame is None:
+            ret, frame = self.cap.read()
+            if not ret:
+                return ret, frame
+        else:
+            frame, self._held_frame = self._held_frame, None
+        if time.time() < self._media_base + self.cap.timestamp:
+            self._held_frame = frame
+            return None, None
+        return True, frame
+
+    def _idle_check(self, frame):
+        """待機中：只做低解析度的在座檢查，偵測到人立即回到全速"""
+        began = time.perf_counter()
+        method = self.detector.check_presence(frame)
+        self.power.record_check(method, time.perf_counter() - began)
+        person = method is not None
+        if not person:
+            self.detector.presence.update(False, time.time())
+        if self.power.update(person):
+            self._apply_power_state()
+
+    def _apply_power_state(self):
+        """依電源狀態調整擷取頻率與介面刷新"""
+        self.timer.setInterval(self.power.interval_ms)
+        if self.power.idle:
+            # 降低攝影機幀率並只保留最新一幀，避免喚醒時讀到緩衝區裡的舊畫面
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            self.cap.set(cv2.CAP_PROP_FPS, max(1.0, 1.0 / max(self.power.wake_latency, 1e-3)))
+            # 沒有人時不再累計姿勢時間
+            self.detector.timeline.close(time.time())
+            self.ui_timer.stop()
+            self.video_label.setText("低功耗待機中（無人）\nIdle - waiting for someone")
+            self.view_model.set_status(
+                STATE_IDLE, f"姿勢狀態：低功耗待機（每 {self.power.wake_latency:g} 秒檢查一次）")
+            self.refresh_ui()
+        else:
+            if self._camera_fps:
+                self.cap.set(cv2.CAP_PROP_FPS, self._camera_fps)
+            if Config.UI_REFRESH_HZ > 0:
+                self.ui_timer.start(int(1000 / Config.UI_REFRESH_HZ))
+
+    # ==================== 結果索引與回看 ====================
+
+    def _close_results_index(self):
+        """關閉結果索引與回看用的影片（暫存的關鍵點檔隨之刪除）"""
+        if self.video_seeker:
+            self.video_seeker.release()
+            self.video_seeker = None
+        if self.results_index is not None:
+            self.results_index.close()
+            self.results_index = None
+        self.scrubber.set_index(None)
+
+    def _record_index(self, posture_info):
+        """記錄本幀結果（容器時間戳、狀態、角度與畫面上的關鍵點／臉部框）"""
+        keypoints = faces = None
+        if self.multi_detector:
+            track = self.multi_detector.primary_track()
+            if track is not None:
+                keypoints, faces = track.keypoints, [track.box]
+        elif posture_info is not None and posture_info.view_type is not None:
+            keypoints, faces = self.detector.last_keypoints, self.detector.last_face_boxes
+        elif self.detector.last_face_boxes:
+            faces = self.detector.last_face_boxes
+        self.results_index.append(self.cap.timestamp, posture_info, keypoints, faces)
+
+    def _set_scrub_enabled(self, enabled):
+        for widget in (self.scrubber, self.prev_bad_button, self.next_bad_button):
+            widget.setEnabled(enabled)
+
+    def seek_to(self, i):
+        """定位到第 i 幀：讀取該時間點的影像並依索引繪製標註（不重新推論）"""
+        if self.is_running or self.results_index is None:
+            return
+        if self.video_seeker is None:
+            self.video_seeker = VideoSeeker(self._index_video_path)
+            if not self.video_seeker.isOpened():
+                self.video_seeker = None
+                self.video_label.setText("無法開啟影片檔\nCannot open video file")
+                return
+        entry = self.results_index.entry(i)
+        frame = self.video_seeker.frame_at(entry.timestamp)
+        if frame is None:
+            return
+        self.display_frame(draw_entry(frame, entry))
+        self.scrubber.set_position(i)
+        minutes, seconds = divmod(entry.timestamp, 60)
+        self.scrub_time_label.setText(f"{int(minutes):02d}:{int(seconds):02d}")
+        result = entry_result(entry)
+        if result.is_correct is not None:
+            self.update_posture_info(result)
+        elif result.person_detected:
+            self.view_model.set_status(STATE_FRONT, "姿勢狀態：未判斷（正面視角或未偵測到姿勢）")
+        else:
+            self.view_model.set_status(STATE_IDLE, "姿勢狀態：未偵測到人")
+        self.refresh_ui()
 
-        self.update_statistics()
+    def jump_bad(self, forward=True):
+        """跳到下一段／上一段不良姿勢的開頭（O(1) 查表）"""
+        if self.results_index is None:
+            return
+        current = self.scrubber.position
+        if forward:
+            target = self.results_index.next_bad(-1 if current is None else current)
+        else:
+            target = self.results_index.previous_bad(len(self.results_index) if current is None else current)
+        if target is not None:
+            self.seek_to(target)
 
     def display_frame(self, frame):
         """顯示影像幀"""
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb_frame.shape
-        bytes_per_line = ch * w
-        qt_image = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-        scaled_pixmap = QPixmap.fromImage(qt_image).scaled(
-            self.video_label.size(),
-            Qt.KeepAspectRatio,
-            Qt.SmoothTransformation
-        )
-        self.video_label.setPixmap(scaled_pixmap)
+        # 先依標籤大小等比例縮放（寫入預先配置的緩衝區），再轉 RGB
+        h, w = frame.shape[:2]
+        target = self.video_label.size()
+        scale = min(target.width() / w, target.height() / h)
+        dw, dh = max(1, int(w * scale)), max(1, int(h * scale))
+
+        with tracer.span('display.convert'):
+            rgb_frame = self.frame_buffers.get('display_rgb', (dh, dw, 3))
+            if (dw, dh) == (w, h):
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb_frame)
+            else:
+                scaled = self.frame_buffers.get('display_bgr', (dh, dw, 3))
+                interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+                cv2.resize(frame, (dw, dh), dst=scaled, interpolation=interpolation)
+                cv2.cvtColor(scaled, cv2.COLOR_BGR2RGB, dst=rgb_frame)
+
+        # QImage 直接包住緩衝區，不複製像素；只有緩衝區換新時才重建
+        with tracer.span('display.pixmap'):
+            if self._display_image_buffer is not rgb_frame:
+                self._display_image = QImage(rgb_frame.data, dw, dh, 3 * dw, QImage.Format_RGB888)
+                self._display_image_buffer = rgb_frame
+            self.video_label.setPixmap(QPixmap.fromImage(self._display_image))
 
     def update_posture_info(self, posture_info):
-        """更新姿勢資訊顯示"""
-        if posture_info.get('view_type') == 'front':
-            self.posture_status_label.setText("正面視角（不做姿勢判斷）")
-            self.posture_status_label.setStyleSheet("""
-                padding: 15px;
-                border-radius: 5px;
-                background-color: #f0f0f0;
-                color: black;
-            """)
-        elif posture_info.get('is_correct'):
-            self.posture_status_label.setText("✓ 坐姿正常")
-            self.posture_status_label.setStyleSheet("""
-                padding: 15px;
-                border-radius: 5px;
-                background-color: #4CAF50;
-                color: white;
-            """)
-        else:
-            self.posture_status_label.setText("✗ 姿勢不良（請調整）")
-            self.posture_status_label.setStyleSheet("""
-                padding: 15px;
-                border-radius: 5px;
-                background-color: #f44336;
-                color: white;
-            """)
-
-        view_type = "正面 Front" if posture_info.get('view_type') == 'front' else "側面 Side"
-        self.view_type_label.setText(f"視角：{view_type}")
-
-        if posture_info.get('view_type') == 'front':
-            self.angle_info_label.setText("角度資訊：正面視角不做姿勢判斷")
-        else:
-            angle_text = (
-                f"脖子角度：{posture_info.get('angles', {}).get('neck', 0):.1f}° "
-                f"(警戒 < {self.side_neck_spinbox.value():.1f}°)\n"
-                f"身體角度：{posture_info.get('angles', {}).get('torso', 0):.1f}° "
-                f"(警戒 < {self.side_torso_spinbox.value():.1f}°)"
-            )
-            self.angle_info_label.setText(angle_text)
+        """記錄姿勢資訊（實際元件更新於 refresh_ui 進行）"""
+        self.view_model.set_posture(posture_info)
 
     def update_statistics(self):
-        """更新辨識結果（累計時間）"""
-        total_good_time, total_bad_time, total_sitting_time = self.detector.get_statistics()
-        self.correct_time_label.setText(f"正確坐姿時間：{total_good_time:.1f} 秒")
-        self.incorrect_time_label.setText(f"不良坐姿時間：{total_bad_time:.1f} 秒")
-        self.total_sitting_time_label.setText(f"總坐姿時間：{total_sitting_time:.1f} 秒")
+        """記錄辨識結果（累計時間）"""
+        source = self.multi_detector or self.detector
+        if source:
+            self.view_model.set_statistics(*source.get_statistics())
+            # 滾動時間窗統計由時間軸以 O(log n) 查詢，只在刷新時計算
+            self.view_model.set_window_statistics(
+                Config.ROLLING_WINDOW_MINUTES,
+                *source.get_window_statistics(Config.ROLLING_WINDOW_MINUTES * 60.0))
+        if self.detector and self.detector.latency and self.detector.latency.calibrated:
+            latency = self.detector.latency
+            self.view_model.set_tuning(latency.describe(), latency.last_avg_ms, latency.target_ms)
+
+    def refresh_ui(self):
+        """依檢視模型的變更更新元件：只改有變化的文字，狀態顏色以動態屬性切換"""
+        start = time.perf_counter()
+        with tracer.span('ui.statistics', 'ui'):
+            self.update_statistics()
+        if self.is_running and self.results_index is not None:
+            self.scrubber.update()  # 分析進度
+        changes = self.view_model.changes(self.side_neck_spinbox.value(),
+                                          self.side_torso_spinbox.value())
+        for field, value in changes:
+            if field == 'status_state':
+                label = self.posture_status_label
+                with tracer.span('ui.restyle', 'ui', {'state': value}):
+                    label.setProperty("postureState", value)
+                    label.style().unpolish(label)
+                    label.style().polish(label)
+            elif field == 'status_text':
+                self.posture_status_label.setText(value)
+            elif field == 'view_text':
+                self.view_type_label.setText(value)
+            elif field == 'angle_text':
+                self.angle_info_label.setText(value)
+            elif field == 'good_text':
+                self.correct_time_label.setText(value)
+            elif field == 'bad_text':
+                self.incorrect_time_label.setText(value)
+            elif field == 'total_text':
+                self.total_sitting_time_label.setText(value)
+            elif field == 'window_text':
+                self.window_stats_label.setText(value)
+            elif field == 'sitting_text':
+                self.sitting_status_label.setText(value)
+            elif field == 'tuning_text':
+                self.tuning_label.setText(value)
+        ended = time.perf_counter()
+        self.gui_timing.add('widgets', (ended - start) * 1000.0)
+        if tracer.enabled:
+            tracer.complete('ui.refresh', start, ended, 'ui', {'changes': len(changes)})
+
+    def dump_trace(self):
+        """匯出最近的效能追蹤（背景執行緒寫檔，不阻塞介面）"""
+        tracer.dump_async()
+
+    def report_gui_timing(self):
+        """輸出 GUI 執行緒每幀平均耗時（毫秒）"""
+        summary = self.gui_timing.summary()
+        parts = ", ".join(f"{k}={v:.2f}ms" for k, v in summary.items())
+        logger.info("GUI 執行緒每幀耗時（%d 幀，刷新 %s Hz）: %s",
+                    self.gui_timing.frames, Config.UI_REFRESH_HZ, parts)
 
     def reset_statistics(self):
         """重置統計資訊"""
         if self.detector:
             self.detector.reset_statistics()
-        self.update_statistics()
-        self.posture_status_label.setText("姿勢狀態：統計已重置")
-        self.posture_status_label.setStyleSheet("""
-            padding: 15px;
-            border-radius: 5px;
-            background-color: #f0f0f0;
-        """)
+        if self.multi_detector:
+            self.multi_detector.reset_statistics()
+        self.view_model.set_status(STATE_IDLE, "姿勢狀態：統計已重置")
+        self.refresh_ui()
 
     def init_detector(self):
         """初始化偵測器"""
         self.detector = PostureDetector(
             side_neck_threshold=self.side_neck_spinbox.value(),
             side_torso_threshold=self.side_torso_spinbox.value(),
-            warning_time=self.warning_time_spinbox.value()
+            warning_time=self.warning_time_spinbox.value(),
+            pose_backend=self.settings.pose_backend
         )
+        self.detector.update_sitting_minutes(self.sitting_minutes)
+        self.detector.presence.add_reminder_listener(self.on_sitting_reminder)
+        self.detector.presence.add_reset_listener(self.on_sitting_session_reset)
+        if Config.MULTI_PERSON_ENABLED:
+            self.multi_detector = MultiPersonDetector(self.detector)
+        if self.exporter:
+            # 提醒時間戳與 push 的時間戳同一基準（影片檔為容器時間），片段前後秒數才正確
+            self.detector.add_alert_listener(
+                lambda alert, info: self.exporter.trigger(alert.name, alert.timestamp))
+            if self.multi_detector:
+                self.multi_detector.add_alert_listener(
+                    lambda track_id, alert, info: self.exporter.trigger(alert.name, alert.timestamp))
 
     def closeEvent(self, event):
         """視窗關閉事件"""
         if self.is_running:
             self.stop_detection()
+        # 確保子行程與共享記憶體都已清除
+        self._stop_multiprocess_pipeline()
+        if self.multi_detector:
+            self.multi_detector.release()
         if self.detector:
             self.detector.release()
+        if self.exporter:
+            self.exporter.close()
+        if self.recorder:
+            self.recorder.close()
+        self._close_results_index()
+        self.watch_timer.stop()
+        self._swap_executor.shutdown(wait=False)
         event.accept()
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/21 14:20
+# User : l'r's
+# Software: PyCharm
+# File : video_reader_module.py
+"""
+影片取樣讀取模組 - Sampled Video Reader Module
+離線分析只需要固定頻率（例如 5 Hz）的結果：不分析的幀只 grab() 不 retrieve()
+（省去色彩轉換與複製），間隔很大時改以關鍵幀定位（seek）直接跳過；
+時間戳取自容器（CAP_PROP_POS_MSEC），處理速度快慢不影響時間長度
+
+demo.MOV 實測：完整解碼 5.64 s、5 Hz grab 3.39 s、5 Hz 每次定位 17.5 s；
+定位要從關鍵幀重新解碼，短間隔反而比 grab 慢，因此只在間隔超過 VIDEO_SEEK_THRESHOLD 時定位
+
+效能測試：python video_reader_module.py demo.MOV --hz 5
+"""
+
+import argparse
+import logging
+import time
+
+import cv2
+
+from config_module import Config
+
+logger = logging.getLogger(__name__)
+
+
+class SampledVideoReader:
+    """依固定頻率取樣解碼的影片讀取器（介面與 cv2.VideoCapture 的 read() 相容）"""
+
+    def __init__(self, path, sample_hz=None, seek_threshold=None, start=0.0):
+        """
+        Args:
+            path: 影片檔路徑
+            sample_hz: 取樣頻率；0 表示每一幀都解碼
+            seek_threshold: 與下一個取樣點的間隔超過此秒數時改用定位；0 表示不定位
+            start: 由此容器時間（秒）開始讀取（例如批次處理由檢查點接續）
+        """
+        self.path = path
+        self.sample_hz = sample_hz if sample_hz is not None else Config.VIDEO_SAMPLE_HZ
+        self.seek_threshold = seek_threshold if seek_threshold is not None else Config.VIDEO_SEEK_THRESHOLD
+        self.cap = cv2.VideoCapture(path)
+
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0.0
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.frame_ms = 1000.0 / self.fps
+        self.interval_ms = 1000.0 / self.sample_hz if self.sample_hz and self.sample_hz > 0 else 0.0
+
+        self.timestamp = None       # 最近一次回傳幀的容器時間戳（秒）
+        self._next_ms = 0.0         # 下一個取樣點（毫秒）
+        self._pos_ms = -self.frame_ms
+        if start > 0 and self.cap.isOpened():
+            self.cap.set(cv2.CAP_PROP_POS_MSEC, start * 1000.0)
+            self._next_ms = start * 1000.0
+            self._pos_ms = self._next_ms - self.frame_ms
+
+        # 統計
+        self.grabbed = 0            # 讀取（解封裝／解碼）的幀數
+        self.decoded = 0            # 實際取出影像（retrieve）的幀數
+        self.seeks = 0
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def release(self):
+        self.cap.release()
+
+    def read(self):
+        """
+        讀取下一個取樣點的幀
+
+        Returns:
+            tuple: (是否成功, BGR 影像)；時間戳見 self.timestamp
+        """
+        if not self.interval_ms:
+            ok, frame = self.cap.read()
+            if ok:
+                self.grabbed += 1
+                self.decoded += 1
+                self.timestamp = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            return ok, frame
+
+        target = self._next_ms
+        if self.seek_threshold and target - self._pos_ms > self.seek_threshold * 1000.0:
+            # 間隔很大：定位到目標前的關鍵幀再往後解碼，比逐幀 grab 省
+            self.cap.set(cv2.CAP_PROP_POS_MSEC, target)
+            self.seeks += 1
+
+        # 目標時間落在某一幀的顯示期間內即取該幀（容許半幀誤差）
+        while True:
+            if not self.cap.grab():
+                return False, None
+            self.grabbed += 1
+            self._pos_ms = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+            if self._pos_ms + self.frame_ms / 2 >= target:
+                break
+
+        ok, frame = self.cap.retrieve()
+        if not ok:
+            return False, None
+        self.decoded += 1
+        self.timestamp = self._pos_ms / 1000.0
+        # 依實際取到的時間排定下一個取樣點，避免累積誤差
+        while self._next_ms <= self._pos_ms + self.frame_ms / 2:
+            self._next_ms += self.interval_ms
+        return True, frame
+
+    def analysis_skip(self, skip_frames):
+        """
+        取樣讀取時的跳幀數：取樣已依 sample_hz 降頻，每個取樣幀都做姿勢偵測
+        （分析頻率只由 sample_hz 決定，不與 skip_frames 相乘）；逐幀解碼時才依 skip_frames 跳幀
+        """
+        return 1 if self.interval_ms else skip_frames
+
+    def stats(self):
+        return {'grabbed': self.grabbed, 'decoded': self.decoded, 'seeks': self.seeks}
+
+
+def run_benchmark(video_path, sample_hz=5.0):
+    """比較完整解碼與取樣解碼（grab／seek）的處理速度"""
+    rows = []
+
+    def measure(label, reader):
+        start = time.perf_counter()
+        frames = 0
+        first = last = None
+        while True:
+            ok, _ = reader.read()
+            if not ok:
+                break
+            frames += 1
+            if first is None:
+                first = reader.timestamp
+            last = reader.timestamp
+        elapsed = time.perf_counter() - start
+        reader.release()
+        duration = (last - first) if first is not None else 0.0
+        rows.append((label, frames, reader.grabbed, reader.seeks, elapsed, duration))
+
+    measure("完整解碼", SampledVideoReader(video_path, sample_hz=0))
+    measure(f"取樣 {sample_hz:g} Hz（grab）", SampledVideoReader(video_path, sample_hz, seek_threshold=0))
+    measure(f"取樣 {sample_hz:g} Hz（seek）", SampledVideoReader(video_path, sample_hz, seek_threshold=1e-3))
+
+    full_elapsed = rows[0][4]
+    print(f"{'模式':<20} {'輸出幀':>6} {'讀取幀':>6} {'定位':>5} {'耗時(s)':>8} {'影片長度(s)':>11} {'加速':>6}")
+    for label, frames, grabbed, seeks, elapsed, duration in rows:
+        speedup = full_elapsed / elapsed if elapsed > 0 else 0.0
+        print(f"{label:<20} {frames:>6} {grabbed:>6} {seeks:>5} {elapsed:>8.2f} {duration:>11.2f} {speedup:>5.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="影片取樣解碼效能測試")
+    parser.add_argument("video", nargs="?", default="demo.MOV", help="測試影片路徑")
+    parser.add_argument("--hz", type=float, default=Config.VIDEO_SAMPLE_HZ or 5.0, help="取樣頻率")
+    args = parser.parse_args()
+    run_benchmark(args.video, args.hz)
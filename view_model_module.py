@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+# Time : 2026/10/19 13:40
+# User : l'r's
+# Software: PyCharm
+# File : view_model_module.py
+"""
+檢視模型模組 - View Model Module
+介於偵測結果與 Qt 元件之間：每幀只記錄最新結果，
+依設定的刷新頻率產生顯示文字，並與上次套用的內容比對，只回傳有變更的欄位
+"""
+
+import time
+
+
+# 狀態標籤的樣式狀態（對應 QSS 的 [postureState="..."] 屬性選擇器）
+STATE_IDLE = 'idle'
+STATE_FRONT = 'front'
+STATE_GOOD = 'good'
+STATE_BAD = 'bad'
+
+# 狀態標籤樣式表：只在建立元件時設定一次，之後以動態屬性切換
+STATUS_LABEL_STYLE = """
+    QLabel#postureStatus {
+        padding: 15px;
+        border-radius: 5px;
+        background-color: #f0f0f0;
+    }
+    QLabel#postureStatus[postureState="front"] {
+        background-color: #f0f0f0;
+        color: black;
+    }
+    QLabel#postureStatus[postureState="good"] {
+        background-color: #4CAF50;
+        color: white;
+    }
+    QLabel#postureStatus[postureState="bad"] {
+        background-color: #f44336;
+        color: white;
+    }
+"""
+
+
+class PostureViewModel:
+    """姿勢狀態的檢視模型"""
+
+    FIELDS = ('status_state', 'status_text', 'view_text', 'angle_text',
+              'good_text', 'bad_text', 'total_text', 'window_text', 'sitting_text',
+              'tuning_text')
+
+    def __init__(self, diff_updates=True):
+        """
+        Args:
+            diff_updates: True 時只回傳與上次不同的欄位；False 時每次都回傳全部欄位
+        """
+        self.diff_updates = diff_updates
+        self._result = None
+        self._status = (STATE_IDLE, "姿勢狀態：等待偵測…")
+        self._statistics = (0.0, 0.0, 0.0)
+        self._window = None  # (時間窗分鐘數, 正確秒數, 不良秒數)
+        self._sitting_event = None  # ('reminded'／'reset', 時間戳)
+        self._tuning = None  # (等級說明, 平均延遲毫秒, 預算毫秒)
+        self._applied = {}
+
+    def set_posture(self, result):
+        """記錄最新的姿勢結果（每幀呼叫，不做任何格式化）"""
+        if result is not None and result.is_correct is not None:
+            self._result = result
+            self._status = None
+
+    def set_statistics(self, good_time, bad_time, total_time):
+        """記錄最新的累計時間"""
+        self._statistics = (good_time, bad_time, total_time)
+
+    def set_window_statistics(self, minutes, good_time, bad_time):
+        """記錄滾動時間窗內的統計"""
+        self._window = (minutes, good_time, bad_time)
+
+    def set_sitting_event(self, kind, timestamp):
+        """
+        記錄最近一次在座事件
+
+        Args:
+            kind: 'reminded'（已播放久坐提醒）／'reset'（離座，重新計時）
+            timestamp: 事件時間戳
+        """
+        self._sitting_event = (kind, timestamp)
+
+    def set_tuning(self, description, avg_ms, target_ms):
+        """記錄延遲預算控制器目前的等級"""
+        self._tuning = (description, avg_ms, target_ms)
+
+    def set_status(self, state, text):
+        """直接指定狀態標籤（例如統計重置），直到下一筆姿勢結果為止"""
+        self._result = None
+        self._status = (state, text)
+
+    def _build(self, neck_threshold, torso_threshold):
+        """依目前資料產生所有欄位的顯示內容"""
+        values = {}
+        result = self._result
+        if self._status is not None:
+            values['status_state'], values['status_text'] = self._status
+        elif result is not None:
+            if result.view_type == 'front':
+                values['status_state'] = STATE_FRONT
+                values['status_text'] = "正面視角（不做姿勢判斷）"
+            elif result.is_correct:
+                values['status_state'] = STATE_GOOD
+                values['status_text'] = "✓ 坐姿正常"
+            else:
+                values['status_state'] = STATE_BAD
+                values['status_text'] = "✗ 姿勢不良（請調整）"
+
+        if result is not None:
+            if result.view_type == 'front':
+                values['view_text'] = "視角：正面 Front"
+                values['angle_text'] = "角度資訊：正面視角不做姿勢判斷"
+            else:
+                values['view_text'] = "視角：側面 Side"
+                values['angle_text'] = (
+                    f"脖子角度：{result.neck_angle or 0:.1f}° "
+                    f"(警戒 < {neck_threshold:.1f}°)\n"
+                    f"身體角度：{result.torso_angle or 0:.1f}° "
+                    f"(警戒 < {torso_threshold:.1f}°)"
+                )
+
+        good_time, bad_time, total_time = self._statistics
+        values['good_text'] = f"正確坐姿時間：{good_time:.1f} 秒"
+        values['bad_text'] = f"不良坐姿時間：{bad_time:.1f} 秒"
+        values['total_text'] = f"總坐姿時間：{total_time:.1f} 秒"
+        if self._window is not None:
+            minutes, window_good, window_bad = self._window
+            values['window_text'] = (f"最近 {minutes:g} 分鐘：正確 {window_good:.0f} 秒／"
+                                     f"不良 {window_bad:.0f} 秒")
+        if self._sitting_event is not None:
+            kind, timestamp = self._sitting_event
+            stamp = time.strftime('%H:%M', time.localtime(timestamp))
+            if kind == 'reminded':
+                values['sitting_text'] = f"久坐提醒：{stamp} 已提醒，重新計時"
+            else:
+                values['sitting_text'] = f"久坐計時：{stamp} 離座，重新計時"
+        if self._tuning is not None:
+            description, avg_ms, target_ms = self._tuning
+            values['tuning_text'] = f"自動調整：{description}（{avg_ms:.0f}／{target_ms:.0f} ms）"
+        return values
+
+    def changes(self, neck_threshold, torso_threshold):
+        """
+        取得需要套用到元件的變更
+
+        Args:
+            neck_threshold: 目前的脖子警戒角度（顯示用）
+            torso_threshold: 目前的身體警戒角度（顯示用）
+
+        Returns:
+            list: [(欄位名稱, 新值), ...]
+        """
+        values = self._build(neck_threshold, torso_threshold)
+        changed = []
+        for field in self.FIELDS:
+            if field not in values:
+                continue
+            value = values[field]
+            if self.diff_updates and self._applied.get(field) == value:
+                continue
+            self._applied[field] = value
+            changed.append((field, value))
+        return changed
+
+    def invalidate(self):
+        """清除已套用紀錄，下次 changes() 會回傳全部欄位"""
+        self._applied.clear()
+
+
+class GuiTimingStats:
+    """GUI 執行緒每幀耗時統計（毫秒），依區段累計"""
+
+    def __init__(self, report_interval=300):
+        self.report_interval = report_interval
+        self._totals = {}
+        self._frame_total = 0.0
+        self.frames = 0
+        self._mark = None
+
+    def start(self):
+        """開始一幀的計時"""
+        self._mark = time.perf_counter()
+
+    def lap(self, section):
+        """累計從上一個標記到現在的耗時至指定區段"""
+        now = time.perf_counter()
+        self.add(section, (now - self._mark) * 1000.0)
+        self._mark = now
+
+    def add(self, section, elapsed_ms):
+        """直接累計一段耗時（例如由獨立計時器觸發的元件刷新）"""
+        self._totals[section] = self._totals.get(section, 0.0) + elapsed_ms
+        self._frame_total += elapsed_ms
+
+    def end_frame(self):
+        """
+        結束一幀
+
+        Returns:
+            bool: 是否到達輸出報告的間隔
+        """
+        self.frames += 1
+        return self.report_interval > 0 and self.frames % self.report_interval == 0
+
+    def summary(self):
+        """
+        取得平均耗時
+
+        Returns:
+            dict: {'total': 每幀平均總耗時, 區段名稱: 每幀平均耗時, ...}
+        """
+        if not self.frames:
+            return {'total': 0.0}
+        result = {'total': self._frame_total / self.frames}
+        for section, total in self._totals.items():
+            result[section] = total / self.frames
+        return result
+
+    def reset(self):
+        """清除統計"""
+        self._totals.clear()
+        self._frame_total = 0.0
+        self.frames = 0